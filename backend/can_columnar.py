@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Lectura de archivos CAN decodificados en formato columnar (CAN_*_TRADUCIDO.npz).
+
+El decodificador (decodificador_can_unificado.py) guarda cada archivo CAN
+decodificado como un .npz comprimido con una columna tipada por campo:
+
+    timestamp   datetime64[ms] de cada trama (NaT si la fecha no es válida)
+    length      int16, bytes de datos
+    mensaje     int32, índice del mensaje DBC en meta['mensajes']
+    cabecera    int32, índice de la cabecera CAN en meta['cabeceras'] (-1 si no hay)
+    senal_<i>   valores de la señal meta['senales'][i] (NaN en las tramas sin esa señal)
+    meta        JSON con version, protocolo, fecha de decodificación y las listas anteriores
+
+Si se decodificó con --dedup (meta['deduplicado']), cada fila es un grupo de
+tramas consecutivas de un ID con los mismos datos, guardado como un tramo:
+timestamp de la primera trama, timestamp_final de la última y repeticiones.
+load_decoded_can recupera por defecto una fila por trama repartiendo las
+tramas de cada tramo a intervalos iguales (exacto para tramas periódicas).
+Los .npz de la versión 1 guardaban además el índice por trama
+(expansion_fila/expansion_timestamp) y se siguen expandiendo con él.
+
+Los CSV por secciones (_TRADUCIDO.csv) se siguen aceptando; el decodificador
+los genera junto al .npz salvo con CAN_EXPORT_CSV=0.
+Este módulo no depende de cantools.
+"""
+
+import os
+import json
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+COLUMNAR_SUFFIX = '_TRADUCIDO.npz'
+LEGACY_CSV_SUFFIX = '_TRADUCIDO.csv'
+SIGNAL_PREFIX = 'senal_'
+
+def decoded_path(can_file_path: str, suffix: str = COLUMNAR_SUFFIX) -> str:
+    """Ruta del archivo decodificado de un CAN_*.txt (mismo directorio, sufijo indicado)."""
+    return f"{os.path.splitext(can_file_path)[0]}{suffix}"
+
+def is_decoded_can_file(filename: str) -> bool:
+    """True para CAN_*_TRADUCIDO.npz y CAN_*_TRADUCIDO.csv."""
+    return filename.startswith('CAN_') and filename.endswith((COLUMNAR_SUFFIX, LEGACY_CSV_SUFFIX))
+
+def has_columnar_sibling(file_path: str) -> bool:
+    """True si file_path es un _TRADUCIDO.csv con su .npz al lado (el CSV es solo una exportación)."""
+    return file_path.endswith(LEGACY_CSV_SUFFIX) and os.path.exists(
+        file_path[:-len(LEGACY_CSV_SUFFIX)] + COLUMNAR_SUFFIX
+    )
+
+def expand_runs(first: np.ndarray, last: np.ndarray, counts: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Expande tramos (primer timestamp, último timestamp, número de tramas) a
+    una fila por trama, con las tramas de cada tramo a intervalos iguales.
+
+    Returns:
+        (fila del tramo de cada trama, timestamps datetime64[ms]), ordenados
+        por timestamp como en el archivo original; las tramas sin fecha
+        válida quedan al final.
+    """
+    counts = np.asarray(counts, dtype=np.int64)
+    first = np.asarray(first, dtype='datetime64[ms]')
+    last = np.asarray(last, dtype='datetime64[ms]')
+    rows = np.repeat(np.arange(len(counts)), counts)
+    position = np.arange(len(rows)) - np.repeat(np.cumsum(counts) - counts, counts)
+    # Sin último timestamp válido, todas las tramas del tramo toman el primero
+    span = np.where(np.isnat(last) | np.isnat(first), 0, (last - first).astype(np.int64))
+    step = span / np.maximum(counts - 1, 1)
+    timestamps = first[rows] + np.rint(position * step[rows]).astype(np.int64).astype('timedelta64[ms]')
+    order = np.argsort(np.where(np.isnat(timestamps), np.iinfo(np.int64).max, timestamps.astype(np.int64)),
+                       kind='stable')
+    return rows[order], timestamps[order]
+
+def _read_meta(npz) -> Dict[str, Any]:
+    return json.loads(str(npz['meta']))
+
+def load_decoded_can(file_path: str, expand: bool = True) -> Tuple[np.ndarray, Dict[str, np.ndarray], Dict[str, Any]]:
+    """
+    Carga un CAN_*_TRADUCIDO.npz.
+
+    Args:
+        expand: En archivos deduplicados, devolver una fila por trama (True)
+            o una por grupo de repeticiones, con las columnas repeticiones y
+            timestamp_final (False)
+
+    Returns:
+        (timestamps datetime64[ms], columnas, meta). Las columnas incluyen
+        length, mensaje, cabecera y una entrada por señal con su nombre DBC.
+    """
+    with np.load(file_path, allow_pickle=False) as npz:
+        meta = _read_meta(npz)
+        timestamps = npz['timestamp']
+        columns = {name: npz[name] for name in ('length', 'mensaje', 'cabecera')}
+        for index, signal in enumerate(meta['senales']):
+            columns[signal] = npz[f"{SIGNAL_PREFIX}{index}"]
+        if meta.get('deduplicado'):
+            if not expand:
+                columns['repeticiones'] = npz['repeticiones']
+                columns['timestamp_final'] = npz['timestamp_final']
+                return timestamps, columns, meta
+            if 'expansion_fila' in npz.files:  # Versión 1: índice por trama
+                rows = np.cumsum(npz['expansion_fila'])  # Guardada como diferencias entre tramas consecutivas
+                timestamps = npz['expansion_timestamp']
+            else:
+                rows, timestamps = expand_runs(timestamps, npz['timestamp_final'], npz['repeticiones'])
+            columns = {name: values[rows] for name, values in columns.items()}
+    return timestamps, columns, meta
+
+def read_time_range(file_path: str) -> Tuple[Optional[np.datetime64], Optional[np.datetime64]]:
+    """Primera y última marca de tiempo válidas del archivo (solo lee la columna de timestamps)."""
+    with np.load(file_path, allow_pickle=False) as npz:
+        timestamps = npz['expansion_timestamp' if 'expansion_timestamp' in npz.files else 'timestamp']
+        final = npz['timestamp_final'] if 'expansion_timestamp' not in npz.files and 'timestamp_final' in npz.files else None
+    valid = np.flatnonzero(~np.isnat(timestamps))
+    if not len(valid):
+        return None, None
+    if final is not None:
+        # Tramos deduplicados: la última trama es el mayor timestamp_final válido
+        final = final[~np.isnat(final)]
+        return timestamps[valid[0]], max(timestamps[valid[-1]], final.max()) if len(final) else timestamps[valid[-1]]
+    return timestamps[valid[0]], timestamps[valid[-1]]
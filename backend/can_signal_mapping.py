@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Correspondencia entre señales DBC decodificadas y columnas de "CanMeasurement".
+
+Las tramas CAN llegan a decenas de Hz y cada mensaje DBC trae solo algunas
+señales. Antes de subirlas se remuestrean a un periodo fijo (1 s por
+defecto, el mismo que el GPS), en una sola pasada vectorizada sobre todo el
+archivo:
+
+    1. Cada columna de CanMeasurement toma la primera señal de su lista
+       que tenga datos en el archivo (J1939 u OBD2).
+    2. Las tramas se agrupan por intervalo (timestamp // periodo) y cada
+       intervalo se resume con la agregación de la columna: 'mean'
+       (media de las tramas del intervalo) o 'last' (último valor).
+    3. Los intervalos sin dato de una señal mantienen su último valor;
+       las columnas obligatorias (NOT NULL en el esquema) valen 0 hasta
+       el primer dato. Si ninguna señal de una columna obligatoria existe
+       en el archivo (p. ej. vehicleSpeed con el DBC J1939 propio, que no
+       la define), se guarda 0 y se avisa una vez por columna.
+
+El resultado tiene una fila por intervalo con datos, con timestamp al inicio
+del intervalo, así que es único por sesión (canmeasurement_sessionid_timestamp_unique)
+y se une directamente con el GPS por segundo.
+
+La correspondencia por defecto (DEFAULT_SIGNAL_MAPPINGS) se amplía o
+sustituye con un JSON indicado en CAN_SIGNAL_MAPPING_FILE:
+
+    {"brakePressure": {"signals": ["Brake_Pressure"], "aggregation": "mean"}}
+"""
+
+import os
+import json
+import hashlib
+import logging
+from dataclasses import asdict, dataclass
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+AGGREGATIONS = ('last', 'mean')
+CAN_RESAMPLE_MS = int(float(os.getenv('CAN_RESAMPLE_SECONDS', '1')) * 1000)
+CAN_SIGNAL_MAPPING_FILE = os.getenv('CAN_SIGNAL_MAPPING_FILE')
+
+# Tipo de las columnas de CanMeasurement que no son Float (para convertir al insertar)
+BOOLEAN_COLUMNS = {'absActive', 'espActive'}
+INTEGER_COLUMNS = {'gearPosition'}
+
+_reported_missing = set()  # Columnas obligatorias sin señal de origen ya avisadas en este proceso
+
+@dataclass(frozen=True)
+class SignalMapping:
+    """
+    Columna de CanMeasurement y señales DBC de las que se obtiene.
+
+    Attributes:
+        column: Columna en "CanMeasurement"
+        signals: Nombres de señal DBC candidatos, por orden de preferencia
+        aggregation: 'mean' o 'last', cómo se resume cada intervalo
+        required: Columna NOT NULL (sin dato se guarda 0)
+    """
+    column: str
+    signals: Tuple[str, ...]
+    aggregation: str = 'last'
+    required: bool = False
+
+DEFAULT_SIGNAL_MAPPINGS = (
+    SignalMapping('engineRpm', ('Engine_Speed', 'S1_PID_0C_EngineRPM'), 'mean', required=True),
+    # doback_custom.dbc (J1939) no define velocidad ni estado del sistema de combustible: solo OBD2
+    SignalMapping('vehicleSpeed', ('S1_PID_0D_VehicleSpeed',), 'mean', required=True),
+    SignalMapping('fuelSystemStatus', ('S1_PID_03_FuelSystemStatus',), 'last', required=True),
+    SignalMapping('temperature', ('Engine_Temperature', 'S1_PID_05_EngineCoolantTemp'), 'mean'),
+    SignalMapping('throttlePosition', ('S1_PID_11_ThrottlePosition',), 'mean'),
+    SignalMapping('absActive', (), 'last'),
+    SignalMapping('brakePressure', (), 'mean'),
+    SignalMapping('espActive', (), 'last'),
+    SignalMapping('gearPosition', (), 'last'),
+    SignalMapping('steeringAngle', (), 'mean'),
+)
+
+def load_signal_mappings(path: Optional[str] = CAN_SIGNAL_MAPPING_FILE) -> Tuple[SignalMapping, ...]:
+    """Correspondencia por defecto con las entradas del JSON de path (si se indica) aplicadas encima."""
+    mappings = {mapping.column: mapping for mapping in DEFAULT_SIGNAL_MAPPINGS}
+    if not path:
+        return tuple(mappings.values())
+    with open(path, 'r', encoding='utf-8') as f:
+        overrides = json.load(f)
+    for column, spec in overrides.items():
+        base = mappings.get(column, SignalMapping(column, ()))
+        mapping = SignalMapping(
+            column,
+            tuple(spec.get('signals', base.signals)),
+            spec.get('aggregation', base.aggregation),
+            spec.get('required', base.required),
+        )
+        if mapping.aggregation not in AGGREGATIONS:
+            raise ValueError(f"Agregación no válida para {column}: {mapping.aggregation} (usar {AGGREGATIONS})")
+        mappings[column] = mapping
+    logger.info(f"📋 Correspondencia de señales CAN cargada de {path}")
+    return tuple(mappings.values())
+
+def measurement_dtypes(mappings: Sequence[SignalMapping]) -> Dict[str, type]:
+    """Columnas remuestreadas: float64 con NaN para "sin dato" (ver to_db_value)."""
+    return {mapping.column: np.float64 for mapping in mappings}
+
+def mappings_digest(mappings: Sequence[SignalMapping], period_ms: int = CAN_RESAMPLE_MS) -> str:
+    """Huella corta de la configuración, para no reutilizar en caché un remuestreo con otra correspondencia."""
+    payload = json.dumps([asdict(mapping) for mapping in mappings] + [period_ms], sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:8]
+
+def resample_signals(timestamps_ms: np.ndarray, signals: Dict[str, np.ndarray],
+                     mappings: Sequence[SignalMapping],
+                     period_ms: int = CAN_RESAMPLE_MS) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+    """
+    Remuestrea las señales de un archivo a un periodo fijo.
+
+    Args:
+        timestamps_ms: int64, milisegundos desde epoch de cada trama
+        signals: Nombre de señal DBC -> valores por trama (NaN donde la trama no la trae)
+
+    Returns:
+        (inicio de cada intervalo en ms, columna de CanMeasurement -> float64 por intervalo)
+    """
+    timestamps_ms = np.asarray(timestamps_ms, dtype=np.int64)
+    bins = timestamps_ms // period_ms
+    sources = {mapping.column: _select_signal(mapping, signals) for mapping in mappings}
+
+    has_data = np.zeros(len(bins), dtype=bool)
+    for values in sources.values():
+        if values is not None:
+            has_data |= np.isfinite(values)
+    out_bins = np.unique(bins[has_data])
+
+    columns = {}
+    for mapping in mappings:
+        values = sources[mapping.column]
+        column = np.full(len(out_bins), np.nan)
+        if values is not None:
+            valid = np.isfinite(values)
+            slots = np.searchsorted(out_bins, bins[valid])
+            if mapping.aggregation == 'mean':
+                counts = np.bincount(slots, minlength=len(out_bins))
+                sums = np.bincount(slots, weights=values[valid], minlength=len(out_bins))
+                np.divide(sums, counts, out=column, where=counts > 0)
+            else:
+                # Último valor de cada intervalo: orden estable por intervalo y fin de cada grupo
+                order = np.argsort(slots, kind='stable')
+                sorted_slots = slots[order]
+                last = np.append(np.flatnonzero(sorted_slots[1:] != sorted_slots[:-1]), len(sorted_slots) - 1)
+                if len(sorted_slots):
+                    column[sorted_slots[last]] = values[valid][order[last]]
+            column = _hold_last(column)
+        if mapping.required:
+            if values is None:
+                _report_missing_source(mapping)
+            column = np.nan_to_num(column, nan=0.0)
+        columns[mapping.column] = column
+    return out_bins * period_ms, columns
+
+def to_db_value(column: str, value):
+    """Valor remuestreado -> valor para la columna de "CanMeasurement" (NaN -> NULL)."""
+    if value is None or value != value:
+        return None
+    if column in BOOLEAN_COLUMNS:
+        return bool(value)
+    if column in INTEGER_COLUMNS:
+        return int(round(value))
+    return float(value)
+
+def _select_signal(mapping: SignalMapping, signals: Dict[str, np.ndarray]) -> Optional[np.ndarray]:
+    """Primera señal candidata con algún dato en el archivo."""
+    for name in mapping.signals:
+        values = signals.get(name)
+        if values is None:
+            continue
+        values = np.asarray(values, dtype=np.float64)
+        if np.isfinite(values).any():
+            return values
+    return None
+
+def _report_missing_source(mapping: SignalMapping) -> None:
+    """Avisa (una vez por columna) de que una columna obligatoria se guarda a 0 sin medida."""
+    if mapping.column in _reported_missing:
+        return
+    _reported_missing.add(mapping.column)
+    logger.warning(f"⚠️ Ninguna señal de {list(mapping.signals)} en los datos CAN: "
+                   f"{mapping.column} (NOT NULL) se guarda a 0 sin medida real")
+
+def _hold_last(column: np.ndarray) -> np.ndarray:
+    """Rellena los NaN con el último valor anterior (los del principio quedan NaN)."""
+    valid = ~np.isnan(column)
+    previous = np.maximum.accumulate(np.where(valid, np.arange(len(column)), -1))
+    held = column[np.maximum(previous, 0)]
+    held[previous < 0] = np.nan
+    return held
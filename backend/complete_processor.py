@@ -15,6 +15,7 @@ FUNCIONALIDADES:
     3. Verificación de duplicados en base de datos
     4. Subida de datos a PostgreSQL
     5. Generación de reportes detallados
+    6. Modo continuo (--watch): ingesta incremental de archivos nuevos
 
 REQUISITOS:
     - Python 3.8+
@@ -28,7 +29,8 @@ CONFIGURACIÓN:
     - Configurar directorio de datos en DATA_DIR
 
 USO:
-    python complete_processor.py
+    python complete_processor.py                 # ejecución completa única
+    python complete_processor.py --watch         # modo continuo (ver ingest_watcher.py)
 
 EJEMPLO DE SALIDA:
     ============================================================
@@ -51,17 +53,41 @@ VERSIÓN: 1.0.0
 import os
 import sys
 import json
+import argparse
 import uuid
 import logging
-import subprocess
 import re
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Tuple, Set
+from typing import Dict, Iterator, List, Optional, Tuple, Set
+import numpy as np
 import pandas as pd
 import psycopg2
 from psycopg2.extras import RealDictCursor
-import time # Added for cache
+import time
 from geopy.distance import geodesic
+from file_manifest import FileManifest, compute_fingerprint
+from parsed_cache import CACHE_DIR_NAME, ParsedFileCache
+from measurement_columns import MeasurementColumns, to_epoch_ms
+from timestamp_parser import (
+    DOBACK_FORMAT, GPS_FORMAT, ROTATIVO_FORMAT, TimestampParser, parse_column, sniff_format
+)
+from processors.parallel_scan import group_by_shard, map_shards
+from stability_parser import STABILITY_COLUMNS, iter_stability_chunks
+from head_tail_reader import (
+    DEFAULT_CHUNK_BYTES, HEAD_SCAN_LINES, find_data_offset, find_first, iter_head_lines, iter_line_chunks,
+    iter_tail_lines, line_number_at, read_first_line
+)
+from parse_report import MAX_SAMPLES_PER_REASON, ParseReport
+from temporal_index import TemporalFileIndex
+from gps_offset import OffsetDetection, detect_clock_offset, to_epoch_seconds
+from session_matching import FileIndex, assign_files_one_to_one, find_compatible_files, temporal_proximity
+from can_columnar import (
+    COLUMNAR_SUFFIX, LEGACY_CSV_SUFFIX, decoded_path, has_columnar_sibling, is_decoded_can_file,
+    load_decoded_can, read_time_range
+)
+from can_signal_mapping import (
+    load_signal_mappings, mappings_digest, measurement_dtypes, resample_signals, to_db_value
+)
 
 # Configuración de logging
 logging.basicConfig(
@@ -76,10 +102,36 @@ logger = logging.getLogger(__name__)
 
 # Configuración de directorios
 DATA_DIR = os.path.join(os.path.dirname(__file__), 'data', 'datosDoback')
-DECODER_PATH = os.path.join(os.path.dirname(__file__), 'data', 'DECODIFICADOR CAN', 'decodificador_can_unificado.py')
+DECODER_DIR = os.path.join(os.path.dirname(__file__), 'data', 'DECODIFICADOR CAN')
+DECODER_PATH = os.path.join(DECODER_DIR, 'decodificador_can_unificado.py')
+MANIFEST_PATH = os.path.join(DATA_DIR, 'file_manifest.json')
+PARSED_CACHE_DIR = os.path.join(DATA_DIR, CACHE_DIR_NAME)
+
+# Caché columnar de archivos parseados (PARSED_CACHE=0 para desactivarla)
+PARSED_CACHE_ENABLED = os.getenv('PARSED_CACHE', '1') != '0'
+PARSED_CACHE_CHUNK_ROWS = 100000  # Filas por bloque al leer por streaming desde la caché
+# Versión del parser de cada tipo, parte de la clave de la caché de parseo: subirla al cambiar lo que
+# produce el parser (o el remuestreo CAN) invalida solo las entradas de ese tipo
+PARSER_VERSIONS = {'GPS': 2, 'ESTABILIDAD': 2, 'CAN': 2, 'ROTATIVO': 2}  # 2: timestamps con el criterio de strptime
+
+# Procesos usados para extraer rangos temporales (1 = escaneo secuencial)
+SCAN_WORKERS = int(os.getenv('SCAN_WORKERS', '1'))
+
+# Procesos usados para decodificar archivos CAN (por defecto DECODE_WORKERS del decodificador)
+DECODE_WORKERS = int(os.getenv('DECODE_WORKERS', '0')) or None
+
+# Bytes leídos por bloque al parsear y subir archivos por streaming. La memoria
+# de parseo queda acotada por este valor (del orden de 20x) y no por el tamaño
+# del archivo
+STREAM_CHUNK_BYTES = int(os.getenv('STREAM_CHUNK_BYTES', str(DEFAULT_CHUNK_BYTES)))
 
 # Configuración de procesamiento
 MAX_TIME_DIFF_MINUTES = 5  # Máxima diferencia temporal entre archivos de sesión
+SESSION_MATCH_TOLERANCE_MINUTES = 15  # Tolerancia (±) al emparejar archivos con el archivo base de la sesión
+# Emparejamiento de archivos con los archivos base: 'greedy' (el más cercano para cada base, un archivo
+# puede repetirse en varias sesiones) u 'optimal' (asignación uno a uno de coste mínimo)
+ASSIGNMENT_MODES = ('greedy', 'optimal')
+SESSION_ASSIGNMENT = os.getenv('SESSION_ASSIGNMENT', 'greedy')
 DEFAULT_ORGANIZATION = 'CMadrid'  # Organización por defecto
 DEFAULT_USER_ID = 'admin@dobacksoft.com'  # Usuario por defecto
 DEFAULT_USER_EMAIL = 'admin@dobacksoft.com' # Email por defecto para trazabilidad
@@ -89,6 +141,11 @@ GPS_OFFSET_HOURS = 2  # Desfase a detectar en horas
 GPS_TOLERANCE_MINUTES = 1  # Tolerancia para detectar el desfase
 GPS_MAX_NEARBY_HOURS = 3  # Máximo rango para considerar archivos cercanos
 
+# Parsers de timestamp para las líneas sueltas leídas en cabecera/cola
+_GPS_PARSER = TimestampParser(GPS_FORMAT)
+_ROTATIVO_PARSER = TimestampParser(ROTATIVO_FORMAT)
+_DOBACK_PARSER = TimestampParser(DOBACK_FORMAT)
+
 # Definir límites geográficos de la Comunidad de Madrid
 MADRID_BOUNDS = {
     'min_lat': 39.5,   # Sur de Madrid
@@ -97,6 +154,77 @@ MADRID_BOUNDS = {
     'max_lon': -2.5    # Este de Madrid
 }
 
+# Tipos de las columnas de mediciones devueltas por los loaders
+GPS_DTYPES = {
+    'latitude': np.float64, 'longitude': np.float64, 'altitude': np.float64, 'hdop': np.float64,
+    'fix': np.int32, 'num_sats': np.int32, 'speed': np.float64
+}
+STABILITY_DTYPES = {name: np.float64 for name in STABILITY_COLUMNS}
+STABILITY_CONSTANTS = {  # Campos sin dato en el archivo: un único valor para toda la sesión
+    'temperature': None, 'isDRSHigh': False, 'isLTRCritical': False, 'isLateralGForceHigh': False,
+    'usciclo6': 0, 'usciclo7': 0, 'usciclo8': 0
+}
+CAN_SIGNAL_MAPPINGS = load_signal_mappings()  # Señales DBC -> columnas de CanMeasurement (ver can_signal_mapping)
+CAN_DTYPES = measurement_dtypes(CAN_SIGNAL_MAPPINGS)
+ROTATIVO_DTYPES = {'state': object, 'value': np.float64, 'status': object}
+
+def _import_can_decoder():
+    """Importa decodificador_can_unificado (requiere cantools); None si no está disponible."""
+    if not os.path.exists(DECODER_PATH):
+        logger.error(f"Decodificador CAN no encontrado en: {DECODER_PATH}")
+        return None
+    if DECODER_DIR not in sys.path:
+        sys.path.insert(0, DECODER_DIR)
+    try:
+        import decodificador_can_unificado
+    except ImportError as e:
+        logger.error(f"No se pudo cargar el decodificador CAN: {e}")
+        return None
+    return decodificador_can_unificado
+
+def _log_decode_progress(index: int, total: int, result: Dict) -> None:
+    name = os.path.basename(result['archivo'])
+    if result['ok']:
+        logger.info(f"  ✅ [{index}/{total}] Decodificado: {name} ({result['mensajes']} mensajes, {result['segundos']:.1f}s)")
+    else:
+        logger.warning(f"  ❌ [{index}/{total}] Error decodificando: {name} ({result['error']})")
+
+def is_raw_can_file(filename: str) -> bool:
+    """True para archivos CAN sin decodificar (CAN_*.txt)."""
+    return filename.startswith('CAN_') and filename.endswith('.txt')
+
+def can_decoded_path(can_file_path: str) -> str:
+    """
+    Ruta del archivo decodificado de un CAN_*.txt: el .npz columnar, o el
+    _TRADUCIDO.csv de versiones anteriores si es el único que existe.
+    """
+    columnar = decoded_path(can_file_path, COLUMNAR_SUFFIX)
+    legacy = decoded_path(can_file_path, LEGACY_CSV_SUFFIX)
+    if not os.path.exists(columnar) and os.path.exists(legacy):
+        return legacy
+    return columnar
+
+def parsed_cache_type(file_type: str, config: Optional[str] = None) -> str:
+    """
+    Tipo con el que se indexa un archivo en la caché de parseo: el tipo, la
+    versión de su parser (PARSER_VERSIONS) y, si la hay, la huella de la
+    configuración que afecta al resultado (p. ej. 'CAN-p1-<huella>').
+    """
+    cache_type = f"{file_type}-p{PARSER_VERSIONS[file_type]}"
+    return f"{cache_type}-{config}" if config else cache_type
+
+class SessionProcessingError(Exception):
+    """
+    Fallo al buscar o subir sesiones (p. ej. base de datos no disponible).
+    
+    Attributes:
+        failures: Descripción de cada grupo vehículo/fecha o sesión fallida
+    """
+    
+    def __init__(self, failures: List[str]):
+        super().__init__(f"{len(failures)} fallos procesando sesiones: {'; '.join(failures[:3])}")
+        self.failures = failures
+
 class DobackProcessor:
     """
     Procesador principal para archivos Doback Soft.
@@ -108,19 +236,34 @@ class DobackProcessor:
     - Generación de reportes
     """
     
-    def __init__(self, organization_name: str = None, user_email: str = None):
+    def __init__(self, organization_name: str = None, user_email: str = None, scan_workers: int = None,
+                 chunk_bytes: int = None, decode_workers: int = None, assignment_mode: str = None):
         """
         Inicializa el procesador con configuración por defecto.
         
         Args:
             organization_name: Nombre de la organización (opcional)
             user_email: Email del usuario (opcional, para trazabilidad)
+            scan_workers: Procesos para el escaneo de archivos (opcional, por defecto SCAN_WORKERS)
+            chunk_bytes: Tamaño de bloque para el parseo por streaming (opcional, por defecto STREAM_CHUNK_BYTES)
+            decode_workers: Procesos para decodificar CAN (opcional, por defecto DECODE_WORKERS)
+            assignment_mode: 'greedy' u 'optimal' (opcional, por defecto SESSION_ASSIGNMENT)
         """
         self.sessions = []
         self.all_files = [] # Lista de todos los archivos escaneados
+        self.file_index = None  # FileIndex del último escaneo (ver session_matching)
+        self.session_failures = []  # Grupos o sesiones que fallaron en el último process_sessions
         self.default_user_id = DEFAULT_USER_ID
         self.organization_name = organization_name or DEFAULT_ORGANIZATION
         self.user_email = user_email or DEFAULT_USER_EMAIL
+        self.scan_workers = scan_workers or SCAN_WORKERS
+        self.chunk_bytes = chunk_bytes or STREAM_CHUNK_BYTES
+        self.decode_workers = decode_workers or DECODE_WORKERS
+        self.assignment_mode = assignment_mode or SESSION_ASSIGNMENT
+        if self.assignment_mode not in ASSIGNMENT_MODES:
+            raise ValueError(f"Modo de emparejamiento no válido: {self.assignment_mode} (usar {ASSIGNMENT_MODES})")
+        self._can_decoder = None
+        self.can_decode_errors = {}  # ID CAN -> tramas fallidas en las decodificaciones de esta ejecución
         
         # Configuración de la base de datos
         self.db_config = {
@@ -131,162 +274,112 @@ class DobackProcessor:
             'password': os.getenv('DB_PASSWORD', 'cosigein'),  # Usar variable de entorno
         }
         
-        # Cache de archivos para mejorar rendimiento
-        self.cache_file = 'all_files_cache.json'
-        self.cache_valid_hours = 24  # Cache válido por 24 horas
-        
         # Verificar que el directorio de datos existe
         if not os.path.exists(DATA_DIR):
             raise FileNotFoundError(f"Directorio de datos no encontrado: {DATA_DIR}")
         
+        # Manifiesto incremental: solo se releen archivos nuevos o modificados
+        self.manifest = FileManifest(MANIFEST_PATH)
+        
+        # Caché de archivos ya parseados, indexada por huella de contenido
+        self.parsed_cache = ParsedFileCache(PARSED_CACHE_DIR) if PARSED_CACHE_ENABLED else None
+        
         logger.info(f"Procesador Doback Soft inicializado para organización: {self.organization_name}")
         if self.user_email != DEFAULT_USER_EMAIL:
             logger.info(f"Usuario específico: {self.user_email}")
     
-    def _load_cached_files(self) -> Optional[List[Dict]]:
-        """Carga archivos desde cache si es válido."""
-        try:
-            if os.path.exists(self.cache_file):
-                cache_age = time.time() - os.path.getmtime(self.cache_file)
-                if cache_age < (self.cache_valid_hours * 3600):  # 24 horas
-                    with open(self.cache_file, 'r', encoding='utf-8') as f:
-                        cached_data = json.load(f)
-                        # Convertir fechas de string a datetime
-                        for file_info in cached_data:
-                            if 'date' in file_info and isinstance(file_info['date'], str):
-                                try:
-                                    file_info['date'] = datetime.fromisoformat(file_info['date'])
-                                except ValueError:
-                                    file_info['date'] = self.extract_date_from_filename(file_info['name'])
-                            if 'start_time' in file_info and isinstance(file_info['start_time'], str):
-                                try:
-                                    file_info['start_time'] = datetime.fromisoformat(file_info['start_time'])
-                                except ValueError:
-                                    file_info['start_time'] = None
-                            if 'end_time' in file_info and isinstance(file_info['end_time'], str):
-                                try:
-                                    file_info['end_time'] = datetime.fromisoformat(file_info['end_time'])
-                                except ValueError:
-                                    file_info['end_time'] = None
-                        logger.info(f"Archivos cargados desde cache: {len(cached_data)} archivos")
-                        return cached_data
-        except Exception as e:
-            logger.warning(f"Error cargando cache: {e}")
-        return None
-    
-    def _save_cached_files(self, files: List[Dict]) -> None:
-        """Guarda archivos en cache."""
-        try:
-            # Convertir fechas datetime a string ISO para JSON
-            files_for_cache = []
-            for file_info in files:
-                cache_info = file_info.copy()
-                if 'date' in cache_info and isinstance(cache_info['date'], datetime):
-                    cache_info['date'] = cache_info['date'].isoformat()
-                if 'start_time' in cache_info and isinstance(cache_info['start_time'], datetime):
-                    cache_info['start_time'] = cache_info['start_time'].isoformat()
-                if 'end_time' in cache_info and isinstance(cache_info['end_time'], datetime):
-                    cache_info['end_time'] = cache_info['end_time'].isoformat()
-                files_for_cache.append(cache_info)
-            
-            with open(self.cache_file, 'w', encoding='utf-8') as f:
-                json.dump(files_for_cache, f, indent=2, ensure_ascii=False)
-            logger.info(f"Cache guardado: {len(files)} archivos")
-        except Exception as e:
-            logger.warning(f"Error guardando cache: {e}")
-    
     def decode_can_files(self) -> None:
         """
         Decodifica todos los archivos CAN encontrados en el directorio de datos.
         
-        Busca archivos CAN en subdirectorios por empresa/vehículo/CAN y los decodifica
-        usando el script externo decodificador_can_unificado.py.
-        
-        Raises:
-            FileNotFoundError: Si no se encuentra el decodificador CAN
+        Busca archivos CAN en las carpetas CAN de cada empresa/vehículo y los
+        decodifica con decodificar_flota de decodificador_can_unificado: los
+        archivos cuya salida ya corresponde a su contenido se omiten, las copias
+        de un contenido ya decodificado reutilizan su salida y el resto se
+        decodifica en un pool de procesos (cada proceso carga los DBC una vez).
         """
         logger.info("PASO 1: Decodificando archivos CAN...")
         
-        # Verificar que el decodificador existe
-        if not os.path.exists(DECODER_PATH):
-            logger.error(f"Decodificador CAN no encontrado en: {DECODER_PATH}")
+        decoder = _import_can_decoder()
+        if decoder is None:
             logger.warning("Continuando sin decodificación CAN...")
             return
         
-        # Buscar directorios de empresas
-        for company_dir in os.listdir(DATA_DIR):
-            company_path = os.path.join(DATA_DIR, company_dir)
-            if not os.path.isdir(company_path):
-                continue
-                
-            logger.info(f"Decodificando archivos CAN para {company_dir}")
-            
-            # Buscar subdirectorios de vehículos
-            for vehicle_dir in os.listdir(company_path):
-                vehicle_path = os.path.join(company_path, vehicle_dir)
-                if not os.path.isdir(vehicle_path):
-                    continue
-                
-                # Buscar subdirectorio CAN
-                can_dir_path = os.path.join(vehicle_path, 'CAN')
-                if not os.path.isdir(can_dir_path):
-                    logger.info(f"  No se encontró directorio CAN para {company_dir}/{vehicle_dir}")
-                    continue
-                
-                logger.info(f"Decodificando archivos CAN para {company_dir}/{vehicle_dir}")
-                
-                # Buscar archivos CAN en el subdirectorio CAN
-                can_files = [f for f in os.listdir(can_dir_path) 
-                           if f.startswith('CAN_') and f.endswith('.txt')]
-                
-                logger.info(f"  Encontrados {len(can_files)} archivos CAN para decodificar")
-                
-                decoded_count = 0
-                for can_file in can_files:
-                    can_file_path = os.path.join(can_dir_path, can_file)
-                    output_file = can_file.replace('.txt', '_TRADUCIDO.csv')
-                    output_path = os.path.join(can_dir_path, output_file)
-                    
-                    # Verificar si ya existe el archivo decodificado
-                    if os.path.exists(output_path):
-                        logger.info(f"  Archivo ya decodificado: {can_file}")
-                        decoded_count += 1
-                        continue
-                    
-                    try:
-                        # Verificar que el archivo de entrada existe y no está vacío
-                        if not os.path.exists(can_file_path):
-                            logger.warning(f"  ❌ Archivo CAN no encontrado: {can_file}")
-                            continue
-                        
-                        if os.path.getsize(can_file_path) == 0:
-                            logger.warning(f"  ❌ Archivo CAN vacío: {can_file}")
-                            continue
-                        
-                        # Ejecutar decodificador
-                        result = subprocess.run([
-                            sys.executable, DECODER_PATH,
-                            can_file_path, output_path
-                        ], capture_output=True, text=True, timeout=30)
-                        
-                        if result.returncode == 0:
-                            # Verificar que el archivo de salida se creó y no está vacío
-                            if os.path.exists(output_path) and os.path.getsize(output_path) > 0:
-                                logger.info(f"  ✅ Decodificado: {can_file}")
-                                decoded_count += 1
-                            else:
-                                logger.warning(f"  ⚠️  Decodificación exitosa pero archivo de salida vacío: {can_file}")
-                        else:
-                            logger.warning(f"  ❌ Error decodificando: {can_file}")
-                            logger.warning(f"    Error: {result.stderr}")
-                            
-                    except subprocess.TimeoutExpired:
-                        logger.warning(f"  ❌ Timeout decodificando: {can_file}")
-                    except Exception as e:
-                        logger.error(f"Error en decodificacion: {e}")
-                        logger.warning(f"  ❌ Error decodificando: {can_file}")
-                
-                logger.info(f"  Total decodificados: {decoded_count}/{len(can_files)}")
+        summary = decoder.decodificar_flota(
+            DATA_DIR, self.decode_workers, decodificador=self._get_can_decoder(), progreso=_log_decode_progress
+        )
+        logger.info(f"  Archivos CAN: {summary['archivos']}, decodificados: {summary['decodificados']}, "
+                    f"ya traducidos: {summary['omitidos']}, reutilizados: {summary['reutilizados']}, "
+                    f"errores: {summary['errores']}")
+        if summary['decodificados']:
+            logger.info(f"  Rendimiento: {summary['tramas_por_segundo']:,.0f} tramas/s, "
+                        f"{summary['mb_por_segundo']:.1f} MB/s")
+        results = summary['resultados']
+        self._record_can_errors(results)
+    
+    def decode_can_file(self, can_file_path: str) -> bool:
+        """
+        Decodifica un archivo CAN_*.txt a CAN_*_TRADUCIDO.npz junto al original.
+        
+        Usa el manifiesto de decodificación de DATA_DIR (el de decode_can_files):
+        si el contenido del archivo cambió desde que se tradujo (un CAN que
+        sigue creciendo), la salida se regenera en lugar de reutilizarse.
+        
+        Returns:
+            True si el archivo decodificado existe y corresponde al contenido actual
+        """
+        can_file = os.path.basename(can_file_path)
+        if not self._needs_can_decode(can_file_path):
+            return False
+        
+        decoder = _import_can_decoder()
+        can_decoder = self._get_can_decoder()
+        if decoder is None or can_decoder is None:
+            logger.warning(f"  ❌ Decodificador CAN no disponible, no se decodifica: {can_file}")
+            return False
+        try:
+            result = decoder.decodificar_si_cambia(can_file_path, DATA_DIR, can_decoder)
+        except Exception as e:
+            logger.error(f"Error en decodificacion: {e}")
+            result = {'archivo': can_file_path, 'ok': False, 'omitido': False, 'error': str(e)}
+        if result['ok'] and result['omitido']:
+            logger.info(f"  Archivo ya decodificado: {can_file}")
+        elif result['ok']:
+            logger.info(f"  ✅ Decodificado: {can_file}")
+        else:
+            logger.warning(f"  ❌ Error decodificando: {can_file} ({result['error']})")
+        self._record_can_errors([result])
+        return result['ok']
+    
+    def _record_can_errors(self, results: List[Dict]) -> None:
+        """Suma los errores por ID de las decodificaciones al resumen del reporte (sin logs por archivo)."""
+        decoder = _import_can_decoder()
+        failed_frames = 0
+        for result in results:
+            decoder.acumular_errores(self.can_decode_errors, result)
+            failed_frames += sum(info['total'] for info in result.get('errores', {}).values())
+        if failed_frames:
+            logger.warning(f"  ⚠️ {failed_frames} tramas CAN sin decodificar "
+                           f"({len(self.can_decode_errors)} IDs en total, ver can_decode_errors en el reporte)")
+    
+    def _needs_can_decode(self, can_file_path: str) -> bool:
+        """True si el archivo CAN existe y no está vacío."""
+        can_file = os.path.basename(can_file_path)
+        if not os.path.exists(can_file_path):
+            logger.warning(f"  ❌ Archivo CAN no encontrado: {can_file}")
+            return False
+        if os.path.getsize(can_file_path) == 0:
+            logger.warning(f"  ❌ Archivo CAN vacío: {can_file}")
+            return False
+        return True
+    
+    def _get_can_decoder(self):
+        """DecodificadorCAN reutilizado entre archivos (mantiene los DBC cargados)."""
+        if self._can_decoder is None:
+            decoder = _import_can_decoder()
+            if decoder is not None:
+                self._can_decoder = decoder.DecodificadorCAN()
+        return self._can_decoder
     
     def extract_date_from_file_content(self, file_path: str) -> Optional[datetime]:
         """
@@ -438,62 +531,60 @@ class DobackProcessor:
             return None, None
 
     def _extract_gps_time_range(self, file_path: str) -> Tuple[Optional[datetime], Optional[datetime]]:
-        """Extrae rango temporal de archivo GPS con corrección de desfase."""
+        """
+        Extrae rango temporal de archivo GPS con corrección de desfase.
+        Lee solo la cabecera hasta el primer dato válido y la cola desde EOF.
+        """
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                lines = f.readlines()
-            if not lines:
+            data_offset = find_data_offset(file_path, lambda line: line.lower().startswith('fecha'))
+            if data_offset is None:
                 return None, None
             
-            # Saltar cabecera y columnas
-            for i, line in enumerate(lines):
-                if line.lower().startswith('fecha'):
-                    data_start = i + 1
-                    break
-            else:
-                data_start = 1
-            
-            first_data = None
-            last_data = None
+            first_data = find_first(
+                (line for _, line in iter_head_lines(file_path, data_offset)), self._parse_gps_line_time
+            )
+            if first_data is None:
+                return None, None
+            last_data = find_first(iter_tail_lines(file_path, data_offset), self._parse_gps_line_time)
             
-            for line in lines[data_start:]:
-                if not line.strip():
-                    continue
-                parts = self._split_flexible(line)
-                if len(parts) >= 2:
-                    try:
-                        date_str = parts[0].replace('.', '').strip()
-                        time_str = self._clean_time(parts[1])
-                        if date_str and time_str and date_str != 'Fecha':
-                            dt_str = f"{date_str} {time_str}"
-                            dt = datetime.strptime(dt_str, '%d/%m/%Y %H:%M:%S')
-                            if first_data is None:
-                                first_data = dt
-                            last_data = dt
-                    except Exception:
-                        continue
-                
             # Aplicar corrección de desfase GPS (+2 horas)
-            if first_data and last_data:
-                first_data = first_data + timedelta(hours=2)
-                last_data = last_data + timedelta(hours=2)
-                logger.debug(f"GPS: Aplicada corrección de desfase +2h")
+            first_data = first_data + timedelta(hours=2)
+            last_data = last_data + timedelta(hours=2)
+            logger.debug(f"GPS: Aplicada corrección de desfase +2h")
             
             return first_data, last_data
         except Exception as e:
             logger.error(f"Error procesando GPS {file_path}: {e}")
             return None, None
+    
+    def _parse_gps_line_time(self, line: str) -> Optional[datetime]:
+        """Timestamp de una línea de datos GPS o None si no es válida."""
+        if not line.strip():
+            return None
+        parts = self._split_flexible(line)
+        if len(parts) < 2:
+            return None
+        try:
+            date_str = parts[0].replace('.', '').strip()
+            time_str = self._clean_time(parts[1])
+            if date_str and time_str and date_str != 'Fecha':
+                return _GPS_PARSER.parse(f"{date_str} {time_str}")
+        except Exception:
+            pass
+        return None
             
     def _extract_stability_time_range(self, file_path: str) -> Tuple[Optional[datetime], Optional[datetime]]:
-        """Extrae rango temporal de archivo ESTABILIDAD."""
+        """
+        Extrae rango temporal de archivo ESTABILIDAD: primera y última marca
+        de hora intercaladas (o la fecha de cabecera si no hay marcas).
+        """
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                lines = f.readlines()
-            if not lines:
+            first_line = read_first_line(file_path)
+            if first_line is None:
                 return None, None
             
             # Parsear fecha de la cabecera
-            first_line = lines[0].strip()
+            first_line = first_line.strip()
             session_start = None
             if first_line.startswith('ESTABILIDAD;'):
                 parts = self._split_flexible(first_line)
@@ -505,76 +596,49 @@ class DobackProcessor:
                             break
                         except Exception:
                             continue
+            if session_start is None:
+                return None, None
             
-            # Buscar timestamps intercalados en el archivo
-                timestamps = []
-                for line in lines:
-                    line = line.strip()
-                if line and ':' in line and ('AM' in line or 'PM' in line):
-                    # Formato: 11:32:30AM
-                    try:
-                        # Asumir que es del mismo día que la sesión
-                        if session_start:
-                            time_str = line
-                            date_str = session_start.strftime('%d/%m/%Y')
-                            dt_str = f"{date_str} {time_str}"
-                            dt = datetime.strptime(dt_str, '%d/%m/%Y %I:%M:%S%p')
-                            timestamps.append(dt)
-                    except Exception:
-                                continue
-                
-                if timestamps:
-                    first_data = min(timestamps)
-                    last_data = max(timestamps)
-                elif session_start:
-                    first_data = session_start
-                    last_data = session_start
-                else:
-                    first_data = None
-                    last_data = None
+            # Buscar marcas de hora intercaladas (formato 11:32:30AM), asumiendo el día de la sesión
+            session_date = session_start.strftime('%d/%m/%Y')
+            parse_marker = lambda line: self._parse_stability_marker(line, session_date)
+            data_offset = find_data_offset(file_path, lambda line: False)
+            first_data = find_first((line for _, line in iter_head_lines(file_path, data_offset)), parse_marker)
+            if first_data is None:
+                return session_start, session_start
+            last_data = find_first(iter_tail_lines(file_path, data_offset), parse_marker)
             
             return first_data, last_data
         except Exception as e:
             logger.error(f"Error procesando ESTABILIDAD {file_path}: {e}")
             return None, None
+    
+    def _parse_stability_marker(self, line: str, session_date: str) -> Optional[datetime]:
+        """Marca de hora de estabilidad (HH:MM:SSAM/PM) como datetime o None."""
+        line = line.strip()
+        if line and ':' in line and ('AM' in line or 'PM' in line):
+            return _DOBACK_PARSER.parse(f"{session_date} {line}")
+        return None
                 
     def _extract_rotativo_time_range(self, file_path: str) -> Tuple[Optional[datetime], Optional[datetime]]:
-        """Extrae rango temporal de archivo ROTATIVO."""
+        """Extrae rango temporal de archivo ROTATIVO leyendo solo cabecera y cola."""
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                lines = f.readlines()
-            if not lines:
+            data_offset = find_data_offset(
+                file_path, lambda line: 'fecha' in line.lower() and 'estado' in line.lower()
+            )
+            if data_offset is None:
                 return None, None
-                
-            # Buscar cabecera de columnas
-            for i, line in enumerate(lines):
-                if 'fecha' in line.lower() and 'estado' in line.lower():
-                    data_start = i + 1
-                    break
-            else:
-                data_start = 1
             
-            first_data = None
+            first_data = find_first(
+                (line for _, line in iter_head_lines(file_path, data_offset)), self._parse_rotativo_line_time
+            )
             last_data = None
-            
-            for line in lines[data_start:]:
-                if not line.strip():
-                    continue
-                parts = self._split_flexible(line)
-                if len(parts) >= 1:
-                    try:
-                        date_str = parts[0].replace('.', '').strip()
-                        if date_str and date_str != 'Fecha-Hora':
-                            dt = datetime.strptime(date_str, '%Y-%m-%d %H:%M:%S')
-                            if first_data is None:
-                                first_data = dt
-                            last_data = dt
-                    except Exception:
-                        continue
+            if first_data is not None:
+                last_data = find_first(iter_tail_lines(file_path, data_offset), self._parse_rotativo_line_time)
             
             # Si no hay datos, intentar parsear la fecha de la primera línea
             if first_data is None:
-                first_line = lines[0].strip()
+                first_line = read_first_line(file_path).strip()
                 if first_line.startswith('ROTATIVO;'):
                     parts = self._split_flexible(first_line)
                     if len(parts) >= 2:
@@ -590,52 +654,54 @@ class DobackProcessor:
         except Exception as e:
             logger.error(f"Error procesando ROTATIVO {file_path}: {e}")
             return None, None
+    
+    def _parse_rotativo_line_time(self, line: str) -> Optional[datetime]:
+        """Timestamp de una línea de datos ROTATIVO o None si no es válida."""
+        if not line.strip():
+            return None
+        parts = self._split_flexible(line)
+        try:
+            date_str = parts[0].replace('.', '').strip()
+            if date_str and date_str != 'Fecha-Hora':
+                return _ROTATIVO_PARSER.parse(date_str)
+        except Exception:
+            pass
+        return None
             
     def _extract_can_time_range(self, file_path: str) -> Tuple[Optional[datetime], Optional[datetime]]:
-        """Extrae rango temporal de archivo CAN."""
+        """Extrae rango temporal de archivo CAN leyendo solo cabecera y cola (o la columna timestamp del .npz)."""
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                lines = f.readlines()
+            if file_path.endswith(COLUMNAR_SUFFIX):
+                first, last = read_time_range(file_path)
+                return (first.item(), last.item()) if first is not None else (None, None)
             
-            # Buscar línea de cabecera CAN
+            # Buscar línea de cabecera CAN entre las primeras líneas
             session_start = None
-            for line in lines:
+            for index, (_, line) in enumerate(iter_head_lines(file_path)):
+                if index >= HEAD_SCAN_LINES:
+                    break
                 if line.strip().startswith('CAN\t'):
                     parts = line.strip().split('\t')
                     if len(parts) >= 2:
-                        date_str = parts[1].strip()
                         try:
-                            session_start = datetime.strptime(date_str, '%d/%m/%Y %I:%M:%S%p')
+                            session_start = datetime.strptime(parts[1].strip(), '%d/%m/%Y %I:%M:%S%p')
                             break
                         except Exception:
                             continue
-            # Buscar cabecera de columnas
-            data_start = None
-            for i, line in enumerate(lines):
-                if 'Timestamp' in line and 'length' in line:
-                    data_start = i + 1
-                    break
             
-            if data_start is None:
+            # Buscar cabecera de columnas
+            data_offset = find_data_offset(
+                file_path, lambda line: 'Timestamp' in line and 'length' in line, default_after_first=False
+            )
+            if data_offset is None:
                 return session_start, session_start
             
-            first_data = None
+            first_data = find_first(
+                (line for _, line in iter_head_lines(file_path, data_offset)), self._parse_can_line_time
+            )
             last_data = None
-            
-            for line in lines[data_start:]:
-                if not line.strip():
-                    continue
-                parts = self._split_flexible(line)
-                if len(parts) >= 1:
-                    try:
-                        date_str = parts[0].strip()
-                        if date_str and ('AM' in date_str or 'PM' in date_str):
-                            dt = datetime.strptime(date_str, '%d/%m/%Y %I:%M:%S%p')
-                            if first_data is None:
-                                first_data = dt
-                            last_data = dt
-                    except Exception:
-                        continue
+            if first_data is not None:
+                last_data = find_first(iter_tail_lines(file_path, data_offset), self._parse_can_line_time)
             
             # Si no se encontraron datos, usar la fecha de sesión
             if first_data is None and session_start:
@@ -647,7 +713,17 @@ class DobackProcessor:
             logger.error(f"Error procesando CAN {file_path}: {e}")
             return None, None
     
-    def scan_files_and_find_sessions(self) -> List[Dict]:
+    def _parse_can_line_time(self, line: str) -> Optional[datetime]:
+        """Timestamp de una línea de datos CAN decodificada o None si no es válida."""
+        if not line.strip():
+            return None
+        parts = self._split_flexible(line)
+        date_str = parts[0].strip()
+        if date_str and ('AM' in date_str or 'PM' in date_str):
+            return _DOBACK_PARSER.parse(date_str)
+        return None
+    
+    def scan_files_and_find_sessions(self, changed_paths: Optional[Set[str]] = None) -> List[Dict]:
         """
         Escanea archivos y encuentra sesiones con lógica mejorada.
         - Agrupa por vehículo y fecha
@@ -655,31 +731,40 @@ class DobackProcessor:
         - Acepta sesiones con archivos faltantes (mínimo estabilidad O GPS)
         - Prioridad: CAN > ESTABILIDAD > GPS como archivo base
         - Evita duplicados
+        
+        Args:
+            changed_paths: Si se indica, solo se buscan sesiones en los grupos
+                vehículo/fecha que contienen alguno de estos archivos (modo watch)
         """
         logger.info("🔍 Iniciando escaneo inteligente de archivos...")
         
-        # Cargar archivos desde caché o escanear
+        # Cargar archivos desde el manifiesto (solo se releen los cambiados)
         all_files = self._get_all_files()
+        self.all_files = all_files
         if not all_files:
             logger.warning("No se encontraron archivos para procesar")
             return []
         
-        # Agrupar archivos por vehículo y fecha
-        files_by_vehicle_date = self._group_files_by_vehicle_date(all_files)
+        # Índice por vehículo, fecha y tipo (compartido con session_matching)
+        self.file_index = FileIndex(all_files)
+        groups = self.file_index.groups()
+        if changed_paths is not None:
+            groups = [
+                group for group in groups
+                if any(file_info['path'] in changed_paths
+                       for files in group.files_by_type.values() for file_info in files)
+            ]
         
         # Encontrar sesiones para cada grupo
         sessions = []
         uploaded_sessions = self._load_uploaded_sessions()
         
-        for (vehicle, date), files in files_by_vehicle_date.items():
-            logger.info(f"📅 Procesando vehículo {vehicle} - {date}")
-        
-            # Agrupar archivos por tipo
-            files_by_type = self._group_files_by_type(files)
+        for group in groups:
+            logger.info(f"📅 Procesando vehículo {group.vehicle} - {group.date}")
             
             # Encontrar sesiones para este vehículo/fecha
             vehicle_sessions = self._find_sessions_for_vehicle_date(
-                vehicle, date, files_by_type, uploaded_sessions
+                group.vehicle, group.date, group.files_by_type, uploaded_sessions, group.indexes()
             )
             
             sessions.extend(vehicle_sessions)
@@ -687,51 +772,63 @@ class DobackProcessor:
         logger.info(f"✅ Encontradas {len(sessions)} sesiones válidas")
         return sessions
 
-    def _group_files_by_vehicle_date(self, files: List[Dict]) -> Dict[Tuple[str, str], List[Dict]]:
-        """Agrupa archivos por vehículo y fecha."""
-        grouped = {}
+    def process_sessions(self, changed_paths: Optional[Set[str]] = None, raise_on_failure: bool = False) -> int:
+        """
+        Escanea, aplica las correcciones GPS y sube las sesiones nuevas.
         
-        for file_info in files:
-            vehicle = file_info.get('vehicle', 'unknown')
-            date = file_info.get('date')
-            
-            if not date:
-                continue
-            
-            # Convertir a string de fecha si es datetime
-            if isinstance(date, datetime):
-                date_str = date.strftime('%Y-%m-%d')
-            else:
-                date_str = str(date)[:10]  # Tomar solo YYYY-MM-DD
+        Args:
+            changed_paths: Si se indica, solo se procesan los vehículo/fecha
+                afectados por estos archivos (ver scan_files_and_find_sessions)
+            raise_on_failure: Lanzar SessionProcessingError si algún grupo no
+                pudo consultarse en la base de datos o alguna sesión no se subió
+                (en lugar de dejarlo solo en el log), para poder reintentar
             
-            key = (vehicle, date_str)
-            if key not in grouped:
-                grouped[key] = []
-            grouped[key].append(file_info)
+        Returns:
+            Número de sesiones encontradas
+        """
+        self.session_failures = []
+        
+        # PASO 2: Escanear archivos y buscar sesiones
+        sessions = self.scan_files_and_find_sessions(changed_paths)
+        
+        # PASO 3: Aplicar correcciones de GPS para todos los vehículos
+        if sessions:
+            logger.info("🔧 Aplicando correcciones de offset GPS...")
+            vehicles = set(session['vehicle'] for session in sessions)
+            for vehicle in vehicles:
+                logger.info(f"  📍 Corrigiendo GPS para vehículo: {vehicle}")
+                corrections = self.apply_smart_gps_corrections(vehicle)
+                if corrections:
+                    logger.info(f"    ✅ Aplicadas {len(corrections)} correcciones para {vehicle}")
+                else:
+                    logger.info(f"    ℹ️  No se requieren correcciones para {vehicle}")
         
-        return grouped
-
-    def _group_files_by_type(self, files: List[Dict]) -> Dict[str, List[Dict]]:
-        """Agrupa archivos por tipo (CAN, GPS, ESTABILIDAD, ROTATIVO)."""
-        grouped = {'CAN': [], 'GPS': [], 'ESTABILIDAD': [], 'ROTATIVO': []}
+        # PASO 4: Subir sesiones
+        if not sessions:
+            logger.warning("No se encontraron sesiones para procesar.")
+        else:
+            logger.info(f"Sesiones encontradas: {len(sessions)}. Iniciando subida a base de datos...")
+            self.upload_sessions_to_database(sessions)
         
-        for file_info in files:
-            file_type = file_info.get('type')
-            if file_type in grouped:
-                grouped[file_type].append(file_info)
+        # Huellas de contenido calculadas para la caché de parseo durante la subida
+        self.manifest.save()
         
-        return grouped
+        if raise_on_failure and self.session_failures:
+            raise SessionProcessingError(self.session_failures)
+        return len(sessions)
 
     def _find_sessions_for_vehicle_date(
         self, 
         vehicle: str, 
         date: str, 
         files_by_type: Dict[str, List[Dict]], 
-        uploaded_sessions: Set[str]
+        uploaded_sessions: Set[str],
+        indexes: Optional[Dict[str, TemporalFileIndex]] = None
     ) -> List[Dict]:
         """
         Encuentra sesiones para un vehículo y fecha específicos.
         Usa lógica de emparejamiento inteligente con tolerancia temporal.
+        indexes: índices temporales por tipo ya construidos (p. ej. de FileIndex).
         """
         sessions = []
         
@@ -772,6 +869,7 @@ class DobackProcessor:
             conn.close()
         except Exception as e:
             logger.warning(f"No se pudo obtener vehicleId/organizationId para {vehicle}: {e}")
+            self.session_failures.append(f"{vehicle} {date}: {e}")
             return sessions
             
         # Crear sesiones basadas en archivos disponibles
@@ -791,9 +889,19 @@ class DobackProcessor:
             base_files = gps_files
             logger.info(f"  📍 Usando archivos GPS como base ({len(gps_files)} archivos)")
         
-        for base_file in base_files:
-            # Buscar archivos compatibles para esta sesión
-            session_files = self._find_compatible_files_for_base(base_file, files_by_type)
+        # Índice temporal por tipo, construido una vez para todos los archivos base
+        if indexes is None:
+            indexes = {file_type: TemporalFileIndex(files) for file_type, files in files_by_type.items()}
+        
+        # Buscar archivos compatibles para cada sesión
+        if self.assignment_mode == 'optimal':
+            matched_files = self._assign_files_one_to_one(base_files, files_by_type, indexes)
+        else:
+            matched_files = [
+                self._find_compatible_files_for_base(base_file, files_by_type, indexes) for base_file in base_files
+            ]
+        
+        for base_file, session_files in zip(base_files, matched_files):
             if not session_files:
                 continue
                 
@@ -863,64 +971,35 @@ class DobackProcessor:
                 logger.info(f"     ⚠️  Faltan: {session['missing_types']}")
         return sessions
     
-    def _find_compatible_files_for_base(self, base_file: Dict, files_by_type: Dict) -> Dict[str, Optional[Dict]]:
+    def _find_compatible_files_for_base(
+        self,
+        base_file: Dict,
+        files_by_type: Dict,
+        indexes: Optional[Dict[str, TemporalFileIndex]] = None
+    ) -> Dict[str, Optional[Dict]]:
         """
         Encuentra archivos compatibles para un archivo base específico.
-        Usa tolerancia temporal de ±15 minutos y busca el archivo más cercano.
-        El archivo base puede ser CAN, ESTABILIDAD o GPS.
+        Usa tolerancia temporal de ±SESSION_MATCH_TOLERANCE_MINUTES y busca el archivo más cercano
+        (ver session_matching.find_compatible_files).
         """
-        # Determinar el tipo del archivo base
-        base_type = base_file.get('type', 'CAN')
-        session_files = {'CAN': None, 'GPS': None, 'ESTABILIDAD': None, 'ROTATIVO': None}
-        
-        # Asignar el archivo base
-        session_files[base_type] = base_file
-        
-        base_start = base_file.get('start_time')
-        base_end = base_file.get('end_time')
-        
-        if not base_start or not base_end:
-            return session_files
-        
-        # Tolerancia temporal: ±15 minutos
-        tolerance_minutes = 15
-        tolerance_seconds = tolerance_minutes * 60
-        
-        # Buscar archivos compatibles para cada tipo (excepto el base)
-        for file_type in ['CAN', 'GPS', 'ESTABILIDAD', 'ROTATIVO']:
-            if file_type == base_type:
-                continue  # Ya asignado arriba
-                
-            type_files = files_by_type.get(file_type, [])
-            if not type_files:
-                continue
-            
-            best_file = None
-            best_score = float('inf')
-            
-            for file_info in type_files:
-                file_start = file_info.get('start_time')
-                file_end = file_info.get('end_time')
-                
-                if not file_start or not file_end:
-                    continue
-                
-                # Calcular proximidad temporal
-                score = self._calculate_temporal_proximity(
-                    base_start, base_end, file_start, file_end, tolerance_seconds
-                )
-                
-                if score is not None and score < best_score:
-                    best_score = score
-                    best_file = file_info
-            
-            if best_file:
-                session_files[file_type] = best_file
-                logger.debug(f"    📎 {file_type}: emparejado (score: {best_score:.1f}s)")
-            else:
-                logger.debug(f"    ❌ {file_type}: no encontrado archivo compatible")
+        tolerance = timedelta(minutes=SESSION_MATCH_TOLERANCE_MINUTES)
+        return find_compatible_files(base_file, files_by_type, tolerance, indexes)
+
+    def _assign_files_one_to_one(
+        self,
+        base_files: List[Dict],
+        files_by_type: Dict[str, List[Dict]],
+        indexes: Optional[Dict[str, TemporalFileIndex]] = None
+    ) -> List[Dict[str, Optional[Dict]]]:
+        """
+        Empareja los archivos base con los del resto de tipos sin repetir archivos
+        (ver session_matching.assign_files_one_to_one).
         
-        return session_files
+        Returns:
+            Archivos de la sesión de cada archivo base, en el orden de base_files
+        """
+        tolerance = timedelta(minutes=SESSION_MATCH_TOLERANCE_MINUTES)
+        return assign_files_one_to_one(base_files, files_by_type, tolerance, indexes)
 
     def _calculate_temporal_proximity(
         self, 
@@ -934,21 +1013,7 @@ class DobackProcessor:
         Calcula la proximidad temporal entre dos rangos de tiempo.
         Retorna None si están fuera de tolerancia, o la diferencia en segundos si están dentro.
         """
-        # Calcular diferencias entre inicios y finales
-        start_diff = abs((base_start - file_start).total_seconds())
-        end_diff = abs((base_end - file_end).total_seconds())
-        
-        # Si ambos están dentro de la tolerancia, usar la diferencia promedio
-        if start_diff <= tolerance_seconds and end_diff <= tolerance_seconds:
-            return (start_diff + end_diff) / 2
-        
-        # Si solo uno está dentro de tolerancia, verificar solapamiento
-        if start_diff <= tolerance_seconds or end_diff <= tolerance_seconds:
-            # Verificar si hay solapamiento real
-            if file_start <= base_end and file_end >= base_start:
-                return min(start_diff, end_diff)
-        
-        return None
+        return temporal_proximity(base_start, base_end, file_start, file_end, tolerance_seconds)
         
     def _generate_session_id(self, vehicle: str, date: str, base_file: Dict) -> str:
         """Genera un ID único para la sesión basado en el archivo base."""
@@ -994,96 +1059,44 @@ class DobackProcessor:
         except Exception as e:
             logger.error(f"Error guardando sesión subida {session_id}: {e}")
     
-    def detect_gps_offset(self, vehicle: str) -> Dict[str, bool]:
+    def detect_gps_offset(self, vehicle: str) -> Tuple[List[Dict], OffsetDetection]:
         """
         Detecta automáticamente si los archivos GPS están desfasados 2 horas.
         
+        Los inicios de los demás archivos del vehículo se ordenan una vez y se
+        cuentan con búsqueda binaria (ver gps_offset.detect_clock_offset).
+        
         Args:
             vehicle: Nombre del vehículo
             
         Returns:
-            Diccionario con archivos GPS y si necesitan corrección
+            (archivos GPS del vehículo, detección) con needs_correction y la
+            confianza por archivo en el orden de los archivos GPS, y el
+            desfase más frecuente del vehículo con su confianza
         """
-        # Filtrar archivos del vehículo
-        vehicle_files = [f for f in self.all_files if f['vehicle'] == vehicle]
-        
-        # Agrupar por tipo
-        files_by_type = {}
-        for file_info in vehicle_files:
-            file_type = file_info['type']
-            if file_type not in files_by_type:
-                files_by_type[file_type] = []
-            files_by_type[file_type].append(file_info)
-        
-        gps_corrections = {}
-        
-        if 'GPS' not in files_by_type:
-            return gps_corrections
-            
-        # Para cada archivo GPS, buscar archivos de otros tipos cercanos
-        for gps_file in files_by_type['GPS']:
-            gps_start = gps_file['start_time']
-            gps_name = gps_file['name']
-            
-            # Buscar archivos de otros tipos que estén cerca temporalmente
-            nearby_files = []
-            
-            for file_type in ['CAN', 'ESTABILIDAD', 'ROTATIVO']:
-                if file_type not in files_by_type:
-                    continue
-                    
-                for other_file in files_by_type[file_type]:
-                    other_start = other_file['start_time']
-                    
-                    # Calcular diferencia temporal
-                    time_diff = abs((gps_start - other_start).total_seconds() / 3600)  # en horas
-                    
-                    # Si están dentro del rango máximo, considerarlos cercanos
-                    if time_diff <= GPS_MAX_NEARBY_HOURS:
-                        nearby_files.append({
-                            'type': file_type,
-                            'file': other_file,
-                            'time_diff_hours': time_diff
-                        })
-            
-            # Analizar si hay un patrón de desfase de 2 horas
-            needs_correction = self._analyze_offset_pattern(gps_start, nearby_files)
-            gps_corrections[gps_name] = needs_correction
-            
+        gps_files = []
+        other_starts = []
+        for file_info in self.all_files:
+            if file_info['vehicle'] != vehicle:
+                continue
+            if file_info['type'] == 'GPS':
+                gps_files.append(file_info)
+            elif file_info['type'] in ('CAN', 'ESTABILIDAD', 'ROTATIVO'):
+                other_starts.append(file_info['start_time'])
+        
+        detection = detect_clock_offset(
+            to_epoch_seconds(f['start_time'] for f in gps_files), to_epoch_seconds(other_starts),
+            GPS_OFFSET_HOURS, GPS_TOLERANCE_MINUTES, GPS_MAX_NEARBY_HOURS
+        )
+        
+        if detection.offset_hours is not None:
+            logger.info(f"GPS {vehicle}: desfase más frecuente {detection.offset_hours:+.2f} h "
+                        f"(confianza {detection.confidence:.0%}, {detection.votes}/{detection.nearby_pairs} pares)")
+        for gps_file, needs_correction in zip(gps_files, detection.needs_correction):
             if needs_correction:
-                logger.info(f"GPS {gps_name}: Detectado desfase de {GPS_OFFSET_HOURS} horas")
-        
-        return gps_corrections
-    
-    def _analyze_offset_pattern(self, gps_start: datetime, nearby_files: List[Dict]) -> bool:
-        """
-        Analiza si hay un patrón de desfase de 2 horas.
-        
-        Args:
-            gps_start: Inicio del archivo GPS
-            nearby_files: Lista de archivos cercanos temporalmente
-            
-        Returns:
-            True si se detecta el patrón de desfase de 2 horas
-        """
-        if not nearby_files:
-            return False
-        
-        # Contar cuántos archivos están exactamente 2 horas después del GPS
-        offset_count = 0
-        total_nearby = len(nearby_files)
-        
-        for nearby in nearby_files:
-            other_start = nearby['file']['start_time']
-            time_diff_hours = (other_start - gps_start).total_seconds() / 3600
-            
-            # Verificar si está en el rango de 2 horas ± tolerancia
-            if abs(time_diff_hours - GPS_OFFSET_HOURS) <= (GPS_TOLERANCE_MINUTES / 60):
-                offset_count += 1
+                logger.info(f"GPS {gps_file['filename']}: Detectado desfase de {GPS_OFFSET_HOURS} horas")
         
-        # Si al menos el 50% de los archivos cercanos siguen el patrón de 2 horas
-        # y hay al menos 2 archivos cercanos, consideramos que hay desfase
-        return offset_count >= 2 and (offset_count / total_nearby) >= 0.5
+        return gps_files, detection
     
     def apply_smart_gps_corrections(self, vehicle: str) -> Dict[str, Dict]:
         """
@@ -1095,34 +1108,34 @@ class DobackProcessor:
         Returns:
             Diccionario con archivos GPS corregidos
         """
-        gps_corrections = self.detect_gps_offset(vehicle)
+        gps_files, detection = self.detect_gps_offset(vehicle)
         corrected_times = {}
         
         # Aplicar correcciones solo a los archivos que lo necesiten
-        for gps_name, needs_correction in gps_corrections.items():
-            if needs_correction:
-                # Encontrar el archivo GPS original
-                for file_info in self.all_files:
-                    if file_info['vehicle'] == vehicle and file_info['name'] == gps_name:
-                        # Aplicar corrección de +2 horas
-                        corrected_start = file_info['start_time'] + timedelta(hours=GPS_OFFSET_HOURS)
-                        corrected_end = file_info['end_time'] + timedelta(hours=GPS_OFFSET_HOURS)
-                        
-                        corrected_times[gps_name] = {
-                            'original_start': file_info['start_time'],
-                            'original_end': file_info['end_time'],
-                            'corrected_start': corrected_start,
-                            'corrected_end': corrected_end
-                        }
-                        
-                        logger.info(f"✅ CORREGIDO: {gps_name}")
-                        logger.info(f"  Original: {file_info['start_time']} - {file_info['end_time']}")
-                        logger.info(f"  Corregido: {corrected_start} - {corrected_end}")
-                        
-                        # Actualizar el archivo original con la corrección
-                        file_info['start_time'] = corrected_start
-                        file_info['end_time'] = corrected_end
-                        break
+        for file_info, needs_correction, confidence in zip(gps_files, detection.needs_correction,
+                                                           detection.file_confidence):
+            if not needs_correction:
+                continue
+            gps_name = file_info['filename']
+            # Aplicar corrección de +2 horas
+            corrected_start = file_info['start_time'] + timedelta(hours=GPS_OFFSET_HOURS)
+            corrected_end = file_info['end_time'] + timedelta(hours=GPS_OFFSET_HOURS)
+            
+            corrected_times[gps_name] = {
+                'original_start': file_info['start_time'],
+                'original_end': file_info['end_time'],
+                'corrected_start': corrected_start,
+                'corrected_end': corrected_end,
+                'confidence': float(confidence)
+            }
+            
+            logger.info(f"✅ CORREGIDO: {gps_name}")
+            logger.info(f"  Original: {file_info['start_time']} - {file_info['end_time']}")
+            logger.info(f"  Corregido: {corrected_start} - {corrected_end}")
+            
+            # Actualizar el archivo original con la corrección
+            file_info['start_time'] = corrected_start
+            file_info['end_time'] = corrected_end
         
         return corrected_times
     
@@ -1232,6 +1245,10 @@ class DobackProcessor:
                     for file_type, files in vehicle_files.items()
                 }
                 for vehicle, vehicle_files in vehicles.items()
+            },
+            'can_decode_errors': {
+                'failed_frames': sum(info['total'] for info in self.can_decode_errors.values()),
+                'ids': dict(sorted(self.can_decode_errors.items(), key=lambda item: -item[1]['total']))
             }
         }
         
@@ -1280,10 +1297,12 @@ class DobackProcessor:
                     logger.info(f"  ✅ Sesión {session_id} subida correctamente")
                 else:
                     stats['fallidas'] += 1
+                    self.session_failures.append(f"{session_id}: error de subida")
                     logger.error(f"  ❌ Error subiendo sesión {session_id}")
                 
             except Exception as e:
                 stats['fallidas'] += 1
+                self.session_failures.append(f"{session_id}: {e}")
                 logger.error(f"  ❌ Error procesando sesión {session_id}: {e}")
             
         # Reporte final
@@ -1386,42 +1405,75 @@ class DobackProcessor:
             return False
 
     def _get_all_files(self) -> List[Dict]:
-        """Carga todos los archivos desde caché o los escanea."""
-        # Intentar cargar desde cache primero
-        cached_files = self._load_cached_files()
-        if cached_files:
-            logger.info(f"📋 Cargados {len(cached_files)} archivos desde caché")
-            return cached_files
-        
-        # Escanear archivos si no hay cache válido
+        """
+        Devuelve todos los archivos con rango temporal válido.
+        
+        Usa el manifiesto incremental: los archivos cuyo tamaño, mtime y huella
+        no han cambiado se sirven desde el manifiesto; solo los nuevos o
+        modificados se vuelven a leer para extraer su rango temporal. Con
+        scan_workers > 1 la lectura se reparte por empresa/vehículo entre
+        varios procesos.
+        """
+        self.manifest.load()
+        
         logger.info("🔍 Escaneando archivos desde disco...")
-        all_files = []
+        seen_paths = set()
+        pending = {}
         
         for root, dirs, files in os.walk(DATA_DIR):
             for file in files:
-                if file.endswith(('.txt', '.csv')):
-                    file_path = os.path.join(root, file)
-                    file_type = self._get_file_type(file)
-                    start_time, end_time = self.extract_time_range_from_file(file_path, file_type)
-                    if start_time and end_time:  # Solo incluir archivos con rangos válidos
-                        all_files.append({
-                            'path': file_path,
-                            'filename': file,
-                            'date': start_time,  # Usar start_time como fecha de referencia
-                            'type': file_type,
-                            'vehicle': self._extract_vehicle_name(file_path),
-                            'start_time': start_time,
-                            'end_time': end_time
-                        })
-        
-        # Guardar en cache para futuras ejecuciones
-        self._save_cached_files(all_files)
+                if not file.endswith(('.txt', '.csv', COLUMNAR_SUFFIX)):
+                    continue
+                file_path = os.path.join(root, file)
+                if has_columnar_sibling(file_path):
+                    continue  # Exportación CSV de un CAN ya disponible en .npz
+                try:
+                    stat = os.stat(file_path)
+                except OSError as e:
+                    logger.warning(f"No se pudo acceder a {file_path}: {e}")
+                    continue
+                seen_paths.add(file_path)
+                
+                if self.manifest.lookup(file_path, stat) is None:
+                    pending[file_path] = stat
+        
+        if pending:
+            shards = group_by_shard(list(pending), DATA_DIR)
+            for shard_results in map_shards(_scan_shard, shards, self.scan_workers):
+                for file_path, info, fingerprint in shard_results:
+                    # Se registran también los archivos sin rango válido para no releerlos
+                    self.manifest.update(file_path, pending[file_path], info, fingerprint)
+        
+        self.manifest.prune(seen_paths)
+        self.manifest.save()
+        if self.parsed_cache:
+            self.parsed_cache.prune((entry.get('content_hash') for entry in self.manifest.entries.values()),
+                                    self._parsed_cache_types())
+        
+        stats = self.manifest.stats
+        logger.info(f"📋 Manifiesto: {stats['hits'] + stats['refreshed']} sin cambios, "
+                    f"{stats['misses']} leídos, {stats['removed']} eliminados")
+        
+        all_files = self.manifest.all_file_infos()
         logger.info(f"📋 Escaneados {len(all_files)} archivos totales")
         return all_files
+    
+    def _scan_file(self, file_path: str) -> Dict:
+        """Extrae tipo, vehículo y rango temporal de un archivo."""
+        file = os.path.basename(file_path)
+        file_type = self._get_file_type(file)
+        start_time, end_time = self.extract_time_range_from_file(file_path, file_type)
+        return {
+            'filename': file,
+            'type': file_type,
+            'vehicle': self._extract_vehicle_name(file_path),
+            'start_time': start_time,
+            'end_time': end_time
+        }
 
     def _get_file_type(self, filename: str) -> str:
         """Determina el tipo de archivo basado en el nombre."""
-        if filename.startswith('CAN_') and '_TRADUCIDO.csv' in filename:
+        if is_decoded_can_file(filename):
             return 'CAN'
         elif filename.startswith('GPS_'):
             return 'GPS'
@@ -1429,7 +1481,7 @@ class DobackProcessor:
             return 'ESTABILIDAD'
         elif filename.startswith('ROTATIVO_'):
             return 'ROTATIVO'
-                else:
+        else:
             return 'UNKNOWN'
     
     def _extract_vehicle_name(self, file_path: str) -> str:
@@ -1449,40 +1501,39 @@ class DobackProcessor:
         from geopy.distance import geodesic
         cur = conn.cursor()
         try:
+            # GPS (1 Hz) se carga entero: el filtro de outliers necesita los puntos vecinos
             gps_data = self._load_gps_data(file_path)
             # NO aplicar filtro temporal estricto para GPS - usar todos los puntos válidos
             # Filtrar puntos fuera de la Comunidad de Madrid
-            gps_data_valid = [point for point in gps_data if (
-                MADRID_BOUNDS['min_lat'] <= point['latitude'] <= MADRID_BOUNDS['max_lat'] and
-                MADRID_BOUNDS['min_lon'] <= point['longitude'] <= MADRID_BOUNDS['max_lon']
-            )]
+            lat, lon = gps_data['latitude'], gps_data['longitude']
+            gps_data_valid = gps_data.select(
+                (lat >= MADRID_BOUNDS['min_lat']) & (lat <= MADRID_BOUNDS['max_lat']) &
+                (lon >= MADRID_BOUNDS['min_lon']) & (lon <= MADRID_BOUNDS['max_lon'])
+            )
             # Filtro de outliers por distancia (20 metros)
             if len(gps_data_valid) > 2:
-                gps_filtrados = [gps_data_valid[0]]
+                lat, lon = gps_data_valid['latitude'].tolist(), gps_data_valid['longitude'].tolist()
+                keep = np.ones(len(gps_data_valid), dtype=bool)
                 for i in range(1, len(gps_data_valid)-1):
-                    prev = gps_data_valid[i-1]
-                    curr = gps_data_valid[i]
-                    next = gps_data_valid[i+1]
-                    dist_prev = geodesic((prev['latitude'], prev['longitude']), (curr['latitude'], curr['longitude'])).meters
-                    dist_next = geodesic((curr['latitude'], curr['longitude']), (next['latitude'], next['longitude'])).meters
+                    dist_prev = geodesic((lat[i-1], lon[i-1]), (lat[i], lon[i])).meters
+                    dist_next = geodesic((lat[i], lon[i]), (lat[i+1], lon[i+1])).meters
                     if dist_prev > 20 and dist_next > 20:
-                        continue  # Salta el outlier
-                    gps_filtrados.append(curr)
-                gps_filtrados.append(gps_data_valid[-1])
-                gps_data_valid = gps_filtrados
+                        keep[i] = False  # Salta el outlier
+                gps_data_valid = gps_data_valid.select(keep)
             if len(gps_data_valid) < 10:
                 logging.warning(f"Sesión {session_id}: solo {len(gps_data_valid)} puntos GPS válidos en Madrid (de {len(gps_data)})")
-            for point in gps_data_valid:
+            fields = ['latitude', 'longitude', 'altitude', 'speed', 'num_sats', 'hdop', 'timestamp', 'fix']
+            for latitude, longitude, altitude, speed, num_sats, hdop, timestamp, fix in gps_data_valid.iter_tuples(fields):
                 cur.execute("""
                     INSERT INTO "GpsMeasurement" (
                         id, latitude, longitude, altitude, speed, satellites, quality, "sessionId", 
                         "createdAt", hdop, timestamp, "updatedAt", fix, heading, accuracy
                     ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
                 """, (
-                    str(uuid.uuid4()), point['latitude'], point['longitude'], point['altitude'], 
-                    point['speed'], point['num_sats'], point.get('quality', 'N/A'), session_id,
-                    datetime.now(), point.get('hdop', 0), point['timestamp'],
-                    datetime.now(), point.get('fix', 'N/A'), point.get('heading', 0), point.get('accuracy', 0)
+                    str(uuid.uuid4()), latitude, longitude, altitude,
+                    speed, num_sats, 'N/A', session_id,
+                    datetime.now(), hdop, timestamp,
+                    datetime.now(), fix, 0, 0
                 ))
             logging.info(f"    Subidos {len(gps_data_valid)} puntos GPS válidos (descartados {len(gps_data)-len(gps_data_valid)})")
         finally:
@@ -1490,144 +1541,156 @@ class DobackProcessor:
     
     def _upload_stability_data(self, conn, session_id: str, file_path: str, session_start=None, session_end=None, gps_data=None, can_data=None) -> None:
         """
-        Sube datos de estabilidad a la base de datos, calcula métricas y eventos igual que la subida manual.
+        Sube datos de estabilidad a la base de datos, calcula eventos igual que la subida manual.
+        El archivo se procesa por bloques (parseo -> eventos -> filtro -> inserción) con memoria acotada.
         """
         cur = conn.cursor()
         try:
-            # Inicializar datos GPS y CAN si no se pasan
-            if gps_data is None:
-                gps_data = []
-            if can_data is None:
-                can_data = []
-                
-            measurements, metrics, events = self._parse_stability_file_and_analyze(file_path)
-            logger.info(f"    Generados {len(events)} eventos de estabilidad")
-            if len(events) > 0:
-                logger.info(f"    Rango eventos: {events[0]['timestamp']} a {events[-1]['timestamp']}")
-            if session_start and session_end:
-                measurements = [point for point in measurements if session_start <= point['timestamp'] <= session_end]
-            for point in measurements:
-                cur.execute("""
-                    INSERT INTO "StabilityMeasurement" (
-                        id, "sessionId", timestamp, ax, ay, az, gx, gy, gz,
-                        roll, pitch, yaw, temperature, "timeantwifi", "isDRSHigh", 
-                        "isLTRCritical", "isLateralGForceHigh", "createdAt", "updatedAt",
-                        accmag, microsds, si, usciclo1, usciclo2, usciclo3, usciclo4,
-                        usciclo5, usciclo6, usciclo7, usciclo8
-                    ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                """, (
-                    str(uuid.uuid4()), session_id, point['timestamp'],
-                    point['ax'], point['ay'], point['az'],
-                    point['gx'], point['gy'], point['gz'],
-                    point.get('roll'), point.get('pitch'), point.get('yaw'),
-                    point.get('temperature'), point.get('timeantwifi', 0),
-                    point.get('isDRSHigh', False), point.get('isLTRCritical', False),
-                    point.get('isLateralGForceHigh', False), datetime.now(), datetime.now(),
-                    point.get('accmag', 0), point.get('microsds', 0), point.get('si', 0),
-                    point.get('usciclo1', 0), point.get('usciclo2', 0), point.get('usciclo3', 0),
-                    point.get('usciclo4', 0), point.get('usciclo5', 0), point.get('usciclo6', 0),
-                    point.get('usciclo7', 0), point.get('usciclo8', 0)
-                ))
-            logger.info(f"    Subidos {len(measurements)} puntos de estabilidad")
-            # Subir eventos de estabilidad en stability_events
-            for event in events:
-                # Buscar datos GPS más cercanos al timestamp del evento
-                closest_gps = None
-                min_diff = float('inf')
-                for gps_point in gps_data:
-                    diff = abs((event['timestamp'] - gps_point['timestamp']).total_seconds())
-                    if diff < min_diff and diff < 30:  # 30 segundos máximo
-                        min_diff = diff
-                        closest_gps = gps_point
-                if not closest_gps:
-                    logger.warning(f"No se encontró GPS cercano para evento {event['id']} en {event['timestamp']}")
-                # Buscar datos CAN más cercanos
-                closest_can = None
-                min_diff = float('inf')
-                for can_point in can_data:
-                    diff = abs((event['timestamp'] - can_point['timestamp']).total_seconds())
-                    if diff < min_diff and diff < 5:
-                        min_diff = diff
-                        closest_can = can_point
-                
-                # Preparar coordenadas GPS
-                lat = closest_gps['latitude'] if closest_gps else 0.0
-                lon = closest_gps['longitude'] if closest_gps else 0.0
-                
-                # Convertir severity a level (formato manual)
-                severity_to_level = {
-                    'critical': 'critico',
-                    'danger': 'peligroso', 
-                    'moderate': 'moderado'
-                }
-                
-                # Preparar tipos de evento
-                event_types = [event['type']]
-                if event.get('subtype'):
-                    event_types.append(event['subtype'])
-                
-                # Preparar valores de estabilidad
-                stability_values = {}
-                if 'measurement' in event:
-                    m = event['measurement']
-                    stability_values = {
-                        'si': m.get('si', 0),
-                        'roll': m.get('roll', 0),
-                        'ay': m.get('ay', 0),
-                        'yaw': m.get('gz', 0)  # gz es yaw rate
-                    }
-                
-                # Preparar datos CAN
-                can_data = {}
-                if closest_can:
-                    can_data = {
-                        'engineRPM': closest_can.get('engineRpm', 0),
-                        'vehicleSpeed': closest_can.get('vehicleSpeed', 0),
-                        'rotativo': closest_can.get('rotativo', False)
-                    }
-                
-                cur.execute("""
-                    INSERT INTO stability_events (
-                        id, session_id, timestamp, lat, lon, type, details
-                    ) VALUES (%s, %s, %s, %s, %s, %s, %s)
-                """, (
-                    event['id'], session_id, event['timestamp'],
-                    lat, lon,
-                    event['type'],
-                    json.dumps({
-                        'level': severity_to_level.get(event['severity'], 'moderado'),
-                        'perc': int(event.get('value', 0) * 100),  # Convertir a porcentaje entero
-                        'tipos': event_types,
-                        'valores': stability_values,
-                        'can': can_data
-                    })
-                ))
-            logger.info(f"    Subidos {len(events)} eventos de estabilidad")
+            fields = [
+                'timestamp', 'ax', 'ay', 'az', 'gx', 'gy', 'gz', 'roll', 'pitch', 'yaw',
+                'temperature', 'timeantwifi', 'isDRSHigh', 'isLTRCritical', 'isLateralGForceHigh',
+                'accmag', 'microsds', 'si', 'usciclo1', 'usciclo2', 'usciclo3', 'usciclo4',
+                'usciclo5', 'usciclo6', 'usciclo7', 'usciclo8'
+            ]
+            total_measurements = 0
+            total_events = 0
+            first_event_time = last_event_time = None
+            previous = None
+            chunks = self._iter_chunks_safe(self._iter_stability_chunks(file_path), 'de estabilidad', file_path)
+            for chunk in chunks:
+                # Los eventos se detectan sobre el bloque completo, con la última fila del anterior como contexto
+                events = self._detect_stability_events(chunk, previous)
+                if len(chunk):
+                    previous = chunk.tail()
+                if events:
+                    first_event_time = first_event_time or events[0]['timestamp']
+                    last_event_time = events[-1]['timestamp']
+                measurements = chunk.between(session_start, session_end) if session_start and session_end else chunk
+                self._insert_stability_measurements(cur, session_id, measurements, fields)
+                self._insert_stability_events(cur, session_id, events, gps_data, can_data)
+                total_measurements += len(measurements)
+                total_events += len(events)
+            logger.info(f"    Generados {total_events} eventos de estabilidad")
+            if total_events > 0:
+                logger.info(f"    Rango eventos: {first_event_time} a {last_event_time}")
+            logger.info(f"    Subidos {total_measurements} puntos de estabilidad")
+            logger.info(f"    Subidos {total_events} eventos de estabilidad")
         finally:
             cur.close()
     
+    def _insert_stability_measurements(self, cur, session_id: str, measurements: MeasurementColumns,
+                                       fields: List[str]) -> None:
+        """Inserta las mediciones de estabilidad de un bloque."""
+        for values in measurements.iter_tuples(fields):
+            cur.execute("""
+                INSERT INTO "StabilityMeasurement" (
+                    id, "sessionId", timestamp, ax, ay, az, gx, gy, gz,
+                    roll, pitch, yaw, temperature, "timeantwifi", "isDRSHigh", 
+                    "isLTRCritical", "isLateralGForceHigh", "createdAt", "updatedAt",
+                    accmag, microsds, si, usciclo1, usciclo2, usciclo3, usciclo4,
+                    usciclo5, usciclo6, usciclo7, usciclo8
+                ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+            """, (
+                str(uuid.uuid4()), session_id, *values[:15], datetime.now(), datetime.now(), *values[15:]
+            ))
+    
+    def _insert_stability_events(self, cur, session_id: str, events: List[Dict],
+                                 gps_data: Optional[MeasurementColumns] = None,
+                                 can_data: Optional[MeasurementColumns] = None) -> None:
+        """Sube eventos de estabilidad en stability_events con el GPS y CAN más cercanos."""
+        for event in events:
+            event_ms = to_epoch_ms(event['timestamp'])
+            # Buscar datos GPS más cercanos al timestamp del evento (30 segundos máximo)
+            closest_gps = None
+            if gps_data is not None:
+                index = gps_data.nearest(event_ms, 30 * 1000)
+                closest_gps = gps_data.row(index) if index is not None else None
+            if not closest_gps:
+                logger.warning(f"No se encontró GPS cercano para evento {event['id']} en {event['timestamp']}")
+            # Buscar datos CAN más cercanos
+            closest_can = None
+            if can_data is not None:
+                index = can_data.nearest(event_ms, 5 * 1000)
+                closest_can = can_data.row(index) if index is not None else None
+            
+            # Preparar coordenadas GPS
+            lat = closest_gps['latitude'] if closest_gps else 0.0
+            lon = closest_gps['longitude'] if closest_gps else 0.0
+            
+            # Convertir severity a level (formato manual)
+            severity_to_level = {
+                'critical': 'critico',
+                'danger': 'peligroso', 
+                'moderate': 'moderado'
+            }
+            
+            # Preparar tipos de evento
+            event_types = [event['type']]
+            if event.get('subtype'):
+                event_types.append(event['subtype'])
+            
+            # Preparar valores de estabilidad
+            stability_values = {}
+            if 'measurement' in event:
+                m = event['measurement']
+                stability_values = {
+                    'si': m.get('si', 0),
+                    'roll': m.get('roll', 0),
+                    'ay': m.get('ay', 0),
+                    'yaw': m.get('gz', 0)  # gz es yaw rate
+                }
+            
+            # Preparar datos CAN
+            can_values = {}
+            if closest_can:
+                can_values = {
+                    'engineRPM': closest_can.get('engineRpm', 0),
+                    'vehicleSpeed': closest_can.get('vehicleSpeed', 0),
+                    'rotativo': closest_can.get('rotativo', False)
+                }
+            
+            cur.execute("""
+                INSERT INTO stability_events (
+                    id, session_id, timestamp, lat, lon, type, details
+                ) VALUES (%s, %s, %s, %s, %s, %s, %s)
+            """, (
+                event['id'], session_id, event['timestamp'],
+                lat, lon,
+                event['type'],
+                json.dumps({
+                    'level': severity_to_level.get(event['severity'], 'moderado'),
+                    'perc': int(event.get('value', 0) * 100),  # Convertir a porcentaje entero
+                    'tipos': event_types,
+                    'valores': stability_values,
+                    'can': can_values
+                })
+            ))
+    
     def _upload_can_data(self, conn, session_id: str, file_path: str, session_start=None, session_end=None) -> None:
-        """Sube datos CAN a la base de datos solo dentro del rango de la sesión."""
+        """Sube los datos CAN remuestreados (una fila por segundo) solo dentro del rango de la sesión, bloque a bloque."""
         cur = conn.cursor()
         try:
-            can_data = self._load_can_data(file_path)
-            if session_start and session_end:
-                can_data = [point for point in can_data if session_start <= point['timestamp'] <= session_end]
-            for point in can_data:
-                cur.execute("""
-                    INSERT INTO "CanMeasurement" (
-                        id, "sessionId", timestamp, "engineRpm", "vehicleSpeed", "fuelSystemStatus",
-                        temperature, "createdAt", "updatedAt", "absActive", "brakePressure", 
-                        "espActive", "gearPosition", "steeringAngle", "throttlePosition"
-                    ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                """, (
-                    str(uuid.uuid4()), session_id, point['timestamp'],
-                    point['engineRpm'], point['vehicleSpeed'], point['fuelSystemStatus'],
-                    point.get('temperature'), datetime.now(), datetime.now(),
-                    point.get('absActive'), point.get('brakePressure'), point.get('espActive'),
-                    point.get('gearPosition'), point.get('steeringAngle'), point.get('throttlePosition')
-                ))
-            logger.info(f"    Subidos {len(can_data)} puntos CAN")
+            uploaded_count = 0
+            for can_data in self._iter_chunks_safe(self._iter_can_chunks(file_path), 'CAN', file_path):
+                if session_start and session_end:
+                    can_data = can_data.between(session_start, session_end)
+                for point in can_data:
+                    value = lambda column: to_db_value(column, point.get(column))
+                    cur.execute("""
+                        INSERT INTO "CanMeasurement" (
+                            id, "sessionId", timestamp, "engineRpm", "vehicleSpeed", "fuelSystemStatus",
+                            temperature, "createdAt", "updatedAt", "absActive", "brakePressure", 
+                            "espActive", "gearPosition", "steeringAngle", "throttlePosition"
+                        ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                    """, (
+                        str(uuid.uuid4()), session_id, point['timestamp'],
+                        value('engineRpm'), value('vehicleSpeed'), value('fuelSystemStatus'),
+                        value('temperature'), datetime.now(), datetime.now(),
+                        value('absActive'), value('brakePressure'), value('espActive'),
+                        value('gearPosition'), value('steeringAngle'), value('throttlePosition')
+                    ))
+                uploaded_count += len(can_data)
+            logger.info(f"    Subidos {uploaded_count} puntos CAN")
         finally:
             cur.close()
     
@@ -1640,426 +1703,415 @@ class DobackProcessor:
         try:
             import psycopg2
             import psycopg2.errorcodes
-            # Intentar usar _load_rotativo_data si existe, si no, parseo directo
-            if hasattr(self, '_load_rotativo_data'):
-                data = self._load_rotativo_data(file_path)
-            else:
-                data = []
-                with open(file_path, 'r', encoding='utf-8') as file:
-                    lines = file.readlines()
-                # Buscar cabecera de columnas
-                data_start = 0
-                for i, line in enumerate(lines):
-                    if 'Fecha-Hora' in line and 'Estado' in line:
-                        data_start = i + 1
-                        break
-                for line in lines[data_start:]:
-                    line = line.strip()
-                    if not line:
-                        continue
-                    parts = [p.strip() for p in line.split(';')]
-                    if len(parts) >= 2:
-                    try:
-                            timestamp = datetime.strptime(parts[0], '%Y-%m-%d %H:%M:%S')
-                            state = parts[1]  # 1/0, encendido/apagado
-                            data.append({'timestamp': timestamp, 'state': state})
-                    except Exception:
-                        continue
-            if session_start and session_end:
-                data = [d for d in data if session_start <= d['timestamp'] <= session_end]
             uploaded_count = 0
-            for d in data:
-                try:
-                cur.execute('''
-                        INSERT INTO "RotativoMeasurement" (id, "sessionId", timestamp, state, "createdAt", "updatedAt")
-                        VALUES (%s, %s, %s, %s, %s, %s)
-                ''', (
-                        str(uuid.uuid4()), session_id, d['timestamp'], d['state'], datetime.now(), datetime.now()
-                ))
-                    uploaded_count += 1
-                except psycopg2.Error as e:
-                    if e.pgcode == psycopg2.errorcodes.UNIQUE_VIOLATION:
-                        logger.warning(f"    ⚠️  Punto duplicado ignorado: {session_id} {d['timestamp']}")
-                        conn.rollback()
-                        continue
-                    else:
-                        logger.error(f"    ❌ Error SQL en punto rotativo: {e}")
-                        conn.rollback()
-                        continue
+            for data in self._iter_chunks_safe(self._iter_rotativo_chunks(file_path), 'rotativo', file_path):
+                if session_start and session_end:
+                    data = data.between(session_start, session_end)
+                for timestamp, state in data.iter_tuples(['timestamp', 'state']):
+                    try:
+                        cur.execute('''
+                            INSERT INTO "RotativoMeasurement" (id, "sessionId", timestamp, state, "createdAt", "updatedAt")
+                            VALUES (%s, %s, %s, %s, %s, %s)
+                        ''', (
+                            str(uuid.uuid4()), session_id, timestamp, state, datetime.now(), datetime.now()
+                        ))
+                        uploaded_count += 1
+                    except psycopg2.Error as e:
+                        if e.pgcode == psycopg2.errorcodes.UNIQUE_VIOLATION:
+                            logger.warning(f"    ⚠️  Punto duplicado ignorado: {session_id} {timestamp}")
+                            conn.rollback()
+                            continue
+                        else:
+                            logger.error(f"    ❌ Error SQL en punto rotativo: {e}")
+                            conn.rollback()
+                            continue
             logger.info(f"    Subidos {uploaded_count} puntos rotativo")
         finally:
             cur.close()
     
-    def _load_gps_data(self, file_path: str) -> List[Dict]:
-        """Carga datos GPS desde un archivo CSV/TXT. Tolerante a columnas extra, mapea solo campos requeridos y loguea filas descartadas con motivo."""
-        try:
-            data = []
-            logger.info(f"DEBUG: Iniciando carga GPS desde {file_path}")
-            with open(file_path, 'r', encoding='utf-8') as file:
-                lines = file.readlines()
-            logger.info(f"DEBUG: Archivo GPS leído, {len(lines)} líneas totales")
-            logger.info(f"DEBUG: Procesando {len(lines)-2} líneas de datos GPS")
-            lines_processed = 0
-            lines_valid = 0
-            lines_discarded = 0
-            for line_num, line in enumerate(lines[2:], 3):
+    def _load_gps_data(self, file_path: str) -> MeasurementColumns:
+        """Carga un archivo GPS completo (ver _iter_gps_chunks)."""
+        return self._load_chunks(self._iter_gps_chunks(file_path), 'GPS', file_path, GPS_DTYPES)
+    
+    def _parse_gps_chunks(self, file_path: str) -> Iterator[MeasurementColumns]:
+        """
+        Lee datos GPS desde un archivo CSV/TXT por bloques. Tolerante a columnas extra, mapea solo
+        campos requeridos y resume las filas descartadas por motivo en un ParseReport al final.
+        """
+        data_offset = find_data_offset(file_path, lambda line: line.lower().startswith('fecha'))
+        if data_offset is None:
+            return
+        report = ParseReport(file_path, 'GPS')
+        line_num = line_number_at(file_path, data_offset) - 1
+        for lines in iter_line_chunks(file_path, data_offset, self.chunk_bytes):
+            timestamps = []
+            line_nums = []
+            columns = {name: [] for name in GPS_DTYPES}
+            for line in lines:
+                line_num += 1
                 line = line.strip()
                 if not line:
                     continue
-                lines_processed += 1
+                report.lines_processed += 1
                 if 'sin datos GPS' in line:
-                    logger.warning(f"    ⚠️ Línea {line_num} descartada (sin datos GPS): {line}")
-                    lines_discarded += 1
+                    report.discard('sin datos GPS', line_num, line)
                     continue
                 parts = [p.strip() for p in re.split(r'[,;]', line)]
                 if len(parts) < 9:
-                    logger.warning(f"    ⚠️ Línea {line_num} descartada (campos insuficientes): {parts}")
-                    lines_discarded += 1
+                    report.discard('campos insuficientes', line_num, line)
                     continue
-                    try:
-                        lat = float(parts[2])
-                        lon = float(parts[3])
-                        if not (-90 <= lat <= 90) or not (-180 <= lon <= 180) or (lat == 0 and lon == 0):
-                        logger.warning(f"    ⚠️ Línea {line_num} descartada (lat/lon fuera de rango o nulos): {lat}, {lon}")
-                        lines_discarded += 1
-                            continue
-                        alt = float(parts[4]) if parts[4] else 0.0
-                        hdop = float(parts[5]) if parts[5] else 0.0
-                        fix = int(parts[6]) if parts[6] else 0
-                        num_sats = int(parts[7]) if parts[7] else 0
-                        speed = float(parts[8]) if parts[8] else 0.0
-                        date_str = parts[0]
-                        time_str = parts[1]
-                        datetime_str = f"{date_str} {time_str}"
-                        timestamp = datetime.strptime(datetime_str, "%d/%m/%Y %H:%M:%S")
-                        data.append({
-                            'timestamp': timestamp,
-                            'latitude': lat,
-                            'longitude': lon,
-                            'altitude': alt,
-                            'hdop': hdop,
-                            'fix': fix,
-                            'num_sats': num_sats,
-                            'speed': speed
-                        })
-                        lines_valid += 1
-                    except (ValueError, IndexError) as e:
-                    logger.warning(f"    ⚠️ Línea {line_num} descartada (error de parseo): {e} | {parts}")
-                    lines_discarded += 1
-                        continue
-            logger.info(f"DEBUG: GPS procesado - {lines_processed} líneas procesadas, {lines_valid} válidas, {lines_discarded} descartadas")
-            logger.info(f"Cargados {len(data)} puntos GPS válidos de {file_path}")
-            return data
-        except Exception as e:
-            logger.error(f"Error cargando datos GPS de {file_path}: {e}")
-            return []
-    
-    def _load_stability_data(self, file_path: str) -> List[Dict]:
-        """Carga datos de estabilidad desde un archivo CSV/TXT. Tolerante a columnas extra, mapea solo campos requeridos y loguea filas descartadas con motivo."""
-        try:
-            data = []
-            logger.info(f"DEBUG: Iniciando carga de estabilidad desde {file_path}")
-            with open(file_path, 'r', encoding='utf-8') as file:
-                lines = file.readlines()
-            logger.info(f"DEBUG: Archivo leído, {len(lines)} líneas totales")
-            if len(lines) < 3:
-                logger.warning(f"Archivo de estabilidad muy corto: {file_path}")
-                return []
-            header_parts = lines[0].strip().split(';')
-            logger.info(f"DEBUG: Cabecera parseada: {header_parts}")
-            if len(header_parts) >= 2:
                 try:
-                    base_timestamp_str = header_parts[1].strip()
-                    logger.info(f"DEBUG: Timestamp base: {base_timestamp_str}")
-                    base_timestamp = datetime.strptime(base_timestamp_str, '%d/%m/%Y %I:%M:%S%p')
-                    logger.info(f"DEBUG: Timestamp parseado: {base_timestamp}")
-                except ValueError as e:
-                    logger.warning(f"Error parseando timestamp de cabecera: {base_timestamp_str} - {e}")
-                    return []
-            else:
-                logger.warning(f"Cabecera de estabilidad inválida: {lines[0]}")
-                return []
-            current_timestamp = base_timestamp
-            sample_count = 0
-            lines_processed = 0
-            lines_valid = 0
-            lines_discarded = 0
-            logger.info(f"DEBUG: Procesando {len(lines)-2} líneas de datos")
-            for line_num, line in enumerate(lines[2:], 3):
-                line = line.strip()
-                if not line:
-                    continue
-                lines_processed += 1
-                if re.match(r'^\d{1,2}:\d{2}:\d{2}(AM|PM)$', line):
-                    try:
-                        time_part = datetime.strptime(line, '%I:%M:%S%p').time()
-                        current_timestamp = current_timestamp.replace(
-                            hour=time_part.hour, 
-                            minute=time_part.minute, 
-                            second=time_part.second
-                        )
-                        logger.info(f"DEBUG: Nueva marca de tiempo: {line} -> {current_timestamp}")
-                        continue
-                    except ValueError:
+                    lat = float(parts[2])
+                    lon = float(parts[3])
+                    if not (-90 <= lat <= 90) or not (-180 <= lon <= 180) or (lat == 0 and lon == 0):
+                        report.discard('lat/lon fuera de rango o nulos', line_num, line)
                         continue
-                parts = line.split(';')
-                if len(parts) < 19:
-                    logger.warning(f"    ⚠️ Línea {line_num} descartada (campos insuficientes): {parts}")
-                    lines_discarded += 1
+                    alt = float(parts[4]) if parts[4] else 0.0
+                    hdop = float(parts[5]) if parts[5] else 0.0
+                    fix = int(parts[6]) if parts[6] else 0
+                    num_sats = int(parts[7]) if parts[7] else 0
+                    speed = float(parts[8]) if parts[8] else 0.0
+                    date_str = parts[0]
+                    time_str = parts[1]
+                    timestamps.append(f"{date_str} {time_str}")
+                    line_nums.append(line_num)
+                    for name, value in zip(GPS_DTYPES, (lat, lon, alt, hdop, fix, num_sats, speed)):
+                        columns[name].append(value)
+                except (ValueError, IndexError):
+                    report.discard('error de parseo', line_num, line)
                     continue
-                        try:
-                            ax, ay, az = float(parts[0]), float(parts[1]), float(parts[2])
-                            gx, gy, gz = float(parts[3]), float(parts[4]), float(parts[5])
-                            roll, pitch, yaw = float(parts[6]), float(parts[7]), float(parts[8])
-                            si = float(parts[15])
-                except (ValueError, IndexError) as e:
-                    logger.warning(f"    ⚠️ Línea {line_num} descartada (error parseando valores): {e} | {parts}")
-                    lines_discarded += 1
-                                continue
-                if not all(-500 <= val <= 500 for val in [ax, ay]):
-                    logger.warning(f"    ⚠️ Línea {line_num} descartada (ax/ay fuera de rango): {ax}, {ay}")
-                    lines_discarded += 1
-                                continue
-                if not (900 <= az <= 1100):
-                    logger.warning(f"    ⚠️ Línea {line_num} descartada (az fuera de rango): {az}")
-                    lines_discarded += 1
-                    continue
-                if not all(-2000 <= val <= 2000 for val in [gx, gy, gz]):
-                    logger.warning(f"    ⚠️ Línea {line_num} descartada (gx/gy/gz fuera de rango): {gx}, {gy}, {gz}")
-                    lines_discarded += 1
-                                continue
-                            if not all(-180 <= val <= 180 for val in [roll, pitch, yaw]):
-                    logger.warning(f"    ⚠️ Línea {line_num} descartada (roll/pitch/yaw fuera de rango): {roll}, {pitch}, {yaw}")
-                    lines_discarded += 1
-                                continue
-                            if not (0 <= si <= 1):
-                    logger.warning(f"    ⚠️ Línea {line_num} descartada (si fuera de rango): {si}")
-                    lines_discarded += 1
-                                continue
-                        stability_point = {
-                    'timestamp': current_timestamp + timedelta(milliseconds=sample_count * 100),
-                    'ax': ax,
-                    'ay': ay,
-                    'az': az,
-                    'gx': gx,
-                    'gy': gy,
-                    'gz': gz,
-                    'roll': roll,
-                    'pitch': pitch,
-                    'yaw': yaw,
-                    'temperature': None,
-                    'timeantwifi': float(parts[9]) if len(parts) > 9 else 0,
-                    'isDRSHigh': False,
-                    'isLTRCritical': False,
-                    'isLateralGForceHigh': False,
-                    'accmag': float(parts[16]) if len(parts) > 16 else 0,
-                    'microsds': float(parts[17]) if len(parts) > 17 else 0,
-                    'si': si,
-                    'usciclo1': float(parts[10]) if len(parts) > 10 else 0,
-                    'usciclo2': float(parts[11]) if len(parts) > 11 else 0,
-                    'usciclo3': float(parts[12]) if len(parts) > 12 else 0,
-                    'usciclo4': float(parts[13]) if len(parts) > 13 else 0,
-                    'usciclo5': float(parts[14]) if len(parts) > 14 else 0,
-                    'usciclo6': 0,
-                    'usciclo7': 0,
-                    'usciclo8': 0
-                        }
-                        data.append(stability_point)
-                        sample_count += 1
-                        lines_valid += 1
-                if sample_count <= 3:
-                            logger.info(f"DEBUG: Punto {sample_count} válido: ax={ax}, ay={ay}, az={az}, si={si}")
-            logger.info(f"DEBUG: Procesamiento completado: {lines_processed} líneas procesadas, {lines_valid} válidas, {lines_discarded} descartadas")
-            logger.info(f"Cargados {len(data)} puntos de estabilidad de {file_path}")
-            return data
-        except Exception as e:
-            logger.error(f"Error cargando datos de estabilidad de {file_path}: {e}")
-            return []
+            # Conversión vectorizada de la columna de fecha/hora; las filas inválidas se descartan
+            parsed = parse_column(timestamps, GPS_FORMAT)
+            valid = ~np.isnat(parsed)
+            self._report_invalid_timestamps(report, valid, timestamps, line_nums)
+            yield MeasurementColumns.from_lists(parsed, columns, GPS_DTYPES).select(valid)
+        report.emit()
     
-    def _load_can_data(self, file_path: str) -> List[Dict]:
-        """Carga datos CAN desde un archivo CSV/TXT."""
+    def _iter_gps_chunks(self, file_path: str) -> Iterator[MeasurementColumns]:
+        """Bloques del archivo GPS desde la caché de parseo (o parseando y guardando, ver _parse_gps_chunks)."""
+        return self._iter_cached('GPS', file_path, self._parse_gps_chunks, GPS_DTYPES)
+    
+    def _load_stability_data(self, file_path: str) -> MeasurementColumns:
+        """Carga un archivo de estabilidad completo (ver _iter_stability_chunks)."""
+        return self._load_chunks(
+            self._iter_stability_chunks(file_path), 'de estabilidad', file_path, STABILITY_DTYPES, STABILITY_CONSTANTS
+        )
+    
+    def _parse_stability_chunks(self, file_path: str) -> Iterator[MeasurementColumns]:
+        """
+        Lee datos de estabilidad desde un archivo CSV/TXT por bloques con el parser vectorizado.
+        Tolerante a columnas extra; las filas descartadas se resumen en un ParseReport al final.
+        """
+        report = ParseReport(file_path, 'ESTABILIDAD')
         try:
-            data = []
-            logger.info(f"DEBUG: Iniciando carga CAN desde {file_path}")
-            
-            with open(file_path, 'r', encoding='utf-8') as file:
-                lines = file.readlines()
-                
-            logger.info(f"DEBUG: Archivo CAN leído, {len(lines)} líneas totales")
-            
-            # Buscar línea de cabecera CAN
-            session_start = None
+            for result in iter_stability_chunks(file_path, self.chunk_bytes):
+                report.lines_processed += result.lines_processed
+                report.lines_valid += result.size
+                report.merge_counts(result.discarded)
+                for reason, line_num, line in result.discard_samples:
+                    report.add_sample(reason, line_num, line)
+                columns = result.columns
+                yield MeasurementColumns(
+                    columns['timestamp'].astype(np.int64),
+                    {name: columns[name] for name in STABILITY_COLUMNS},
+                    STABILITY_CONSTANTS,
+                )
+        except ValueError as e:
+            logger.warning(f"Archivo de estabilidad no válido {file_path}: {e}")
+            return
+        report.emit()
+    
+    def _iter_stability_chunks(self, file_path: str) -> Iterator[MeasurementColumns]:
+        """Bloques del archivo ESTABILIDAD desde la caché de parseo (o parseando y guardando, ver _parse_stability_chunks)."""
+        return self._iter_cached('ESTABILIDAD', file_path, self._parse_stability_chunks, STABILITY_DTYPES, STABILITY_CONSTANTS)
+    
+    def _load_can_data(self, file_path: str) -> MeasurementColumns:
+        """Carga un archivo CAN completo (ver _iter_can_chunks)."""
+        return self._load_chunks(self._iter_can_chunks(file_path), 'CAN', file_path, CAN_DTYPES)
+    
+    def _parse_can_chunks(self, file_path: str) -> Iterator[MeasurementColumns]:
+        """
+        Lee las señales de un CAN_*_TRADUCIDO.csv por bloques y las devuelve
+        remuestreadas (ver _resample_can); los descartes se resumen en un ParseReport.
+        """
+        # Buscar cabecera de columnas
+        is_header = lambda line: 'Timestamp' in line and 'length' in line
+        data_offset = find_data_offset(file_path, is_header, default_after_first=False)
+        if data_offset is None:
+            logger.warning(f"No se encontró cabecera de datos en {file_path}")
+            return
+        header = self._split_flexible(next(line for _, line in iter_head_lines(file_path) if is_header(line)))
+        mapped = {name for mapping in CAN_SIGNAL_MAPPINGS for name in mapping.signals}
+        signal_index = {name: index for index, name in enumerate(header) if name in mapped}
+        
+        report = ParseReport(file_path, 'CAN')
+        line_num = line_number_at(file_path, data_offset) - 1
+        can_formats = [DOBACK_FORMAT, ROTATIVO_FORMAT]
+        timestamp_format = None
+        stamps = []
+        signals = {name: [] for name in signal_index}
+        
+        for lines in iter_line_chunks(file_path, data_offset, self.chunk_bytes):
+            timestamps = []
+            line_nums = []
+            values = {name: [] for name in signal_index}
             for line in lines:
-                if line.strip().startswith('CAN\t'):
-                    parts = line.strip().split('\t')
-                    if len(parts) >= 2:
-                        date_str = parts[1].strip()
-                        try:
-                            session_start = datetime.strptime(date_str, '%d/%m/%Y %I:%M:%S%p')
-                            break
-                        except Exception:
-                            continue
-            
-            # Buscar cabecera de columnas
-            data_start = None
-            for i, line in enumerate(lines):
-                if 'Timestamp' in line and 'length' in line:
-                    data_start = i + 1
-                    break
-            
-            if data_start is None:
-                logger.warning(f"No se encontró cabecera de datos en {file_path}")
-                return []
-            
-            logger.info(f"DEBUG: Procesando {len(lines)-data_start} líneas de datos CAN")
-            lines_processed = 0
-            lines_valid = 0
-            
-            for line in lines[data_start:]:
+                line_num += 1
                 line = line.strip()
                 if not line:
                     continue
                     
-                lines_processed += 1
+                report.lines_processed += 1
                 parts = self._split_flexible(line)
                 
-                if len(parts) >= 3:  # Mínimo: timestamp, length, data
-                    try:
-                        # Parsear timestamp
-                        timestamp_str = parts[0].strip()
-                        if 'AM' in timestamp_str or 'PM' in timestamp_str:
-                        timestamp = datetime.strptime(timestamp_str, '%d/%m/%Y %I:%M:%S%p')
-                        else:
-                            # Intentar otros formatos
-                            timestamp = datetime.strptime(timestamp_str, '%Y-%m-%d %H:%M:%S')
-                        
-                        # Parsear otros campos
-                        length = int(parts[1]) if parts[1].isdigit() else 0
-                        can_data = parts[2] if len(parts) > 2 else ''
-                        
-                        data.append({
-                            'timestamp': timestamp,
-                            'length': length,
-                            'data': can_data
-                        })
-                        lines_valid += 1
-                        
-                except (ValueError, IndexError) as e:
-                        # Saltar líneas con errores de formato
+                if len(parts) < 3:  # Mínimo: timestamp, length, data
+                    report.discard('campos insuficientes', line_num, line)
                     continue
-                        
-            logger.info(f"DEBUG: CAN procesado - {lines_processed} líneas procesadas, {lines_valid} válidas")
-            logger.info(f"Cargados {len(data)} puntos CAN válidos de {file_path}")
-            return data
-            
-        except Exception as e:
-            logger.error(f"Error cargando datos CAN de {file_path}: {e}")
-            return []
+                # Guardar el texto de las señales (timestamp y valores se convierten al final, por columna)
+                timestamps.append(parts[0].strip())
+                line_nums.append(line_num)
+                for name, index in signal_index.items():
+                    values[name].append(parts[index] if index < len(parts) else '')
+            
+            # Formato detectado una vez por archivo; las líneas que no encajan se reintentan con el otro
+            if timestamp_format is None and timestamps:
+                timestamp_format = sniff_format(timestamps, can_formats) or DOBACK_FORMAT
+            parsed = parse_column(
+                timestamps, timestamp_format or DOBACK_FORMAT, [fmt for fmt in can_formats if fmt != timestamp_format]
+            )
+            valid = ~np.isnat(parsed)
+            self._report_invalid_timestamps(report, valid, timestamps, line_nums)
+            stamps.append(parsed[valid].astype('datetime64[ms]').astype(np.int64))
+            for name in signal_index:
+                signals[name].append(pd.to_numeric(pd.Series(values[name], dtype=object)[valid], errors='coerce')
+                                     .to_numpy(dtype=np.float64))
+        report.emit()
+        if stamps:
+            yield from self._resample_can(
+                np.concatenate(stamps), {name: np.concatenate(parts) for name, parts in signals.items()}
+            )
     
-    def _load_rotativo_data(self, file_path: str) -> List[Dict]:
-        """Carga datos rotativos desde un archivo CSV/TXT."""
-        try:
-            data = []
-            logger.info(f"DEBUG: Iniciando carga rotativo desde {file_path}")
-            
-            with open(file_path, 'r', encoding='utf-8') as file:
-                lines = file.readlines()
-                
-            logger.info(f"DEBUG: Archivo rotativo leído, {len(lines)} líneas totales")
-            
-            # Buscar cabecera de columnas
-            data_start = None
-            for i, line in enumerate(lines):
-                if 'fecha' in line.lower() and 'estado' in line.lower():
-                    data_start = i + 1
-                    break
-            else:
-                data_start = 1  # Si no se encuentra cabecera, empezar desde la línea 1
-            
-            logger.info(f"DEBUG: Procesando {len(lines)-data_start} líneas de datos rotativo")
-            lines_processed = 0
-            lines_valid = 0
-            
-            for line in lines[data_start:]:
+    def _iter_columnar_can_chunks(self, file_path: str) -> Iterator[MeasurementColumns]:
+        """
+        Bloques remuestreados de un CAN_*_TRADUCIDO.npz (ver _resample_can). Ya
+        es columnar, así que no pasa por la caché de parseo.
+        """
+        timestamps, columns, meta = load_decoded_can(file_path)
+        valid = ~np.isnat(timestamps)
+        report = ParseReport(file_path, 'CAN')
+        report.lines_processed = len(timestamps)
+        report.lines_valid = int(np.count_nonzero(valid))
+        invalid = np.flatnonzero(~valid)
+        if len(invalid):
+            report.discard('fecha/hora no válida', int(invalid[0]) + 1, '', count=len(invalid))
+        report.emit()
+        yield from self._resample_can(
+            timestamps[valid].astype(np.int64), {name: columns[name][valid] for name in meta['senales']}
+        )
+    
+    def _resample_can(self, timestamps_ms: np.ndarray, signals: Dict[str, np.ndarray]) -> Iterator[MeasurementColumns]:
+        """
+        Señales DBC de todo el archivo -> columnas de CanMeasurement a periodo
+        fijo (CAN_RESAMPLE_SECONDS, 1 s), según CAN_SIGNAL_MAPPINGS.
+        """
+        stamps, columns = resample_signals(timestamps_ms, signals, CAN_SIGNAL_MAPPINGS)
+        resampled = MeasurementColumns(stamps, columns)
+        for start in range(0, len(resampled), PARSED_CACHE_CHUNK_ROWS):
+            yield resampled.select(slice(start, start + PARSED_CACHE_CHUNK_ROWS))
+    
+    def _iter_can_chunks(self, file_path: str) -> Iterator[MeasurementColumns]:
+        """Bloques del archivo CAN desde el .npz o la caché de parseo (o parseando y guardando, ver _parse_can_chunks)."""
+        if file_path.endswith(COLUMNAR_SUFFIX):
+            return self._iter_columnar_can_chunks(file_path)
+        # El remuestreo depende de la correspondencia de señales: entradas de caché distintas por configuración
+        return self._iter_cached('CAN', file_path, self._parse_can_chunks, CAN_DTYPES,
+                                 config=mappings_digest(CAN_SIGNAL_MAPPINGS))
+    
+    def _load_rotativo_data(self, file_path: str) -> MeasurementColumns:
+        """Carga un archivo rotativo completo (ver _iter_rotativo_chunks)."""
+        return self._load_chunks(self._iter_rotativo_chunks(file_path), 'rotativo', file_path, ROTATIVO_DTYPES)
+    
+    def _parse_rotativo_chunks(self, file_path: str) -> Iterator[MeasurementColumns]:
+        """Lee datos rotativos desde un archivo CSV/TXT por bloques; los descartes se resumen en un ParseReport."""
+        # Buscar cabecera de columnas; si no se encuentra, empezar desde la línea 1
+        data_offset = find_data_offset(file_path, lambda line: 'fecha' in line.lower() and 'estado' in line.lower())
+        if data_offset is None:
+            return
+        
+        report = ParseReport(file_path, 'ROTATIVO')
+        line_num = line_number_at(file_path, data_offset) - 1
+        
+        for lines in iter_line_chunks(file_path, data_offset, self.chunk_bytes):
+            timestamps = []
+            line_nums = []
+            columns = {name: [] for name in ROTATIVO_DTYPES}
+            for line in lines:
+                line_num += 1
                 line = line.strip()
                 if not line:
                     continue
                     
-                lines_processed += 1
+                report.lines_processed += 1
                 parts = self._split_flexible(line)
                 
-                if len(parts) >= 2:  # Mínimo: timestamp, valor
-                    try:
-                        # Parsear timestamp
-                        timestamp_str = parts[0].replace('.', '').strip()
-                        if timestamp_str and timestamp_str != 'Fecha-Hora':
-                            timestamp = datetime.strptime(timestamp_str, '%Y-%m-%d %H:%M:%S')
-                            
-                            # Parsear valor y estado
-                            value = float(parts[1]) if len(parts) > 1 and parts[1].replace('.', '').replace('-', '').isdigit() else 0.0
-                            status = parts[2] if len(parts) > 2 else 'UNKNOWN'
-                            
-                            data.append({
-                                'timestamp': timestamp,
-                                'value': value,
-                                'status': status
-                            })
-                            lines_valid += 1
-                        
-                    except (ValueError, IndexError) as e:
-                        # Saltar líneas con errores de formato
-                        continue
-                        
-            logger.info(f"DEBUG: Rotativo procesado - {lines_processed} líneas procesadas, {lines_valid} válidas")
-            logger.info(f"Cargados {len(data)} puntos rotativo válidos de {file_path}")
-            return data
-            
+                if len(parts) < 2:  # Mínimo: timestamp, valor
+                    report.discard('campos insuficientes', line_num, line)
+                    continue
+                timestamp_str = parts[0].replace('.', '').strip()
+                if not timestamp_str or timestamp_str == 'Fecha-Hora':
+                    report.discard('sin fecha/hora', line_num, line)
+                    continue
+                # Parsear valor y estado (el timestamp se convierte al final, por columna)
+                try:
+                    value = float(parts[1]) if parts[1].replace('.', '').replace('-', '').isdigit() else 0.0
+                except ValueError:
+                    report.discard('error de parseo', line_num, line)
+                    continue
+                status = parts[2] if len(parts) > 2 else 'UNKNOWN'
+                
+                timestamps.append(timestamp_str)
+                line_nums.append(line_num)
+                columns['state'].append(parts[1])  # 1/0, encendido/apagado
+                columns['value'].append(value)
+                columns['status'].append(status)
+            
+            parsed = parse_column(timestamps, ROTATIVO_FORMAT)
+            valid = ~np.isnat(parsed)
+            self._report_invalid_timestamps(report, valid, timestamps, line_nums)
+            yield MeasurementColumns.from_lists(parsed, columns, ROTATIVO_DTYPES).select(valid)
+        report.emit()
+    
+    def _iter_rotativo_chunks(self, file_path: str) -> Iterator[MeasurementColumns]:
+        """Bloques del archivo ROTATIVO desde la caché de parseo (o parseando y guardando, ver _parse_rotativo_chunks)."""
+        return self._iter_cached('ROTATIVO', file_path, self._parse_rotativo_chunks, ROTATIVO_DTYPES)
+    
+    def _report_invalid_timestamps(self, report: ParseReport, valid, timestamps: List[str],
+                                   line_nums: List[int]) -> None:
+        """Suma al informe las filas válidas de un bloque y descarta las de fecha/hora no parseable."""
+        report.lines_valid += int(np.count_nonzero(valid))
+        invalid = np.flatnonzero(~valid)
+        if len(invalid):
+            first = int(invalid[0])
+            report.discard('fecha/hora no válida', line_nums[first], timestamps[first], count=len(invalid))
+            for index in invalid[1:MAX_SAMPLES_PER_REASON].tolist():
+                report.add_sample('fecha/hora no válida', line_nums[index], timestamps[index])
+    
+    def _parsed_cache_types(self) -> List[str]:
+        """Tipos de la caché de parseo con los parsers y la configuración actuales."""
+        return [parsed_cache_type(file_type, mappings_digest(CAN_SIGNAL_MAPPINGS) if file_type == 'CAN' else None)
+                for file_type in PARSER_VERSIONS]
+    
+    def _iter_cached(self, file_type: str, file_path: str, parse, dtypes: Dict,
+                     constants: Optional[Dict] = None, config: Optional[str] = None) -> Iterator[MeasurementColumns]:
+        """
+        Sirve un archivo desde la caché de parseo si su contenido no ha cambiado.
+        En un fallo se parsea con parse(file_path) y los bloques se guardan según se leen.
+        """
+        if self.parsed_cache is None:
+            yield from parse(file_path)
+            return
+        # Clave: huella del contenido completo (la del manifiesto solo mira inicio y fin)
+        content_hash = self.manifest.content_hash(file_path)
+        cache_type = parsed_cache_type(file_type, config)
+        cached = self.parsed_cache.load(cache_type, content_hash)
+        if cached is not None:
+            for start in range(0, len(cached), PARSED_CACHE_CHUNK_ROWS):
+                yield cached.select(slice(start, start + PARSED_CACHE_CHUNK_ROWS))
+            return
+        yield from self.parsed_cache.store_chunks(
+            cache_type, content_hash, parse(file_path), dtypes, constants, source=file_path
+        )
+    
+    def _load_chunks(self, chunks: Iterator[MeasurementColumns], label: str, file_path: str,
+                     dtypes: Dict, constants: Optional[Dict] = None) -> MeasurementColumns:
+        """Une todos los bloques de un loader; ante un error de lectura devuelve un contenedor vacío."""
+        try:
+            return MeasurementColumns.concat(list(chunks), dtypes, constants)
         except Exception as e:
-            logger.error(f"Error cargando datos rotativo de {file_path}: {e}")
-            return []
+            logger.error(f"Error cargando datos {label} de {file_path}: {e}")
+            return MeasurementColumns.empty(dtypes, constants)
+    
+    def _iter_chunks_safe(self, chunks: Iterator[MeasurementColumns], label: str,
+                          file_path: str) -> Iterator[MeasurementColumns]:
+        """Itera los bloques de un loader; un error de lectura se registra y corta el streaming."""
+        try:
+            yield from chunks
+        except Exception as e:
+            logger.error(f"Error cargando datos {label} de {file_path}: {e}")
     
     def _parse_stability_file_and_analyze(self, file_path: str):
         """
         Parsea el archivo de estabilidad, calcula métricas y detecta eventos críticos avanzados.
         Devuelve: measurements, metrics, events
         """
-        import numpy as np
         measurements = self._load_stability_data(file_path)
         metrics = {}
-        events = []
         
-        if not measurements:
-            return [], {}, []
+        if not len(measurements):
+            return measurements, {}, []
         
         # Calcular métricas básicas
         for key in ['ax', 'ay', 'az', 'gx', 'gy', 'gz', 'si', 'roll', 'pitch', 'yaw']:
-            values = [m[key] for m in measurements if key in m and m[key] is not None]
-            if values:
-                metrics[f'{key}_mean'] = float(np.mean(values))
-                metrics[f'{key}_std'] = float(np.std(values))
-                metrics[f'{key}_min'] = float(np.min(values))
-                metrics[f'{key}_max'] = float(np.max(values))
-        
-        # Calcular derivadas para detección de cambios bruscos
-        if len(measurements) > 1:
-            for i in range(1, len(measurements)):
-                dt = (measurements[i]['timestamp'] - measurements[i-1]['timestamp']).total_seconds()
-                if dt > 0:
-                    # Derivadas de giroscopio
-                    dgx_dt = (measurements[i]['gx'] - measurements[i-1]['gx']) / dt
-                    dgy_dt = (measurements[i]['gy'] - measurements[i-1]['gy']) / dt
-                    dgz_dt = (measurements[i]['gz'] - measurements[i-1]['gz']) / dt
-                    
-                    measurements[i]['dgx_dt'] = dgx_dt
-                    measurements[i]['dgy_dt'] = dgy_dt
-                    measurements[i]['dgz_dt'] = dgz_dt
+            values = measurements[key]
+            metrics[f'{key}_mean'] = float(np.mean(values))
+            metrics[f'{key}_std'] = float(np.std(values))
+            metrics[f'{key}_min'] = float(np.min(values))
+            metrics[f'{key}_max'] = float(np.max(values))
+        
+        events = self._detect_stability_events(measurements)
+            
+        # Calcular estadísticas de eventos
+        event_types = [e['type'] for e in events]
+        event_counts = {}
+        for event_type in set(event_types):
+            event_counts[event_type] = event_types.count(event_type)
+        
+        metrics['event_counts'] = event_counts
+        metrics['total_events'] = len(events)
+            
+        logger.info(f"Detectados {len(events)} eventos de estabilidad avanzados")
+        for event_type, count in event_counts.items():
+            logger.info(f"  - {event_type}: {count} eventos")
         
-        # Detectar eventos avanzados
-        for i, m in enumerate(measurements):
+        return measurements, metrics, events
+    
+    def _detect_stability_events(self, measurements: MeasurementColumns,
+                                 previous: Optional[MeasurementColumns] = None) -> List[Dict]:
+        """
+        Detecta eventos de estabilidad en un bloque de mediciones.
+        
+        previous son las últimas filas del bloque anterior cuando el archivo se
+        procesa por streaming: sirven de contexto para derivadas y variaciones
+        pero no generan eventos.
+        """
+        events = []
+        start = 0
+        if previous is not None and len(previous):
+            start = len(previous)
+            measurements = MeasurementColumns.concat([previous, measurements], STABILITY_DTYPES, STABILITY_CONSTANTS)
+        if len(measurements) <= start:
+            return events
+        
+        # Calcular derivadas de giroscopio para detección de cambios bruscos (solo donde dt > 0)
+        dt = np.diff(measurements.timestamps) / 1000.0
+        has_derivative = np.concatenate([[False], dt > 0])
+        derivatives = {}
+        for key in ['gx', 'gy', 'gz']:
+            values = np.zeros(len(measurements))
+            with np.errstate(divide='ignore', invalid='ignore'):
+                values[1:] = np.where(dt > 0, np.diff(measurements[key]) / dt, 0.0)
+            derivatives[f'd{key}_dt'] = values
+        si, gx, gz = measurements['si'], measurements['gx'], measurements['gz']
+        
+        # Detectar eventos avanzados: SOLO cuando SI < 50%, el resto de filas no se recorre
+        for i in np.flatnonzero(si[start:] * 100 < 50).tolist():
+            i += start
+            m = measurements.row(i)
+            if has_derivative[i]:
+                m.update({key: float(values[i]) for key, values in derivatives.items()})
             # Convertir SI de decimal a porcentaje (0-1 -> 0-100)
             si_percent = m['si'] * 100
             
-            # SOLO generar eventos cuando SI < 50%
             if si_percent < 50:
                 # 1. EVENTO PRINCIPAL: riesgo_de_vuelco (SIEMPRE presente cuando SI < 50%)
                 if si_percent < 10:
@@ -2146,7 +2198,7 @@ class DobackProcessor:
                 
                 # CAMBIO DE CARGA (roll alto Y variación de SI > ±10%)
                 if i > 0 and abs(m['roll']) > 15:
-                    si_variation = abs(m['si'] - measurements[i-1]['si']) / measurements[i-1]['si'] * 100
+                    si_variation = abs(m['si'] - float(si[i-1])) / float(si[i-1]) * 100
                     if si_variation > 10:
                         events.append({
                             'id': str(uuid.uuid4()),
@@ -2161,8 +2213,8 @@ class DobackProcessor:
                 
                 # ZONA INESTABLE (picos/variaciones rápidas en gz + gx)
                 if i > 0:
-                    gz_variation = abs(m['gz'] - measurements[i-1]['gz'])
-                    gx_variation = abs(m['gx'] - measurements[i-1]['gx'])
+                    gz_variation = abs(m['gz'] - float(gz[i-1]))
+                    gx_variation = abs(m['gx'] - float(gx[i-1]))
                     if gz_variation > 50 and gx_variation > 50:
                         events.append({
                             'id': str(uuid.uuid4()),
@@ -2201,49 +2253,44 @@ class DobackProcessor:
                     })
             
             # NO generar eventos cuando SI >= 50% (conducción estable)
-            
-        # Calcular estadísticas de eventos
-        event_types = [e['type'] for e in events]
-        event_counts = {}
-        for event_type in set(event_types):
-            event_counts[event_type] = event_types.count(event_type)
-        
-        metrics['event_counts'] = event_counts
-        metrics['total_events'] = len(events)
-            
-        logger.info(f"Detectados {len(events)} eventos de estabilidad avanzados")
-        for event_type, count in event_counts.items():
-            logger.info(f"  - {event_type}: {count} eventos")
         
-        return measurements, metrics, events
+        return events
+
+# Procesador reutilizado por cada proceso del pool de escaneo
+_scan_processor = None
+
+def _scan_shard(file_paths: List[str]) -> List[Tuple[str, Dict, str]]:
+    """Escanea los archivos de un fragmento empresa/vehículo (ejecutado en el pool)."""
+    global _scan_processor
+    if _scan_processor is None:
+        _scan_processor = DobackProcessor(scan_workers=1)
+    results = []
+    for file_path in sorted(file_paths):
+        info = _scan_processor._scan_file(file_path)
+        results.append((file_path, info, compute_fingerprint(file_path)))
+    return results
 
 if __name__ == "__main__":
-    logger.info("=== INICIO DEL PROCESADOR DOBACK SOFT ===")
-        processor = DobackProcessor()
-    
-    # PASO 1: Decodificar archivos CAN
-    processor.decode_can_files()
-    
-    # PASO 2: Escanear archivos y buscar sesiones
-    sessions = processor.scan_files_and_find_sessions()
+    parser = argparse.ArgumentParser(description='Procesador Doback Soft')
+    parser.add_argument('--watch', action='store_true',
+                        help='Modo continuo: procesa y sube los archivos nuevos según van llegando')
+    parser.add_argument('--interval', type=float, default=None,
+                        help='Segundos entre sondeos en modo continuo (por defecto WATCH_POLL_SECONDS)')
+    parser.add_argument('--assignment', choices=ASSIGNMENT_MODES, default=None,
+                        help='Emparejamiento de archivos: greedy u optimal (uno a uno; por defecto SESSION_ASSIGNMENT)')
+    args = parser.parse_args()
     
-    # PASO 3: Aplicar correcciones de GPS para todos los vehículos
-    if sessions:
-        logger.info("🔧 Aplicando correcciones de offset GPS...")
-        vehicles = set(session['vehicle'] for session in sessions)
-        for vehicle in vehicles:
-            logger.info(f"  📍 Corrigiendo GPS para vehículo: {vehicle}")
-            corrections = processor.apply_smart_gps_corrections(vehicle)
-            if corrections:
-                logger.info(f"    ✅ Aplicadas {len(corrections)} correcciones para {vehicle}")
-            else:
-                logger.info(f"    ℹ️  No se requieren correcciones para {vehicle}")
+    logger.info("=== INICIO DEL PROCESADOR DOBACK SOFT ===")
+    processor = DobackProcessor(assignment_mode=args.assignment)
     
-    if not sessions:
-        logger.warning("No se encontraron sesiones para procesar.")
+    if args.watch:
+        from ingest_watcher import IngestWatcher
+        IngestWatcher(processor, DATA_DIR, poll_interval=args.interval).run()
     else:
-        logger.info(f"Sesiones encontradas: {len(sessions)}. Iniciando subida a base de datos...")
-        processor.upload_sessions_to_database(sessions)
+        # PASO 1: Decodificar archivos CAN
+        processor.decode_can_files()
+        
+        # PASOS 2-4: Sesiones, correcciones GPS y subida
+        processor.process_sessions()
     
     logger.info("=== FIN DEL PROCESADOR DOBACK SOFT ===")
-    
\ No newline at end of file
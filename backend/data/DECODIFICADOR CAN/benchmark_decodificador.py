@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+"""
+Benchmark del decodificador CAN unificado con capturas sintéticas.
+
+Genera logs reproducibles (misma semilla, mismo archivo) con el formato de
+texto que lee leer_tramas / leer_archivo_mixto:
+
+    CAN;07/07/2025 05:21:42PM;DOBACK999;5;0;
+    07/07/2025 05:21:42PM   can0  0CF00400   [8]  FF 7D 7D 00 00 FF FF 9A
+
+para J1939 (doback_custom.dbc) y OBD2 (respuestas 7E8 del servicio 01), y
+mide por separado cada etapa de DecodificadorCAN.decodificar_archivo:
+
+    lectura        leer_tramas
+    identificacion identificar_protocolo + cargar_dbc (desde dbc_cache)
+    decodificacion decodificar_can
+    escritura      guardar_resultados (.npz, y CSV con --csv)
+
+Para cada etapa se muestra el mejor tiempo de --repeticiones pasadas, las
+tramas/s y el pico de memoria que asigna la propia etapa sobre lo que ya
+estaba en memoria (tracemalloc, en una pasada aparte para no distorsionar
+los tiempos).
+
+Uso:
+    python benchmark_decodificador.py
+    python benchmark_decodificador.py --protocolo J1939 --tramas 1000000
+    python benchmark_decodificador.py --mezcla 0CF00400:5,18FEF100:1,18FEE900:1 --desconocidos 0.01
+    python benchmark_decodificador.py --protocolo OBD2 --pids 0C,0D,05 --repeticion 0.5 --dedup
+"""
+
+import io
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+import tracemalloc
+from contextlib import redirect_stdout
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.resolve()))
+from decodificador_can_unificado import DecodificadorCAN, leer_tramas
+
+# Mezclas por defecto: ID CAN -> peso relativo (proporciones de las capturas reales)
+MEZCLA_J1939 = {'0CF00400': 5, '18FEF100': 1}
+MEZCLA_OBD2 = {'7E8': 1}
+PIDS_OBD2 = ('0C', '0D', '05', '11', '2F', '04', '0F', '10')
+ID_DESCONOCIDO = '18FFAA00'  # Fuera del DBC y del mapeo J1939: ejercita la ruta de errores
+TRAMAS_POR_SEGUNDO = 100  # Frecuencia de la captura sintética
+TRAMAS_POR_CABECERA = 50000  # Una línea de cabecera CAN cada tantas tramas, como en los logs reales
+INICIO_CAPTURA = datetime(2025, 7, 7, 17, 21, 42)
+ETAPAS = ('lectura', 'identificacion', 'decodificacion', 'escritura')
+
+def parsear_mezcla(texto):
+    """'0CF00400:5,18FEF100:1' -> {'0CF00400': 5.0, '18FEF100': 1.0} (sin peso = 1)."""
+    mezcla = {}
+    for parte in texto.split(','):
+        id_can, _, peso = parte.strip().partition(':')
+        mezcla[id_can.upper()] = float(peso) if peso else 1.0
+    return mezcla
+
+def generar_log_sintetico(ruta, protocolo='J1939', tramas=100000, mezcla=None, pids=PIDS_OBD2,
+                          desconocidos=0.0, repeticion=0.0, semilla=0, vehiculo='DOBACK999'):
+    """
+    Escribe un log CAN sintético en ruta y devuelve su tamaño en bytes.
+
+    Args:
+        mezcla: ID CAN (hex) -> peso relativo; por defecto MEZCLA_J1939 u MEZCLA_OBD2
+        pids: PIDs (hex) del servicio 01 para las respuestas OBD2
+        desconocidos: Fracción de tramas con un ID fuera del DBC
+        repeticion: Probabilidad de que una trama repita los datos de la anterior
+            de su mismo ID (vehículo parado; ver el modo deduplicado)
+    """
+    azar = random.Random(semilla)
+    mezcla = mezcla or (MEZCLA_OBD2 if protocolo == 'OBD2' else MEZCLA_J1939)
+    ids = list(mezcla)
+    pesos = [mezcla[id_can] for id_can in ids]
+    ultimos = {}
+    with open(ruta, 'w', encoding='utf-8', newline='\n') as f:
+        for indice in range(tramas):
+            instante = (INICIO_CAPTURA + timedelta(seconds=indice // TRAMAS_POR_SEGUNDO)).strftime('%d/%m/%Y %I:%M:%S%p')
+            if indice % TRAMAS_POR_CABECERA == 0:
+                f.write(f"CAN;{instante};{vehiculo};5;{indice // TRAMAS_POR_CABECERA};\n")
+            id_can = ID_DESCONOCIDO if azar.random() < desconocidos else azar.choices(ids, pesos)[0]
+            if id_can in ultimos and azar.random() < repeticion:
+                datos = ultimos[id_can]
+            elif protocolo == 'OBD2':
+                # Respuesta de 4 bytes útiles al servicio 01: longitud, 0x41, PID y datos
+                datos = bytes([4, 0x41, int(azar.choice(pids), 16)] + [azar.getrandbits(8) for _ in range(5)])
+            else:
+                datos = bytes(azar.getrandbits(8) for _ in range(8))
+            ultimos[id_can] = datos
+            f.write(f"{instante}   can0  {id_can:>8}   [{len(datos)}]  {' '.join(f'{b:02X}' for b in datos)}\n")
+    return os.path.getsize(ruta)
+
+def _medir_etapas(archivo, decodificador):
+    """Una pasada por las etapas de decodificar_archivo: (segundos por etapa, tramas, mensajes)."""
+    segundos = {}
+    with redirect_stdout(io.StringIO()):
+        inicio = time.perf_counter()
+        tramas = leer_tramas(archivo)
+        segundos['lectura'] = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        protocolo = decodificador.identificar_protocolo(tramas)
+        if not protocolo or not decodificador.cargar_dbc(protocolo):
+            raise RuntimeError(f"No se pudo identificar el protocolo de {archivo}")
+        segundos['identificacion'] = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        df_decodificado = decodificador.decodificar_can(tramas)
+        segundos['decodificacion'] = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        if not decodificador.guardar_resultados(df_decodificado, archivo, tramas.cabeceras):
+            raise RuntimeError(f"No se pudieron guardar los resultados de {archivo}")
+        segundos['escritura'] = time.perf_counter() - inicio
+    return segundos, len(tramas), len(df_decodificado)
+
+def _pico_memoria_etapas(archivo, decodificador):
+    """Pico de memoria (bytes, tracemalloc) que asigna cada etapa, en una pasada aparte."""
+    picos = {}
+
+    def medir(etapa, funcion, *argumentos):
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+        resultado = funcion(*argumentos)
+        picos[etapa] = tracemalloc.get_traced_memory()[1] - base
+        return resultado
+
+    tracemalloc.start()
+    try:
+        with redirect_stdout(io.StringIO()):
+            tramas = medir('lectura', leer_tramas, archivo)
+            medir('identificacion', lambda: decodificador.cargar_dbc(decodificador.identificar_protocolo(tramas)))
+            df_decodificado = medir('decodificacion', decodificador.decodificar_can, tramas)
+            medir('escritura', decodificador.guardar_resultados, df_decodificado, archivo, tramas.cabeceras)
+    finally:
+        tracemalloc.stop()
+    return picos
+
+def ejecutar_benchmark(archivo, repeticiones=3, exportar_csv=False, deduplicar=False):
+    """
+    Mide las etapas de decodificación de archivo y devuelve un resumen con
+    tramas, mensajes, bytes y, por etapa, segundos (mejor pasada),
+    tramas_por_segundo y pico_memoria_mb.
+    """
+    decodificador = DecodificadorCAN(exportar_csv, deduplicar)
+    decodificador.precargar_dbcs()  # La compilación de la DBC no forma parte de la medida
+    mejores = {}
+    for _ in range(repeticiones):
+        segundos, tramas, mensajes = _medir_etapas(archivo, decodificador)
+        for etapa, valor in segundos.items():
+            mejores[etapa] = min(valor, mejores.get(etapa, valor))
+    picos = _pico_memoria_etapas(archivo, decodificador)
+    resumen = {'archivo': str(archivo), 'protocolo': decodificador.protocolo_actual, 'tramas': tramas,
+               'mensajes': mensajes, 'bytes': os.path.getsize(archivo), 'etapas': {}}
+    for etapa in ETAPAS:
+        resumen['etapas'][etapa] = {
+            'segundos': mejores[etapa],
+            'tramas_por_segundo': tramas / max(mejores[etapa], 1e-9),
+            'pico_memoria_mb': picos[etapa] / 1e6,
+        }
+    total = sum(mejores.values())
+    resumen['total'] = {'segundos': total, 'tramas_por_segundo': tramas / max(total, 1e-9),
+                        'mb_por_segundo': resumen['bytes'] / 1e6 / max(total, 1e-9),
+                        'pico_memoria_mb': max(picos.values()) / 1e6}
+    return resumen
+
+def mostrar_resumen(resumen):
+    print(f"\n📊 {resumen['protocolo']}: {resumen['tramas']:,} tramas ({resumen['bytes'] / 1e6:.1f} MB), "
+          f"{resumen['mensajes']:,} filas decodificadas")
+    print(f"  {'Etapa':<16}{'Segundos':>10}{'Tramas/s':>14}{'Pico MB':>10}")
+    for etapa in ETAPAS + ('total',):
+        medida = resumen['total'] if etapa == 'total' else resumen['etapas'][etapa]
+        print(f"  {etapa:<16}{medida['segundos']:>10.3f}{medida['tramas_por_segundo']:>14,.0f}"
+              f"{medida['pico_memoria_mb']:>10.1f}")
+    print(f"  Rendimiento total: {resumen['total']['mb_por_segundo']:.1f} MB/s")
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark del decodificador CAN con capturas sintéticas')
+    parser.add_argument('--protocolo', choices=('J1939', 'OBD2', 'ambos'), default='ambos')
+    parser.add_argument('--tramas', type=int, default=200000, help='Tramas por captura (por defecto 200000)')
+    parser.add_argument('--mezcla', type=parsear_mezcla, default=None,
+                        help='IDs y pesos, p. ej. 0CF00400:5,18FEF100:1 (por defecto la de las capturas reales)')
+    parser.add_argument('--pids', default=','.join(PIDS_OBD2), help='PIDs OBD2 del servicio 01 (hex, separados por comas)')
+    parser.add_argument('--desconocidos', type=float, default=0.0, help='Fracción de tramas con ID fuera del DBC')
+    parser.add_argument('--repeticion', type=float, default=0.0,
+                        help='Probabilidad de repetir los datos de la trama anterior del mismo ID')
+    parser.add_argument('--semilla', type=int, default=0)
+    parser.add_argument('--repeticiones', type=int, default=3, help='Pasadas por etapa (se toma la mejor)')
+    parser.add_argument('--csv', action='store_true', help='Medir también la exportación CSV en la escritura')
+    parser.add_argument('--dedup', action='store_true', help='Decodificar en modo deduplicado')
+    parser.add_argument('--directorio', default=None, help='Dónde generar las capturas (por defecto un temporal)')
+    parser.add_argument('--json', default=None, help='Guardar los resultados en este archivo JSON')
+    args = parser.parse_args()
+
+    protocolos = ('J1939', 'OBD2') if args.protocolo == 'ambos' else (args.protocolo,)
+    resultados = []
+    with tempfile.TemporaryDirectory(prefix='benchmark_can_') as temporal:
+        directorio = Path(args.directorio or temporal)
+        directorio.mkdir(parents=True, exist_ok=True)
+        for protocolo in protocolos:
+            archivo = directorio / f"CAN_SINTETICO_{protocolo}_{args.tramas}.txt"
+            print(f"Generando {archivo.name}...")
+            generar_log_sintetico(archivo, protocolo, args.tramas, args.mezcla, args.pids.split(','),
+                                  args.desconocidos, args.repeticion, args.semilla)
+            resumen = ejecutar_benchmark(archivo, args.repeticiones, args.csv, args.dedup)
+            mostrar_resumen(resumen)
+            resultados.append(resumen)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(resultados, f, ensure_ascii=False, indent=2)
+        print(f"\nResultados guardados en {args.json}")
+
+if __name__ == "__main__":
+    main()
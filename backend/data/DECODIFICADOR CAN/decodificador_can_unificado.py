@@ -1,14 +1,93 @@
 import cantools
+import numpy as np
 import pandas as pd
 from datetime import datetime
 import os
 import csv
 import sys
+import json
 import time
+import pickle
+import shutil
+import hashlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
 from pathlib import Path
+from typing import Dict, Iterator, List
+
+# Módulos compartidos del backend (manifiesto de archivos)
+BACKEND_DIR = str(Path(__file__).resolve().parents[2])
+if BACKEND_DIR not in sys.path:
+    sys.path.append(BACKEND_DIR)
+from file_manifest import cached_content_hash
+
+# Procesos usados al decodificar varios archivos (1 = en el proceso actual)
+DECODE_WORKERS = int(os.getenv('DECODE_WORKERS', str(min(4, os.cpu_count() or 1))))
+
+# Caché persistente de DBC compiladas (pickle de cantools), indexada por el hash del archivo DBC
+DBC_CACHE_DIR = os.getenv('DBC_CACHE_DIR', str(Path(__file__).parent.resolve() / 'dbc_cache'))
+DBC_CACHE_VERSION = 1  # Cambiar si cambia lo que se guarda en la caché
+# Manifiesto de la decodificación de flota: huella del contenido de cada archivo CAN y salida generada
+MANIFIESTO_DECODIFICACION = 'manifiesto_decodificacion_can.json'
+VERSION_MANIFIESTO = 2  # 2: huella con los mismos campos y criterio que file_manifest.FileManifest
+RESUMEN_ERRORES = 'resumen_errores_can.json'  # Resumen de errores por ID de la última decodificación masiva
+
+# Salida decodificada: .npz columnar siempre; CSV por secciones también, salvo CAN_EXPORT_CSV=0 o --sin-csv
+# (los servicios TypeScript y strict_temporal_processor.py leen el CSV)
+SUFIJO_COLUMNAR = '_TRADUCIDO.npz'
+SUFIJO_CSV = '_TRADUCIDO.csv'
+VERSION_COLUMNAR = 2  # 2: los grupos deduplicados se guardan como tramos (sin índice por trama)
+EXPORTAR_CSV = os.getenv('CAN_EXPORT_CSV', '1') == '1'
+# Modo deduplicado: las tramas consecutivas de un ID con los mismos datos se decodifican y guardan una vez (CAN_DEDUP=1 o --dedup)
+DEDUPLICAR = os.getenv('CAN_DEDUP', '0') == '1'
+FORMATOS_TIMESTAMP = ('%d/%m/%Y %I:%M:%S%p', '%Y-%m-%d %H:%M:%S')  # Formato de las tramas y del CSV alternativo
+COLUMNAS_FIJAS = ['Timestamp', 'length', 'response', 'service', 'ParameterID_Service01', 'Cabecera']
+
+BYTES_BLOQUE_LECTURA = 4 * 1024 * 1024  # Tamaño aproximado de cada bloque leído de un archivo CAN
+MAX_EJEMPLOS_ERROR = 3  # Tramas de ejemplo guardadas por ID y motivo de error
+MAX_IDS_ERROR_MOSTRAR = 5  # IDs con error que se muestran por archivo y en el resumen
+MAX_PATRONES_POR_LONGITUD = 8  # Disposiciones de campos distintas por longitud de línea antes de leer línea a línea
+
+# Mapeo de IDs de 29 bits a IDs de 11 bits para J1939 (COMPLETO FINAL)
+MAPEO_IDS_J1939 = {
+    # Valor J1939: 1024 (Engine Data Request)
+    0x0C000003: 1024,  # Engine Data Request
+    0x0CF00400: 1024,  # Engine Data Request (corregido)
+
+    # Valor J1939: 240 (Engine Data Response)
+    0x10F0072A: 240,   # Engine Data Response
+    0x14FEF100: 240,   # Engine Data Response
+    0x18011721: 240,   # Engine Data Response
+    0x18011771: 240,   # Engine Data Response
+    0x18D0EE17: 240,   # Engine Data Response
+    0x18E0FF17: 240,   # Engine Data Response
+    0x18E8FFEE: 240,   # Engine Data Response
+    0x18EA17F9: 240,   # Engine Data Response
+    0x18EAEE27: 240,   # Engine Data Response
+    0x18EAFF03: 240,   # Engine Data Response
+    0x18ECFF00: 240,   # Engine Data Response
+    0x18ECFF29: 240,   # Engine Data Response
+    0x18F00029: 240,   # Engine Data Response
+    0x18FD0900: 240,   # Engine Data Response
+    0x18FD7C00: 240,   # Engine Data Response
+    0x18FD9200: 240,   # Engine Data Response
+    0x18FDB200: 240,   # Engine Data Response
+    0x18FEDF00: 240,   # Engine Data Response
+    0x18FEE400: 240,   # Engine Data Response
+    0x18FEE500: 240,   # Engine Data Response
+    0x18FEE900: 240,   # Engine Data Response
+    0x18FEEF00: 240,   # Engine Data Response
+    0x18FEEF21: 240,   # Engine Data Response
+    0x18FEF100: 240,   # Engine Data Response (corregido)
+    0x18FEF521: 240,   # Engine Data Response
+    0x18FEF721: 240,   # Engine Data Response
+    0x18FF2917: 240,   # Engine Data Response
+    0x18FECA2A: 240,   # Engine Data Response
+    0x18FECA71: 240,   # Engine Data Response
+}
 
 class DecodificadorCAN:
-    def __init__(self):
+    def __init__(self, exportar_csv=None, deduplicar=None):
         self.protocolos = {
             'J1939': {
                 'dbc': 'doback_custom.dbc',  # Usar DBC personalizado
@@ -21,6 +100,9 @@ class DecodificadorCAN:
         }
         self.db = None
         self.protocolo_actual = None
+        self.errores_por_id = {}  # ID CAN -> fallos del último archivo decodificado (ver decodificar_can)
+        self.exportar_csv = EXPORTAR_CSV if exportar_csv is None else exportar_csv
+        self.deduplicar = DEDUPLICAR if deduplicar is None else deduplicar
 
     def verificar_archivos_dbc(self):
         """Verifica que los archivos DBC necesarios existan (ruta absoluta)."""
@@ -32,277 +114,342 @@ class DecodificadorCAN:
                 return False
         return True
 
-    def leer_archivo_mixto(self, archivo):
-        """Lee archivos CSV o TXT con formato mixto (cabeceras CAN y datos)."""
+    def leer_tramas(self, archivo):
+        """
+        Lee un archivo CSV o TXT con formato mixto (cabeceras CAN y datos) en
+        arrays (ver TramasCAN y leer_tramas). Devuelve None si no se puede leer.
+        """
         try:
-            with open(archivo, 'r', encoding='utf-8') as f:
-                lineas = f.readlines()
-            
-            datos_procesados = []
-            cabeceras = []
-            ultima_cabecera = None
-            
-            for linea in lineas:
-                linea = linea.strip()
-                if not linea:
-                    continue
-                    
-                # Detectar cabecera CAN
-                if linea.startswith('CAN;'):
-                    ultima_cabecera = linea
-                    cabeceras.append(linea)
-                    continue
-                
-                # Procesar línea de datos CAN
-                # Formato esperado: "08/07/2025 07:41:12AM   can0  0CF00400   [8]  F0 7D 84 59 16 FF FF 85"
-                if 'can0' in linea and '[' in linea and ']' in linea:
-                    try:
-                        # Dividir por espacios múltiples
-                        partes = linea.split()
-                        if len(partes) >= 6:
-                            timestamp = f"{partes[0]} {partes[1]}"
-                            id_can = partes[3]  # 0CF00400
-                            
-                            # Extraer datos hex después del [8]
-                            datos_hex = []
-                            for parte in partes[5:]:
-                                if len(parte) == 2 and all(c in '0123456789ABCDEFabcdef' for c in parte):
-                                    datos_hex.append(parte)
-                            
-                            if datos_hex:
-                                datos_procesados.append({
-                                    'ID': id_can,
-                                    'Timestamp': timestamp,
-                                    'Datos': ''.join(datos_hex),
-                                    'Cabecera': ultima_cabecera if ultima_cabecera else ''
-                                })
-                    except Exception as e:
-                        print(f"Error al procesar línea: {linea[:50]}... - {e}")
-                        continue
-                
-                # Formato CSV alternativo (compatibilidad)
-                elif ',' in linea:
-                    partes = linea.strip().split(',')
-                    if len(partes) >= 3:
-                        datos_procesados.append({
-                            'ID': partes[0],
-                            'Timestamp': partes[1],
-                            'Datos': partes[2].strip(),
-                            'Cabecera': ultima_cabecera if ultima_cabecera else ''
-                        })
-            
-            df = pd.DataFrame(datos_procesados)
-            if 'Cabecera' not in df.columns:
-                df['Cabecera'] = ''
-            return df, cabeceras
+            return leer_tramas(archivo)
         except Exception as e:
             print(f"Error al leer el archivo {archivo}: {e}")
+            return None
+
+    def leer_archivo_mixto(self, archivo):
+        """Lee archivos CSV o TXT con formato mixto como DataFrame de texto (ID, Timestamp, Datos, Cabecera)."""
+        tramas = self.leer_tramas(archivo)
+        if tramas is None:
             return None, []
+        return tramas.a_dataframe(), tramas.cabeceras
 
-    def identificar_protocolo(self, df):
-        """Identifica el protocolo CAN basado en los IDs presentes."""
+    def identificar_protocolo(self, tramas):
+        """Identifica el protocolo CAN basado en los IDs presentes (cada ID distinto se evalúa una vez)."""
+        if isinstance(tramas, pd.DataFrame):
+            ids_unicos = pd.unique(tramas['ID'].astype(str))
+        else:
+            ids_unicos = tramas.ids_texto
         for protocolo, info in self.protocolos.items():
-            if any(df['ID'].apply(info['identificador'])):
+            if any(info['identificador'](id_can) for id_can in ids_unicos):
                 return protocolo
         return None
 
     def cargar_dbc(self, protocolo):
-        """Carga el archivo DBC correspondiente al protocolo (ruta absoluta)."""
+        """Carga el archivo DBC correspondiente al protocolo (ruta absoluta) desde la caché de DBC compiladas."""
         try:
             base_dir = Path(__file__).parent.resolve()
-            dbc_path = base_dir / self.protocolos[protocolo]['dbc']
-            self.db = cantools.database.load_file(str(dbc_path))
+            self.db = cargar_dbc_compilada(base_dir / self.protocolos[protocolo]['dbc'])
             self.protocolo_actual = protocolo
             return True
         except Exception as e:
             print(f"Error al cargar el archivo DBC para {protocolo}: {e}")
             return False
 
-    def decodificar_can(self, df):
-        """Decodifica los mensajes CAN usando la base de datos DBC cargada."""
+    def precargar_dbcs(self):
+        """
+        Carga en memoria los DBC de todos los protocolos. Llamado antes de
+        crear el pool, los procesos hijos (fork) los heredan ya compilados.
+        """
+        for protocolo in self.protocolos:
+            self.cargar_dbc(protocolo)
+        self.db = None
+        self.protocolo_actual = None
+
+    def decodificar_can(self, tramas):
+        """
+        Decodifica los mensajes CAN (TramasCAN o DataFrame con ID, Timestamp,
+        Datos y Cabecera) usando la base de datos DBC cargada.
+
+        Las tramas se agrupan por mensaje DBC (tras el mapeo de IDs J1939) y
+        cada definición se resuelve una sola vez. Si el mensaje no es
+        multiplexado ni tiene señales float o con valores enumerados, los
+        campos de bits de todo el grupo se extraen a la vez con NumPy; si no,
+        las tramas del grupo se decodifican con cantools una a una. Los fallos
+        se cuentan por ID en self.errores_por_id y no interrumpen el archivo.
+
+        Con self.deduplicar, las repeticiones consecutivas de cada ID con los
+        mismos datos se agrupan (ver agrupar_repeticiones) y solo se decodifica
+        la primera trama de cada grupo: cada fila del resultado es un grupo y
+        df.attrs guarda su número de tramas, el timestamp de la última y la
+        correspondencia trama -> fila para expandirlo sin pérdidas
+        (ver expandir_repeticiones).
+        """
         if not self.db:
             print("Error: No se ha cargado ninguna base de datos DBC")
             return None
 
-        # Mapeo de IDs de 29 bits a IDs de 11 bits para J1939 (COMPLETO FINAL)
-        mapeo_ids = {
-            # Valor J1939: 1024 (Engine Data Request)
-            0x0C000003: 1024,  # Engine Data Request
-            0x0CF00400: 1024,  # Engine Data Request (corregido)
-
-            # Valor J1939: 240 (Engine Data Response)
-            0x10F0072A: 240,   # Engine Data Response
-            0x14FEF100: 240,   # Engine Data Response
-            0x18011721: 240,   # Engine Data Response
-            0x18011771: 240,   # Engine Data Response
-            0x18D0EE17: 240,   # Engine Data Response
-            0x18E0FF17: 240,   # Engine Data Response
-            0x18E8FFEE: 240,   # Engine Data Response
-            0x18EA17F9: 240,   # Engine Data Response
-            0x18EAEE27: 240,   # Engine Data Response
-            0x18EAFF03: 240,   # Engine Data Response
-            0x18ECFF00: 240,   # Engine Data Response
-            0x18ECFF29: 240,   # Engine Data Response
-            0x18F00029: 240,   # Engine Data Response
-            0x18FD0900: 240,   # Engine Data Response
-            0x18FD7C00: 240,   # Engine Data Response
-            0x18FD9200: 240,   # Engine Data Response
-            0x18FDB200: 240,   # Engine Data Response
-            0x18FEDF00: 240,   # Engine Data Response
-            0x18FEE400: 240,   # Engine Data Response
-            0x18FEE500: 240,   # Engine Data Response
-            0x18FEE900: 240,   # Engine Data Response
-            0x18FEEF00: 240,   # Engine Data Response
-            0x18FEEF21: 240,   # Engine Data Response
-            0x18FEF100: 240,   # Engine Data Response (corregido)
-            0x18FEF521: 240,   # Engine Data Response
-            0x18FEF721: 240,   # Engine Data Response
-            0x18FF2917: 240,   # Engine Data Response
-            0x18FECA2A: 240,   # Engine Data Response
-            0x18FECA71: 240,   # Engine Data Response
-        }
+        if isinstance(tramas, pd.DataFrame):
+            tramas = TramasCAN.desde_dataframe(tramas)
+        self.errores_por_id = {}
+        if len(tramas) == 0:
+            return pd.DataFrame()
 
-        mensajes_decodificados = []
-        errores_consecutivos = 0
-        max_errores_consecutivos = 10  # Máximo errores consecutivos antes de saltar
-        errores_mostrados = 0
-        max_errores_mostrar = 5  # Máximo errores a mostrar por archivo
-        
-        # Lista para recopilar todos los errores
-        errores_recopilados = []
-        
-        for _, fila in df.iterrows():
-            try:
-                # Convertir ID a entero
-                id_can = int(fila['ID'] if fila['ID'].startswith('0x') else '0x' + fila['ID'], 16)
-                
-                # Mapear ID de 29 bits a 11 bits si es necesario
-                id_dbc = mapeo_ids.get(id_can, id_can)
-                
-                # Buscar mensaje en DBC
-                mensaje = self.db.get_message_by_frame_id(id_dbc)
-                
-                if not mensaje:
-                    errores_consecutivos += 1
-                    continue
-                
-                # Convertir datos a bytes
-                datos = bytes.fromhex(fila['Datos'])
-                
-                # Verificar longitud de los datos
-                if len(datos) != mensaje.length:
-                    errores_consecutivos += 1
+        if not self.deduplicar:
+            df_decodificado, fallo, motivos, _ = self._decodificar_tramas(tramas)
+            self._resumir_errores(tramas, fallo, motivos)
+            return df_decodificado
+
+        repeticiones = agrupar_repeticiones(tramas)
+        print(f"  🔁 Tramas distintas: {len(repeticiones.cabezas)} de {len(tramas)}")
+        df_decodificado, fallo, motivos, filas_ok = self._decodificar_tramas(tramas.seleccionar(repeticiones.cabezas))
+        # Las repeticiones fallan igual que la primera trama de su grupo
+        self._resumir_errores(tramas, fallo[repeticiones.grupo_de_trama], motivos)
+        fila_de_grupo = np.full(len(repeticiones.cabezas), -1, dtype=np.int64)
+        fila_de_grupo[filas_ok] = np.arange(len(filas_ok))
+        fila_de_trama = fila_de_grupo[repeticiones.grupo_de_trama]
+        tramas_ok = np.flatnonzero(fila_de_trama >= 0)
+        df_decodificado.attrs.update({
+            'repeticiones': repeticiones.cuentas[filas_ok],
+            'timestamp_final': tramas.timestamps[repeticiones.ultimas[filas_ok]],
+            'expansion_fila': fila_de_trama[tramas_ok],
+            'expansion_timestamp': tramas.timestamps[tramas_ok],
+        })
+        return df_decodificado
+
+    def _decodificar_tramas(self, tramas):
+        """
+        Decodifica tramas (ver decodificar_can) y devuelve (DataFrame, motivo de
+        fallo por trama, lista de motivos, tramas decodificadas).
+        """
+        total_filas = len(tramas)
+        codigos_id, ids_unicos = tramas.codigos_id, tramas.ids_texto
+        payload, longitudes = tramas.payload, tramas.longitudes
+
+        # Motivo de fallo por fila (-1 = sin fallo) y ParameterID de las filas decodificadas
+        motivos = []
+        fallo = np.full(total_filas, -1, dtype=np.int64)
+        decodificada = np.zeros(total_filas, dtype=bool)
+        parametro = np.empty(total_filas, dtype=object)
+        columnas = {}  # señal -> [(filas, valores)]
+        primera_aparicion = {}  # señal -> (fila, posición) donde aparece por primera vez
+
+        def marcar_fallo(filas, motivo):
+            if motivo not in motivos:
+                motivos.append(motivo)
+            fallo[filas] = motivos.index(motivo)
+
+        def registrar_columna(nombre, filas, valores, fila_inicial, posicion):
+            columnas.setdefault(nombre, []).append((filas, valores))
+            if (fila_inicial, posicion) < primera_aparicion.get(nombre, (total_filas, 0)):
+                primera_aparicion[nombre] = (fila_inicial, posicion)
+
+        # Resolver cada ID una sola vez
+        mensajes = []
+        indice_por_id_dbc = {}
+        mensaje_de_id = np.full(len(ids_unicos), -1, dtype=np.int64)
+        valores_id, ids_validos = tramas.valores_id()
+        for indice in range(len(ids_unicos)):
+            if not ids_validos[indice]:
+                marcar_fallo(codigos_id == indice, 'ID no hexadecimal')
+                continue
+            id_can = int(valores_id[indice])
+            id_dbc = MAPEO_IDS_J1939.get(id_can, id_can)
+            if id_dbc not in indice_por_id_dbc:
+                try:
+                    mensajes.append(self.db.get_message_by_frame_id(id_dbc))
+                    indice_por_id_dbc[id_dbc] = len(mensajes) - 1
+                except KeyError:
+                    indice_por_id_dbc[id_dbc] = -1
+            mensaje_de_id[indice] = indice_por_id_dbc[id_dbc]
+            if mensaje_de_id[indice] < 0:
+                marcar_fallo(codigos_id == indice, 'ID no definido en DBC')
+
+        mensaje_de_fila = mensaje_de_id[codigos_id]
+        nombres_mensaje = np.array([mensaje.name for mensaje in mensajes] + [''], dtype=object)
+        orden = np.argsort(mensaje_de_fila, kind='stable')
+        limites = np.searchsorted(mensaje_de_fila[orden], np.arange(len(mensajes) + 1))
+
+        for indice_mensaje, mensaje in enumerate(mensajes):
+            filas = orden[limites[indice_mensaje]:limites[indice_mensaje + 1]]
+            no_hex = longitudes[filas] < 0
+            marcar_fallo(filas[no_hex], 'datos no hexadecimales')
+            filas = filas[~no_hex]
+            longitud_incorrecta = longitudes[filas] != mensaje.length
+            marcar_fallo(filas[longitud_incorrecta], f'longitud de datos distinta de {mensaje.length} bytes')
+            filas = filas[~longitud_incorrecta]
+            if len(filas) == 0:
+                continue
+
+            if _es_vectorizable(mensaje):
+                bloque = np.ascontiguousarray(payload[filas, :8])
+                palabras_le = bloque.view('<u8').ravel()
+                palabras_be = bloque.view('>u8').ravel().astype(np.uint64)
+                for posicion, senal in enumerate(mensaje.signals):
+                    valores = _extraer_senal(palabras_le, palabras_be, senal)
+                    registrar_columna(senal.name, filas, valores, filas[0], posicion)
+                parametro[filas] = mensaje.signals[0].name if mensaje.signals else ''
+                decodificada[filas] = True
+                continue
+
+            # Mensajes multiplexados, float o con valores enumerados: cantools trama a trama
+            valores_grupo = {}
+            for fila in filas.tolist():
+                try:
+                    mensaje_decodificado = mensaje.decode(payload[fila, :mensaje.length].tobytes())
+                except Exception as e:
+                    marcar_fallo(fila, f"{type(e).__name__}: {e}")
                     continue
-                
-                # Decodificar mensaje
-                mensaje_decodificado = self.db.decode_message(id_dbc, datos)
-                
-                mensaje_decodificado_ordenado = {
-                    'Timestamp': fila['Timestamp'],
-                    'length': len(datos),
-                    'response': 4,
-                    'service': 'Show current data',
-                    'ParameterID_Service01': next(iter(mensaje_decodificado.keys()), ''),
-                    'Cabecera': fila.get('Cabecera', '')
-                }
-                
-                for clave, valor in mensaje_decodificado.items():
-                    if clave not in mensaje_decodificado_ordenado:
-                        mensaje_decodificado_ordenado[clave] = valor
-                
-                mensajes_decodificados.append(mensaje_decodificado_ordenado)
-                errores_consecutivos = 0  # Resetear contador de errores consecutivos
-                
-            except Exception as e:
-                errores_consecutivos += 1
-                
-                # Recopilar el error para análisis posterior
-                error_info = {
-                    'id_can': fila['ID'],
-                    'id_hex': hex(int(fila['ID'] if fila['ID'].startswith('0x') else '0x' + fila['ID'], 16)),
-                    'error': str(e),
-                    'timestamp': fila.get('Timestamp', 'N/A'),
-                    'data': fila.get('Data', 'N/A')
-                }
-                errores_recopilados.append(error_info)
-                
-                # Si hay muchos errores consecutivos, salir del procesamiento de este archivo
-                if errores_consecutivos >= max_errores_consecutivos:
-                    print(f"Demasiados errores consecutivos ({errores_consecutivos}). Saltando al siguiente archivo.")
-                    break
-                
-                # Solo mostrar algunos errores como ejemplo
-                if errores_mostrados < max_errores_mostrar:
-                    print(f"Error al decodificar mensaje con ID {fila['ID']}: {e}")
-                    errores_mostrados += 1
-                elif errores_mostrados == max_errores_mostrar:
-                    print(f"... (omitiendo más errores de decodificación)")
-                    errores_mostrados += 1
-        
-        # Mostrar resumen de errores si los hubo
-        if errores_consecutivos > 0 and errores_consecutivos < max_errores_consecutivos:
-            print(f"Total de errores de decodificación: {errores_consecutivos}")
-        
-        # Guardar errores en archivo si los hay
-        if errores_recopilados:
-            self.guardar_errores_en_archivo(errores_recopilados)
-        
-        return pd.DataFrame(mensajes_decodificados)
+                for posicion, (clave, valor) in enumerate(mensaje_decodificado.items()):
+                    if clave not in valores_grupo:
+                        valores_grupo[clave] = ([], [])
+                        if (fila, posicion) < primera_aparicion.get(clave, (total_filas, 0)):
+                            primera_aparicion[clave] = (fila, posicion)
+                    valores_grupo[clave][0].append(fila)
+                    valores_grupo[clave][1].append(valor)
+                parametro[fila] = next(iter(mensaje_decodificado.keys()), '')
+                decodificada[fila] = True
+            for clave, (filas_clave, valores) in valores_grupo.items():
+                valores_objeto = np.empty(len(valores), dtype=object)
+                valores_objeto[:] = valores
+                columnas.setdefault(clave, []).append((np.asarray(filas_clave, dtype=np.int64), valores_objeto))
 
-    def guardar_errores_en_archivo(self, errores_recopilados):
-        """Guarda los errores recopilados en un archivo de log para análisis."""
-        from datetime import datetime
-        
-        # Crear nombre de archivo con timestamp
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        archivo_errores = f"errores_can_{timestamp}.log"
-        
+        filas_ok = np.flatnonzero(decodificada)
+        resultado = {
+            'Timestamp': tramas.timestamps[filas_ok],
+            'length': longitudes[filas_ok],
+            'response': np.full(len(filas_ok), 4, dtype=np.int64),
+            'service': np.full(len(filas_ok), 'Show current data', dtype=object),
+            'ParameterID_Service01': parametro[filas_ok],
+            'Cabecera': tramas.cabecera_de(filas_ok),
+        }
+        # Mismo orden de columnas que un DataFrame construido fila a fila
+        for nombre in sorted(primera_aparicion, key=primera_aparicion.get):
+            if nombre not in resultado:
+                resultado[nombre] = _ensamblar_columna(columnas[nombre], filas_ok, total_filas)
+        df_decodificado = pd.DataFrame(resultado)
+        # Nombre del mensaje DBC de cada fila (se guarda en la salida columnar, no en el CSV)
+        df_decodificado.attrs['mensaje'] = nombres_mensaje[mensaje_de_fila[filas_ok]]
+        return df_decodificado, fallo, motivos, filas_ok
+
+    def _resumir_errores(self, tramas, fallo, motivos):
+        """
+        Agrupa los fallos por ID y motivo en self.errores_por_id: total, tramas
+        por motivo y hasta MAX_EJEMPLOS_ERROR ejemplos por motivo. Solo se
+        muestra un resumen; el detalle viaja en el resultado de decodificar_archivo.
+        """
+        filas_error = np.flatnonzero(fallo >= 0)
+        if len(filas_error) == 0:
+            return
+        claves = tramas.codigos_id[filas_error].astype(np.int64) * len(motivos) + fallo[filas_error]
+        orden = np.argsort(claves, kind='stable')
+        claves_ordenadas = claves[orden]
+        inicios = np.flatnonzero(np.r_[True, claves_ordenadas[1:] != claves_ordenadas[:-1]])
+        cantidades = np.diff(np.append(inicios, len(claves_ordenadas)))
+        for clave, inicio, cantidad in zip(claves_ordenadas[inicios].tolist(), inicios.tolist(), cantidades.tolist()):
+            id_texto = tramas.ids_texto[clave // len(motivos)]
+            motivo = motivos[clave % len(motivos)]
+            info = self.errores_por_id.setdefault(id_texto, {
+                'id_hex': _id_hex(id_texto), 'total': 0, 'motivos': {}, 'ejemplos': []
+            })
+            info['total'] += cantidad
+            info['motivos'][motivo] = cantidad
+            for fila in filas_error[orden[inicio:inicio + min(cantidad, MAX_EJEMPLOS_ERROR)]].tolist():
+                info['ejemplos'].append({'motivo': motivo, 'timestamp': str(tramas.timestamps[fila]),
+                                         'datos': tramas.datos_hex(fila)})
+            if motivo == 'ID no definido en DBC':
+                info['mapeo_sugerido'] = _mapeo_sugerido(id_texto)
+
+        ids_con_error = sorted(self.errores_por_id.items(), key=lambda item: -item[1]['total'])
+        for id_texto, info in ids_con_error[:MAX_IDS_ERROR_MOSTRAR]:
+            motivo = max(info['motivos'], key=info['motivos'].get)
+            print(f"Error al decodificar mensajes con ID {id_texto}: {info['total']} tramas ({motivo})")
+        if len(ids_con_error) > MAX_IDS_ERROR_MOSTRAR:
+            print(f"... (omitiendo {len(ids_con_error) - MAX_IDS_ERROR_MOSTRAR} IDs más con errores)")
+        print(f"Total de errores de decodificación: {len(filas_error)} en {len(ids_con_error)} IDs")
+
+    def guardar_resultados(self, df_decodificado, archivo_original, cabeceras):
+        """Guarda los resultados en formato columnar (.npz) y, si exportar_csv, también en CSV."""
+        if not self.guardar_columnar(df_decodificado, archivo_original, cabeceras):
+            return False
+        if self.exportar_csv:
+            return self.guardar_csv(expandir_repeticiones(df_decodificado), archivo_original, cabeceras)
+        return True
+
+    def guardar_columnar(self, df_decodificado, archivo_original, cabeceras):
+        """
+        Guarda los mensajes decodificados en CAN_*_TRADUCIDO.npz (comprimido),
+        una columna tipada por campo:
+
+            timestamp   datetime64[ms] de cada trama (NaT si la fecha no es válida)
+            length      bytes de datos
+            mensaje     índice del mensaje DBC en meta['mensajes']
+            cabecera    índice de la cabecera CAN; en meta['cabeceras'] (-1 si no hay)
+            senal_<i>   valores de meta['senales'][i] (NaN en las tramas sin esa señal)
+            meta        JSON con version, protocolo, fecha de decodificación y las listas anteriores
+
+        En modo deduplicado (meta['deduplicado']) cada fila es un grupo de
+        tramas repetidas, guardado como un tramo (timestamp de la primera
+        trama, de la última y número de tramas):
+
+            repeticiones          tramas del grupo
+            timestamp_final       timestamp de la última trama del grupo
+
+        No se guarda nada por trama, así que el tamaño depende de los cambios
+        de datos y no del tráfico del bus. can_columnar.load_decoded_can
+        reconstruye una fila por trama repartiendo las tramas de cada grupo a
+        intervalos iguales entre su primer y su último timestamp.
+
+        Se lee con numpy.load sin parsear texto (ver backend/can_columnar.py).
+        """
+        archivo_salida = ruta_traducida(archivo_original, SUFIJO_COLUMNAR)
+        temporal = f"{archivo_salida}.tmp{os.getpid()}"
         try:
-            with open(archivo_errores, 'w', encoding='utf-8') as f:
-                f.write("ANÁLISIS DE ERRORES CAN - DECODIFICADOR\n")
-                f.write("=" * 50 + "\n")
-                f.write(f"Fecha: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-                f.write(f"Total de errores: {len(errores_recopilados)}\n\n")
-                
-                # Agrupar errores por ID CAN
-                errores_por_id = {}
-                for error in errores_recopilados:
-                    id_can = error['id_can']
-                    if id_can not in errores_por_id:
-                        errores_por_id[id_can] = []
-                    errores_por_id[id_can].append(error)
-                
-                f.write("ERRORES AGRUPADOS POR ID CAN:\n")
-                f.write("-" * 30 + "\n\n")
-                
-                for id_can, errores in sorted(errores_por_id.items()):
-                    f.write(f"ID CAN: {id_can} ({errores[0]['id_hex']})\n")
-                    f.write(f"  Cantidad de errores: {len(errores)}\n")
-                    f.write(f"  Tipo de error: {errores[0]['error']}\n")
-                    f.write(f"  Ejemplo de datos: {errores[0]['data']}\n")
-                    f.write(f"  Timestamp ejemplo: {errores[0]['timestamp']}\n")
-                    f.write("\n")
-                
-                # Generar mapeo sugerido
-                f.write("\nMAPEO SUGERIDO PARA AGREGAR:\n")
-                f.write("-" * 30 + "\n")
-                for id_can in sorted(errores_por_id.keys()):
-                    id_hex = errores_por_id[id_can][0]['id_hex']
-                    # Determinar si es solicitud o respuesta basado en el patrón
-                    if id_can.startswith('0C') or id_can.startswith('CF'):
-                        f.write(f"            0x{id_can}: 1024,  # Engine Data Request\n")
-                    else:
-                        f.write(f"            0x{id_can}: 240,   # Engine Data Response\n")
-                
-            print(f"📝 Errores guardados en: {archivo_errores}")
-            
+            total = len(df_decodificado)
+            mensajes = df_decodificado.attrs.get('mensaje')
+            if mensajes is None or len(mensajes) != total:
+                mensajes = np.full(total, '', dtype=object)
+            codigos_mensaje, nombres_mensaje = pd.factorize(pd.Series(mensajes, dtype=object))
+            posicion_cabecera = {}
+            for indice, cabecera in enumerate(cabeceras):
+                posicion_cabecera.setdefault(cabecera, indice)
+            cabecera_fila = df_decodificado['Cabecera'].fillna('') if 'Cabecera' in df_decodificado else pd.Series([''] * total)
+            senales = [columna for columna in df_decodificado.columns if columna not in COLUMNAS_FIJAS]
+
+            columnas = {
+                'timestamp': _parsear_timestamps(df_decodificado['Timestamp']),
+                'length': df_decodificado['length'].to_numpy(dtype=np.int16),
+                'mensaje': codigos_mensaje.astype(np.int32),
+                'cabecera': cabecera_fila.map(lambda texto: posicion_cabecera.get(texto, -1)).to_numpy(dtype=np.int32),
+            }
+            for indice, senal in enumerate(senales):
+                columnas[f'senal_{indice}'] = _columna_numerica(df_decodificado[senal])
+            deduplicado = 'expansion_fila' in df_decodificado.attrs
+            if deduplicado:
+                columnas['repeticiones'] = np.asarray(df_decodificado.attrs['repeticiones'], dtype=np.int32)
+                columnas['timestamp_final'] = _parsear_timestamps(df_decodificado.attrs['timestamp_final'])
+            meta = {
+                'version': VERSION_COLUMNAR,
+                'protocolo': self.protocolo_actual,
+                'fecha_decodificacion': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                'mensajes': [str(nombre) for nombre in nombres_mensaje],
+                'cabeceras': list(cabeceras),
+                'senales': [str(senal) for senal in senales],
+                'deduplicado': deduplicado,
+                'errores': self.errores_por_id,
+            }
+            with open(temporal, 'wb') as f:
+                np.savez_compressed(f, meta=np.array(json.dumps(meta, ensure_ascii=False)), **columnas)
+            os.replace(temporal, archivo_salida)
+            print(f"Archivo guardado: {archivo_salida}")
+            return True
         except Exception as e:
-            print(f"Error al guardar archivo de errores: {e}")
+            if os.path.exists(temporal):
+                os.remove(temporal)
+            print(f"Error al guardar el archivo {archivo_salida}: {e}")
+            return False
 
-    def guardar_resultados(self, df_decodificado, archivo_original, cabeceras):
-        """Guarda los resultados decodificados en un archivo CSV."""
-        nombre_base = os.path.splitext(archivo_original)[0]
-        archivo_salida = f"{nombre_base}_TRADUCIDO.csv"
+    def guardar_csv(self, df_decodificado, archivo_original, cabeceras):
+        """Exporta los resultados decodificados a un CSV legible, con una sección por cabecera CAN."""
+        archivo_salida = ruta_traducida(archivo_original, SUFIJO_CSV)
         
         columnas_orden = ['Timestamp', 'length', 'response', 'service', 'ParameterID_Service01']
         columnas_adicionales = [col for col in df_decodificado.columns if col not in columnas_orden and col != 'Cabecera']
@@ -337,52 +484,790 @@ class DecodificadorCAN:
 
     def procesar_archivo(self, archivo):
         """Procesa un archivo CAN completo."""
+        return self.decodificar_archivo(archivo)['ok']
+
+    def decodificar_archivo(self, archivo, sobrescribir=False):
+        """
+        Decodifica un archivo CAN en el proceso actual y devuelve un resumen:
+        archivo, ok, omitido (ya traducido), protocolo, lineas, mensajes,
+        segundos, error (motivo si ok es False) y errores (ver _resumir_errores).
+
+        Con sobrescribir se descartan las salidas existentes (el contenido del
+        archivo cambió desde que se tradujo) en lugar de omitir el archivo.
+        """
+        inicio = time.perf_counter()
         archivo_path = Path(archivo)
+        self.errores_por_id = {}
+        resultado = {
+            'archivo': str(archivo), 'ok': False, 'omitido': False, 'protocolo': None,
+            'lineas': 0, 'mensajes': 0, 'segundos': 0.0, 'error': None, 'errores': {}
+        }
+
+        def terminar(ok, error=None):
+            resultado['ok'] = ok
+            resultado['error'] = error
+            resultado['errores'] = self.errores_por_id
+            resultado['segundos'] = time.perf_counter() - inicio
+            return resultado
+
         print(f"\nProcesando: {archivo_path.name}")
         
-        # Verificar si ya existe el archivo traducido
-        archivo_traducido = archivo_path.parent / f"{archivo_path.stem}_TRADUCIDO.csv"
-        if archivo_traducido.exists():
+        if sobrescribir:
+            for sufijo in (SUFIJO_COLUMNAR, SUFIJO_CSV):
+                if os.path.exists(ruta_traducida(archivo, sufijo)):
+                    os.remove(ruta_traducida(archivo, sufijo))
+
+        # Verificar si ya existe el archivo traducido (columnar o CSV de versiones anteriores)
+        archivo_traducido = next((Path(ruta_traducida(archivo, sufijo)) for sufijo in (SUFIJO_COLUMNAR, SUFIJO_CSV)
+                                  if os.path.exists(ruta_traducida(archivo, sufijo))), None)
+        if archivo_traducido:
             print(f"  ⏭️  Archivo ya traducido: {archivo_traducido.name}")
-            return True
+            resultado['omitido'] = True
+            return terminar(True)
         
         # Leer el archivo
-        df, cabeceras = self.leer_archivo_mixto(archivo)
-        if df is None or df.empty:
+        tramas = self.leer_tramas(archivo)
+        if tramas is None or len(tramas) == 0:
             print(f"  ✗ No se pudieron leer datos válidos")
-            return False
+            return terminar(False, 'sin datos válidos')
+        cabeceras = tramas.cabeceras
 
-        print(f"  📊 Líneas leídas: {len(df)}")
+        resultado['lineas'] = len(tramas)
+        print(f"  📊 Líneas leídas: {len(tramas)}")
 
         # Identificar protocolo
-        protocolo = self.identificar_protocolo(df)
+        protocolo = self.identificar_protocolo(tramas)
         if not protocolo:
             print(f"  ✗ No se pudo identificar el protocolo")
-            return False
+            return terminar(False, 'protocolo no identificado')
+        resultado['protocolo'] = protocolo
         print(f"  🔍 Protocolo: {protocolo}")
 
         # Cargar DBC
         if not self.cargar_dbc(protocolo):
             print(f"  ✗ Error al cargar DBC para {protocolo}")
-            return False
+            return terminar(False, f'error cargando DBC {protocolo}')
 
         # Decodificar mensajes
-        df_decodificado = self.decodificar_can(df)
+        df_decodificado = self.decodificar_can(tramas)
         if df_decodificado is None or df_decodificado.empty:
             print(f"  ✗ No se pudieron decodificar mensajes")
-            return False
+            return terminar(False, 'ningún mensaje decodificado')
 
         # Guardar resultados
         if self.guardar_resultados(df_decodificado, archivo, cabeceras):
+            resultado['mensajes'] = len(df_decodificado)
             print(f"  ✓ Decodificados: {len(df_decodificado)} mensajes")
             print(f"  ✓ Cabeceras: {len(cabeceras)}")
-            return True
+            return terminar(True)
         else:
             print(f"  ✗ Error al guardar resultados")
-            return False
+            return terminar(False, 'error guardando resultados')
+
+@dataclass
+class RepeticionesCAN:
+    """
+    Grupos de tramas consecutivas de un mismo ID con los mismos datos.
+
+    Attributes:
+        cabezas: Primera trama de cada grupo, en orden de aparición
+        grupo_de_trama: Grupo de cada trama del archivo
+        cuentas: Tramas de cada grupo
+        ultimas: Última trama de cada grupo
+    """
+    cabezas: np.ndarray
+    grupo_de_trama: np.ndarray
+    cuentas: np.ndarray
+    ultimas: np.ndarray
+
+def agrupar_repeticiones(tramas):
+    """
+    Agrupa las tramas que repiten los datos de la trama anterior del mismo ID
+    (misma longitud, mismos bytes y misma cabecera). Las tramas con datos no
+    hexadecimales no se agrupan nunca.
+    """
+    orden = np.argsort(tramas.codigos_id, kind='stable')  # Tramas de cada ID juntas y en orden de archivo
+    ids = tramas.codigos_id[orden]
+    longitudes = tramas.longitudes[orden]
+    payload = tramas.payload[orden]
+    cabeceras = tramas.codigos_cabecera[orden]
+    nuevo = np.ones(len(orden), dtype=bool)
+    nuevo[1:] = ((ids[1:] != ids[:-1]) | (longitudes[1:] != longitudes[:-1]) | (cabeceras[1:] != cabeceras[:-1])
+                 | (payload[1:] != payload[:-1]).any(axis=1) | (longitudes[1:] < 0))
+    grupo_ordenado = np.cumsum(nuevo) - 1
+    cabezas_ordenadas = orden[nuevo]
+    # Numerar los grupos por la posición de su primera trama
+    posicion = np.argsort(cabezas_ordenadas, kind='stable')
+    numero = np.empty_like(posicion)
+    numero[posicion] = np.arange(len(posicion))
+    grupo_de_trama = np.empty(len(orden), dtype=np.int64)
+    grupo_de_trama[orden] = numero[grupo_ordenado]
+    ultimas = np.empty(len(posicion), dtype=np.int64)
+    ultimas[numero] = orden[np.append(np.flatnonzero(nuevo)[1:] - 1, len(orden) - 1)]
+    return RepeticionesCAN(
+        cabezas=cabezas_ordenadas[posicion],
+        grupo_de_trama=grupo_de_trama,
+        cuentas=np.bincount(grupo_de_trama, minlength=len(posicion)),
+        ultimas=ultimas,
+    )
+
+def expandir_repeticiones(df_decodificado):
+    """DataFrame deduplicado -> una fila por trama, igual que sin deduplicar (no hace nada si no lo está)."""
+    if 'expansion_fila' not in df_decodificado.attrs:
+        return df_decodificado
+    expandido = df_decodificado.iloc[df_decodificado.attrs['expansion_fila']].reset_index(drop=True)
+    expandido['Timestamp'] = df_decodificado.attrs['expansion_timestamp']
+    expandido.attrs = {'mensaje': np.asarray(df_decodificado.attrs['mensaje'])[df_decodificado.attrs['expansion_fila']]}
+    return expandido
+
+def ruta_traducida(archivo, sufijo=SUFIJO_COLUMNAR):
+    """Ruta del archivo decodificado junto al original (CAN_x.txt -> CAN_x_TRADUCIDO.npz)."""
+    return f"{os.path.splitext(str(archivo))[0]}{sufijo}"
+
+def _parsear_timestamps(textos):
+    """Texto de fecha y hora de cada trama -> datetime64[ms] (NaT si no encaja con FORMATOS_TIMESTAMP)."""
+    textos = pd.Series(textos, dtype=object)
+    resultado = pd.to_datetime(textos, format=FORMATOS_TIMESTAMP[0], errors='coerce', cache=True)
+    for formato in FORMATOS_TIMESTAMP[1:]:
+        faltan = resultado.isna()
+        if not faltan.any():
+            break
+        resultado[faltan] = pd.to_datetime(textos[faltan], format=formato, errors='coerce', cache=True)
+    return resultado.to_numpy(dtype='datetime64[ms]')
+
+def _columna_numerica(columna):
+    """Valores de una señal como array numérico (los valores enumerados de cantools se guardan por su número)."""
+    if pd.api.types.is_numeric_dtype(columna) and not pd.api.types.is_bool_dtype(columna):
+        return columna.to_numpy()
+    valores = [getattr(valor, 'value', valor) for valor in columna.tolist()]
+    return pd.to_numeric(pd.Series(valores, dtype=object), errors='coerce').to_numpy(dtype=np.float64)
+
+@dataclass
+class TramasCAN:
+    """
+    Tramas CAN de un archivo en arrays, sin un DataFrame de texto intermedio.
+
+    Attributes:
+        timestamps: Fecha y hora de cada trama (texto)
+        codigos_id: Índice de cada trama en ids_texto
+        ids_texto: IDs distintos tal como aparecen en el archivo
+        payload: Bytes de datos uint8 (tramas x máximo de bytes), rellenos con ceros
+        longitudes: Bytes de datos de cada trama (-1 si los datos no son hexadecimales)
+        codigos_cabecera: Índice en cabeceras de la última cabecera 'CAN;' anterior (-1 si no hay)
+        cabeceras: Líneas de cabecera 'CAN;' en orden de aparición
+        datos_no_hex: Fila -> texto de datos no hexadecimal (formato CSV alternativo)
+    """
+    timestamps: np.ndarray
+    codigos_id: np.ndarray
+    ids_texto: List[str]
+    payload: np.ndarray
+    longitudes: np.ndarray
+    codigos_cabecera: np.ndarray
+    cabeceras: List[str] = field(default_factory=list)
+    datos_no_hex: Dict[int, str] = field(default_factory=dict)
+
+    def __len__(self):
+        return len(self.codigos_id)
+
+    def valores_id(self):
+        """IDs distintos como uint32 y máscara de los que son hexadecimales válidos."""
+        valores = np.zeros(len(self.ids_texto), dtype=np.uint32)
+        validos = np.zeros(len(self.ids_texto), dtype=bool)
+        for indice, id_texto in enumerate(self.ids_texto):
+            try:
+                valores[indice] = int(id_texto if id_texto.startswith('0x') else '0x' + id_texto, 16)
+                validos[indice] = True
+            except (ValueError, OverflowError):
+                continue
+        return valores, validos
+
+    @property
+    def ids(self):
+        """ID de cada trama como uint32 (0 si no es hexadecimal)."""
+        return self.valores_id()[0][self.codigos_id]
+
+    def datos_hex(self, fila):
+        if fila in self.datos_no_hex:
+            return self.datos_no_hex[fila]
+        return self.payload[fila, :self.longitudes[fila]].tobytes().hex().upper()
+
+    def seleccionar(self, filas):
+        """Subconjunto de las tramas indicadas, en ese orden."""
+        filas = np.asarray(filas, dtype=np.int64)
+        nueva_fila = {int(fila): indice for indice, fila in enumerate(filas.tolist()) if int(fila) in self.datos_no_hex}
+        return TramasCAN(
+            timestamps=self.timestamps[filas],
+            codigos_id=self.codigos_id[filas],
+            ids_texto=self.ids_texto,
+            payload=self.payload[filas],
+            longitudes=self.longitudes[filas],
+            codigos_cabecera=self.codigos_cabecera[filas],
+            cabeceras=self.cabeceras,
+            datos_no_hex={indice: self.datos_no_hex[fila] for fila, indice in nueva_fila.items()},
+        )
+
+    def cabecera_de(self, filas):
+        """Texto de la cabecera de cada fila ('' si no tiene)."""
+        return np.array(self.cabeceras + [''], dtype=object)[self.codigos_cabecera[filas]]
+
+    def a_dataframe(self):
+        """
+        DataFrame de texto con el formato de leer_archivo_mixto (ID, Timestamp,
+        Datos, Cabecera). Los datos hexadecimales salen en mayúsculas.
+        """
+        filas = np.arange(len(self))
+        return pd.DataFrame({
+            'ID': np.array(self.ids_texto, dtype=object)[self.codigos_id],
+            'Timestamp': self.timestamps,
+            'Datos': [self.datos_hex(fila) for fila in filas.tolist()],
+            'Cabecera': self.cabecera_de(filas),
+        })
+
+    @classmethod
+    def desde_dataframe(cls, df):
+        """Convierte un DataFrame con columnas ID, Timestamp, Datos y Cabecera."""
+        codigos_id, ids_texto = pd.factorize(df['ID'].astype(str))
+        textos_datos = df['Datos'].astype(str).tolist()
+        payload, longitudes = _hex_a_bytes(textos_datos)
+        cabeceras_fila = df['Cabecera'].fillna('').astype(str) if 'Cabecera' in df.columns else pd.Series([''] * len(df))
+        codigos_cabecera, cabeceras = pd.factorize(cabeceras_fila.where(cabeceras_fila != ''))
+        return cls(
+            timestamps=df['Timestamp'].to_numpy(dtype=object),
+            codigos_id=codigos_id,
+            ids_texto=list(ids_texto),
+            payload=payload,
+            longitudes=longitudes,
+            codigos_cabecera=codigos_cabecera,
+            cabeceras=list(cabeceras),
+            datos_no_hex={fila: textos_datos[fila] for fila in np.flatnonzero(longitudes < 0).tolist()},
+        )
+
+    @classmethod
+    def concatenar(cls, bloques):
+        """Une los bloques de iterar_tramas (los índices de cabecera ya son globales)."""
+        bloques = list(bloques)
+        if not bloques:
+            return _tramas_de_lineas([], [], [], [], [])
+        ids_texto = list(dict.fromkeys(id_texto for bloque in bloques for id_texto in bloque.ids_texto))
+        posicion_id = {id_texto: indice for indice, id_texto in enumerate(ids_texto)}
+        ancho = max(bloque.payload.shape[1] for bloque in bloques)
+        datos_no_hex = {}
+        inicio = 0
+        for bloque in bloques:
+            datos_no_hex.update({inicio + fila: texto for fila, texto in bloque.datos_no_hex.items()})
+            inicio += len(bloque)
+        return cls(
+            timestamps=np.concatenate([bloque.timestamps for bloque in bloques]),
+            codigos_id=np.concatenate([
+                np.array([posicion_id[id_texto] for id_texto in bloque.ids_texto], dtype=np.int64)[bloque.codigos_id]
+                if len(bloque.ids_texto) else bloque.codigos_id for bloque in bloques
+            ]),
+            ids_texto=ids_texto,
+            payload=np.concatenate([np.pad(bloque.payload, ((0, 0), (0, ancho - bloque.payload.shape[1])))
+                                    for bloque in bloques]),
+            longitudes=np.concatenate([bloque.longitudes for bloque in bloques]),
+            codigos_cabecera=np.concatenate([bloque.codigos_cabecera for bloque in bloques]),
+            cabeceras=bloques[-1].cabeceras,
+            datos_no_hex=datos_no_hex,
+        )
+
+def leer_tramas(archivo, bytes_bloque=BYTES_BLOQUE_LECTURA):
+    """Lee un archivo CAN completo como TramasCAN (ver iterar_tramas)."""
+    return TramasCAN.concatenar(iterar_tramas(archivo, bytes_bloque))
+
+def iterar_tramas(archivo, bytes_bloque=BYTES_BLOQUE_LECTURA) -> Iterator[TramasCAN]:
+    """
+    Lee un archivo CAN por bloques de líneas completas de unos bytes_bloque
+    bytes y devuelve las tramas de cada bloque.
+
+    Las líneas de datos "08/07/2025 07:41:12AM   can0  0CF00400   [8]  F0 7D ..."
+    se trocean en bloque: las líneas de igual longitud y misma disposición
+    de espacios tienen los campos en las mismas columnas, así que la fecha,
+    el ID y los bytes de datos se extraen por columnas con NumPy. Las
+    cabeceras 'CAN;', el formato CSV alternativo y cualquier línea que no
+    encaje se procesan línea a línea con las mismas reglas.
+    """
+    cabeceras = []
+    with open(archivo, 'rb') as f:
+        while True:
+            bloque = f.read(bytes_bloque)
+            if not bloque:
+                break
+            if not bloque.endswith(b'\n'):
+                bloque += f.readline()
+            yield _tramas_de_bloque(bloque, cabeceras)
+
+def _tramas_de_bloque(bloque, cabeceras):
+    """Tramas de un bloque de líneas completas; añade a cabeceras las que encuentre."""
+    datos = np.frombuffer(bloque, dtype=np.uint8)
+    finales = np.flatnonzero(datos == ord('\n'))
+    if len(finales) == 0 or finales[-1] != len(datos) - 1:
+        finales = np.append(finales, len(datos))
+    inicios = np.concatenate(([0], finales[:-1] + 1))
+    con_retorno = (finales > inicios) & (datos[np.maximum(finales - 1, 0)] == ord('\r'))
+    longitudes_linea = finales - inicios - con_retorno
+    primer_byte = datos[np.minimum(inicios, len(datos) - 1)]
+    empieza_por_digito = (longitudes_linea > 0) & (primer_byte >= ord('0')) & (primer_byte <= ord('9'))
+
+    # Cabeceras y líneas que no empiezan por la fecha: línea a línea
+    es_cabecera = np.zeros(len(inicios), dtype=bool)
+    lineas_texto = []
+    textos_lentos = {}
+    for linea in np.flatnonzero(~empieza_por_digito & (longitudes_linea > 0)).tolist():
+        texto = bloque[inicios[linea]:inicios[linea] + longitudes_linea[linea]].decode('utf-8', errors='replace').strip()
+        if texto.startswith('CAN;'):
+            es_cabecera[linea] = True
+            cabeceras.append(texto)
+        elif texto:
+            lineas_texto.append(linea)
+            textos_lentos[linea] = texto
+    cabecera_de_linea = len(cabeceras) - np.count_nonzero(es_cabecera) + np.cumsum(es_cabecera) - 1
+
+    lineas_rapidas, timestamps, ids, payloads, rechazadas = _tokenizar_por_columnas(
+        datos, inicios, longitudes_linea, np.flatnonzero(empieza_por_digito))
+    for linea in rechazadas.tolist():
+        texto = bloque[inicios[linea]:inicios[linea] + longitudes_linea[linea]].decode('utf-8', errors='replace').strip()
+        lineas_texto.append(linea)
+        textos_lentos[linea] = texto
+
+    lentas = []
+    for linea in lineas_texto:
+        trama = _parsear_linea_mixta(textos_lentos[linea])
+        if trama:
+            lentas.append((linea,) + trama)
+    return _tramas_de_lineas(lineas_rapidas + [np.array([t[0] for t in lentas], dtype=np.int64)],
+                             timestamps + [np.array([t[2] for t in lentas], dtype=str)],
+                             ids + [np.array([t[1] for t in lentas], dtype=object)],
+                             payloads, [t[3] for t in lentas],
+                             cabecera_de_linea, cabeceras)
+
+def _tramas_de_lineas(lineas, timestamps, ids, payloads, datos_texto, cabecera_de_linea=None, cabeceras=None):
+    """Ordena por línea las tramas extraídas por columnas y las de texto (las de texto van al final de las listas)."""
+    if not lineas:
+        return TramasCAN(np.empty(0, dtype=object), np.empty(0, dtype=np.int64), [],
+                         np.zeros((0, 8), dtype=np.uint8), np.empty(0, dtype=np.int64),
+                         np.empty(0, dtype=np.int64), list(cabeceras or []))
+    payload_texto, longitudes_texto = _hex_a_bytes(datos_texto)
+    ancho = max([8, payload_texto.shape[1]] + [payload.shape[1] for payload in payloads])
+    payload = np.concatenate([np.pad(p, ((0, 0), (0, ancho - p.shape[1]))) for p in payloads + [payload_texto]])
+    longitudes = np.concatenate([np.full(len(p), p.shape[1], dtype=np.int64) for p in payloads] + [longitudes_texto])
+    todas_lineas = np.concatenate(lineas)
+    orden = np.argsort(todas_lineas, kind='stable')
+    # Los IDs extraídos por columnas son bytes: se decodifica solo cada ID distinto
+    codigos_grupo, ids_grupo = [], []
+    for ids_bloque in ids:
+        unicos, codigos = np.unique(ids_bloque, return_inverse=True)
+        codigos_grupo.append(codigos.ravel() + sum(len(previos) for previos in ids_grupo))
+        ids_grupo.append([i.decode('ascii') if isinstance(i, bytes) else i for i in unicos.tolist()])
+    textos_id = np.array([i for unicos in ids_grupo for i in unicos] or [''], dtype=object)
+    codigos_id, ids_texto = pd.factorize(textos_id[np.concatenate(codigos_grupo)[orden]])
+    # Textos de datos no hexadecimales (solo pueden venir de las líneas de texto, al final)
+    primera_texto = len(todas_lineas) - len(datos_texto)
+    posicion_final = np.empty(len(orden), dtype=np.int64)
+    posicion_final[orden] = np.arange(len(orden))
+    datos_no_hex = {int(posicion_final[primera_texto + indice]): datos_texto[indice]
+                    for indice in np.flatnonzero(longitudes_texto < 0).tolist()}
+    return TramasCAN(
+        timestamps=np.concatenate(timestamps)[orden],
+        codigos_id=codigos_id,
+        ids_texto=list(ids_texto),
+        payload=payload[orden],
+        longitudes=longitudes[orden],
+        codigos_cabecera=cabecera_de_linea[todas_lineas[orden]],
+        cabeceras=list(cabeceras),
+        datos_no_hex=datos_no_hex,
+    )
+
+def _tokenizar_por_columnas(datos, inicios, longitudes_linea, lineas):
+    """
+    Extrae por columnas las líneas "fecha hora can0 ID [n] b0 b1 ...": agrupa
+    por longitud y por disposición de espacios, y dentro de cada grupo los
+    campos están en posiciones fijas.
+
+    Returns:
+        (lineas, timestamps, ids, payloads, rechazadas): listas por grupo y
+        las líneas que hay que procesar como texto
+    """
+    aceptadas, timestamps, ids, payloads, rechazadas = [], [], [], [], []
+    for longitud in np.unique(longitudes_linea[lineas]).tolist():
+        pendientes = lineas[longitudes_linea[lineas] == longitud]
+        matriz = datos[inicios[pendientes, None] + np.arange(longitud)]
+        espacios = (matriz == ord(' ')) | (matriz == ord('\t'))
+        for _ in range(MAX_PATRONES_POR_LONGITUD):
+            if len(pendientes) == 0:
+                break
+            iguales = (espacios == espacios[0]).all(axis=1)
+            campos = _campos_en_columnas(matriz[iguales], espacios[0])
+            grupo = pendientes[iguales]
+            if campos is None:
+                rechazadas.append(grupo)
+            else:
+                validas, descartadas, timestamp, id_can, payload = campos
+                aceptadas.append(grupo[validas])
+                timestamps.append(timestamp.astype(str))
+                ids.append(id_can)
+                payloads.append(payload)
+                rechazadas.append(grupo[~validas & ~descartadas])
+            pendientes, matriz, espacios = pendientes[~iguales], matriz[~iguales], espacios[~iguales]
+        rechazadas.append(pendientes)
+    return aceptadas, timestamps, ids, payloads, np.concatenate(rechazadas or [np.empty(0, dtype=np.int64)])
+
+def _campos_en_columnas(matriz, espacios):
+    """
+    Campos de un grupo de líneas con la misma disposición de espacios.
+
+    Returns:
+        None si la disposición no es la de una trama, o (validas, descartadas,
+        timestamps, ids, payload): las válidas se extraen aquí, las
+        descartadas no tienen bytes de datos (como en el formato original) y
+        el resto se procesa como texto.
+    """
+    anterior_espacio = np.concatenate(([True], espacios[:-1]))
+    siguiente_espacio = np.concatenate((espacios[1:], [True]))
+    campos = list(zip(np.flatnonzero(~espacios & anterior_espacio).tolist(),
+                      (np.flatnonzero(~espacios & siguiente_espacio) + 1).tolist()))
+    if len(campos) < 5 or campos[2][1] - campos[2][0] != 4:
+        return None
+    (ini_fecha, fin_fecha), (ini_hora, fin_hora), (ini_bus, fin_bus), (ini_id, fin_id), (ini_dlc, fin_dlc) = campos[:5]
+    validas = ((matriz[:, ini_bus:fin_bus] == np.frombuffer(b'can0', dtype=np.uint8)).all(axis=1) &
+               (matriz[:, ini_dlc] == ord('[')) & (matriz[:, fin_dlc - 1] == ord(']')) &
+               (matriz < 128).all(axis=1))
+    # Como en el formato original, solo cuentan los campos de datos de 2 dígitos hexadecimales
+    columnas_datos = [inicio for inicio, fin in campos[5:] if fin - inicio == 2]
+    if not columnas_datos:
+        vacio = np.empty(0, dtype='S1')
+        return np.zeros_like(validas), validas, vacio, vacio, np.zeros((0, 0), dtype=np.uint8)
+    nibbles = _VALOR_HEX[matriz[:, np.array([[c, c + 1] for c in columnas_datos]).ravel()]]
+    validas &= (nibbles != 255).all(axis=1)
+    payload = (nibbles[validas, 0::2] << 4) | nibbles[validas, 1::2]
+    filas = matriz[validas]
+    if ini_hora == fin_fecha + 1:
+        timestamps = _columnas_como_bytes(filas, ini_fecha, fin_hora)
+    else:
+        timestamps = np.char.add(np.char.add(_columnas_como_bytes(filas, ini_fecha, fin_fecha), b' '),
+                                 _columnas_como_bytes(filas, ini_hora, fin_hora))
+    return validas, np.zeros_like(validas), timestamps, _columnas_como_bytes(filas, ini_id, fin_id), payload
+
+def _columnas_como_bytes(matriz, inicio, fin):
+    return np.ascontiguousarray(matriz[:, inicio:fin]).view(f'S{fin - inicio}').ravel()
+
+def _parsear_linea_mixta(linea):
+    """
+    Interpreta una línea de datos como texto: "fecha hora can0 ID [n] bytes..."
+    o CSV "ID,Timestamp,Datos". Devuelve (id, timestamp, datos_hex) o None.
+    """
+    # Formato esperado: "08/07/2025 07:41:12AM   can0  0CF00400   [8]  F0 7D 84 59 16 FF FF 85"
+    if 'can0' in linea and '[' in linea and ']' in linea:
+        try:
+            partes = linea.split()
+            if len(partes) >= 6:
+                # Extraer datos hex después del [8]
+                datos_hex = [parte for parte in partes[5:]
+                             if len(parte) == 2 and all(c in '0123456789ABCDEFabcdef' for c in parte)]
+                if datos_hex:
+                    return partes[3], f"{partes[0]} {partes[1]}", ''.join(datos_hex)
+        except Exception as e:
+            print(f"Error al procesar línea: {linea[:50]}... - {e}")
+        return None
+
+    # Formato CSV alternativo (compatibilidad)
+    if ',' in linea:
+        partes = linea.split(',')
+        if len(partes) >= 3:
+            return partes[0], partes[1], partes[2].strip()
+    return None
+
+# DBC compiladas del proceso: ruta -> (tamaño, mtime_ns, base de datos). Se rellena en el
+# proceso principal antes de crear el pool para que los workers la compartan tras el fork.
+_DBS_COMPILADAS = {}
+
+def cargar_dbc_compilada(dbc_path):
+    """
+    Devuelve la base de datos cantools de dbc_path sin volver a parsear el
+    DBC si no ha cambiado.
+
+    Se busca primero en memoria (mismo tamaño y mtime), después en el pickle
+    de DBC_CACHE_DIR cuyo nombre lleva el hash del contenido y la versión de
+    cantools, y solo si no existe se parsea el DBC y se guarda el pickle.
+    """
+    dbc_path = str(dbc_path)
+    estado = os.stat(dbc_path)
+    en_memoria = _DBS_COMPILADAS.get(dbc_path)
+    if en_memoria and en_memoria[:2] == (estado.st_size, estado.st_mtime_ns):
+        return en_memoria[2]
+
+    with open(dbc_path, 'rb') as f:
+        huella = hashlib.sha256(f.read()).hexdigest()[:16]
+    prefijo = f"{Path(dbc_path).stem}_"
+    ruta_cache = Path(DBC_CACHE_DIR) / f"{prefijo}{huella}_v{DBC_CACHE_VERSION}_cantools{cantools.__version__}.pickle"
+    db = None
+    if ruta_cache.exists():
+        try:
+            with open(ruta_cache, 'rb') as f:
+                db = pickle.load(f)
+        except Exception as e:
+            print(f"⚠️ DBC compilada dañada {ruta_cache.name}, se vuelve a parsear: {e}")
+    if db is None:
+        db = cantools.database.load_file(dbc_path)
+        _guardar_dbc_compilada(ruta_cache, prefijo, db)
+    _DBS_COMPILADAS[dbc_path] = (estado.st_size, estado.st_mtime_ns, db)
+    return db
+
+def _guardar_dbc_compilada(ruta_cache, prefijo, db):
+    """Escribe el pickle (con rename atómico) y borra las versiones anteriores del mismo DBC."""
+    try:
+        ruta_cache.parent.mkdir(parents=True, exist_ok=True)
+        temporal = ruta_cache.with_name(f"{ruta_cache.name}.tmp{os.getpid()}")
+        with open(temporal, 'wb') as f:
+            pickle.dump(db, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporal, ruta_cache)
+        for anterior in ruta_cache.parent.glob(f"{prefijo}*.pickle"):
+            if anterior != ruta_cache:
+                anterior.unlink(missing_ok=True)
+    except OSError as e:
+        # La caché es opcional: sin ella cada proceso parsea el DBC una vez
+        print(f"⚠️ No se pudo guardar la DBC compilada en {ruta_cache.parent}: {e}")
+
+# Valor de cada carácter ASCII como dígito hexadecimal (255 = no válido)
+_VALOR_HEX = np.full(256, 255, dtype=np.uint8)
+for _valor, _digito in enumerate('0123456789abcdef'):
+    _VALOR_HEX[ord(_digito)] = _valor
+    _VALOR_HEX[ord(_digito.upper())] = _valor
+
+def _hex_a_bytes(textos):
+    """
+    Convierte las cadenas hexadecimales de datos en una matriz de bytes
+    (filas x máximo de bytes, rellena con ceros) y sus longitudes en bytes.
+    La longitud es -1 si la cadena no es hexadecimal válida.
+    """
+    total = len(textos)
+    caracteres = np.fromiter(map(len, textos), dtype=np.int64, count=total)
+    inicios = np.zeros(total, dtype=np.int64)
+    np.cumsum(caracteres[:-1], out=inicios[1:])
+    nibbles = _VALOR_HEX[np.frombuffer(''.join(textos).encode('ascii', 'replace'), dtype=np.uint8)]
+    longitudes = np.full(total, -1, dtype=np.int64)
+    payload = np.zeros((total, max(8, int(caracteres.max(initial=0)) // 2)), dtype=np.uint8)
+    # Las tramas de un mismo tamaño se convierten juntas
+    for num_caracteres in np.unique(caracteres).tolist():
+        if num_caracteres % 2:
+            continue
+        filas = np.flatnonzero(caracteres == num_caracteres)
+        grupo = nibbles[inicios[filas, None] + np.arange(num_caracteres)]
+        validas = (grupo != 255).all(axis=1)
+        filas, grupo = filas[validas], grupo[validas]
+        payload[filas, :num_caracteres // 2] = (grupo[:, 0::2] << 4) | grupo[:, 1::2]
+        longitudes[filas] = num_caracteres // 2
+    return payload, longitudes
+
+def _es_vectorizable(mensaje):
+    """
+    Mensajes de hasta 8 bytes cuyas señales son enteras o lineales, caben en
+    el mensaje y no tienen multiplexado ni valores enumerados.
+    """
+    return (not mensaje.is_multiplexed() and mensaje.length <= 8 and
+            all(not senal.is_float and not senal.conversion.choices and
+                _bit_inicial(senal) + senal.length <= 8 * mensaje.length
+                for senal in mensaje.signals))
+
+def _bit_inicial(senal):
+    """Posición del primer bit de la señal contando desde el inicio de la trama en su orden de bytes."""
+    if senal.byte_order == 'little_endian':
+        return senal.start
+    # En big-endian el bit de inicio es el más significativo en numeración "sawtooth"
+    return 8 * (senal.start // 8) + (7 - senal.start % 8)
+
+def _extraer_senal(palabras_le, palabras_be, senal):
+    """
+    Valores de una señal para todas las tramas de un grupo, a partir de los 8
+    bytes de cada trama leídos como entero little-endian y big-endian. Se
+    devuelven con el mismo valor y tipo (int/float) que cantools.
+    """
+    if senal.byte_order == 'little_endian':
+        palabras, desplazamiento = palabras_le, senal.start
+    else:
+        palabras, desplazamiento = palabras_be, 64 - (_bit_inicial(senal) + senal.length)
+    crudo = (palabras >> np.uint64(desplazamiento)) & np.uint64((1 << senal.length) - 1)
+    if senal.length < 64:
+        crudo = crudo.astype(np.int64)
+        if senal.is_signed:
+            crudo = np.where(crudo >= 1 << (senal.length - 1), crudo - (1 << senal.length), crudo)
+    elif senal.is_signed:
+        crudo = crudo.view(np.int64)
+
+    conversion = senal.conversion
+    if conversion.scale == 1 and conversion.offset == 0 and isinstance(conversion.scale, int):
+        return crudo
+    return crudo * conversion.scale + conversion.offset
+
+def _ensamblar_columna(segmentos, filas_ok, total_filas):
+    """
+    Une los valores de una señal (por grupos de filas) en una columna para
+    las filas decodificadas, con NaN donde el mensaje no tiene esa señal. El
+    tipo resultante es el que tendría un DataFrame construido fila a fila.
+    """
+    if any(valores.dtype == object for _, valores in segmentos):
+        columna = np.full(total_filas, np.nan, dtype=object)
+        for filas, valores in segmentos:
+            columna[filas] = valores
+        return pd.Series(columna[filas_ok]).infer_objects().to_numpy()
+    tipo = np.result_type(*(valores.dtype for _, valores in segmentos))
+    cubiertas = sum(len(filas) for filas, _ in segmentos)
+    if tipo.kind != 'f' and cubiertas == len(filas_ok):
+        columna = np.empty(total_filas, dtype=tipo)
+    else:
+        columna = np.full(total_filas, np.nan)
+    for filas, valores in segmentos:
+        columna[filas] = valores
+    return columna[filas_ok]
+
+def acumular_errores(resumen, resultado):
+    """
+    Suma los errores por ID de un resultado de decodificar_archivo a un
+    resumen de varios archivos: {id: {id_hex, total, archivos, motivos, ejemplos}}.
+    Los ejemplos se limitan a MAX_EJEMPLOS_ERROR por ID y motivo.
+    """
+    for id_texto, info in resultado.get('errores', {}).items():
+        total = resumen.setdefault(id_texto, {
+            'id_hex': info['id_hex'], 'total': 0, 'archivos': 0, 'motivos': {}, 'ejemplos': []
+        })
+        total['total'] += info['total']
+        total['archivos'] += 1
+        for motivo, cantidad in info['motivos'].items():
+            total['motivos'][motivo] = total['motivos'].get(motivo, 0) + cantidad
+        for ejemplo in info['ejemplos']:
+            if sum(1 for guardado in total['ejemplos'] if guardado['motivo'] == ejemplo['motivo']) < MAX_EJEMPLOS_ERROR:
+                total['ejemplos'].append(dict(ejemplo, archivo=Path(resultado['archivo']).name))
+        if 'mapeo_sugerido' in info:
+            total['mapeo_sugerido'] = info['mapeo_sugerido']
+    return resumen
+
+def mostrar_resumen_errores(resumen):
+    """Muestra los IDs con más tramas fallidas de un resumen de acumular_errores."""
+    if not resumen:
+        return
+    print(f"\nErrores de decodificación: {sum(info['total'] for info in resumen.values())} tramas en {len(resumen)} IDs")
+    for id_texto, info in sorted(resumen.items(), key=lambda item: -item[1]['total'])[:MAX_IDS_ERROR_MOSTRAR]:
+        motivos = ', '.join(f"{motivo}: {cantidad}" for motivo, cantidad in info['motivos'].items())
+        print(f"  - {id_texto}: {info['total']} tramas en {info['archivos']} archivos ({motivos})")
+    sugeridos = {id_texto: info['mapeo_sugerido'] for id_texto, info in resumen.items() if 'mapeo_sugerido' in info}
+    if sugeridos:
+        print("  Mapeo sugerido para MAPEO_IDS_J1939:")
+        for id_texto, destino in sorted(sugeridos.items()):
+            print(f"    {_id_hex(id_texto)}: {destino},")
+
+def guardar_resumen_errores(directorio_base, resumen_errores, resumen):
+    """
+    Guarda en directorio_base/RESUMEN_ERRORES el resumen de errores por ID
+    (acumular_errores) de una decodificación de flota, con sus totales.
+    Se reemplaza en cada ejecución; devuelve la ruta del archivo.
+    """
+    ruta = Path(directorio_base) / RESUMEN_ERRORES
+    temporal = f"{ruta}.tmp{os.getpid()}"
+    with open(temporal, 'w', encoding='utf-8') as f:
+        json.dump({
+            'fecha': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'archivos': resumen['archivos'],
+            'decodificados': resumen['decodificados'],
+            'archivos_con_error': resumen['errores'],
+            'tramas_con_error': sum(info['total'] for info in resumen_errores.values()),
+            'errores_por_id': resumen_errores,
+        }, f, ensure_ascii=False, indent=1)
+    os.replace(temporal, ruta)
+    return ruta
+
+def _mapeo_sugerido(id_texto):
+    """ID J1939 destino sugerido para un ID sin definir en el DBC (solicitud o respuesta según el patrón)."""
+    texto = id_texto.upper()
+    texto = texto[2:] if texto.startswith('0X') else texto
+    return 1024 if texto.startswith(('0C', 'CF')) else 240
+
+def _id_hex(id_texto):
+    try:
+        return hex(int(id_texto if id_texto.startswith('0x') else '0x' + id_texto, 16))
+    except ValueError:
+        return id_texto
+
+# Decodificador de cada proceso del pool: se crea una vez y usa las DBC compiladas heredadas
+_decodificador_worker = None
+
+def _inicializar_worker(exportar_csv, deduplicar):
+    global _decodificador_worker
+    _decodificador_worker = DecodificadorCAN(exportar_csv, deduplicar)
+
+def _decodificar_en_worker(archivo, sobrescribir):
+    try:
+        return _decodificador_worker.decodificar_archivo(archivo, sobrescribir)
+    except Exception as e:
+        return {'archivo': str(archivo), 'ok': False, 'omitido': False, 'protocolo': None,
+                'lineas': 0, 'mensajes': 0, 'segundos': 0.0, 'error': str(e), 'errores': {}}
+
+def _mostrar_progreso(indice, total, resultado):
+    nombre = Path(resultado['archivo']).name
+    if resultado['omitido']:
+        print(f"[{indice}/{total}] ⏭️  {nombre} ya traducido")
+    elif resultado['ok']:
+        print(f"[{indice}/{total}] ✓ {nombre}: {resultado['mensajes']} mensajes en {resultado['segundos']:.1f}s")
+    else:
+        print(f"[{indice}/{total}] ✗ {nombre}: {resultado['error']}")
+
+def decodificar_archivos(archivos, workers=None, progreso=_mostrar_progreso, decodificador=None, sobrescribir=()):
+    """
+    Decodifica varios archivos CAN en el proceso actual o en un pool de procesos.
+
+    Los DBC se cargan en el proceso principal antes de crear el pool y los
+    procesos hijos los heredan ya compilados (con spawn los leen de la caché
+    de DBC compiladas). Cada proceso crea un único DecodificadorCAN. No hay
+    timeout por archivo: los archivos grandes tardan lo que tardan.
+    progreso(indice, total, resultado) se llama al terminar cada archivo (en
+    orden de finalización). Los archivos de sobrescribir se decodifican
+    aunque ya tengan salida (ver DecodificadorCAN.decodificar_archivo).
+
+    Returns:
+        Lista de resúmenes (ver DecodificadorCAN.decodificar_archivo) en el orden de archivos
+    """
+    archivos = [str(archivo) for archivo in archivos]
+    sobrescribir = {str(archivo) for archivo in sobrescribir}
+    workers = DECODE_WORKERS if workers is None else workers
+    resultados = {}
+    if workers <= 1 or len(archivos) <= 1:
+        decodificador = decodificador or DecodificadorCAN()
+        for indice, archivo in enumerate(archivos, 1):
+            try:
+                resultados[archivo] = decodificador.decodificar_archivo(archivo, archivo in sobrescribir)
+            except Exception as e:
+                resultados[archivo] = {'archivo': archivo, 'ok': False, 'omitido': False, 'protocolo': None,
+                                       'lineas': 0, 'mensajes': 0, 'segundos': 0.0, 'error': str(e), 'errores': {}}
+            if progreso:
+                progreso(indice, len(archivos), resultados[archivo])
+        return [resultados[archivo] for archivo in archivos]
+
+    max_workers = min(workers, len(archivos))
+    print(f"Decodificando {len(archivos)} archivos en {max_workers} procesos")
+    decodificador = decodificador or DecodificadorCAN()
+    decodificador.precargar_dbcs()
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_inicializar_worker,
+                             initargs=(decodificador.exportar_csv, decodificador.deduplicar)) as executor:
+        # Los archivos más grandes se envían primero para equilibrar la carga
+        orden = sorted(archivos, key=lambda archivo: -_tamano_archivo(archivo))
+        futures = {executor.submit(_decodificar_en_worker, archivo, archivo in sobrescribir): archivo
+                   for archivo in orden}
+        for indice, future in enumerate(as_completed(futures), 1):
+            resultados[futures[future]] = future.result()
+            if progreso:
+                progreso(indice, len(archivos), resultados[futures[future]])
+    return [resultados[archivo] for archivo in archivos]
+
+def _tamano_archivo(archivo):
+    try:
+        return os.path.getsize(archivo)
+    except OSError:
+        return 0
 
 def buscar_archivos_can_recursivo(directorio_base):
-    """Busca recursivamente todos los archivos CAN en las subcarpetas de vehículos."""
+    """
+    Busca recursivamente los archivos CAN sin traducir (.txt/.csv) de las
+    carpetas CAN de cada vehículo: <base>/<vehículo>/CAN o <base>/<empresa>/<vehículo>/CAN.
+    """
     archivos_can = []
     directorio_base = Path(directorio_base)
     
@@ -390,31 +1275,260 @@ def buscar_archivos_can_recursivo(directorio_base):
         print(f"Error: El directorio {directorio_base} no existe")
         return archivos_can
     
-    # Buscar en todas las subcarpetas de vehículos (dobackXXX)
-    for vehiculo_dir in directorio_base.iterdir():
-        if vehiculo_dir.is_dir() and vehiculo_dir.name.startswith('doback'):
-            can_dir = vehiculo_dir / 'CAN'
-            if can_dir.exists() and can_dir.is_dir():
-                print(f"Explorando carpeta CAN del vehículo: {vehiculo_dir.name}")
-                
-                # Buscar archivos CAN sin procesar
-                for archivo in can_dir.iterdir():
-                    if archivo.is_file() and (archivo.suffix.lower() in ['.csv', '.txt']):
-                        # Solo procesar archivos que no estén ya traducidos
-                        if '_TRADUCIDO' not in archivo.name:
-                            archivos_can.append(str(archivo))
-                            print(f"  - Encontrado: {archivo.name}")
+    for raiz, directorios, archivos in os.walk(directorio_base):
+        directorios.sort()
+        can_dir = Path(raiz)
+        if can_dir.name.upper() != 'CAN':
+            continue
+        print(f"Explorando carpeta CAN del vehículo: {can_dir.parent.name}")
+        for nombre in sorted(archivos):
+            # Solo archivos que no estén ya traducidos
+            if Path(nombre).suffix.lower() in ('.csv', '.txt') and '_TRADUCIDO' not in nombre:
+                archivos_can.append(str(can_dir / nombre))
     
     return archivos_can
 
-def procesar_todos_vehiculos_cmadrid():
+class ManifiestoDecodificacion:
+    """
+    Manifiesto de la decodificación de flota, guardado en el directorio base.
+
+    archivos: ruta relativa -> content_hash y content_hash_stat (como en
+              file_manifest.FileManifest) y huella de la que se generó su
+              salida (decodificado)
+    huellas:  huella -> salida generada (ruta relativa), protocolo y tramas
+
+    La huella se obtiene con file_manifest.cached_content_hash: solo se
+    recalcula si cambia el tamaño o el mtime del archivo, igual que en el
+    manifiesto del procesador.
+    """
+
+    def __init__(self, directorio_base):
+        self.directorio_base = Path(directorio_base)
+        self.ruta = self.directorio_base / MANIFIESTO_DECODIFICACION
+        self.archivos = {}
+        self.huellas = {}
+
+    def cargar(self):
+        if not self.ruta.exists():
+            return
+        try:
+            with open(self.ruta, 'r', encoding='utf-8') as f:
+                datos = json.load(f)
+            if datos.get('version') == 1:
+                # Versión 1: tamano, mtime_ns y huella propios; se conservan las huellas ya calculadas
+                datos['archivos'] = {ruta: {'content_hash': entrada['huella'],
+                                            'content_hash_stat': [entrada['tamano'], entrada['mtime_ns']],
+                                            'decodificado': entrada.get('decodificado')}
+                                     for ruta, entrada in datos.get('archivos', {}).items()}
+            elif datos.get('version') != VERSION_MANIFIESTO:
+                return
+            self.archivos = datos.get('archivos', {})
+            self.huellas = datos.get('huellas', {})
+        except Exception as e:
+            print(f"⚠️  Manifiesto de decodificación ilegible, se reconstruirá: {e}")
+
+    def guardar(self):
+        temporal = f"{self.ruta}.tmp{os.getpid()}"
+        with open(temporal, 'w', encoding='utf-8') as f:
+            json.dump({'version': VERSION_MANIFIESTO, 'archivos': self.archivos, 'huellas': self.huellas},
+                      f, ensure_ascii=False, indent=1)
+        os.replace(temporal, self.ruta)
+
+    def relativa(self, archivo):
+        return Path(os.path.relpath(archivo, self.directorio_base)).as_posix()
+
+    def huella(self, archivo):
+        """Huella del contenido, reutilizando la guardada si el archivo no cambió de tamaño ni de mtime."""
+        entrada = self.archivos.setdefault(self.relativa(archivo), {'decodificado': None})
+        cached_content_hash(entrada, archivo)
+        return entrada['content_hash']
+
+    def decodificado(self, archivo):
+        """Huella de la que se generó la salida actual del archivo (None si no consta)."""
+        return self.archivos.get(self.relativa(archivo), {}).get('decodificado')
+
+    def salida_de(self, huella):
+        """Salida existente ya generada para ese contenido (de cualquier archivo) o None."""
+        salida = self.huellas.get(huella, {}).get('salida')
+        if salida and (self.directorio_base / salida).exists():
+            return self.directorio_base / salida
+        return None
+
+    def registrar(self, archivo, huella, salida, protocolo=None, tramas=None):
+        salida = self.relativa(salida)
+        self.archivos[self.relativa(archivo)]['decodificado'] = huella
+        # Una salida regenerada deja de representar el contenido del que se generó antes
+        for otra in [otra for otra, entrada in self.huellas.items() if entrada['salida'] == salida and otra != huella]:
+            del self.huellas[otra]
+        if self.salida_de(huella) is None:
+            self.huellas[huella] = {'salida': salida, 'protocolo': protocolo, 'tramas': tramas}
+
+def _salida_existente(archivo):
+    return next((Path(ruta_traducida(archivo, sufijo)) for sufijo in (SUFIJO_COLUMNAR, SUFIJO_CSV)
+                 if os.path.exists(ruta_traducida(archivo, sufijo))), None)
+
+def _falta_csv(archivo, exportar_csv):
+    """True si se exporta CSV y el archivo no lo tiene (p. ej. decodificado solo a .npz con CAN_EXPORT_CSV=0)."""
+    return exportar_csv and not os.path.exists(ruta_traducida(archivo, SUFIJO_CSV))
+
+def _csv_de(salida):
+    """CSV exportado junto a una salida (la propia salida si ya es el CSV)."""
+    return salida if salida.suffix == '.csv' else salida.with_name(salida.name[:-len(SUFIJO_COLUMNAR)] + SUFIJO_CSV)
+
+def _copiar_salida(manifiesto, archivo, huella, origen):
+    """Copia la salida de otro archivo con el mismo contenido (y su CSV, si lo tiene) como salida de archivo."""
+    for sufijo in (SUFIJO_COLUMNAR, SUFIJO_CSV):
+        if os.path.exists(ruta_traducida(archivo, sufijo)):
+            os.remove(ruta_traducida(archivo, sufijo))
+    destino = ruta_traducida(archivo, SUFIJO_COLUMNAR if origen.suffix == '.npz' else SUFIJO_CSV)
+    shutil.copy2(origen, destino)
+    if origen.suffix == '.npz' and _csv_de(origen).exists():
+        shutil.copy2(_csv_de(origen), ruta_traducida(archivo, SUFIJO_CSV))
+    manifiesto.registrar(archivo, huella, destino)
+    print(f"  ♻️  {Path(archivo).name}: mismo contenido que {origen.relative_to(manifiesto.directorio_base)}, salida copiada")
+
+def decodificar_flota(directorio_base, workers=None, decodificador=None, progreso=_mostrar_progreso):
+    """
+    Decodifica todos los archivos CAN bajo directorio_base usando el
+    manifiesto de decodificación (ver ManifiestoDecodificacion):
+
+        - Se omite un archivo si su salida se generó a partir de su contenido
+          actual. Si la salida es anterior al manifiesto, se adopta cuando es
+          más reciente que el archivo.
+        - Si el mismo contenido ya se decodificó en otra ruta (copias entre
+          vehículos o carpetas), se copia esa salida en lugar de decodificar;
+          las copias pendientes en la misma ejecución se decodifican una vez.
+        - El resto se decodifica en el pool de procesos (decodificar_archivos);
+          si el contenido cambió, la salida anterior se reemplaza.
+
+    Muestra el progreso global y el rendimiento (tramas/s y MB/s) y devuelve
+    un resumen con archivos, decodificados, omitidos, reutilizados, errores,
+    tramas, bytes, segundos, tramas_por_segundo, mb_por_segundo y resultados
+    (ver DecodificadorCAN.decodificar_archivo).
+    """
+    inicio = time.perf_counter()
+    manifiesto = ManifiestoDecodificacion(directorio_base)
+    manifiesto.cargar()
+    archivos = buscar_archivos_can_recursivo(directorio_base)
+    resumen = {'archivos': len(archivos), 'decodificados': 0, 'omitidos': 0, 'reutilizados': 0, 'errores': 0,
+               'tramas': 0, 'bytes': 0, 'segundos': 0.0, 'tramas_por_segundo': 0.0, 'mb_por_segundo': 0.0,
+               'resultados': []}
+
+    exportar_csv = decodificador.exportar_csv if decodificador else EXPORTAR_CSV
+    pendientes, sobrescribir, huella_de, copias = [], [], {}, {}
+    for archivo in archivos:
+        try:
+            huella = huella_de[archivo] = manifiesto.huella(archivo)
+        except OSError as e:
+            print(f"  ✗ No se pudo leer {archivo}: {e}")
+            resumen['errores'] += 1
+            continue
+        salida = _salida_existente(archivo)
+        # Sin el CSV que leen otros servicios, la salida se regenera aunque esté al día
+        al_dia = salida is not None and not _falta_csv(archivo, exportar_csv)
+        if al_dia and manifiesto.decodificado(archivo) == huella:
+            resumen['omitidos'] += 1
+            continue
+        if al_dia and manifiesto.decodificado(archivo) is None and os.path.getmtime(salida) >= os.path.getmtime(archivo):
+            manifiesto.registrar(archivo, huella, salida)  # Traducido antes de existir el manifiesto
+            resumen['omitidos'] += 1
+            continue
+        origen = manifiesto.salida_de(huella)
+        if origen is not None and origen != salida and not (exportar_csv and not _csv_de(origen).exists()):
+            _copiar_salida(manifiesto, archivo, huella, origen)
+            resumen['reutilizados'] += 1
+            continue
+        if huella in copias:
+            copias[huella].append(archivo)  # Se copiará de la primera ruta con este contenido
+            continue
+        copias[huella] = []
+        pendientes.append(archivo)
+        if salida:
+            sobrescribir.append(archivo)
+
+    repetidos = sum(len(rutas) for rutas in copias.values())
+    print(f"\n📋 {len(archivos)} archivos CAN: {len(pendientes)} por decodificar, {resumen['omitidos']} ya traducidos, "
+          f"{resumen['reutilizados'] + repetidos} reutilizados por contenido")
+
+    inicio_decodificacion = time.perf_counter()
+    acumulado = {'tramas': 0, 'bytes': 0}
+
+    def progreso_global(indice, total, resultado):
+        if resultado['ok'] and not resultado['omitido']:
+            acumulado['tramas'] += resultado['lineas']
+            acumulado['bytes'] += _tamano_archivo(resultado['archivo'])
+        if progreso:
+            progreso(indice, total, resultado)
+        transcurrido = max(time.perf_counter() - inicio_decodificacion, 1e-9)
+        print(f"    ⏱️  {indice}/{total} archivos · {acumulado['tramas'] / transcurrido:,.0f} tramas/s · "
+              f"{acumulado['bytes'] / 1e6 / transcurrido:.1f} MB/s")
+
+    if pendientes:
+        resultados = decodificar_archivos(pendientes, workers, progreso_global, decodificador, sobrescribir)
+        segundos = time.perf_counter() - inicio_decodificacion
+        for resultado in resultados:
+            archivo = resultado['archivo']
+            huella = huella_de[archivo]
+            if resultado['ok'] and not resultado['omitido']:
+                manifiesto.registrar(archivo, huella, _salida_existente(archivo),
+                                     resultado['protocolo'], resultado['lineas'])
+                resumen['decodificados'] += 1
+            elif not resultado['ok']:
+                resumen['errores'] += 1 + len(copias[huella])
+                continue
+            origen = _salida_existente(archivo)
+            for copia in copias[huella]:
+                _copiar_salida(manifiesto, copia, huella, origen)
+                resumen['reutilizados'] += 1
+        resumen.update({
+            'resultados': resultados, 'tramas': acumulado['tramas'], 'bytes': acumulado['bytes'], 'segundos': segundos,
+            'tramas_por_segundo': acumulado['tramas'] / max(segundos, 1e-9),
+            'mb_por_segundo': acumulado['bytes'] / 1e6 / max(segundos, 1e-9),
+        })
+    manifiesto.guardar()
+
+    print(f"📈 Decodificados {resumen['decodificados']} archivos ({resumen['tramas']:,} tramas, "
+          f"{resumen['bytes'] / 1e6:.1f} MB) en {resumen['segundos']:.1f}s: "
+          f"{resumen['tramas_por_segundo']:,.0f} tramas/s, {resumen['mb_por_segundo']:.1f} MB/s "
+          f"(total {time.perf_counter() - inicio:.1f}s)")
+    return resumen
+
+def decodificar_si_cambia(archivo, directorio_base, decodificador=None):
+    """
+    Decodifica un único archivo CAN con el manifiesto de decodificación de
+    directorio_base (el mismo criterio que decodificar_flota): si su salida
+    se generó a partir del contenido actual se omite; si el contenido cambió
+    (p. ej. un CAN que sigue creciendo) la salida se regenera.
+
+    Devuelve el resumen de decodificar_archivo (omitido=True si la salida ya
+    estaba al día).
+    """
+    manifiesto = ManifiestoDecodificacion(directorio_base)
+    manifiesto.cargar()
+    huella = manifiesto.huella(archivo)
+    salida = _salida_existente(archivo)
+    decodificador = decodificador or DecodificadorCAN()
+    if salida and not _falta_csv(archivo, decodificador.exportar_csv) and (manifiesto.decodificado(archivo) == huella or (
+            manifiesto.decodificado(archivo) is None and os.path.getmtime(salida) >= os.path.getmtime(archivo))):
+        manifiesto.registrar(archivo, huella, salida)
+        manifiesto.guardar()
+        return {'archivo': str(archivo), 'ok': True, 'omitido': True, 'protocolo': None, 'lineas': 0,
+                'mensajes': 0, 'segundos': 0.0, 'error': None, 'errores': {}}
+
+    resultado = decodificador.decodificar_archivo(archivo, sobrescribir=salida is not None)
+    if resultado['ok']:
+        manifiesto.registrar(archivo, huella, _salida_existente(archivo), resultado['protocolo'], resultado['lineas'])
+    manifiesto.guardar()
+    return resultado
+
+def procesar_todos_vehiculos_cmadrid(exportar_csv=None, deduplicar=None):
     """Procesa todos los archivos CAN de todos los vehículos en CMadrid."""
     print("Decodificador CAN Unificado - Procesamiento Masivo CMadrid")
     print("=" * 60)
     
     # Verificar archivos DBC
     print("Verificando archivos DBC...")
-    decodificador = DecodificadorCAN()
+    decodificador = DecodificadorCAN(exportar_csv, deduplicar)
     if not decodificador.verificar_archivos_dbc():
         print("No se pueden encontrar los archivos DBC necesarios.")
         return False
@@ -428,56 +1542,48 @@ def procesar_todos_vehiculos_cmadrid():
         print(f"❌ Error: El directorio {directorio_cmadrid} no existe")
         return False
     
-    # Buscar todos los archivos CAN
+    # Decodificar la flota: lista de trabajo desde el manifiesto y pool de procesos
     print("Explorando estructura de directorios...")
-    archivos_can = buscar_archivos_can_recursivo(directorio_cmadrid)
+    resumen = decodificar_flota(directorio_cmadrid, decodificador=decodificador)
     
-    if not archivos_can:
-        print("No se encontraron archivos CAN sin procesar en CMadrid")
+    if not resumen['archivos']:
+        print("No se encontraron archivos CAN en CMadrid")
         return False
     
-    print(f"\nTotal de archivos CAN encontrados: {len(archivos_can)}")
-    print("Iniciando procesamiento...")
-    
-    # Procesar cada archivo
-    exitos = 0
-    errores = 0
-    vehiculos_procesados = set()
-    
-    for i, archivo in enumerate(archivos_can, 1):
-        archivo_path = Path(archivo)
-        vehiculo = archivo_path.parent.parent.name  # Extraer nombre del vehículo
-        vehiculos_procesados.add(vehiculo)
-        
-        print(f"\n[{i}/{len(archivos_can)}] Procesando {vehiculo}: {archivo_path.name}")
-        
-        try:
-            if decodificador.procesar_archivo(archivo):
-                exitos += 1
-                print(f"✓ Procesado exitosamente")
-            else:
-                errores += 1
-                print(f"✗ Error en el procesamiento")
-        except Exception as e:
-            errores += 1
-            print(f"✗ Error inesperado: {e}")
+    resultados = resumen['resultados']
+    exitos = resumen['decodificados'] + resumen['omitidos'] + resumen['reutilizados']
+    errores = resumen['errores']
+    resumen_errores = {}
+    for resultado in resultados:
+        acumular_errores(resumen_errores, resultado)
+    vehiculos_procesados = set(Path(resultado['archivo']).parent.parent.name for resultado in resultados)
     
     # Mostrar resumen detallado
     print("\n" + "=" * 60)
     print("RESUMEN DEL PROCESAMIENTO MASIVO")
     print("=" * 60)
     print(f"Vehículos procesados: {len(vehiculos_procesados)}")
-    print(f"Archivos procesados exitosamente: {exitos}")
+    print(f"Archivos decodificados: {resumen['decodificados']}")
+    print(f"Archivos ya traducidos: {resumen['omitidos']}")
+    print(f"Archivos reutilizados por contenido: {resumen['reutilizados']}")
     print(f"Archivos con errores: {errores}")
-    print(f"Total de archivos: {len(archivos_can)}")
+    print(f"Total de archivos: {resumen['archivos']}")
+    print(f"Rendimiento: {resumen['tramas_por_segundo']:,.0f} tramas/s, {resumen['mb_por_segundo']:.1f} MB/s")
     
     if vehiculos_procesados:
         print(f"\nVehículos procesados:")
         for vehiculo in sorted(vehiculos_procesados):
             print(f"  - {vehiculo}")
+    mostrar_resumen_errores(resumen_errores)
+    try:
+        ruta_resumen = guardar_resumen_errores(directorio_cmadrid, resumen_errores, resumen)
+        print(f"Resumen de errores guardado en: {ruta_resumen}")
+    except OSError as e:
+        print(f"⚠️  No se pudo guardar el resumen de errores: {e}")
     
     if exitos > 0:
-        print(f"\nLos archivos traducidos se guardan con el sufijo '_TRADUCIDO.csv'")
+        sufijos = f"'{SUFIJO_COLUMNAR}'" + (f" y '{SUFIJO_CSV}'" if decodificador.exportar_csv else '')
+        print(f"\nLos archivos traducidos se guardan con el sufijo {sufijos}")
     
     return exitos > 0
 
@@ -489,38 +1595,42 @@ def mostrar_ayuda():
     print("  python decodificador_can_unificado.py [opciones] [archivos]")
     print("\nOpciones:")
     print("  --cmadrid, --masivo    Procesar todos los archivos CAN de CMadrid")
+    print("  --sin-csv             No exportar el CSV legible (_TRADUCIDO.csv), solo el .npz")
+    print("  --dedup               Agrupar tramas repetidas consecutivas de cada ID (decodifica y guarda una vez)")
     print("  --help                Mostrar esta ayuda")
     print("\nEjemplos:")
     print("  python decodificador_can_unificado.py --cmadrid")
+    print("  python decodificador_can_unificado.py --sin-csv archivo1.txt")
     print("  python decodificador_can_unificado.py archivo1.txt archivo2.csv")
     print("  python decodificador_can_unificado.py")
 
 def main():
     """Función principal con opciones de procesamiento."""
-    if len(sys.argv) > 1:
-        primer_arg = sys.argv[1]
+    exportar_csv = False if '--sin-csv' in sys.argv else (True if '--csv' in sys.argv else None)
+    deduplicar = True if '--dedup' in sys.argv else None
+    argumentos = [argumento for argumento in sys.argv[1:] if argumento not in ('--csv', '--sin-csv', '--dedup')]
+    if argumentos:
+        primer_arg = argumentos[0]
         
         if primer_arg == '--help' or primer_arg == '-h':
             mostrar_ayuda()
             return
         elif primer_arg == '--cmadrid' or primer_arg == '--masivo':
             # Procesamiento masivo de CMadrid
-            procesar_todos_vehiculos_cmadrid()
+            procesar_todos_vehiculos_cmadrid(exportar_csv, deduplicar)
         else:
             # Procesamiento de archivos específicos (comportamiento original)
             print("Decodificador CAN Unificado")
             print("=" * 50)
             
-            decodificador = DecodificadorCAN()
+            decodificador = DecodificadorCAN(exportar_csv, deduplicar)
             if not decodificador.verificar_archivos_dbc():
                 print("No se pueden encontrar los archivos DBC necesarios.")
                 return
 
-            archivos = sys.argv[1:]
-            exitos = 0
-            for archivo in archivos:
-                if decodificador.procesar_archivo(archivo):
-                    exitos += 1
+            archivos = argumentos
+            resultados = decodificar_archivos(archivos, decodificador=decodificador)
+            exitos = sum(1 for resultado in resultados if resultado['ok'])
 
             print(f"\nResumen: {exitos}/{len(archivos)} archivos procesados exitosamente")
     else:
@@ -528,7 +1638,7 @@ def main():
         print("Decodificador CAN Unificado")
         print("=" * 50)
         
-        decodificador = DecodificadorCAN()
+        decodificador = DecodificadorCAN(exportar_csv, deduplicar)
         if not decodificador.verificar_archivos_dbc():
             print("No se pueden encontrar los archivos DBC necesarios.")
             return
@@ -541,10 +1651,8 @@ def main():
             print("python decodificador_can_unificado.py --cmadrid")
             return
 
-        exitos = 0
-        for archivo in archivos:
-            if decodificador.procesar_archivo(archivo):
-                exitos += 1
+        resultados = decodificar_archivos(archivos, decodificador=decodificador)
+        exitos = sum(1 for resultado in resultados if resultado['ok'])
 
         print(f"\nResumen: {exitos}/{len(archivos)} archivos procesados exitosamente")
 
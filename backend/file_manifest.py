@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Manifiesto incremental de archivos Doback.
+
+Guarda, por ruta, el tamaño, el mtime y una huella del contenido de cada
+archivo escaneado junto con su rango temporal. En cada ejecución solo se
+vuelven a leer los archivos nuevos o modificados; el resto se sirve desde
+el manifiesto.
+"""
+
+import os
+import json
+import hashlib
+import logging
+from datetime import datetime
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_VERSION = 1
+FINGERPRINT_BLOCK_SIZE = 64 * 1024  # Bytes leídos del inicio y del final del archivo
+CONTENT_HASH_BLOCK_SIZE = 1024 * 1024  # Bloque de lectura para la huella del contenido completo
+
+def compute_fingerprint(file_path: str, size: Optional[int] = None) -> str:
+    """
+    Calcula una huella del contenido a partir del tamaño y de los bloques
+    inicial y final del archivo.
+
+    Los archivos Doback solo crecen por el final y siempre empiezan por una
+    cabecera con fecha y vehículo, por lo que ambos bloques bastan para
+    distinguir un archivo de otro sin leerlo entero.
+    """
+    if size is None:
+        size = os.path.getsize(file_path)
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(str(size).encode('ascii'))
+    with open(file_path, 'rb') as f:
+        digest.update(f.read(FINGERPRINT_BLOCK_SIZE))
+        if size > FINGERPRINT_BLOCK_SIZE:
+            f.seek(max(FINGERPRINT_BLOCK_SIZE, size - FINGERPRINT_BLOCK_SIZE))
+            digest.update(f.read(FINGERPRINT_BLOCK_SIZE))
+    return digest.hexdigest()
+
+def compute_content_hash(file_path: str) -> str:
+    """
+    Huella (blake2b) del contenido completo del archivo.
+
+    A diferencia de compute_fingerprint, detecta cualquier cambio, también
+    en mitad del archivo: es la clave de la caché de parseo, que guarda
+    todas las filas y no solo el rango temporal.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(CONTENT_HASH_BLOCK_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def cached_content_hash(entry: Dict, file_path: str) -> bool:
+    """
+    Asegura en la entrada de manifiesto la huella del contenido completo.
+
+    La huella (content_hash) se guarda junto al (tamaño, mtime_ns) con que se
+    calculó (content_hash_stat) y solo se recalcula si cambian. La usan
+    FileManifest y el manifiesto del decodificador CAN, de modo que ambos
+    dan un archivo por modificado en los mismos casos.
+    Devuelve True si la entrada se actualizó.
+    """
+    stat = os.stat(file_path)
+    state = [stat.st_size, stat.st_mtime_ns]
+    if entry.get('content_hash') and entry.get('content_hash_stat') == state:
+        return False
+    entry['content_hash'] = compute_content_hash(file_path)
+    entry['content_hash_stat'] = state
+    return True
+
+class FileManifest:
+    """
+    Manifiesto persistente de archivos escaneados.
+
+    Cada entrada se indexa por ruta y contiene:
+        size, mtime_ns, fingerprint: identidad del archivo en disco
+        filename, type, vehicle: metadatos derivados de la ruta
+        start_time, end_time: rango temporal extraído del contenido
+        content_hash, content_hash_stat: huella del contenido completo y el
+            (tamaño, mtime_ns) con el que se calculó (ver content_hash)
+    """
+
+    def __init__(self, manifest_path: str):
+        self.manifest_path = manifest_path
+        self.entries: Dict[str, Dict] = {}
+        self.dirty = False
+        self.stats = {'hits': 0, 'refreshed': 0, 'misses': 0, 'removed': 0}
+
+    def load(self) -> None:
+        """Carga el manifiesto desde disco. Un manifiesto ilegible se descarta."""
+        self.stats = {'hits': 0, 'refreshed': 0, 'misses': 0, 'removed': 0}
+        if not os.path.exists(self.manifest_path):
+            return
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') != MANIFEST_VERSION:
+                logger.info(f"Versión de manifiesto distinta en {self.manifest_path}, se reconstruirá")
+                return
+            self.entries = data.get('files', {})
+            logger.info(f"Manifiesto cargado: {len(self.entries)} archivos")
+        except Exception as e:
+            logger.warning(f"Error cargando manifiesto {self.manifest_path}: {e}")
+            self.entries = {}
+
+    def save(self) -> None:
+        """Guarda el manifiesto si hubo cambios (escritura atómica)."""
+        if not self.dirty:
+            return
+        tmp_path = f"{self.manifest_path}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'version': MANIFEST_VERSION, 'files': self.entries}, f, indent=2, ensure_ascii=False)
+            os.replace(tmp_path, self.manifest_path)
+            self.dirty = False
+            logger.info(f"Manifiesto guardado: {len(self.entries)} archivos")
+        except Exception as e:
+            logger.warning(f"Error guardando manifiesto {self.manifest_path}: {e}")
+
+    def lookup(self, file_path: str, stat: os.stat_result) -> Optional[Dict]:
+        """
+        Devuelve la entrada del manifiesto si el archivo no ha cambiado.
+
+        Tamaño y mtime iguales se consideran un acierto directo. Si solo cambió
+        el mtime (copias, touch), se compara la huella del contenido antes de
+        dar el archivo por modificado.
+        """
+        entry = self.entries.get(file_path)
+        if entry is None or entry.get('size') != stat.st_size:
+            self.stats['misses'] += 1
+            return None
+        if entry.get('mtime_ns') == stat.st_mtime_ns:
+            self.stats['hits'] += 1
+            return entry
+        try:
+            fingerprint = compute_fingerprint(file_path, stat.st_size)
+        except OSError:
+            self.stats['misses'] += 1
+            return None
+        if fingerprint != entry.get('fingerprint'):
+            self.stats['misses'] += 1
+            return None
+        entry['mtime_ns'] = stat.st_mtime_ns
+        self.dirty = True
+        self.stats['refreshed'] += 1
+        return entry
+
+    def content_hash(self, file_path: str) -> str:
+        """
+        Huella del contenido completo del archivo (ver cached_content_hash).
+
+        Se guarda en la entrada del manifiesto y se reutiliza mientras no
+        cambien el tamaño ni el mtime. No basta con que la entrada siga
+        siendo válida para lookup, que acepta un cambio de mtime si la
+        huella de inicio y fin no cambia.
+        """
+        entry = self.entries.get(file_path)
+        if entry is None:
+            return compute_content_hash(file_path)
+        if cached_content_hash(entry, file_path):
+            self.dirty = True
+        return entry['content_hash']
+
+    def update(self, file_path: str, stat: os.stat_result, info: Dict,
+               fingerprint: Optional[str] = None) -> Dict:
+        """
+        Registra (o reemplaza) la entrada de un archivo recién leído.
+        La huella se calcula aquí si no viene ya calculada.
+        """
+        entry = {
+            'size': stat.st_size,
+            'mtime_ns': stat.st_mtime_ns,
+            'fingerprint': fingerprint or compute_fingerprint(file_path, stat.st_size),
+            'filename': info.get('filename'),
+            'type': info.get('type'),
+            'vehicle': info.get('vehicle'),
+            'start_time': _to_iso(info.get('start_time')),
+            'end_time': _to_iso(info.get('end_time')),
+        }
+        self.entries[file_path] = entry
+        self.dirty = True
+        return entry
+
+    def prune(self, existing_paths: set) -> None:
+        """Elimina del manifiesto los archivos que ya no existen en disco."""
+        stale = [path for path in self.entries if path not in existing_paths]
+        for path in stale:
+            del self.entries[path]
+        if stale:
+            self.stats['removed'] += len(stale)
+            self.dirty = True
+
+    def to_file_info(self, file_path: str, entry: Dict) -> Optional[Dict]:
+        """
+        Convierte una entrada al formato de archivo usado por DobackProcessor.
+        Devuelve None si el archivo no tiene un rango temporal válido.
+        """
+        start_time = _from_iso(entry.get('start_time'))
+        end_time = _from_iso(entry.get('end_time'))
+        if not start_time or not end_time:
+            return None
+        return {
+            'path': file_path,
+            'filename': entry.get('filename'),
+            'date': start_time,  # Usar start_time como fecha de referencia
+            'type': entry.get('type'),
+            'vehicle': entry.get('vehicle'),
+            'start_time': start_time,
+            'end_time': end_time,
+            'fingerprint': entry.get('fingerprint'),
+        }
+
+    def all_file_infos(self) -> List[Dict]:
+        """Devuelve todos los archivos del manifiesto con rango temporal válido."""
+        infos = []
+        for path in sorted(self.entries):
+            info = self.to_file_info(path, self.entries[path])
+            if info:
+                infos.append(info)
+        return infos
+
+def _to_iso(value) -> Optional[str]:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+def _from_iso(value) -> Optional[datetime]:
+    if isinstance(value, datetime) or value is None:
+        return value
+    try:
+        return datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
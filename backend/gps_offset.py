@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Detección del desfase fijo del reloj GPS respecto al resto de fuentes.
+
+Algunos equipos graban el GPS en UTC mientras CAN, ESTABILIDAD y ROTATIVO
+van en hora local, así que los demás archivos empiezan GPS_OFFSET_HOURS
+después que el GPS. En lugar de comparar cada inicio GPS con cada inicio del
+resto de archivos en bucles Python, los inicios se ordenan una vez y cada
+pregunta "¿cuántos archivos empiezan en esta ventana?" es una búsqueda
+binaria (np.searchsorted) vectorizada para todos los GPS a la vez:
+
+- por archivo GPS: cuántos archivos empiezan cerca y cuántos justo al
+  desfase esperado (la regla de siempre: al menos 2 y al menos la mitad)
+- por vehículo: histograma de las diferencias de inicio entre cada GPS y
+  los archivos cercanos, con paso la tolerancia. Su moda es el desfase
+  estimado y la fracción de pares que caen en ella es la confianza.
+
+Con n archivos GPS y m del resto el coste es O((n + m) log m) por ventana y
+el histograma tiene un número fijo de ventanas (±3 h en pasos de 1 min),
+así que cientos de archivos GPS por vehículo se resuelven en milisegundos.
+"""
+
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Iterable, Optional
+
+import numpy as np
+
+MIN_OFFSET_MATCHES = 2  # Archivos al desfase esperado necesarios para corregir un GPS
+MIN_OFFSET_RATIO = 0.5  # Fracción mínima de los archivos cercanos que deben estar al desfase
+
+@dataclass
+class OffsetDetection:
+    """
+    Resultado de la detección para los archivos GPS de un vehículo.
+
+    Los arrays por archivo siguen el orden de los inicios GPS recibidos.
+    offset_hours es la moda del histograma de diferencias (otros - GPS), o
+    None si ningún archivo tiene vecinos. confidence es la fracción de los
+    pares cercanos que caen en la moda (0 a 1).
+    """
+    expected_offset_hours: float
+    tolerance_minutes: float
+    offset_hours: Optional[float]
+    confidence: float
+    votes: int
+    nearby_pairs: int
+    offset_matches: np.ndarray
+    nearby_counts: np.ndarray
+    needs_correction: np.ndarray
+
+    @property
+    def matches_expected(self) -> bool:
+        """La moda coincide con el desfase esperado (dentro de la tolerancia)."""
+        if self.offset_hours is None:
+            return False
+        return abs(self.offset_hours - self.expected_offset_hours) * 60 <= self.tolerance_minutes
+
+    @property
+    def file_confidence(self) -> np.ndarray:
+        """Fracción de los archivos cercanos a cada GPS que están al desfase esperado."""
+        return np.divide(self.offset_matches, self.nearby_counts,
+                         out=np.zeros(len(self.nearby_counts)), where=self.nearby_counts > 0)
+
+def to_epoch_seconds(instants: Iterable[datetime]) -> np.ndarray:
+    """Instantes (naive, hora de pared) a segundos int64, sin pasar por la zona horaria local."""
+    return np.array(list(instants), dtype='datetime64[s]').astype(np.int64)
+
+def count_within(sorted_values: np.ndarray, centers: np.ndarray, radius: float) -> np.ndarray:
+    """Cuántos valores de sorted_values caen en [center - radius, center + radius] para cada center."""
+    return (np.searchsorted(sorted_values, centers + radius, side='right')
+            - np.searchsorted(sorted_values, centers - radius, side='left'))
+
+def detect_clock_offset(gps_starts: np.ndarray, other_starts: np.ndarray, expected_offset_hours: float,
+                        tolerance_minutes: float, max_nearby_hours: float) -> OffsetDetection:
+    """
+    Detecta el desfase de los inicios GPS respecto a los del resto de archivos.
+
+    Args:
+        gps_starts: Inicios de los archivos GPS (segundos, ver to_epoch_seconds)
+        other_starts: Inicios de los archivos CAN, ESTABILIDAD y ROTATIVO
+        expected_offset_hours: Desfase a detectar (otros - GPS)
+        tolerance_minutes: Tolerancia alrededor del desfase y paso del histograma
+        max_nearby_hours: Distancia máxima para considerar un archivo cercano
+    """
+    gps_starts = np.asarray(gps_starts, dtype=np.int64)
+    other_starts = np.sort(np.asarray(other_starts, dtype=np.int64))
+    tolerance = tolerance_minutes * 60
+    max_nearby = max_nearby_hours * 3600
+    expected = expected_offset_hours * 3600
+
+    nearby_counts = count_within(other_starts, gps_starts, max_nearby)
+    offset_matches = count_within(other_starts, gps_starts + expected, tolerance)
+    needs_correction = (offset_matches >= MIN_OFFSET_MATCHES) & (offset_matches >= MIN_OFFSET_RATIO * nearby_counts)
+
+    # Histograma de diferencias: pares GPS/otro a cada desfase candidato ± tolerancia.
+    # Rejilla centrada en el desfase esperado y con las ventanas dentro de ±max_nearby.
+    limit = max_nearby - tolerance
+    steps = np.arange(np.ceil((-limit - expected) / tolerance), np.floor((limit - expected) / tolerance) + 1)
+    candidates = expected + steps * tolerance
+    windows = count_within(other_starts, (gps_starts[:, None] + candidates[None, :]).ravel(), tolerance)
+    histogram = windows.reshape(len(gps_starts), len(candidates)).sum(axis=0)
+    nearby_pairs = int(nearby_counts.sum())
+
+    offset_hours, votes = None, 0
+    if nearby_pairs:
+        # Moda; en empate, el candidato más cercano al desfase esperado
+        best = np.lexsort((np.abs(candidates - expected), -histogram))[0]
+        offset_hours = float(candidates[best]) / 3600
+        votes = int(histogram[best])
+
+    return OffsetDetection(
+        expected_offset_hours=expected_offset_hours,
+        tolerance_minutes=tolerance_minutes,
+        offset_hours=offset_hours,
+        confidence=votes / nearby_pairs if nearby_pairs else 0.0,
+        votes=votes,
+        nearby_pairs=nearby_pairs,
+        offset_matches=offset_matches,
+        nearby_counts=nearby_counts,
+        needs_correction=needs_correction,
+    )
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Lectura de cabecera y cola de archivos de telemetría sin cargarlos enteros.
+
+Para obtener el rango temporal de un archivo solo hacen falta la cabecera,
+el primer bloque de datos y la última marca de tiempo válida. Estas
+utilidades leen el inicio del archivo línea a línea y el final a bloques
+desde EOF hacia atrás, de modo que el coste por archivo es de unos pocos KB
+independientemente de su tamaño.
+"""
+
+import os
+from typing import Callable, Iterator, List, Optional, Tuple, TypeVar
+
+HEAD_SCAN_LINES = 50  # Líneas iniciales en las que se buscan cabeceras
+FIND_MAX_LINES = 10000  # Líneas revisadas desde el inicio o el final buscando una marca de tiempo válida
+TAIL_BLOCK_SIZE = 8 * 1024  # Tamaño del bloque leído desde el final
+DEFAULT_CHUNK_BYTES = 4 * 1024 * 1024  # Tamaño objetivo de cada bloque en lectura por streaming
+
+T = TypeVar('T')
+
+def iter_head_lines(file_path: str, start_offset: int = 0) -> Iterator[Tuple[int, str]]:
+    """
+    Itera las líneas desde el inicio del archivo (o desde start_offset, que
+    debe coincidir con un inicio de línea).
+
+    Yields:
+        (offset, línea): offset en bytes del final de la línea y la línea
+        decodificada sin salto de línea.
+    """
+    offset = start_offset
+    with open(file_path, 'rb') as f:
+        f.seek(start_offset)
+        for raw in f:
+            offset += len(raw)
+            yield offset, raw.decode('utf-8', errors='replace').rstrip('\r\n')
+
+def iter_tail_lines(file_path: str, stop_offset: int = 0,
+                    block_size: int = TAIL_BLOCK_SIZE) -> Iterator[str]:
+    """
+    Itera las líneas desde el final del archivo hacia atrás.
+
+    Args:
+        file_path: Ruta del archivo
+        stop_offset: No se leen bytes anteriores a este offset (p. ej. el
+            final de la cabecera de columnas)
+        block_size: Bytes leídos por cada salto hacia atrás
+    """
+    with open(file_path, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        position = f.tell()
+        remainder = b''
+        while position > stop_offset:
+            read_size = min(block_size, position - stop_offset)
+            position -= read_size
+            f.seek(position)
+            chunk = f.read(read_size) + remainder
+            lines = chunk.split(b'\n')
+            # La primera línea del bloque puede estar cortada: se completa en el siguiente salto
+            remainder = lines.pop(0)
+            for raw in reversed(lines):
+                yield raw.decode('utf-8', errors='replace').rstrip('\r')
+        if remainder:
+            yield remainder.decode('utf-8', errors='replace').rstrip('\r')
+
+def iter_line_chunks(file_path: str, start_offset: int = 0,
+                     chunk_bytes: int = DEFAULT_CHUNK_BYTES) -> Iterator[List[str]]:
+    """
+    Itera el archivo en bloques de líneas completas de unos chunk_bytes bytes
+    (un bloque solo supera ese tamaño si una única línea es mayor).
+
+    La memoria usada depende de chunk_bytes y no del tamaño del archivo.
+    Las líneas se devuelven decodificadas en UTF-8 y con su salto de línea,
+    como readlines().
+    """
+    with open(file_path, 'rb') as f:
+        f.seek(start_offset)
+        while True:
+            raw_lines = f.readlines(chunk_bytes)
+            if not raw_lines:
+                break
+            yield [raw.decode('utf-8') for raw in raw_lines]
+
+def find_data_offset(file_path: str, is_header: Callable[[str], bool],
+                     default_after_first: bool = True) -> Optional[int]:
+    """
+    Busca la cabecera de columnas entre las primeras HEAD_SCAN_LINES líneas.
+
+    Returns:
+        Offset en bytes donde empiezan los datos. Si no se encuentra la
+        cabecera, el offset tras la primera línea (default_after_first) o
+        None. También None si el archivo está vacío.
+    """
+    first_line_end = None
+    for index, (offset, line) in enumerate(iter_head_lines(file_path)):
+        if index == 0:
+            first_line_end = offset
+        if is_header(line):
+            return offset
+        if index + 1 >= HEAD_SCAN_LINES:
+            break
+    return first_line_end if default_after_first else None
+
+def line_number_at(file_path: str, offset: int) -> int:
+    """Número de línea (desde 1) de la línea que empieza en offset, p. ej. el devuelto por find_data_offset."""
+    with open(file_path, 'rb') as f:
+        return f.read(offset).count(b'\n') + 1
+
+def read_first_line(file_path: str) -> Optional[str]:
+    """Devuelve la primera línea del archivo o None si está vacío."""
+    for _, line in iter_head_lines(file_path):
+        return line
+    return None
+
+def find_first(lines, parse: Callable[[str], Optional[T]], max_lines: int = FIND_MAX_LINES) -> Optional[T]:
+    """
+    Devuelve el primer valor no nulo de parse(línea) entre las primeras
+    max_lines líneas, o None. El límite evita que un archivo sin ninguna
+    línea válida se lea entero desde el inicio o desde el final.
+    """
+    for index, line in enumerate(lines):
+        if index >= max_lines:
+            break
+        value = parse(line)
+        if value is not None:
+            return value
+    return None
@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Ingesta continua de archivos Doback (modo --watch de complete_processor.py).
+
+En lugar de decodificar, escanear y subir todo en cada ejecución, el
+vigilante detecta los archivos nuevos o modificados bajo datosDoback y
+procesa solo los vehículo/fecha afectados:
+
+    1. Sondeo: os.walk + stat de los .txt/.csv/.npz y comparación con el último
+       estado procesado (inicializado desde el manifiesto, así que al
+       arrancar solo se recupera lo que llegó mientras estaba parado).
+    2. Un archivo se procesa cuando lleva WATCH_SETTLE_SECONDS sin cambiar,
+       para no leer archivos a medio copiar.
+    3. Los CAN_*.txt nuevos se decodifican uno a uno y su _TRADUCIDO.npz
+       entra en el mismo lote.
+    4. DobackProcessor.process_sessions(changed_paths) actualiza el
+       manifiesto (solo relee lo cambiado), empareja los vehículo/fecha
+       afectados y sube las sesiones nuevas.
+    5. Un archivo solo se da por procesado si su lote se subió sin errores
+       (y, si es un CAN, si su salida corresponde al contenido actual). Los
+       fallidos se reintentan con espera exponencial y se guardan en
+       WATCH_PENDING_FILE para recuperarlos tras un reinicio, aunque el
+       manifiesto ya los tenga escaneados.
+
+Si inotify_simple está instalado (Linux), los eventos del sistema de
+archivos despiertan el bucle en cuanto llega algo; sin él se sondea cada
+WATCH_POLL_SECONDS. La detección es la misma en ambos casos.
+"""
+
+import os
+import json
+import time
+import logging
+from typing import Dict, Optional, Set, Tuple
+
+from complete_processor import DobackProcessor, SessionProcessingError, can_decoded_path, is_raw_can_file
+
+try:
+    from inotify_simple import INotify, flags as inotify_flags
+except ImportError:
+    INotify = None
+
+logger = logging.getLogger(__name__)
+
+WATCH_POLL_SECONDS = float(os.getenv('WATCH_POLL_SECONDS', '15'))  # Intervalo entre sondeos
+WATCH_SETTLE_SECONDS = float(os.getenv('WATCH_SETTLE_SECONDS', '5'))  # Tiempo sin cambios antes de procesar
+WATCH_RETRY_SECONDS = float(os.getenv('WATCH_RETRY_SECONDS', '30'))  # Primera espera antes de reintentar un lote fallido
+WATCH_RETRY_MAX_SECONDS = float(os.getenv('WATCH_RETRY_MAX_SECONDS', '900'))  # Espera máxima entre reintentos
+WATCH_PENDING_FILE = 'watch_pending.json'  # Archivos fallidos pendientes de reintento (en data_dir)
+WATCHED_EXTENSIONS = ('.txt', '.csv', '.npz')
+
+FileState = Tuple[int, int]  # (tamaño, mtime_ns)
+
+class IngestWatcher:
+    """
+    Bucle de ingesta incremental sobre el directorio de datos.
+
+    Attributes:
+        processor: DobackProcessor usado para decodificar, emparejar y subir
+        data_dir: Directorio raíz vigilado (datosDoback)
+        processed: Ruta -> (tamaño, mtime_ns) del último estado ya procesado
+        retries: Ruta -> (intentos fallidos, instante del siguiente reintento)
+    """
+
+    def __init__(self, processor: DobackProcessor, data_dir: str, poll_interval: Optional[float] = None,
+                 settle_seconds: Optional[float] = None):
+        self.processor = processor
+        self.data_dir = data_dir
+        self.poll_interval = poll_interval or WATCH_POLL_SECONDS
+        self.settle_seconds = WATCH_SETTLE_SECONDS if settle_seconds is None else settle_seconds
+        self.processed: Dict[str, FileState] = {}
+        self.retries: Dict[str, Tuple[int, float]] = {}
+        self.pending_path = os.path.join(data_dir, WATCH_PENDING_FILE)
+        self._inotify = None
+        self._watched_dirs: Set[str] = set()
+
+    def run(self, max_cycles: Optional[int] = None) -> None:
+        """Ejecuta el bucle hasta Ctrl+C (o max_cycles sondeos)."""
+        self._load_processed_state()
+        self._start_inotify()
+        logger.info(f"👀 Vigilando {self.data_dir} (sondeo cada {self.poll_interval:.0f}s, "
+                    f"{'inotify' if self._inotify else 'sin inotify'})")
+        cycles = 0
+        try:
+            while max_cycles is None or cycles < max_cycles:
+                cycles += 1
+                ready, waiting = self.poll()
+                if ready:
+                    self.process_batch(ready)
+                # Si hay archivos esperando a estabilizarse se vuelve a mirar antes
+                self._wait(min(self.poll_interval, self.settle_seconds) if waiting else self.poll_interval)
+        except KeyboardInterrupt:
+            logger.info("⏹️  Modo continuo detenido")
+
+    def poll(self) -> Tuple[Dict[str, FileState], int]:
+        """
+        Recorre el directorio de datos y devuelve los archivos nuevos o
+        modificados que ya llevan settle_seconds sin cambiar, junto con el
+        número de archivos cambiados que aún se están escribiendo.
+        """
+        now_ns = time.time_ns()
+        now = now_ns / 1e9
+        settle_ns = int(self.settle_seconds * 1e9)
+        ready = {}
+        waiting = 0
+        for root, dirs, files in os.walk(self.data_dir):
+            self._watch_dir(root)
+            for file in files:
+                if not file.endswith(WATCHED_EXTENSIONS):
+                    continue
+                file_path = os.path.join(root, file)
+                try:
+                    stat = os.stat(file_path)
+                except OSError:
+                    continue
+                state = (stat.st_size, stat.st_mtime_ns)
+                if self.processed.get(file_path) == state:
+                    continue
+                if file_path in self.retries and now < self.retries[file_path][1]:
+                    continue  # Lote fallido: se espera al siguiente reintento
+                if now_ns - stat.st_mtime_ns < settle_ns:
+                    waiting += 1
+                else:
+                    ready[file_path] = state
+        return ready, waiting
+
+    def process_batch(self, ready: Dict[str, FileState]) -> None:
+        """
+        Decodifica los CAN nuevos y procesa los vehículo/fecha afectados por el lote.
+        
+        Solo se marcan como procesados los archivos de un lote subido sin
+        errores; los CAN que no se pudieron decodificar y todo el lote si
+        falla la búsqueda o la subida de sesiones quedan pendientes de reintento.
+        """
+        logger.info(f"📥 {len(ready)} archivos nuevos o modificados")
+        changed_paths = set(ready)
+        failed = set()
+        for file_path in sorted(ready):
+            if not is_raw_can_file(os.path.basename(file_path)):
+                continue
+            if self.processor.decode_can_file(file_path):
+                changed_paths.add(can_decoded_path(file_path))
+            else:
+                failed.add(file_path)  # Su salida no corresponde al contenido actual
+        try:
+            self.processor.process_sessions(changed_paths, raise_on_failure=True)
+        except Exception as e:
+            level = logging.WARNING if isinstance(e, SessionProcessingError) else logging.ERROR
+            logger.log(level, f"❌ Error procesando lote de {len(changed_paths)} archivos: {e}")
+            failed = set(changed_paths)
+        
+        self._mark_processed(changed_paths - failed, ready)
+        self._schedule_retries(failed)
+
+    def _mark_processed(self, paths: Set[str], ready: Dict[str, FileState]) -> None:
+        for file_path in paths:
+            self.retries.pop(file_path, None)
+            if file_path in ready:
+                self.processed[file_path] = ready[file_path]
+                continue
+            try:
+                stat = os.stat(file_path)
+            except OSError:
+                continue
+            self.processed[file_path] = (stat.st_size, stat.st_mtime_ns)
+        self._save_pending()
+
+    def _schedule_retries(self, paths: Set[str]) -> None:
+        """Deja los archivos pendientes con espera exponencial (WATCH_RETRY_SECONDS, 2x, ... hasta el máximo)."""
+        if not paths:
+            return
+        now = time.time()
+        delays = []
+        for file_path in paths:
+            self.processed.pop(file_path, None)
+            attempts = self.retries.get(file_path, (0, 0.0))[0] + 1
+            delay = min(WATCH_RETRY_SECONDS * 2 ** (attempts - 1), WATCH_RETRY_MAX_SECONDS)
+            self.retries[file_path] = (attempts, now + delay)
+            delays.append(delay)
+        logger.info(f"🔁 {len(paths)} archivos pendientes; siguiente reintento en {min(delays):.0f}s")
+        self._save_pending()
+
+    def _save_pending(self) -> None:
+        """Guarda los archivos pendientes para no perderlos si el vigilante se reinicia."""
+        try:
+            temporary = f"{self.pending_path}.tmp"
+            with open(temporary, 'w', encoding='utf-8') as f:
+                json.dump(sorted(self.retries), f, indent=1)
+            os.replace(temporary, self.pending_path)
+        except OSError as e:
+            logger.warning(f"No se pudo guardar {self.pending_path}: {e}")
+
+    def _load_processed_state(self) -> None:
+        """
+        Parte del manifiesto: lo ya escaneado en ejecuciones anteriores no se
+        reprocesa, salvo los archivos que quedaron pendientes de reintento.
+        """
+        manifest = self.processor.manifest
+        manifest.load()
+        self.processed = {
+            path: (entry.get('size'), entry.get('mtime_ns'))
+            for path, entry in manifest.entries.items()
+        }
+        pending = []
+        if os.path.exists(self.pending_path):
+            try:
+                with open(self.pending_path, 'r', encoding='utf-8') as f:
+                    pending = json.load(f)
+            except (OSError, ValueError) as e:
+                logger.warning(f"No se pudo leer {self.pending_path}: {e}")
+        for file_path in pending:
+            self.processed.pop(file_path, None)
+            self.retries[file_path] = (0, 0.0)
+        logger.info(f"📋 {len(self.processed)} archivos ya procesados según el manifiesto, "
+                    f"{len(pending)} pendientes de reintento")
+
+    def _start_inotify(self) -> None:
+        if INotify is None:
+            return
+        try:
+            self._inotify = INotify()
+        except OSError as e:
+            logger.warning(f"inotify no disponible, se usará solo sondeo: {e}")
+            self._inotify = None
+
+    def _watch_dir(self, directory: str) -> None:
+        if self._inotify is None or directory in self._watched_dirs:
+            return
+        try:
+            mask = inotify_flags.CREATE | inotify_flags.CLOSE_WRITE | inotify_flags.MOVED_TO
+            self._inotify.add_watch(directory, mask)
+            self._watched_dirs.add(directory)
+        except OSError as e:
+            logger.warning(f"No se pudo vigilar {directory} con inotify: {e}")
+
+    def _wait(self, seconds: float) -> None:
+        """Espera seconds o hasta el siguiente evento de inotify (si está disponible)."""
+        if self._inotify is None:
+            time.sleep(seconds)
+            return
+        events = self._inotify.read(timeout=int(seconds * 1000))
+        if events:
+            # Agrupar la ráfaga de eventos de una copia antes de volver a sondear
+            time.sleep(min(1.0, seconds))
+            self._inotify.read(timeout=0)
@@ -23,6 +23,9 @@ import psycopg2
 from psycopg2.extras import RealDictCursor
 import importlib.util
 
+from can_columnar import COLUMNAR_SUFFIX, LEGACY_CSV_SUFFIX, decoded_path
+from temporal_index import SortedTimeIndex
+
 # Configurar logging
 logging.basicConfig(
     level=logging.INFO,
@@ -34,6 +37,14 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+def find_translated_can(can_path: Path) -> Optional[Path]:
+    """Salida decodificada de un CAN: el .npz columnar o, si no existe, el _TRADUCIDO.csv (None si no hay ninguna)."""
+    for suffix in (COLUMNAR_SUFFIX, LEGACY_CSV_SUFFIX):
+        translated_path = Path(decoded_path(str(can_path), suffix))
+        if translated_path.exists():
+            return translated_path
+    return None
+
 class FileAnalyzer:
     """Analiza la calidad y validez de archivos individuales"""
     
@@ -489,8 +500,8 @@ class IntelligentProcessor:
                     
                     if success:
                         # Buscar archivo traducido
-                        translated_path = file_path.with_suffix('').with_suffix('_TRADUCIDO.csv')
-                        if translated_path.exists():
+                        translated_path = find_translated_can(file_path)
+                        if translated_path:
                             file_info['can_decoded'] = True
                             file_info['translated_path'] = str(translated_path)
                             logger.info(f"CAN decodificado exitosamente: {file_path.name}")
@@ -545,9 +556,7 @@ class IntelligentProcessor:
                 can_file = session['files'].get('CAN')
                 if can_file:
                     # Verificar si existe el archivo traducido
-                    can_path = Path(can_file['path'])
-                    translated_path = can_path.parent / f"{can_path.stem}_TRADUCIDO.csv"
-                    if not translated_path.exists():
+                    if not find_translated_can(Path(can_file['path'])):
                         logger.warning(f"Sesión {session['vehicle']} - CAN no decodificado, saltando")
                         results['sessions_failed'] += 1
                         continue
@@ -747,81 +756,51 @@ def group_files_into_sessions(valid_files: list, time_window_minutes: int = 120)
         
         logger.info(f"  [OK] Todos los tipos presentes: CAN({len(files_by_type['CAN'])}), GPS({len(files_by_type['GPS'])}), ESTABILIDAD({len(files_by_type['ESTABILIDAD'])}), ROTATIVO({len(files_by_type['ROTATIVO'])})")
         
-        # Crear todas las combinaciones posibles de archivos
+        # Índice temporal de los archivos aún no usados de cada tipo
         time_window = timedelta(minutes=time_window_minutes)
-        used_files = set()  # Conjunto para rastrear archivos ya usados
-        
-        # Ordenar archivos por tiempo
-        can_files = sorted(files_by_type['CAN'], key=lambda x: x['metadata']['date'])
-        gps_files = sorted(files_by_type['GPS'], key=lambda x: x['metadata']['date'])
-        estabilidad_files = sorted(files_by_type['ESTABILIDAD'], key=lambda x: x['metadata']['date'])
-        rotativo_files = sorted(files_by_type['ROTATIVO'], key=lambda x: x['metadata']['date'])
+        file_time = lambda file_info: file_info['metadata']['date']
+        can_files = sorted(files_by_type['CAN'], key=file_time)
+        indexes = {
+            file_type: SortedTimeIndex(files_by_type[file_type], file_time)
+            for file_type in ['GPS', 'ESTABILIDAD', 'ROTATIVO']
+        }
         
-        # Para cada archivo CAN, buscar la mejor combinación de otros archivos
+        # Para cada archivo CAN, buscar la mejor combinación de otros archivos. El score solo
+        # depende de la mayor de las tres diferencias con el CAN, así que la mejor combinación
+        # se forma con el archivo libre más cercano de cada tipo; en empate se queda el
+        # primero por tiempo, como al recorrer todas las combinaciones en orden
         for can_file in can_files:
             can_time = can_file['metadata']['date']
-            can_path = str(can_file['path'])
             
-            # Verificar que el archivo CAN no haya sido usado
-            if can_path in used_files:
-                continue
-            
-            # Buscar la mejor combinación de archivos para este CAN
             best_session = None
-            best_score = -1
-            
-            # Probar diferentes combinaciones de GPS, ESTABILIDAD y ROTATIVO
-            for gps_file in gps_files:
-                gps_path = str(gps_file['path'])
-                if gps_path in used_files:
-                    continue
-                    
-                for estabilidad_file in estabilidad_files:
-                    estabilidad_path = str(estabilidad_file['path'])
-                    if estabilidad_path in used_files:
-                        continue
-                        
-                    for rotativo_file in rotativo_files:
-                        rotativo_path = str(rotativo_file['path'])
-                        if rotativo_path in used_files:
-                            continue
-                        
-                        # Verificar que todos los archivos estén dentro de la ventana temporal
-                        gps_time = gps_file['metadata']['date']
-                        estabilidad_time = estabilidad_file['metadata']['date']
-                        rotativo_time = rotativo_file['metadata']['date']
-                        
-                        # Calcular la diferencia máxima de tiempo
-                        max_time_diff = max(
-                            abs((gps_time - can_time).total_seconds()),
-                            abs((estabilidad_time - can_time).total_seconds()),
-                            abs((rotativo_time - can_time).total_seconds())
-                        )
-                        
-                        # Si todos están dentro de la ventana temporal, calcular score
-                        if max_time_diff <= time_window.total_seconds():
-                            # Score basado en proximidad temporal (menor diferencia = mejor score)
-                            time_score = 1.0 / (1.0 + max_time_diff / 60.0)  # Normalizar a minutos
-                            
-                            if time_score > best_score:
-                                best_score = time_score
-                                best_session = {
-                                    'vehicle': can_file['metadata']['vehicle'],
-                                    'date': can_file['metadata']['date'],
-                                    'start_time': can_time,
-                                    'end_time': max(can_time, gps_time, estabilidad_time, rotativo_time),
-                                    'files': {
-                                        'CAN': can_file,
-                                        'GPS': gps_file,
-                                        'ESTABILIDAD': estabilidad_file,
-                                        'ROTATIVO': rotativo_file
-                                    },
-                                    'can_time': can_time,
-                                    'gps_time': gps_time,
-                                    'estabilidad_time': estabilidad_time,
-                                    'rotativo_time': rotativo_time,
-                                    'score': time_score
-                                }
+            distances = [index.nearest_distance(can_time) for index in indexes.values()]
+            if None not in distances and max(distances) <= time_window:
+                max_time_diff = max(distances)
+                chosen = {file_type: index.first_within(can_time, max_time_diff) for file_type, index in indexes.items()}
+                gps_file, estabilidad_file, rotativo_file = chosen['GPS'], chosen['ESTABILIDAD'], chosen['ROTATIVO']
+                gps_time = gps_file['metadata']['date']
+                estabilidad_time = estabilidad_file['metadata']['date']
+                rotativo_time = rotativo_file['metadata']['date']
+                
+                # Score basado en proximidad temporal (menor diferencia = mejor score)
+                time_score = 1.0 / (1.0 + max_time_diff.total_seconds() / 60.0)  # Normalizar a minutos
+                best_session = {
+                    'vehicle': can_file['metadata']['vehicle'],
+                    'date': can_file['metadata']['date'],
+                    'start_time': can_time,
+                    'end_time': max(can_time, gps_time, estabilidad_time, rotativo_time),
+                    'files': {
+                        'CAN': can_file,
+                        'GPS': gps_file,
+                        'ESTABILIDAD': estabilidad_file,
+                        'ROTATIVO': rotativo_file
+                    },
+                    'can_time': can_time,
+                    'gps_time': gps_time,
+                    'estabilidad_time': estabilidad_time,
+                    'rotativo_time': rotativo_time,
+                    'score': time_score
+                }
             
             # Si encontramos una sesión válida, agregarla y marcar archivos como usados
             if best_session:
@@ -832,10 +811,8 @@ def group_files_into_sessions(valid_files: list, time_window_minutes: int = 120)
                 logger.info(f"      ROTATIVO: {Path(best_session['files']['ROTATIVO']['path']).name} ({best_session['rotativo_time']})")
                 
                 # Marcar archivos como usados
-                used_files.add(str(best_session['files']['CAN']['path']))
-                used_files.add(str(best_session['files']['GPS']['path']))
-                used_files.add(str(best_session['files']['ESTABILIDAD']['path']))
-                used_files.add(str(best_session['files']['ROTATIVO']['path']))
+                for file_type, index in indexes.items():
+                    index.remove(best_session['files'][file_type])
                 
                 sessions.append(best_session)
             else:
@@ -10,21 +10,30 @@ import sys
 import json
 import logging
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, List, Tuple
 from complete_processor import DobackProcessor
+from session_matching import FileIndex, MultiReferenceStrategy
 
 class MultiReferenceProcessor:
     """
     Procesador que busca sesiones usando cada tipo de archivo como referencia.
+    
+    El criterio es la estrategia multi_reference de session_matching, sobre
+    el índice de archivos del manifiesto de DobackProcessor (un solo escaneo
+    y sin consultar la base de datos). Los candidatos son todos los archivos
+    del vehículo, no solo los de la misma fecha: una sesión que cruza la
+    medianoche conserva sus archivos del día siguiente.
     """
     
     def __init__(self):
         self.base_processor = DobackProcessor()
         self.max_early_minutes = 10  # Máximo 10 minutos antes de la referencia
+        self.file_index = None
         
     def scan_files(self):
-        """Escanea todos los archivos."""
-        self.base_processor.scan_files_and_find_sessions()
+        """Escanea todos los archivos (una vez) y construye el índice."""
+        if self.file_index is None:
+            self.file_index = FileIndex.from_processor(self.base_processor)
         
     def find_sessions_by_reference(self, vehicle: str, reference_type: str) -> List[Dict]:
         """
@@ -37,94 +46,13 @@ class MultiReferenceProcessor:
         Returns:
             Lista de sesiones encontradas
         """
-        # Filtrar archivos del vehículo
-        vehicle_files = [f for f in self.base_processor.all_files if f['vehicle'] == vehicle]
-        
-        # Agrupar por tipo
-        files_by_type = {}
-        for file_info in vehicle_files:
-            file_type = file_info['type']
-            if file_type not in files_by_type:
-                files_by_type[file_type] = []
-            files_by_type[file_type].append(file_info)
-        
-        if reference_type not in files_by_type:
-            return []
-        
-        sessions = []
-        reference_files = files_by_type[reference_type]
-        
-        for ref_file in reference_files:
-            session = self._find_matching_session_multi_ref(ref_file, files_by_type, reference_type)
-            if session:
-                sessions.append(session)
-        
+        self.scan_files()
+        strategy = MultiReferenceStrategy(max_early_minutes=self.max_early_minutes)
+        sessions = strategy.match_reference(self.file_index.vehicle_group(vehicle), reference_type)
+        for session in sessions:
+            session['vehicle'] = vehicle
         return sessions
     
-    def _find_matching_session_multi_ref(self, ref_file: Dict, files_by_type: Dict, ref_type: str) -> Optional[Dict]:
-        """
-        Busca archivos de otros tipos que se solapen con el archivo de referencia.
-        """
-        ref_start = ref_file.get('start_time')
-        ref_end = ref_file.get('end_time')
-        if not ref_start or not ref_end:
-            return None
-        
-        session_files = {ref_type: ref_file}
-        required_types = ['CAN', 'GPS', 'ESTABILIDAD', 'ROTATIVO']
-        
-        for file_type in required_types:
-            if file_type == ref_type:
-                continue  # Ya tenemos este tipo
-                
-            if file_type not in files_by_type:
-                return None
-            
-            best_match = None
-            max_overlap = 0
-            
-            for file_info in files_by_type[file_type]:
-                f_start = file_info.get('start_time')
-                f_end = file_info.get('end_time')
-                if not f_start or not f_end:
-                    continue
-                
-                # Verificar que no empiece demasiado antes de la referencia
-                early_diff = (ref_start - f_start).total_seconds() / 60.0
-                if early_diff > self.max_early_minutes:
-                    continue
-                
-                # Debe haber solapamiento real
-                latest_start = max(ref_start, f_start)
-                earliest_end = min(ref_end, f_end)
-                overlap = (earliest_end - latest_start).total_seconds()
-                
-                if overlap > 0 and overlap > max_overlap:
-                    max_overlap = overlap
-                    best_match = file_info
-            
-            if best_match is None:
-                return None
-            
-            session_files[file_type] = best_match
-        
-        # Calcular rango de la sesión como intersección
-        all_starts = [f['start_time'] for f in session_files.values()]
-        all_ends = [f['end_time'] for f in session_files.values()]
-        session_start = max(all_starts)
-        session_end = min(all_ends)
-        
-        if session_start >= session_end:
-            return None
-        
-        return {
-            'files': session_files,
-            'start_time': session_start,
-            'end_time': session_end,
-            'reference_type': ref_type,
-            'vehicle': ref_file['vehicle']
-        }
-    
     def find_all_possible_sessions(self, vehicle: str) -> Dict[str, List[Dict]]:
         """
         Busca todas las sesiones posibles usando cada tipo como referencia.
@@ -173,7 +101,7 @@ class MultiReferenceProcessor:
                     ref_file = session['files'][session['reference_type']]
                     time_diff = abs((file_info['start_time'] - ref_file['start_time']).total_seconds() / 60)
                     
-                    print(f"    {file_type}: {file_info['name']}")
+                    print(f"    {file_type}: {file_info['filename']}")
                     print(f"      Rango: {file_info['start_time']} - {file_info['end_time']}")
                     print(f"      Diferencia: {time_diff:.1f} min")
         
@@ -192,7 +120,7 @@ class MultiReferenceProcessor:
             print(f"  Referencias que la detectan: {session['detected_by']}")
             
             for file_type, file_info in session['files'].items():
-                print(f"    {file_type}: {file_info['name']}")
+                print(f"    {file_type}: {file_info['filename']}")
     
     def _find_unique_sessions(self, all_sessions: Dict[str, List[Dict]]) -> List[Dict]:
         """
@@ -6,6 +6,7 @@ Algoritmo del juego de las parejas para encontrar TODAS las combinaciones posibl
 
 import os
 import json
+import argparse
 import logging
 from pathlib import Path
 from datetime import datetime, timedelta
@@ -14,6 +15,8 @@ import re
 from collections import defaultdict
 from itertools import combinations, product
 
+from session_assignment import assign_pairs
+
 # Configurar logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -118,10 +121,18 @@ class FileContentAnalyzer:
         return None
 
 class ParejasMatcher:
-    """Encuentra TODAS las combinaciones posibles usando el algoritmo de parejas"""
+    """
+    Encuentra TODAS las combinaciones posibles usando el algoritmo de parejas.
     
-    def __init__(self):
+    Con one_to_one, en lugar del producto cartesiano de todos los archivos,
+    cada CAN se empareja con como mucho un archivo de cada tipo y cada
+    archivo se usa una sola vez (asignación de coste mínimo, ver
+    _generate_assigned_combinations).
+    """
+    
+    def __init__(self, one_to_one: bool = False):
         self.analyzer = FileContentAnalyzer()
+        self.one_to_one = one_to_one
     
     def find_all_possible_sessions(self, base_path: Path) -> List[Dict[str, Any]]:
         """Encuentra TODAS las sesiones posibles sin restricción de tolerancia temporal"""
@@ -210,8 +221,11 @@ class ParejasMatcher:
         logger.info(f"  ESTABILIDAD: {len(type_files['ESTABILIDAD'])} archivos")
         logger.info(f"  ROTATIVO: {len(type_files['ROTATIVO'])} archivos")
         
-        # Generar TODAS las combinaciones posibles
-        all_combinations = self._generate_all_combinations(type_files)
+        # Generar TODAS las combinaciones posibles (o solo las de la asignación uno a uno)
+        if self.one_to_one:
+            all_combinations = self._generate_assigned_combinations(type_files)
+        else:
+            all_combinations = self._generate_all_combinations(type_files)
         logger.info(f"  Generadas {len(all_combinations)} combinaciones posibles")
         
         # Evaluar cada combinación
@@ -247,6 +261,43 @@ class ParejasMatcher:
         
         return combinations_list
     
+    def _generate_assigned_combinations(self, type_files: Dict[str, List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """
+        Una combinación por archivo CAN con asignación uno a uno de los demás tipos.
+        
+        Para cada tipo se resuelve la asignación de coste mínimo entre archivos
+        CAN y archivos del tipo, con coste la diferencia en minutos respecto al
+        CAN (como en _evaluate_combination). Solo se emparejan archivos del
+        mismo día; un ROTATIVO con solo fecha cuesta 0 en su día. Los CAN que
+        se quedan sin algún tipo no generan combinación.
+        """
+        can_files = type_files['CAN']
+        cans_by_date = defaultdict(list)
+        for row, can_file in enumerate(can_files):
+            cans_by_date[can_file['date']].append(row)
+        
+        assigned = {}
+        for file_type in ['GPS', 'ESTABILIDAD', 'ROTATIVO']:
+            files = type_files[file_type]
+            pairs = []
+            for column, file_info in enumerate(files):
+                file_time = file_info['real_datetime']
+                date_only = file_type == 'ROTATIVO' and file_time.time() == datetime.min.time()
+                for row in cans_by_date.get(file_info['date'], []):
+                    diff = 0.0 if date_only else abs((file_time - can_files[row]['real_datetime']).total_seconds() / 60)
+                    pairs.append((row, column, diff))
+            assigned[file_type] = assign_pairs(len(can_files), len(files), pairs)
+        
+        combinations_list = []
+        for row, can_file in enumerate(can_files):
+            if all(row in assigned[file_type] for file_type in assigned):
+                combination = {'CAN': can_file}
+                for file_type, assignment in assigned.items():
+                    combination[file_type] = type_files[file_type][assignment[row]]
+                combinations_list.append(combination)
+        
+        return combinations_list
+    
     def _evaluate_combination(self, combination: Dict[str, Any], session_number: int) -> Optional[Dict[str, Any]]:
         """Evalúa una combinación y calcula su score"""
         can_time = combination['CAN']['real_datetime']
@@ -288,10 +339,10 @@ class ParejasMatcher:
 class ParejasProcessor:
     """Procesador de parejas que encuentra TODAS las combinaciones posibles"""
     
-    def __init__(self, base_path: Path, db_config: Dict[str, str]):
+    def __init__(self, base_path: Path, db_config: Dict[str, str], one_to_one: bool = False):
         self.base_path = base_path
         self.db_config = db_config
-        self.parejas_matcher = ParejasMatcher()
+        self.parejas_matcher = ParejasMatcher(one_to_one)
     
     def run_full_analysis(self) -> Dict[str, Any]:
         """Ejecuta el análisis completo usando el algoritmo de parejas"""
@@ -342,6 +393,11 @@ class ParejasProcessor:
 
 def main():
     """Función principal"""
+    parser = argparse.ArgumentParser(description='Procesador de parejas Doback Soft')
+    parser.add_argument('--one-to-one', action='store_true',
+                        help='Asignación uno a uno de coste mínimo en lugar de todas las combinaciones')
+    args = parser.parse_args()
+    
     # Configuración
     db_config = {
         'host': 'localhost',
@@ -354,7 +410,7 @@ def main():
     base_path = Path(__file__).parent / 'data' / 'datosDoback'
     
     # Crear y ejecutar procesador
-    processor = ParejasProcessor(base_path, db_config)
+    processor = ParejasProcessor(base_path, db_config, args.one_to_one)
     results = processor.run_full_analysis()
     
     # Mostrar resumen
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Informe agregado del parseo de un archivo de telemetría.
+
+En lugar de un logger.warning por cada línea descartada, los loaders cuentan
+los descartes por motivo y guardan una muestra acotada de líneas problemáticas.
+El informe se emite una sola vez por archivo: una línea de resumen legible y
+el informe completo en JSON por el logger 'parse_report.json', que puede
+enviarse a un archivo propio.
+"""
+
+import os
+import json
+import logging
+from dataclasses import asdict, dataclass, field
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+report_logger = logging.getLogger('parse_report.json')
+
+MAX_SAMPLES_PER_REASON = 3  # Líneas de ejemplo guardadas por motivo de descarte
+MAX_SAMPLE_LENGTH = 200  # Caracteres guardados de cada línea de ejemplo
+
+@dataclass
+class ParseReport:
+    """Contadores de un archivo parseado y muestra de líneas descartadas."""
+    file_path: str
+    file_type: str
+    lines_processed: int = 0
+    lines_valid: int = 0
+    discarded: Dict[str, int] = field(default_factory=dict)
+    samples: List[Dict] = field(default_factory=list)
+
+    @property
+    def lines_discarded(self) -> int:
+        return sum(self.discarded.values())
+
+    def discard(self, reason: str, line_num: Optional[int] = None, line: Optional[str] = None,
+                count: int = 1) -> None:
+        """Registra count líneas descartadas por reason (con una línea de ejemplo opcional)."""
+        if count <= 0:
+            return
+        self.discarded[reason] = self.discarded.get(reason, 0) + count
+        if line is not None:
+            self.add_sample(reason, line_num, line)
+
+    def add_sample(self, reason: str, line_num: Optional[int], line: str) -> None:
+        """Guarda una línea de ejemplo si aún no hay MAX_SAMPLES_PER_REASON para ese motivo."""
+        if sum(1 for sample in self.samples if sample['reason'] == reason) >= MAX_SAMPLES_PER_REASON:
+            return
+        self.samples.append({'reason': reason, 'line_num': line_num, 'line': str(line)[:MAX_SAMPLE_LENGTH]})
+
+    def merge_counts(self, discarded: Dict[str, int]) -> None:
+        for reason, count in discarded.items():
+            self.discard(reason, count=count)
+
+    def to_dict(self) -> Dict:
+        data = asdict(self)
+        data['lines_discarded'] = self.lines_discarded
+        return data
+
+    def to_json(self) -> str:
+        return json.dumps(self.to_dict(), ensure_ascii=False, default=str)
+
+    def summary(self) -> str:
+        """Resumen de una línea para el log."""
+        text = (f"{self.file_type} {os.path.basename(self.file_path)}: {self.lines_processed} líneas procesadas, "
+                f"{self.lines_valid} válidas, {self.lines_discarded} descartadas")
+        if self.discarded:
+            reasons = ', '.join(f"{reason}: {count}" for reason, count in sorted(self.discarded.items()))
+            text += f" ({reasons})"
+        return text
+
+    def emit(self) -> None:
+        """Emite el informe una sola vez: resumen legible y JSON."""
+        if self.discarded:
+            logger.warning(f"⚠️ {self.summary()}")
+        else:
+            logger.info(f"📄 {self.summary()}")
+        report_logger.info(self.to_json())
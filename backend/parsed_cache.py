@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Caché columnar de archivos de telemetría ya parseados.
+
+Cada archivo GPS/ESTABILIDAD/CAN/ROTATIVO se parsea una sola vez: el
+resultado (MeasurementColumns) se guarda junto al manifiesto, indexado por la
+huella del contenido completo (file_manifest.compute_content_hash) y el tipo. Las
+lecturas posteriores (subida, detección de eventos, análisis) no vuelven a
+parsear texto.
+
+El tipo de la clave lo compone quien usa la caché e incluye la versión del
+parser que generó la entrada (ver complete_processor.parsed_cache_type), así
+que un cambio en un parser solo invalida las entradas de su tipo.
+
+Cada entrada es un directorio con una columna por archivo:
+    meta.json          filas, tipos de columna y constantes
+    timestamp.bin      int64, milisegundos desde epoch
+    <campo>.bin        columnas numéricas en binario plano (se abren con memmap)
+    <campo>.off/.bin   columnas de texto: offsets int64 + bytes UTF-8
+
+El formato se escribe por bloques según llegan del parser, así que crear la
+entrada no obliga a tener el archivo entero en memoria, y las columnas
+numéricas se leen con memmap (solo se cargan las páginas usadas).
+"""
+
+import os
+import json
+import shutil
+import logging
+from typing import Any, Dict, Iterable, Iterator, Optional
+
+import numpy as np
+
+from measurement_columns import TIMESTAMP_FIELD, MeasurementColumns
+
+logger = logging.getLogger(__name__)
+
+CACHE_VERSION = 1  # Cambiar si cambia el formato de las entradas (los parsers llevan su versión en el tipo)
+CACHE_DIR_NAME = 'parsed_cache'
+META_FILE = 'meta.json'
+TEXT_DTYPE = 'str'  # Tipo registrado en meta.json para las columnas de texto
+
+class ParsedFileCache:
+    """
+    Directorio de entradas parseadas, una por (tipo, huella de contenido).
+    Una entrada solo existe si se escribió completa (se publica con un rename atómico).
+    """
+
+    def __init__(self, cache_dir: str):
+        self.cache_dir = cache_dir
+
+    def entry_path(self, file_type: str, fingerprint: str) -> str:
+        return os.path.join(self.cache_dir, f"{file_type}_{fingerprint}_v{CACHE_VERSION}")
+
+    def load(self, file_type: str, fingerprint: str) -> Optional[MeasurementColumns]:
+        """Devuelve las mediciones guardadas o None si no hay entrada (o está dañada)."""
+        path = self.entry_path(file_type, fingerprint)
+        meta_path = os.path.join(path, META_FILE)
+        if not os.path.exists(meta_path):
+            return None
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            rows = meta['rows']
+            timestamps = _read_numeric(path, TIMESTAMP_FIELD, np.int64, rows)
+            columns = {
+                name: _read_text(path, name, rows) if dtype == TEXT_DTYPE else _read_numeric(path, name, dtype, rows)
+                for name, dtype in meta['columns'].items()
+            }
+            return MeasurementColumns(timestamps, columns, meta.get('constants'))
+        except Exception as e:
+            logger.warning(f"Entrada de caché dañada {path}, se volverá a parsear: {e}")
+            shutil.rmtree(path, ignore_errors=True)
+            return None
+
+    def store_chunks(self, file_type: str, fingerprint: str, chunks: Iterable[MeasurementColumns],
+                     dtypes: Dict[str, Any], constants: Optional[Dict[str, Any]] = None,
+                     source: Optional[str] = None) -> Iterator[MeasurementColumns]:
+        """
+        Reenvía los bloques de chunks mientras los escribe en la caché.
+
+        La entrada se publica solo si chunks se consume entero sin errores; si
+        el consumidor se detiene antes o el parser falla, se descarta.
+        """
+        final_path = self.entry_path(file_type, fingerprint)
+        tmp_path = f"{final_path}.tmp{os.getpid()}"
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        os.makedirs(tmp_path)
+        committed = False
+        writer = _EntryWriter(tmp_path, dtypes)
+        try:
+            for chunk in chunks:
+                writer.append(chunk)
+                yield chunk
+            writer.close({'version': CACHE_VERSION, 'file_type': file_type, 'source': source,
+                          'constants': constants or {}})
+            if os.path.exists(final_path):
+                shutil.rmtree(final_path, ignore_errors=True)
+            os.replace(tmp_path, final_path)
+            committed = True
+        finally:
+            if not committed:
+                writer.close_files()
+                shutil.rmtree(tmp_path, ignore_errors=True)
+
+    def prune(self, fingerprints: Iterable[str], file_types: Optional[Iterable[str]] = None) -> int:
+        """
+        Elimina las entradas cuya huella ya no está en el manifiesto (o de otra
+        versión). Con file_types, también las de tipos que no estén en la lista
+        (p. ej. generadas por una versión anterior de un parser).
+        """
+        if not os.path.isdir(self.cache_dir):
+            return 0
+        valid = set(fingerprints)
+        valid_types = set(file_types) if file_types is not None else None
+        removed = 0
+        for name in os.listdir(self.cache_dir):
+            if '.tmp' in name:
+                continue  # Entrada en escritura
+            parts = name.split('_')
+            if (len(parts) == 3 and parts[1] in valid and parts[2] == f"v{CACHE_VERSION}"
+                    and (valid_types is None or parts[0] in valid_types)):
+                continue
+            shutil.rmtree(os.path.join(self.cache_dir, name), ignore_errors=True)
+            removed += 1
+        if removed:
+            logger.info(f"🧹 Caché de parseo: {removed} entradas obsoletas eliminadas")
+        return removed
+
+class _EntryWriter:
+    """Escribe columnas por bloques en archivos binarios planos."""
+
+    def __init__(self, path: str, dtypes: Dict[str, Any]):
+        self.path = path
+        self.dtypes = dtypes
+        self.rows = 0
+        self.text_offsets = {name: 0 for name, dtype in dtypes.items() if dtype is object}
+        self.files = {TIMESTAMP_FIELD: open(os.path.join(path, f"{TIMESTAMP_FIELD}.bin"), 'wb')}
+        for name in dtypes:
+            self.files[name] = open(os.path.join(path, f"{name}.bin"), 'wb')
+            if name in self.text_offsets:
+                self.files[f"{name}.off"] = open(os.path.join(path, f"{name}.off"), 'wb')
+                self.files[f"{name}.off"].write(np.zeros(1, dtype=np.int64).tobytes())
+
+    def append(self, chunk: MeasurementColumns) -> None:
+        self.files[TIMESTAMP_FIELD].write(np.ascontiguousarray(chunk.timestamps, dtype=np.int64).tobytes())
+        for name, dtype in self.dtypes.items():
+            values = chunk.columns[name]
+            if name in self.text_offsets:
+                encoded = [str(value).encode('utf-8') for value in values.tolist()]
+                lengths = np.fromiter((len(item) for item in encoded), dtype=np.int64, count=len(encoded))
+                offsets = self.text_offsets[name] + np.cumsum(lengths)
+                self.files[name].write(b''.join(encoded))
+                self.files[f"{name}.off"].write(offsets.tobytes())
+                if len(offsets):
+                    self.text_offsets[name] = int(offsets[-1])
+            else:
+                self.files[name].write(np.ascontiguousarray(values, dtype=dtype).tobytes())
+        self.rows += len(chunk)
+
+    def close_files(self) -> None:
+        for handle in self.files.values():
+            handle.close()
+
+    def close(self, meta: Dict[str, Any]) -> None:
+        self.close_files()
+        meta['rows'] = self.rows
+        meta['columns'] = {
+            name: TEXT_DTYPE if dtype is object else np.dtype(dtype).str for name, dtype in self.dtypes.items()
+        }
+        with open(os.path.join(self.path, META_FILE), 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False, default=str)
+
+def _read_numeric(path: str, name: str, dtype, rows: int) -> np.ndarray:
+    if rows == 0:
+        return np.empty(0, dtype=dtype)
+    return np.memmap(os.path.join(path, f"{name}.bin"), dtype=dtype, mode='r', shape=(rows,))
+
+def _read_text(path: str, name: str, rows: int) -> np.ndarray:
+    offsets = np.fromfile(os.path.join(path, f"{name}.off"), dtype=np.int64)
+    with open(os.path.join(path, f"{name}.bin"), 'rb') as f:
+        blob = f.read()
+    values = np.empty(rows, dtype=object)
+    values[:] = [blob[start:end].decode('utf-8') for start, end in zip(offsets[:-1].tolist(), offsets[1:].tolist())]
+    return values
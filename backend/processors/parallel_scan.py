@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Escaneo paralelo por fragmentos empresa/vehículo - Doback Soft
+
+Reparte la extracción de metadatos por archivo entre un pool de procesos.
+Cada fragmento (shard) agrupa los archivos de un mismo directorio
+empresa/vehículo y los resultados se combinan siempre en orden de clave,
+de modo que la salida es idéntica a la de un escaneo secuencial.
+"""
+
+import os
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, Hashable, List, Tuple, TypeVar
+
+logger = logging.getLogger(__name__)
+
+P = TypeVar('P')
+R = TypeVar('R')
+
+def shard_key(file_path: str, base_dir: str) -> Tuple[str, ...]:
+    """Clave empresa/vehículo de un archivo relativa al directorio base."""
+    relative = os.path.relpath(file_path, base_dir)
+    parts = relative.split(os.sep)[:-1]
+    return tuple(parts[:2])
+
+def group_by_shard(file_paths: List[str], base_dir: str) -> Dict[Tuple[str, ...], List[str]]:
+    """Agrupa rutas de archivo por directorio empresa/vehículo."""
+    shards: Dict[Tuple[str, ...], List[str]] = {}
+    for file_path in file_paths:
+        shards.setdefault(shard_key(file_path, base_dir), []).append(file_path)
+    return shards
+
+def map_shards(worker: Callable[[P], R], shards: Dict[Hashable, P], workers: int) -> List[R]:
+    """
+    Ejecuta worker sobre cada fragmento y devuelve los resultados ordenados
+    por clave de fragmento.
+
+    Con workers <= 1 (o un único fragmento) se ejecuta en el proceso actual.
+    worker debe ser serializable (función de módulo o método de un objeto
+    serializable).
+    """
+    keys = sorted(shards)
+    if workers <= 1 or len(keys) <= 1:
+        return [worker(shards[key]) for key in keys]
+
+    max_workers = min(workers, len(keys))
+    logger.info(f"Escaneo paralelo: {len(keys)} fragmentos en {max_workers} procesos")
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        # Los fragmentos más grandes se envían primero para equilibrar la carga
+        submit_order = sorted(keys, key=lambda key: -_shard_size(shards[key]))
+        futures = {key: executor.submit(worker, shards[key]) for key in submit_order}
+        return [futures[key].result() for key in keys]
+
+def _shard_size(payload) -> int:
+    try:
+        return len(payload)
+    except TypeError:
+        return 1
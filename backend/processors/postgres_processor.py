@@ -11,15 +11,21 @@ import asyncio
 import logging
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Iterator, List, Optional, Tuple
 import psycopg2
 from psycopg2.extras import RealDictCursor
 import pandas as pd
 import uuid
 from dataclasses import dataclass
+from functools import partial
 from concurrent.futures import ThreadPoolExecutor
 import time
 
+try:
+    from .parallel_scan import map_shards
+except ImportError:
+    from parallel_scan import map_shards
+
 # Configuración de logging
 logging.basicConfig(
     level=logging.INFO,
@@ -31,6 +37,13 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Mediciones por bloque al procesar archivos de estabilidad por streaming
+STABILITY_CHUNK_SIZE = int(os.getenv('STABILITY_CHUNK_SIZE', '5000'))
+
+# Carpetas de tipo y patrón de archivos buscados en cada vehículo durante el escaneo
+SCAN_TYPE_DIRS = ('CAN', 'estabilidad', 'GPS', 'ROTATIVO')
+SCAN_PATTERN = '*.txt'
+
 @dataclass
 class FileInfo:
     """Información de archivo detectado"""
@@ -52,7 +65,8 @@ class SessionGroup:
     session_id: Optional[str] = None
 
 class PostgresProcessor:
-    def __init__(self, base_path: str = ".", db_config: Optional[Dict] = None):
+    def __init__(self, base_path: str = ".", db_config: Optional[Dict] = None, scan_workers: int = 1,
+                 chunk_size: int = STABILITY_CHUNK_SIZE):
         # Resolver ruta absoluta basada en la ubicación real del script
         script_dir = Path(__file__).parent
         if base_path == ".":
@@ -70,6 +84,12 @@ class PostgresProcessor:
             'password': os.getenv('DB_PASSWORD', 'cosigein')
         }
         
+        # Procesos usados para escanear vehículos en paralelo (1 = secuencial)
+        self.scan_workers = scan_workers
+        
+        # Mediciones por bloque en el procesado por streaming de estabilidad
+        self.chunk_size = chunk_size
+        
         # Directorio para archivos procesados
         self.processed_dir = self.base_path / "processed"
         self.processed_dir.mkdir(parents=True, exist_ok=True)
@@ -112,7 +132,8 @@ class PostgresProcessor:
             logger.error(f"Error escaneando empresas: {e}")
             return []
 
-    def parse_filename(self, filename: str) -> Optional[Tuple[str, str, datetime, int]]:
+    @staticmethod
+    def parse_filename(filename: str) -> Optional[Tuple[str, str, datetime, int]]:
         """Parsear nombre de archivo: múltiples formatos soportados"""
         try:
             # Descarta archivos RealTime
@@ -190,42 +211,22 @@ class PostgresProcessor:
             return None
 
     def scan_files(self, company: str) -> List[FileInfo]:
-        """Escanear archivos de una empresa"""
+        """Escanear archivos de una empresa (en paralelo por vehículo si scan_workers > 1)"""
         files = []
         company_path = self.base_path / company
         logger.info(f"[SCAN] Explorando empresa: {company_path}")
         
         try:
             # Primero buscar vehículos dentro de la empresa
-            for vehicle_dir in company_path.iterdir():
-                if vehicle_dir.is_dir() and not vehicle_dir.name.startswith('.'):
-                    logger.info(f"[SCAN] Explorando vehículo: {vehicle_dir}")
-                    
-                    # Buscar tipos de archivo dentro del vehículo
-                    for file_type in ['CAN', 'estabilidad', 'GPS', 'ROTATIVO']:
-                        type_path = vehicle_dir / file_type
-                        logger.info(f"[SCAN] Buscando en carpeta: {type_path}")
-                        if not type_path.exists():
-                            logger.warning(f"[SCAN] Carpeta no existe: {type_path}")
-                            continue
-                            
-                        for file_path in type_path.glob('*.txt'):
-                            logger.info(f"[SCAN] Encontrado archivo: {file_path}")
-                            if file_path.is_file():
-                                parsed = self.parse_filename(file_path.name)
-                                if parsed:
-                                    file_type_name, vehicle, date, sequence = parsed
-                                    file_info = FileInfo(
-                                        path=file_path,
-                                        company=company,
-                                        vehicle=vehicle,
-                                        date=date,
-                                        sequence=sequence,
-                                        file_type=file_type_name
-                                    )
-                                    files.append(file_info)
-                                else:
-                                    logger.warning(f"[SCAN] No se pudo parsear: {file_path.name}")
+            vehicle_dirs = {
+                vehicle_dir.name: vehicle_dir
+                for vehicle_dir in company_path.iterdir()
+                if vehicle_dir.is_dir() and not vehicle_dir.name.startswith('.')
+            }
+            # Cada proceso recibe solo la función de escaneo y su directorio, no el procesador
+            scan_worker = partial(scan_vehicle_dir, type_dirs=SCAN_TYPE_DIRS, pattern=SCAN_PATTERN)
+            for vehicle_files in map_shards(scan_worker, vehicle_dirs, self.scan_workers):
+                files.extend(vehicle_files)
                                     
             logger.info(f"Archivos detectados en {company}: {len(files)}")
             return files
@@ -527,92 +528,83 @@ class PostgresProcessor:
             return []
 
     def process_stability_file(self, file_info: FileInfo) -> list:
-        print("[DEBUG] >>>>> Entrando en process_stability_file para:", file_info.path)
-        """Procesar archivo de estabilidad y extraer mediciones alineadas al modelo de la app, interpolando timestamps correctamente entre marcas de hora y forzando incremento si es necesario."""
-        import uuid
-        from datetime import datetime, timedelta
-        import re
+        """Procesar archivo de estabilidad completo (ver iter_stability_file)."""
         measurements = []
+        for chunk in self.iter_stability_file(file_info):
+            measurements.extend(chunk)
+        return measurements
+
+    def iter_stability_file(self, file_info: FileInfo, chunk_size: Optional[int] = None) -> Iterator[List[Dict]]:
+        """
+        Procesar archivo de estabilidad por bloques de chunk_size mediciones alineadas al modelo de la app,
+        interpolando timestamps entre marcas de hora y forzando incremento si es necesario.
+
+        El archivo se lee línea a línea y solo se retienen las filas entre dos marcas de hora
+        y el bloque pendiente de entregar, por lo que la memoria no depende del tamaño del archivo.
+        """
+        import re
+        chunk_size = chunk_size or self.chunk_size
+        hora_regex = re.compile(r'^[0-9]{2}:[0-9]{2}:[0-9]{2}(AM|PM)$')
         try:
-            print("[DEBUG] Antes de abrir el archivo de ESTABILIDAD")
             with open(file_info.path, 'r', encoding='utf-8') as f:
-                print("[DEBUG] Archivo abierto correctamente")
-                lines = [line.strip() for line in f if line.strip()]
-                print(f"[DEBUG] Líneas leídas: {len(lines)}")
-                print("Primeras 30 líneas del archivo:")
-                for l in lines[:30]:
-                    print(l)
-                data_lines = lines[2:]
-                print("Primeras 30 líneas de data_lines (sin cabecera):")
-                for l in data_lines[:30]:
-                    print(l)
-
-            if len(lines) < 3:
-                return []
-
-            # 1. Parsear cabecera de sesión
-            header = lines[0].split(';')
-            fecha_str = header[1].strip()  # '10/07/2025 08:14:54AM'
-            vehiculo = header[2].strip()
-            fecha_base = datetime.strptime(fecha_str, '%d/%m/%Y %I:%M:%S%p')
-
-            # 2. Detectar marcas de hora y agrupar bloques
-            data_lines = lines[2:]
-            hora_regex = re.compile(r'^[0-9]{2}:[0-9]{2}:[0-9]{2}(AM|PM)$')
-            marcas = [fecha_base]
-            bloques = []
-            bloque_actual = []
-            for line in data_lines:
-                if hora_regex.match(line):
-                    # Nueva marca de hora
-                    marcas.append(datetime.strptime(f"{fecha_base.strftime('%d/%m/%Y')} {line}", '%d/%m/%Y %I:%M:%S%p'))
-                    if bloque_actual:
-                        bloques.append(bloque_actual)
-                        bloque_actual = []
-                else:
-                    # Fila de datos
-                    bloque_actual.append(line)
-            if bloque_actual:
-                bloques.append(bloque_actual)
-
-            # Diagnóstico: imprimir marcas de hora detectadas
-            print("Marcas de hora detectadas:")
-            for idx, marca in enumerate(marcas):
-                print(f"  Marca {idx}: {marca}")
-            print(f"Total marcas: {len(marcas)}")
-            print(f"Total bloques: {len(bloques)}")
-            for i, bloque in enumerate(bloques):
-                print(f"Bloque {i}: filas={len(bloque)}")
-
-            # 3. Interpolar timestamps y construir measurements
-            for i, bloque in enumerate(bloques):
-                n = len(bloque)
-                if n == 0:
-                    continue
-                t_start = marcas[i]
-                t_end = marcas[i+1] if i+1 < len(marcas) else None
-                if t_end and n > 1 and t_end > t_start:
-                    total_seconds = (t_end - t_start).total_seconds()
-                    step = total_seconds / (n - 1)
-                    ts_list = [t_start + timedelta(seconds=step * j) for j in range(n)]
-                else:
-                    # Solo una marca o marcas iguales: sumar 1 segundo incremental
-                    ts_list = [t_start + timedelta(seconds=j) for j in range(n)]
-                print(f"Primeros 10 timestamps bloque {i}: {[str(ts) for ts in ts_list[:10]]}")
-                for j, line in enumerate(bloque):
-                    valores = [v.strip() for v in line.split(';') if v.strip()]
-                    measurement = {
-                        'id': str(uuid.uuid4()),
-                        'timestamp': ts_list[j],
-                        'vehiculo': vehiculo,
-                        # ... aquí mapear los campos restantes según el modelo ...
-                    }
-                    # Si hay más columnas, añadirlas aquí
-                    measurements.append(measurement)
-            return measurements
+                lines = (line.strip() for line in f)
+                lines = (line for line in lines if line)
+                header_line = next(lines, None)
+                columns_line = next(lines, None)
+                if header_line is None or columns_line is None:
+                    return
+
+                # 1. Parsear cabecera de sesión
+                header = header_line.split(';')
+                fecha_str = header[1].strip()  # '10/07/2025 08:14:54AM'
+                vehiculo = header[2].strip()
+                fecha_base = datetime.strptime(fecha_str, '%d/%m/%Y %I:%M:%S%p')
+                fecha_dia = fecha_base.strftime('%d/%m/%Y')
+
+                # 2. Detectar marcas de hora; cada bloque de filas se interpola al cerrarse con la siguiente marca
+                marca_actual = fecha_base
+                bloque = []
+                pendientes = []
+                for line in lines:
+                    if hora_regex.match(line):
+                        marca = datetime.strptime(f"{fecha_dia} {line}", '%d/%m/%Y %I:%M:%S%p')
+                        pendientes.extend(self._build_stability_block(bloque, marca_actual, marca, vehiculo))
+                        bloque = []
+                        marca_actual = marca
+                        while len(pendientes) >= chunk_size:
+                            yield pendientes[:chunk_size]
+                            pendientes = pendientes[chunk_size:]
+                    else:
+                        # Fila de datos
+                        bloque.append(line)
+                pendientes.extend(self._build_stability_block(bloque, marca_actual, None, vehiculo))
+                for start in range(0, len(pendientes), chunk_size):
+                    yield pendientes[start:start + chunk_size]
         except Exception as e:
             print(f"Error procesando archivo de estabilidad: {e}")
+
+    def _build_stability_block(self, bloque: List[str], t_start: datetime, t_end: Optional[datetime],
+                               vehiculo: str) -> List[Dict]:
+        """3. Interpolar timestamps de un bloque de filas entre dos marcas y construir measurements."""
+        n = len(bloque)
+        if n == 0:
             return []
+        if t_end and n > 1 and t_end > t_start:
+            total_seconds = (t_end - t_start).total_seconds()
+            step = total_seconds / (n - 1)
+            ts_list = [t_start + timedelta(seconds=step * j) for j in range(n)]
+        else:
+            # Solo una marca o marcas iguales: sumar 1 segundo incremental
+            ts_list = [t_start + timedelta(seconds=j) for j in range(n)]
+        return [
+            {
+                'id': str(uuid.uuid4()),
+                'timestamp': ts_list[j],
+                'vehiculo': vehiculo,
+                # ... aquí mapear los campos restantes según el modelo ...
+            }
+            for j in range(n)
+        ]
 
     def process_gps_file(self, file_info: FileInfo) -> List[Dict]:
         """Procesar archivo GPS y extraer mediciones. Tolerante a columnas extra, mapea solo campos requeridos y loguea filas descartadas con motivo."""
@@ -720,8 +712,8 @@ class PostgresProcessor:
                 self.insert_measurements(conn, session_id, can_measurements, 'can')
             
             if 'ESTABILIDAD' in session_group.files:
-                stability_measurements = self.process_stability_file(session_group.files['ESTABILIDAD'])
-                self.insert_measurements(conn, session_id, stability_measurements, 'stability')
+                for stability_measurements in self.iter_stability_file(session_group.files['ESTABILIDAD']):
+                    self.insert_measurements(conn, session_id, stability_measurements, 'stability')
             
             if 'GPS' in session_group.files:
                 gps_measurements = self.process_gps_file(session_group.files['GPS'])
@@ -779,6 +771,40 @@ class PostgresProcessor:
             logger.error(f"Error en procesamiento: {e}")
             raise
 
+def scan_vehicle_dir(vehicle_dir: Path, type_dirs: Tuple[str, ...] = SCAN_TYPE_DIRS,
+                     pattern: str = SCAN_PATTERN) -> List[FileInfo]:
+    """Escanear los archivos de un vehículo (un fragmento del escaneo paralelo)"""
+    files = []
+    logger.info(f"[SCAN] Explorando vehículo: {vehicle_dir}")
+    
+    # Buscar tipos de archivo dentro del vehículo
+    for file_type in type_dirs:
+        type_path = vehicle_dir / file_type
+        logger.info(f"[SCAN] Buscando en carpeta: {type_path}")
+        if not type_path.exists():
+            logger.warning(f"[SCAN] Carpeta no existe: {type_path}")
+            continue
+            
+        for file_path in sorted(type_path.glob(pattern)):
+            logger.info(f"[SCAN] Encontrado archivo: {file_path}")
+            if file_path.is_file():
+                parsed = PostgresProcessor.parse_filename(file_path.name)
+                if parsed:
+                    file_type_name, vehicle, date, sequence = parsed
+                    file_info = FileInfo(
+                        path=file_path,
+                        company=vehicle_dir.parent.name,
+                        vehicle=vehicle,
+                        date=date,
+                        sequence=sequence,
+                        file_type=file_type_name
+                    )
+                    files.append(file_info)
+                else:
+                    logger.warning(f"[SCAN] No se pudo parsear: {file_path.name}")
+    return files
+
+
 def main():
     """Función principal"""
     processor = PostgresProcessor()
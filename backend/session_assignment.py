@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Asignación uno a uno de archivos a sesiones con coste mínimo.
+
+El emparejamiento voraz elige para cada archivo base el mejor archivo de
+cada tipo sin mirar a los demás, así que un mismo GPS o CAN puede acabar en
+varias sesiones. Aquí se resuelve el problema de asignación completo: cada
+archivo base recibe como mucho un archivo de cada tipo, cada archivo se usa
+como mucho una vez y la suma de costes es mínima.
+
+min_cost_assignment implementa el algoritmo húngaro (camino aumentante más
+corto con potenciales, O(n²·m)) con el bucle interno vectorizado en NumPy:
+un día completo de un vehículo (50+ archivos por tipo) se resuelve en
+milisegundos. No depende de scipy.
+"""
+
+from datetime import datetime
+from typing import Dict, Iterable, Tuple
+
+import numpy as np
+
+# Coste de los pares no admisibles; las asignaciones con este coste se descartan
+UNASSIGNED_COST = 1e12
+
+def min_cost_assignment(cost: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Resuelve la asignación de coste mínimo de una matriz (filas x columnas).
+
+    Con matrices rectangulares se asignan min(filas, columnas) pares.
+
+    Returns:
+        (filas, columnas) asignadas, ordenadas por fila
+    """
+    cost = np.asarray(cost, dtype=np.float64)
+    transposed = cost.shape[0] > cost.shape[1]
+    if transposed:
+        cost = cost.T
+    n, m = cost.shape
+    if n == 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+
+    # Índices desde 1; la columna 0 es la raíz del camino aumentante
+    u = np.zeros(n + 1)
+    v = np.zeros(m + 1)
+    row_of = np.zeros(m + 1, dtype=np.int64)  # Fila asignada a cada columna (0 = libre)
+    way = np.zeros(m + 1, dtype=np.int64)
+    for row in range(1, n + 1):
+        row_of[0] = row
+        column = 0
+        min_slack = np.full(m + 1, np.inf)
+        used = np.zeros(m + 1, dtype=bool)
+        while True:
+            used[column] = True
+            current_row = row_of[column]
+            slack = cost[current_row - 1] - u[current_row] - v[1:]
+            free = ~used[1:]
+            better = free & (slack < min_slack[1:])
+            min_slack[1:][better] = slack[better]
+            way[1:][better] = column
+            candidates = np.where(free, min_slack[1:], np.inf)
+            next_column = int(np.argmin(candidates)) + 1
+            delta = candidates[next_column - 1]
+            u[row_of[used]] += delta
+            v[used] -= delta
+            min_slack[1:][free] -= delta
+            column = next_column
+            if row_of[column] == 0:
+                break
+        # Invertir el camino aumentante
+        while column:
+            previous = way[column]
+            row_of[column] = row_of[previous]
+            column = previous
+
+    columns = np.flatnonzero(row_of[1:])
+    rows = row_of[columns + 1] - 1
+    if transposed:
+        rows, columns = columns, rows
+    order = np.argsort(rows)
+    return rows[order], columns[order]
+
+def assign_pairs(n_rows: int, n_columns: int, pairs: Iterable[Tuple[int, int, float]]) -> Dict[int, int]:
+    """
+    Asignación uno a uno a partir de los pares admisibles (fila, columna, coste).
+
+    Los pares que no se indican no son admisibles: una fila puede quedar sin
+    columna si todas sus columnas admisibles se asignan mejor a otras filas.
+    Cada componente conexa de pares (archivos que compiten entre sí) se
+    resuelve por separado, así que el coste crece con el tamaño de las
+    componentes y no con el total de archivos del día.
+
+    Returns:
+        Fila -> columna asignada
+    """
+    pairs = list(pairs)
+    # Componentes conexas del grafo fila-columna (columnas desplazadas n_rows)
+    parent = list(range(n_rows + n_columns))
+
+    def find(node):
+        while parent[node] != node:
+            parent[node] = parent[parent[node]]
+            node = parent[node]
+        return node
+
+    for row, column, _ in pairs:
+        parent[find(row)] = find(n_rows + column)
+    components = {}
+    for row, column, pair_cost in pairs:
+        components.setdefault(find(row), []).append((row, column, pair_cost))
+
+    assignment = {}
+    for component in components.values():
+        rows = sorted({row for row, _, _ in component})
+        columns = sorted({column for _, column, _ in component})
+        row_position = {row: position for position, row in enumerate(rows)}
+        column_position = {column: position for position, column in enumerate(columns)}
+        cost = np.full((len(rows), len(columns)), UNASSIGNED_COST)
+        for row, column, pair_cost in component:
+            cost[row_position[row], column_position[column]] = pair_cost
+        assigned_rows, assigned_columns = min_cost_assignment(cost)
+        for row, column in zip(assigned_rows.tolist(), assigned_columns.tolist()):
+            if cost[row, column] < UNASSIGNED_COST:
+                assignment[rows[row]] = columns[column]
+    return dict(sorted(assignment.items()))
+
+def overlap_deficit_seconds(base_start: datetime, base_end: datetime,
+                            file_start: datetime, file_end: datetime) -> float:
+    """Segundos del rango base que el archivo no cubre."""
+    overlap = (min(base_end, file_end) - max(base_start, file_start)).total_seconds()
+    return (base_end - base_start).total_seconds() - max(overlap, 0.0)
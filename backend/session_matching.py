@@ -0,0 +1,644 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Motor único de emparejamiento de sesiones Doback.
+
+Los emparejadores históricos (DobackProcessor, StrictTemporalMatcher,
+FixedSessionMatcher, SessionMatcher, ParejasMatcher, MultiReferenceProcessor,
+agrupar_sesiones) recorrían el disco y volvían a extraer los rangos
+temporales cada uno por su cuenta. Aquí el escaneo se hace una vez
+(FileIndex, construido desde el manifiesto de DobackProcessor) y los
+criterios de emparejamiento son estrategias intercambiables que trabajan
+sobre ese índice:
+
+- proximity: el criterio de DobackProcessor (±15 min sobre inicio/fin,
+  voraz o asignación uno a uno)
+- strict: el criterio de StrictTemporalMatcher (CAN como base, las cuatro
+  fuentes a lo sumo a 2 min)
+- multi_reference: el criterio de MultiReferenceProcessor (cada tipo como
+  referencia, máximo solapamiento, sesión = intersección)
+- pairs: el criterio de ParejasMatcher con asignación uno a uno
+
+Comparar estrategias sobre un mes de datos cuesta un escaneo:
+
+    python session_matching.py --strategies proximity strict pairs --from 2025-07-01 --to 2025-07-31
+
+Nuevas estrategias: subclase de MatchingStrategy decorada con
+@register_strategy.
+"""
+
+import argparse
+import json
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from session_assignment import assign_pairs, overlap_deficit_seconds
+from temporal_index import SortedTimeIndex, TemporalFileIndex
+
+logger = logging.getLogger(__name__)
+
+SESSION_TYPES = ('CAN', 'GPS', 'ESTABILIDAD', 'ROTATIVO')
+
+def _date_key(value) -> Optional[str]:
+    """Fecha YYYY-MM-DD de un valor datetime o cadena (None si no hay fecha)."""
+    if not value:
+        return None
+    if isinstance(value, datetime):
+        return value.strftime('%Y-%m-%d')
+    return str(value)[:10]
+
+def _is_date_only(instant: datetime) -> bool:
+    """ROTATIVO con solo fecha: la hora es exactamente 00:00:00."""
+    return instant.hour == 0 and instant.minute == 0 and instant.second == 0
+
+def _empty_session_files() -> Dict[str, Optional[Dict]]:
+    return {file_type: None for file_type in SESSION_TYPES}
+
+def _diff_score(total_diff_minutes: float) -> float:
+    """Score de StrictTemporalMatcher/ParejasMatcher: 1 sin diferencia, decrece con los minutos."""
+    return 1.0 / (1.0 + total_diff_minutes / 10.0)
+
+# ---------------------------------------------------------------------------
+# Índice de archivos
+# ---------------------------------------------------------------------------
+
+class MatchGroup:
+    """
+    Archivos de un vehículo y una fecha, separados por tipo.
+
+    Los índices temporales de cada tipo se construyen la primera vez que una
+    estrategia los pide y se reutilizan en las demás.
+    """
+
+    def __init__(self, vehicle: str, date: str, files_by_type: Dict[str, List[Dict]]):
+        self.vehicle = vehicle
+        self.date = date
+        self.files_by_type = files_by_type
+        self._indexes = {}
+
+    def files(self, file_type: str) -> List[Dict]:
+        return self.files_by_type.get(file_type, [])
+
+    def index(self, file_type: str) -> TemporalFileIndex:
+        if file_type not in self._indexes:
+            self._indexes[file_type] = TemporalFileIndex(self.files(file_type))
+        return self._indexes[file_type]
+
+    def indexes(self) -> Dict[str, TemporalFileIndex]:
+        return {file_type: self.index(file_type) for file_type in self.files_by_type}
+
+class FileIndex:
+    """
+    Todos los archivos escaneados, agrupados por vehículo, fecha y tipo.
+
+    Los archivos tienen el formato de DobackProcessor (path, filename, type,
+    vehicle, date, start_time, end_time); los que no tienen vehículo, fecha o
+    un tipo de sesión conocido no se indexan.
+    """
+
+    def __init__(self, files: Iterable[Dict]):
+        self.files = list(files)
+        self._groups = {}
+        for file_info in self.files:
+            date = _date_key(file_info.get('date'))
+            file_type = file_info.get('type')
+            if not date or file_type not in SESSION_TYPES:
+                continue
+            key = (file_info.get('vehicle', 'unknown'), date)
+            if key not in self._groups:
+                self._groups[key] = MatchGroup(key[0], key[1], {file_type: [] for file_type in SESSION_TYPES})
+            self._groups[key].files_by_type[file_type].append(file_info)
+
+    @classmethod
+    def from_processor(cls, processor) -> 'FileIndex':
+        """Índice a partir del escaneo incremental (manifiesto) de un DobackProcessor."""
+        return cls(processor._get_all_files())
+
+    def __len__(self) -> int:
+        return len(self.files)
+
+    @property
+    def vehicles(self) -> List[str]:
+        return sorted({vehicle for vehicle, _ in self._groups})
+
+    def groups(self, vehicles: Optional[Iterable[str]] = None, date_from: Optional[str] = None,
+               date_to: Optional[str] = None) -> Iterator[MatchGroup]:
+        """Grupos vehículo/fecha, en orden, filtrados por vehículo y rango de fechas (inclusivo)."""
+        vehicles = set(vehicles) if vehicles else None
+        for (vehicle, date), group in sorted(self._groups.items()):
+            if vehicles is not None and vehicle not in vehicles:
+                continue
+            if (date_from and date < date_from) or (date_to and date > date_to):
+                continue
+            yield group
+
+    def vehicle_group(self, vehicle: str) -> MatchGroup:
+        """
+        Todos los archivos indexados de un vehículo en un solo grupo (date
+        None), sin separar por fecha y en el orden del escaneo.
+        """
+        files_by_type = {file_type: [] for file_type in SESSION_TYPES}
+        for file_info in self.files:
+            if (file_info.get('vehicle', 'unknown') == vehicle and _date_key(file_info.get('date'))
+                    and file_info.get('type') in SESSION_TYPES):
+                files_by_type[file_info['type']].append(file_info)
+        return MatchGroup(vehicle, None, files_by_type)
+
+# ---------------------------------------------------------------------------
+# Criterio de proximidad (DobackProcessor)
+# ---------------------------------------------------------------------------
+
+def temporal_proximity(base_start: datetime, base_end: datetime, file_start: datetime,
+                       file_end: datetime, tolerance_seconds: float) -> Optional[float]:
+    """
+    Calcula la proximidad temporal entre dos rangos de tiempo.
+    Retorna None si están fuera de tolerancia, o la diferencia en segundos si están dentro.
+    """
+    # Calcular diferencias entre inicios y finales
+    start_diff = abs((base_start - file_start).total_seconds())
+    end_diff = abs((base_end - file_end).total_seconds())
+
+    # Si ambos están dentro de la tolerancia, usar la diferencia promedio
+    if start_diff <= tolerance_seconds and end_diff <= tolerance_seconds:
+        return (start_diff + end_diff) / 2
+
+    # Si solo uno está dentro de tolerancia, verificar solapamiento
+    if start_diff <= tolerance_seconds or end_diff <= tolerance_seconds:
+        # Verificar si hay solapamiento real
+        if file_start <= base_end and file_end >= base_start:
+            return min(start_diff, end_diff)
+
+    return None
+
+def find_compatible_files(base_file: Dict, files_by_type: Dict[str, List[Dict]], tolerance: timedelta,
+                          indexes: Optional[Dict[str, TemporalFileIndex]] = None) -> Dict[str, Optional[Dict]]:
+    """
+    Archivo más próximo de cada tipo a un archivo base (CAN, ESTABILIDAD o GPS).
+
+    Solo pueden estar en tolerancia los archivos que empiezan cerca del
+    inicio del base o terminan cerca de su fin (ver temporal_proximity), así
+    que solo se puntúan esos candidatos, obtenidos del índice temporal de
+    cada tipo (indexes, o uno construido aquí si no se pasa).
+    """
+    base_type = base_file.get('type', 'CAN')
+    session_files = _empty_session_files()
+    session_files[base_type] = base_file
+
+    base_start = base_file.get('start_time')
+    base_end = base_file.get('end_time')
+    if not base_start or not base_end:
+        return session_files
+
+    tolerance_seconds = tolerance.total_seconds()
+    for file_type in SESSION_TYPES:
+        if file_type == base_type:
+            continue
+        type_files = files_by_type.get(file_type, [])
+        if not type_files:
+            continue
+
+        index = (indexes or {}).get(file_type) or TemporalFileIndex(type_files)
+        best_file = None
+        best_score = float('inf')
+        # Candidatos en el orden original: en empate gana el primero, como en un recorrido lineal
+        for position in index.candidates(base_start, base_end, tolerance):
+            file_info = type_files[position]
+            score = temporal_proximity(base_start, base_end, file_info['start_time'],
+                                       file_info['end_time'], tolerance_seconds)
+            if score is not None and score < best_score:
+                best_score = score
+                best_file = file_info
+
+        if best_file:
+            session_files[file_type] = best_file
+            logger.debug(f"    📎 {file_type}: emparejado (score: {best_score:.1f}s)")
+        else:
+            logger.debug(f"    ❌ {file_type}: no encontrado archivo compatible")
+
+    return session_files
+
+def assign_files_one_to_one(base_files: List[Dict], files_by_type: Dict[str, List[Dict]], tolerance: timedelta,
+                            indexes: Optional[Dict[str, TemporalFileIndex]] = None) -> List[Dict[str, Optional[Dict]]]:
+    """
+    Empareja los archivos base con los del resto de tipos sin repetir archivos.
+
+    Por cada tipo se resuelve una asignación de coste mínimo (ver
+    session_assignment) entre archivos base y archivos del tipo. Solo son
+    admisibles los pares que find_compatible_files aceptaría, y el coste es
+    su proximidad temporal más los segundos del base que el archivo no
+    cubre.
+
+    Returns:
+        Archivos de la sesión de cada archivo base, en el orden de base_files
+    """
+    matched = []
+    for base_file in base_files:
+        session_files = _empty_session_files()
+        session_files[base_file.get('type', 'CAN')] = base_file
+        matched.append(session_files)
+
+    for file_type, type_files in files_by_type.items():
+        if not type_files:
+            continue
+        index = (indexes or {}).get(file_type) or TemporalFileIndex(type_files)
+        pairs = []
+        for row, base_file in enumerate(base_files):
+            base_start = base_file.get('start_time')
+            base_end = base_file.get('end_time')
+            if base_file.get('type', 'CAN') == file_type or not base_start or not base_end:
+                continue
+            for column in index.candidates(base_start, base_end, tolerance):
+                file_start = type_files[column]['start_time']
+                file_end = type_files[column]['end_time']
+                proximity = temporal_proximity(base_start, base_end, file_start, file_end,
+                                               tolerance.total_seconds())
+                if proximity is not None:
+                    deficit = overlap_deficit_seconds(base_start, base_end, file_start, file_end)
+                    pairs.append((row, column, proximity + deficit))
+
+        assignment = assign_pairs(len(base_files), len(type_files), pairs)
+        for row, column in assignment.items():
+            matched[row][file_type] = type_files[column]
+        logger.debug(f"    📎 {file_type}: {len(assignment)} archivos asignados uno a uno "
+                     f"({len(pairs)} pares admisibles)")
+
+    return matched
+
+# ---------------------------------------------------------------------------
+# Estrategias
+# ---------------------------------------------------------------------------
+
+STRATEGIES = {}
+
+def register_strategy(strategy_class):
+    """Registra una estrategia por su name para usarla desde el motor y la CLI."""
+    STRATEGIES[strategy_class.name] = strategy_class
+    return strategy_class
+
+def get_strategy(name: str, **options) -> 'MatchingStrategy':
+    """Instancia la estrategia registrada con ese nombre."""
+    if name not in STRATEGIES:
+        raise ValueError(f"Estrategia de emparejamiento desconocida: {name} "
+                         f"(disponibles: {', '.join(sorted(STRATEGIES))})")
+    return STRATEGIES[name](**options)
+
+class MatchingStrategy:
+    """
+    Criterio de emparejamiento sobre un grupo vehículo/fecha.
+
+    match devuelve una lista de sesiones; cada una con al menos 'files'
+    (tipo -> archivo o None) y, si la estrategia lo define, 'start_time',
+    'end_time', 'score' u otros campos propios. El motor completa el rango
+    temporal (unión de los archivos) y los tipos disponibles.
+    """
+
+    name = ''
+    description = ''
+
+    def match(self, group: MatchGroup) -> List[Dict]:
+        raise NotImplementedError
+
+@register_strategy
+class ProximityStrategy(MatchingStrategy):
+    """
+    Criterio de DobackProcessor: base CAN > ESTABILIDAD > GPS y archivos de
+    los demás tipos a ±tolerance_minutes del inicio o del fin del base.
+    Con one_to_one cada archivo se usa en una sesión como mucho.
+    """
+
+    name = 'proximity'
+    description = 'Proximidad ±15 min al archivo base (DobackProcessor)'
+
+    def __init__(self, tolerance_minutes: float = 15, one_to_one: bool = False):
+        self.tolerance = timedelta(minutes=tolerance_minutes)
+        self.one_to_one = one_to_one
+
+    def base_files(self, group: MatchGroup) -> List[Dict]:
+        """Archivos base del grupo; vacío si no hay estabilidad ni GPS (mínimo requerido)."""
+        if not group.files('ESTABILIDAD') and not group.files('GPS'):
+            return []
+        for file_type in ('CAN', 'ESTABILIDAD', 'GPS'):
+            if group.files(file_type):
+                return group.files(file_type)
+        return []
+
+    def match(self, group: MatchGroup) -> List[Dict]:
+        base_files = self.base_files(group)
+        if self.one_to_one:
+            matched = assign_files_one_to_one(base_files, group.files_by_type, self.tolerance, group.indexes())
+        else:
+            matched = [find_compatible_files(base_file, group.files_by_type, self.tolerance, group.indexes())
+                       for base_file in base_files]
+        return [{'files': session_files, 'base_file': base_file}
+                for base_file, session_files in zip(base_files, matched)]
+
+@register_strategy
+class StrictStrategy(MatchingStrategy):
+    """
+    Criterio de StrictTemporalMatcher: cada CAN, en orden de inicio, se
+    empareja con un GPS, ESTABILIDAD y ROTATIVO libres y la sesión solo vale
+    si todos empiezan a lo sumo a tolerance_minutes del CAN. Un ROTATIVO con
+    solo fecha (00:00:00) del mismo día cuenta como 0.
+
+    La diferencia máxima mínima es la mayor de las distancias al más
+    cercano libre de cada tipo, así que basta una búsqueda binaria por tipo
+    en lugar del triple bucle. Como el triple bucle, entre las combinaciones
+    con esa diferencia se queda con la primera: en cada tipo, el primer
+    archivo libre (en el orden del grupo) a esa distancia o menos.
+    """
+
+    name = 'strict'
+    description = 'CAN + 3 fuentes a ≤2 min, sin reutilizar archivos (StrictTemporalMatcher)'
+
+    def __init__(self, tolerance_minutes: float = 2):
+        self.tolerance = timedelta(minutes=tolerance_minutes)
+
+    def match(self, group: MatchGroup) -> List[Dict]:
+        if any(not group.files(file_type) for file_type in SESSION_TYPES):
+            return []
+
+        start_key = lambda file_info: file_info['start_time']
+        position = {id(file_info): index for file_type in SESSION_TYPES[1:]
+                    for index, file_info in enumerate(group.files(file_type))}
+        date_only_rotativos = [f for f in group.files('ROTATIVO') if _is_date_only(f['start_time'])]
+        free = {file_type: SortedTimeIndex(group.files(file_type), start_key) for file_type in SESSION_TYPES[1:]}
+        free['ROTATIVO'] = SortedTimeIndex(
+            [f for f in group.files('ROTATIVO') if not _is_date_only(f['start_time'])], start_key
+        )
+
+        sessions = []
+        for can_file in sorted(group.files('CAN'), key=start_key):
+            can_start = can_file['start_time']
+            same_day = [f for f in date_only_rotativos if f['start_time'].date() == can_start.date()]
+            distances = {file_type: index.nearest_distance(can_start) for file_type, index in free.items()}
+            if same_day:
+                distances['ROTATIVO'] = timedelta(0)
+            if any(distance is None or distance > self.tolerance for distance in distances.values()):
+                continue
+
+            max_distance = max(distances.values())
+            session_files = {'CAN': can_file}
+            diffs = {}
+            for file_type, index in free.items():
+                candidates = index.within(can_start, max_distance) + (same_day if file_type == 'ROTATIVO' else [])
+                chosen = min(candidates, key=lambda file_info: position[id(file_info)])
+                session_files[file_type] = chosen
+                if file_type == 'ROTATIVO' and _is_date_only(chosen['start_time']):
+                    date_only_rotativos = [f for f in date_only_rotativos if f is not chosen]
+                    diffs[file_type] = 0.0
+                else:
+                    index.remove(chosen)  # Sesión válida: sus archivos dejan de estar libres
+                    diffs[file_type] = abs((chosen['start_time'] - can_start).total_seconds()) / 60
+            sessions.append({
+                'files': session_files,
+                'score': _diff_score(sum(diffs.values())),
+                'time_diffs': diffs,
+            })
+        return sessions
+
+@register_strategy
+class MultiReferenceStrategy(MatchingStrategy):
+    """
+    Criterio de MultiReferenceProcessor: cada archivo de cada tipo de
+    referencia busca, en los demás tipos, el de mayor solapamiento que no
+    empiece más de max_early_minutes antes que él. La sesión es la
+    intersección de los cuatro rangos. Las sesiones que se solapan más de
+    merge_overlap_seconds se fusionan y anotan qué referencias las detectan.
+    """
+
+    name = 'multi_reference'
+    description = 'Cada tipo como referencia, máximo solapamiento (MultiReferenceProcessor)'
+
+    def __init__(self, reference_types: Iterable[str] = SESSION_TYPES, max_early_minutes: float = 10,
+                 merge_overlap_seconds: float = 300):
+        self.reference_types = list(reference_types)
+        self.max_early = timedelta(minutes=max_early_minutes)
+        self.merge_overlap_seconds = merge_overlap_seconds
+
+    def match_reference(self, group: MatchGroup, reference_type: str) -> List[Dict]:
+        """Sesiones encontradas usando reference_type como referencia."""
+        if any(not group.files(file_type) for file_type in SESSION_TYPES):
+            return []
+        sessions = []
+        for ref_file in group.files(reference_type):
+            ref_start, ref_end = ref_file['start_time'], ref_file['end_time']
+            session_files = {reference_type: ref_file}
+            for file_type in SESSION_TYPES:
+                if file_type == reference_type:
+                    continue
+                type_files = group.files(file_type)
+                best_match, max_overlap = None, 0
+                # Solo solapan los que empiezan antes del fin de la referencia
+                for position in group.index(file_type).starting_between(ref_start - self.max_early, ref_end):
+                    file_info = type_files[position]
+                    overlap = (min(ref_end, file_info['end_time']) - max(ref_start, file_info['start_time'])).total_seconds()
+                    if overlap > max_overlap:
+                        best_match, max_overlap = file_info, overlap
+                if best_match is None:
+                    break
+                session_files[file_type] = best_match
+            else:
+                session_start = max(f['start_time'] for f in session_files.values())
+                session_end = min(f['end_time'] for f in session_files.values())
+                if session_start < session_end:
+                    sessions.append({
+                        'files': {file_type: session_files[file_type] for file_type in SESSION_TYPES},
+                        'start_time': session_start,
+                        'end_time': session_end,
+                        'reference_type': reference_type,
+                    })
+        return sessions
+
+    def match(self, group: MatchGroup) -> List[Dict]:
+        unique_sessions = []
+        for reference_type in self.reference_types:
+            for session in self.match_reference(group, reference_type):
+                for existing in unique_sessions:
+                    overlap = (min(session['end_time'], existing['end_time'])
+                               - max(session['start_time'], existing['start_time'])).total_seconds()
+                    if overlap > self.merge_overlap_seconds:
+                        existing['detected_by'].append(reference_type)
+                        break
+                else:
+                    unique_sessions.append(dict(session, detected_by=[reference_type]))
+        return unique_sessions
+
+@register_strategy
+class PairsStrategy(MatchingStrategy):
+    """
+    Criterio de ParejasMatcher con one_to_one: cada CAN recibe como mucho un
+    archivo de cada tipo, cada archivo se usa una vez y la suma de
+    diferencias de inicio (minutos) es mínima. Un ROTATIVO con solo fecha
+    cuesta 0. Con max_diff_minutes se descartan los pares más lejanos.
+    """
+
+    name = 'pairs'
+    description = 'Asignación uno a uno de coste mínimo por CAN (ParejasMatcher)'
+
+    def __init__(self, max_diff_minutes: Optional[float] = None):
+        self.max_diff_minutes = max_diff_minutes
+
+    def match(self, group: MatchGroup) -> List[Dict]:
+        if any(not group.files(file_type) for file_type in SESSION_TYPES):
+            return []
+        can_files = group.files('CAN')
+        assigned = {}
+        costs = {}
+        for file_type in SESSION_TYPES[1:]:
+            files = group.files(file_type)
+            pairs = []
+            for column, file_info in enumerate(files):
+                date_only = file_type == 'ROTATIVO' and _is_date_only(file_info['start_time'])
+                for row, can_file in enumerate(can_files):
+                    diff = 0.0 if date_only else abs((file_info['start_time'] - can_file['start_time']).total_seconds() / 60)
+                    if self.max_diff_minutes is None or diff <= self.max_diff_minutes:
+                        pairs.append((row, column, diff))
+                        costs[(file_type, row, column)] = diff
+            assigned[file_type] = assign_pairs(len(can_files), len(files), pairs)
+
+        sessions = []
+        for row, can_file in enumerate(can_files):
+            if not all(row in assignment for assignment in assigned.values()):
+                continue
+            session_files = {'CAN': can_file}
+            diffs = {}
+            for file_type, assignment in assigned.items():
+                session_files[file_type] = group.files(file_type)[assignment[row]]
+                diffs[file_type] = costs[(file_type, row, assignment[row])]
+            sessions.append({'files': session_files, 'score': _diff_score(sum(diffs.values())), 'time_diffs': diffs})
+        return sessions
+
+# ---------------------------------------------------------------------------
+# Motor
+# ---------------------------------------------------------------------------
+
+class SessionMatchingEngine:
+    """
+    Ejecuta estrategias de emparejamiento sobre un FileIndex ya construido.
+
+    Las sesiones resultantes tienen vehicle, date, strategy, files (los cuatro
+    tipos, None si falta), start_time, end_time, available_types,
+    missing_types y los campos propios de la estrategia.
+    """
+
+    def __init__(self, index: FileIndex):
+        self.index = index
+
+    def run(self, strategy, vehicles: Optional[Iterable[str]] = None, date_from: Optional[str] = None,
+            date_to: Optional[str] = None) -> List[Dict]:
+        """Sesiones de una estrategia (instancia o nombre registrado) en los grupos filtrados."""
+        if isinstance(strategy, str):
+            strategy = get_strategy(strategy)
+        sessions = []
+        for group in self.index.groups(vehicles, date_from, date_to):
+            for session in strategy.match(group):
+                sessions.append(self._complete_session(session, group, strategy.name))
+        logger.info(f"🔗 {strategy.name}: {len(sessions)} sesiones")
+        return sessions
+
+    def compare(self, strategies: Iterable, **filters) -> Dict[str, List[Dict]]:
+        """Ejecuta varias estrategias sobre el mismo índice (un único escaneo)."""
+        results = {}
+        for strategy in strategies:
+            if isinstance(strategy, str):
+                strategy = get_strategy(strategy)
+            results[strategy.name] = self.run(strategy, **filters)
+        return results
+
+    @staticmethod
+    def _complete_session(session: Dict, group: MatchGroup, strategy_name: str) -> Dict:
+        files = _empty_session_files()
+        files.update(session['files'])
+        present = [file_info for file_info in files.values() if file_info]
+        completed = dict(session)
+        completed.update({
+            'vehicle': group.vehicle,
+            'date': group.date,
+            'strategy': strategy_name,
+            'files': files,
+            'start_time': session.get('start_time') or min(f['start_time'] for f in present),
+            'end_time': session.get('end_time') or max(f['end_time'] for f in present),
+            'available_types': [file_type for file_type in SESSION_TYPES if files[file_type]],
+            'missing_types': [file_type for file_type in SESSION_TYPES if not files[file_type]],
+        })
+        return completed
+
+def session_signature(session: Dict) -> Tuple:
+    """Rutas de los archivos de una sesión, para comparar sesiones entre estrategias."""
+    return tuple((session['files'][file_type] or {}).get('path') for file_type in SESSION_TYPES)
+
+def summarize_results(results: Dict[str, List[Dict]]) -> Dict[str, Dict]:
+    """
+    Resumen por estrategia: sesiones, sesiones completas, archivos usados,
+    archivos repetidos en varias sesiones y sesiones idénticas (mismos
+    archivos) a las de cada una de las demás estrategias.
+    """
+    signatures = {name: {session_signature(session) for session in sessions}
+                  for name, sessions in results.items()}
+    summary = {}
+    for name, sessions in results.items():
+        used = [f['path'] for session in sessions for f in session['files'].values() if f]
+        summary[name] = {
+            'sessions': len(sessions),
+            'complete_sessions': sum(1 for session in sessions if not session['missing_types']),
+            'files_used': len(set(used)),
+            'files_reused': len(used) - len(set(used)),
+            'shared_with': {other: len(signatures[name] & signatures[other])
+                            for other in results if other != name},
+        }
+    return summary
+
+def _session_to_json(session: Dict) -> Dict:
+    return {
+        'vehicle': session['vehicle'],
+        'date': session['date'],
+        'strategy': session['strategy'],
+        'start_time': session['start_time'].isoformat(),
+        'end_time': session['end_time'].isoformat(),
+        'score': session.get('score'),
+        'files': {file_type: (file_info or {}).get('filename') for file_type, file_info in session['files'].items()},
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='Compara estrategias de emparejamiento de sesiones con un único escaneo')
+    parser.add_argument('--strategies', nargs='+', default=sorted(STRATEGIES), choices=sorted(STRATEGIES),
+                        help='Estrategias a ejecutar (por defecto todas)')
+    parser.add_argument('--vehicle', action='append', dest='vehicles', help='Filtrar por vehículo (repetible)')
+    parser.add_argument('--from', dest='date_from', help='Fecha inicial YYYY-MM-DD (inclusive)')
+    parser.add_argument('--to', dest='date_to', help='Fecha final YYYY-MM-DD (inclusive)')
+    parser.add_argument('--one-to-one', action='store_true', help='proximity con asignación uno a uno')
+    parser.add_argument('--output', help='Guardar las sesiones de cada estrategia en este JSON')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    from complete_processor import DobackProcessor
+
+    started = datetime.now()
+    index = FileIndex.from_processor(DobackProcessor())
+    logger.info(f"📋 Índice construido: {len(index)} archivos, {len(index.vehicles)} vehículos "
+                f"({(datetime.now() - started).total_seconds():.1f}s)")
+
+    engine = SessionMatchingEngine(index)
+    options = {'proximity': {'one_to_one': args.one_to_one}}
+    strategies = [get_strategy(name, **options.get(name, {})) for name in args.strategies]
+    results = engine.compare(strategies, vehicles=args.vehicles, date_from=args.date_from, date_to=args.date_to)
+
+    print("\n" + "=" * 60)
+    print("COMPARACIÓN DE ESTRATEGIAS DE EMPAREJAMIENTO")
+    print("=" * 60)
+    for name, stats in summarize_results(results).items():
+        print(f"\n{name}: {STRATEGIES[name].description}")
+        print(f"  Sesiones: {stats['sessions']} ({stats['complete_sessions']} completas)")
+        print(f"  Archivos usados: {stats['files_used']} (repetidos: {stats['files_reused']})")
+        for other, shared in stats['shared_with'].items():
+            print(f"  Sesiones idénticas a {other}: {shared}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump({name: [_session_to_json(s) for s in sessions] for name, sessions in results.items()},
+                      f, indent=2, ensure_ascii=False)
+        print(f"\n📊 Sesiones guardadas en: {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Parser vectorizado de archivos ESTABILIDAD.
+
+Formato del archivo:
+    ESTABILIDAD;07/07/2025 02:23:20PM;DOBACK022;51;0;       <- cabecera de sesión
+    ax; ay; az; gx; gy; gz; roll; pitch; yaw; ...           <- cabecera de columnas
+    -22.81;  -0.61; 1020.04; ...                             <- muestras a 10 Hz
+    02:23:55PM                                               <- marca de hora
+
+Las líneas de datos se leen en bloque con el motor C de pandas y las reglas
+de validez (ax/ay, az, gx/gy/gz, roll/pitch/yaw, si) se aplican como máscaras
+sobre columnas NumPy, sin bucles Python por muestra.
+"""
+
+import io
+import re
+import csv
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from head_tail_reader import DEFAULT_CHUNK_BYTES, iter_head_lines, iter_line_chunks
+from timestamp_parser import DOBACK_FORMAT, parse_timestamp
+
+# Columnas del archivo en orden (campos 0..17 de cada línea de datos)
+STABILITY_COLUMNS = [
+    'ax', 'ay', 'az', 'gx', 'gy', 'gz', 'roll', 'pitch', 'yaw', 'timeantwifi',
+    'usciclo1', 'usciclo2', 'usciclo3', 'usciclo4', 'usciclo5', 'si', 'accmag', 'microsds'
+]
+# Campos obligatorios: si no son numéricos la línea se descarta
+REQUIRED_COLUMNS = ['ax', 'ay', 'az', 'gx', 'gy', 'gz', 'roll', 'pitch', 'yaw', 'si']
+MIN_FIELDS = 19  # Campos mínimos por línea (18 valores + ';' final)
+
+# Reglas de validez en el orden en que se evalúan: (motivo, columnas, mínimo, máximo)
+VALIDITY_RULES = [
+    ('ax/ay fuera de rango', ('ax', 'ay'), -500, 500),
+    ('az fuera de rango', ('az',), 900, 1100),
+    ('gx/gy/gz fuera de rango', ('gx', 'gy', 'gz'), -2000, 2000),
+    ('roll/pitch/yaw fuera de rango', ('roll', 'pitch', 'yaw'), -180, 180),
+    ('si fuera de rango', ('si',), 0, 1),
+]
+DISCARD_SHORT = 'campos insuficientes'
+DISCARD_PARSE = 'error parseando valores'
+
+SAMPLE_PERIOD_MS = 100  # Muestreo a 10 Hz
+MAX_DISCARD_SAMPLES = 3  # Líneas descartadas de ejemplo guardadas por motivo y bloque
+HEADER_TIMESTAMP_FORMAT = DOBACK_FORMAT
+MARKER_REGEX = re.compile(r'^\d{1,2}:\d{2}:\d{2}(AM|PM)$')
+
+@dataclass
+class StabilityParseResult:
+    """
+    Resultado del parseo: columnas tipadas, contadores de líneas y una muestra
+    de líneas descartadas (motivo, número de línea en el archivo, línea).
+    """
+    base_timestamp: datetime
+    columns: Dict[str, np.ndarray]
+    lines_processed: int = 0
+    discarded: Dict[str, int] = field(default_factory=dict)
+    discard_samples: List[Tuple[str, int, str]] = field(default_factory=list)
+
+    @property
+    def size(self) -> int:
+        return len(self.columns['timestamp'])
+
+def parse_stability_file(file_path: str) -> StabilityParseResult:
+    """Parsea un archivo ESTABILIDAD completo."""
+    with open(file_path, 'r', encoding='utf-8') as f:
+        lines = f.read().splitlines()
+    return parse_stability_lines(lines)
+
+def parse_stability_lines(lines: List[str]) -> StabilityParseResult:
+    """
+    Parsea las líneas de un archivo ESTABILIDAD (incluidas las dos cabeceras).
+
+    El timestamp de cada muestra válida es la última marca de hora (sobre la
+    fecha de cabecera) más 100 ms por cada muestra válida anterior del archivo.
+
+    Raises:
+        ValueError: Si el archivo es demasiado corto o la cabecera no es válida
+    """
+    if len(lines) < 3:
+        raise ValueError("Archivo de estabilidad muy corto")
+    parser = StabilityChunkParser(parse_stability_header(lines[0]))
+    return parser.parse_chunk(lines[2:])
+
+def iter_stability_chunks(file_path: str, chunk_bytes: int = DEFAULT_CHUNK_BYTES) -> Iterator[StabilityParseResult]:
+    """
+    Parsea un archivo ESTABILIDAD por bloques de unos chunk_bytes bytes.
+
+    Cada resultado contiene solo las muestras y contadores de su bloque; los
+    timestamps son idénticos a los de parse_stability_file. El pico de memoria
+    queda acotado por el tamaño de bloque (del orden de 20 × chunk_bytes) y no
+    depende del tamaño del archivo.
+
+    Raises:
+        ValueError: Si el archivo es demasiado corto o la cabecera no es válida
+    """
+    header_lines = []
+    data_offset = 0
+    for data_offset, line in iter_head_lines(file_path):
+        header_lines.append(line)
+        if len(header_lines) == 2:
+            break
+    if len(header_lines) < 2:
+        raise ValueError("Archivo de estabilidad muy corto")
+    parser = StabilityChunkParser(parse_stability_header(header_lines[0]))
+    for lines in iter_line_chunks(file_path, data_offset, chunk_bytes):
+        yield parser.parse_chunk([line.rstrip('\r\n') for line in lines])
+
+def parse_stability_header(header_line: str) -> datetime:
+    """Fecha de inicio de sesión de la cabecera ESTABILIDAD;dd/mm/YYYY hh:mm:ssAM;..."""
+    header_parts = header_line.strip().split(';')
+    if len(header_parts) < 2:
+        raise ValueError(f"Cabecera de estabilidad inválida: {header_line}")
+    base_timestamp = parse_timestamp(header_parts[1].strip(), HEADER_TIMESTAMP_FORMAT)
+    if base_timestamp is None:
+        raise ValueError(f"Fecha de cabecera de estabilidad inválida: {header_parts[1]}")
+    return base_timestamp
+
+class StabilityChunkParser:
+    """
+    Parser con estado para leer un archivo ESTABILIDAD por bloques.
+
+    Entre bloques conserva la última marca de hora y el número de muestras
+    válidas ya emitidas, de modo que el resultado no depende de dónde se
+    corte el archivo.
+    """
+
+    def __init__(self, base_timestamp: datetime):
+        self.base_timestamp = base_timestamp
+        self.anchor = np.datetime64(base_timestamp, 'ms')
+        self.day = np.datetime64(base_timestamp.date(), 'ms')
+        self.valid_count = 0
+        self.first_line = 3  # Número de línea en el archivo de la primera línea del bloque
+
+    def parse_chunk(self, body: List[str]) -> StabilityParseResult:
+        """Parsea un bloque de líneas de datos y marcas de hora (sin cabeceras)."""
+        # Las líneas con ';' son datos; el resto son marcas de hora, vacías o basura
+        separators = np.fromiter((line.count(';') for line in body), dtype=np.int32, count=len(body))
+        data_index = np.flatnonzero(separators)
+        marker_index = []
+        marker_seconds = []
+        discarded = {}
+        samples = []
+        lines_processed = len(data_index)
+        for i in np.flatnonzero(separators == 0).tolist():
+            line = body[i].strip()
+            if not line:
+                continue
+            lines_processed += 1
+            if MARKER_REGEX.match(line):
+                seconds = _marker_seconds(line)
+                if seconds is None:
+                    continue
+                marker_index.append(i)
+                marker_seconds.append(seconds)
+            else:
+                discarded[DISCARD_SHORT] = discarded.get(DISCARD_SHORT, 0) + 1
+                _add_samples(samples, DISCARD_SHORT, [i], body, self.first_line)
+
+        data_lines = [body[i] for i in data_index.tolist()]
+        values = _read_numeric_block(data_lines, int(separators.max(initial=0)) + 1)
+
+        # Máscara de validez, acumulando el primer motivo de descarte de cada línea
+        def discard(reason: str, mask: np.ndarray) -> None:
+            positions = data_index[mask]
+            if len(positions):
+                discarded[reason] = discarded.get(reason, 0) + len(positions)
+                _add_samples(samples, reason, positions[:MAX_DISCARD_SAMPLES].tolist(), body, self.first_line)
+
+        valid = separators[data_index] + 1 >= MIN_FIELDS
+        discard(DISCARD_SHORT, ~valid)
+        parsed = np.ones(len(data_lines), dtype=bool)
+        for name in REQUIRED_COLUMNS:
+            parsed &= ~np.isnan(values[name])
+        discard(DISCARD_PARSE, valid & ~parsed)
+        valid &= parsed
+        for reason, names, low, high in VALIDITY_RULES:
+            in_range = np.ones(len(data_lines), dtype=bool)
+            for name in names:
+                in_range &= (values[name] >= low) & (values[name] <= high)
+            discard(reason, valid & ~in_range)
+            valid &= in_range
+
+        columns = {name: values[name][valid] for name in STABILITY_COLUMNS}
+        for name in STABILITY_COLUMNS:
+            if name not in REQUIRED_COLUMNS:
+                columns[name] = np.nan_to_num(columns[name], nan=0.0)
+
+        # Timestamp: marca de hora vigente + 100 ms por muestra válida previa
+        anchors = np.concatenate([
+            [self.anchor],
+            self.day + (np.asarray(marker_seconds, dtype=np.int64) * 1000).astype('timedelta64[ms]')
+        ])
+        valid_positions = data_index[valid]
+        anchor_index = np.searchsorted(np.asarray(marker_index, dtype=np.int64), valid_positions, side='right')
+        offsets = (self.valid_count + np.arange(len(valid_positions), dtype=np.int64)) * SAMPLE_PERIOD_MS
+        columns['timestamp'] = anchors[anchor_index] + offsets.astype('timedelta64[ms]')
+        self.anchor = anchors[-1]
+        self.valid_count += len(valid_positions)
+        self.first_line += len(body)
+
+        return StabilityParseResult(
+            base_timestamp=self.base_timestamp,
+            columns=columns,
+            lines_processed=lines_processed,
+            discarded=discarded,
+            discard_samples=samples,
+        )
+
+def _marker_seconds(marker: str) -> Optional[int]:
+    """
+    Segundos desde medianoche de una marca HH:MM:SSAM/PM ya validada por
+    MARKER_REGEX, o None si la hora no es válida (mismo criterio que %I:%M:%S%p).
+    """
+    hour, minute, second = marker[:-2].split(':')
+    hour, minute, second = int(hour), int(minute), int(second)
+    if not (1 <= hour <= 12 and minute < 60 and second < 60):
+        return None
+    hour = hour % 12 + (12 if marker[-2:] == 'PM' else 0)
+    return hour * 3600 + minute * 60 + second
+
+def _read_numeric_block(data_lines: List[str], max_fields: int) -> Dict[str, np.ndarray]:
+    """Lee los 18 primeros campos de las líneas de datos como float64 (NaN si no son numéricos)."""
+    if not data_lines:
+        return {name: np.empty(0, dtype=np.float64) for name in STABILITY_COLUMNS}
+    names = list(range(max(max_fields, len(STABILITY_COLUMNS))))
+    options = dict(sep=';', header=None, names=names, usecols=range(len(STABILITY_COLUMNS)),
+                   skipinitialspace=True, quoting=csv.QUOTE_NONE, engine='c')
+    text = '\n'.join(data_lines)
+    try:
+        frame = pd.read_csv(io.StringIO(text), dtype=np.float64, **options)
+    except ValueError:
+        # Algún campo no numérico: se relee infiriendo tipos y solo las columnas
+        # que quedan como texto se fuerzan a número (NaN lo inválido)
+        frame = pd.read_csv(io.StringIO(text), low_memory=False, **options)
+        for column in frame.columns:
+            if not pd.api.types.is_numeric_dtype(frame[column].dtype):
+                frame[column] = pd.to_numeric(frame[column], errors='coerce')
+    return {
+        name: frame[index].to_numpy(dtype=np.float64)
+        for index, name in enumerate(STABILITY_COLUMNS)
+    }
+
+def _add_samples(samples: List[Tuple[str, int, str]], reason: str, positions: List[int],
+                 body: List[str], first_line: int) -> None:
+    """Guarda hasta MAX_DISCARD_SAMPLES líneas de ejemplo por motivo."""
+    stored = sum(1 for sample in samples if sample[0] == reason)
+    for i in positions[:max(MAX_DISCARD_SAMPLES - stored, 0)]:
+        samples.append((reason, first_line + i, body[i]))
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Índice temporal de archivos Doback para el emparejamiento de sesiones.
+
+Ordena una vez los inicios y los finales de los archivos de un tipo y
+responde con búsqueda binaria qué archivos empiezan cerca de un instante o
+terminan cerca de otro. Así cada archivo base solo compara contra los
+candidatos dentro de la tolerancia, en lugar de recorrer todos los archivos
+del día: O(n log n) en total en vez de O(n²).
+
+SortedTimeIndex hace lo mismo con un único instante por archivo y permite
+quitar los archivos ya usados en una sesión.
+"""
+
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+class TemporalFileIndex:
+    """
+    Archivos de un tipo ordenados por inicio y por fin.
+
+    Los archivos sin start_time o end_time no se indexan. Los candidatos se
+    devuelven como posiciones en la lista original, en su orden, para que
+    quien elija el mejor desempate igual que un recorrido lineal.
+    """
+
+    def __init__(self, files: List[Dict]):
+        self.files = files
+        timed = [index for index, file_info in enumerate(files)
+                 if file_info.get('start_time') and file_info.get('end_time')]
+        self._by_start = sorted(timed, key=lambda index: files[index]['start_time'])
+        self._starts = [files[index]['start_time'] for index in self._by_start]
+        self._by_end = sorted(timed, key=lambda index: files[index]['end_time'])
+        self._ends = [files[index]['end_time'] for index in self._by_end]
+
+    def starting_near(self, instant: datetime, tolerance: timedelta) -> List[int]:
+        """Posiciones de los archivos cuyo inicio está a lo sumo a tolerance de instant."""
+        low = bisect_left(self._starts, instant - tolerance)
+        high = bisect_right(self._starts, instant + tolerance)
+        return self._by_start[low:high]
+
+    def ending_near(self, instant: datetime, tolerance: timedelta) -> List[int]:
+        """Posiciones de los archivos cuyo fin está a lo sumo a tolerance de instant."""
+        low = bisect_left(self._ends, instant - tolerance)
+        high = bisect_right(self._ends, instant + tolerance)
+        return self._by_end[low:high]
+
+    def starting_between(self, low: datetime, high: datetime) -> List[int]:
+        """Posiciones (en orden original) de los archivos que empiezan en [low, high)."""
+        return sorted(self._by_start[bisect_left(self._starts, low):bisect_left(self._starts, high)])
+
+    def candidates(self, start: datetime, end: datetime, tolerance: timedelta) -> List[int]:
+        """
+        Posiciones (en orden original) de los archivos que empiezan cerca de
+        start o terminan cerca de end: los únicos que pueden estar dentro de
+        la tolerancia de un rango [start, end].
+        """
+        return sorted(set(self.starting_near(start, tolerance)) | set(self.ending_near(end, tolerance)))
+
+class SortedTimeIndex:
+    """
+    Elementos ordenados por un instante, con borrado, para emparejar sin reutilizar.
+
+    Cada búsqueda es binaria sobre los elementos que quedan; los empates de
+    instante conservan el orden en que se añadieron.
+    """
+
+    def __init__(self, items: List, key):
+        self._key = key
+        self._items = sorted(items, key=key)
+        self._times = [key(item) for item in self._items]
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def nearest_distance(self, instant: datetime) -> Optional[timedelta]:
+        """Distancia al elemento más cercano a instant (None si no queda ninguno)."""
+        position = bisect_left(self._times, instant)
+        distances = [abs(self._times[index] - instant) for index in (position - 1, position)
+                     if 0 <= index < len(self._times)]
+        return min(distances) if distances else None
+
+    def within(self, instant: datetime, distance: timedelta) -> List:
+        """Elementos (en orden de instante) a lo sumo a distance de instant."""
+        return self._items[bisect_left(self._times, instant - distance):bisect_right(self._times, instant + distance)]
+
+    def first_within(self, instant: datetime, distance: timedelta):
+        """Primer elemento (en orden de instante) a lo sumo a distance de instant, o None."""
+        position = bisect_left(self._times, instant - distance)
+        if position < len(self._times) and self._times[position] <= instant + distance:
+            return self._items[position]
+        return None
+
+    def remove(self, item) -> None:
+        """Quita item (por identidad) del índice."""
+        position = bisect_left(self._times, self._key(item))
+        while self._items[position] is not item:
+            position += 1
+        del self._items[position]
+        del self._times[position]
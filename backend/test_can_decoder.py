@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests unitarios del decodificador CAN (data/DECODIFICADOR CAN) con capturas
+sintéticas de benchmark_decodificador.
+
+La decodificación vectorizada se compara con una copia del bucle original
+trama a trama con cantools y el lector por columnas con una copia del
+lector original línea a línea. El modo deduplicado se compara con la
+decodificación completa del mismo archivo.
+"""
+
+import contextlib
+import io
+import os
+import random
+import shutil
+import sys
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+DECODER_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'DECODIFICADOR CAN')
+if DECODER_DIR not in sys.path:
+    sys.path.insert(0, DECODER_DIR)
+
+from can_columnar import load_decoded_can, read_time_range
+
+try:
+    import decodificador_can_unificado as decoder
+    from benchmark_decodificador import generar_log_sintetico
+except ImportError:  # Sin cantools no hay decodificador
+    decoder = None
+
+MEZCLA_J1939 = {'0CF00400': 5, '18FEF100': 1, '18FEE900': 1, '18FEEF00': 1}
+
+
+def original_decode(db, df):
+    """Bucle original de DecodificadorCAN.decodificar_can (sin el corte tras 10 errores consecutivos)."""
+    decoded = []
+    for _, fila in df.iterrows():
+        try:
+            id_can = int(fila['ID'] if fila['ID'].startswith('0x') else '0x' + fila['ID'], 16)
+            id_dbc = decoder.MAPEO_IDS_J1939.get(id_can, id_can)
+            mensaje = db.get_message_by_frame_id(id_dbc)
+            datos = bytes.fromhex(fila['Datos'])
+            if len(datos) != mensaje.length:
+                continue
+            mensaje_decodificado = db.decode_message(id_dbc, datos)
+            ordenado = {
+                'Timestamp': fila['Timestamp'],
+                'length': len(datos),
+                'response': 4,
+                'service': 'Show current data',
+                'ParameterID_Service01': next(iter(mensaje_decodificado.keys()), ''),
+                'Cabecera': fila.get('Cabecera', ''),
+            }
+            for clave, valor in mensaje_decodificado.items():
+                if clave not in ordenado:
+                    ordenado[clave] = valor
+            decoded.append(ordenado)
+        except Exception:
+            continue
+    return pd.DataFrame(decoded)
+
+
+def original_read_mixed(archivo):
+    """DecodificadorCAN.leer_archivo_mixto original, línea a línea."""
+    with open(archivo, 'r', encoding='utf-8') as f:
+        lineas = f.readlines()
+    filas = []
+    cabeceras = []
+    ultima_cabecera = None
+    for linea in lineas:
+        linea = linea.strip()
+        if not linea:
+            continue
+        if linea.startswith('CAN;'):
+            ultima_cabecera = linea
+            cabeceras.append(linea)
+            continue
+        if 'can0' in linea and '[' in linea and ']' in linea:
+            partes = linea.split()
+            if len(partes) >= 6:
+                datos_hex = [parte for parte in partes[5:]
+                             if len(parte) == 2 and all(c in '0123456789ABCDEFabcdef' for c in parte)]
+                if datos_hex:
+                    filas.append({'ID': partes[3], 'Timestamp': f"{partes[0]} {partes[1]}",
+                                  'Datos': ''.join(datos_hex), 'Cabecera': ultima_cabecera or ''})
+        elif ',' in linea:
+            partes = linea.split(',')
+            if len(partes) >= 3:
+                filas.append({'ID': partes[0], 'Timestamp': partes[1], 'Datos': partes[2].strip(),
+                              'Cabecera': ultima_cabecera or ''})
+    df = pd.DataFrame(filas)
+    if 'Cabecera' not in df.columns:
+        df['Cabecera'] = ''
+    return df, cabeceras
+
+
+def irregular_log_lines(rnd, count):
+    """Líneas de un log con cabeceras, huecos, DLC distintos, minúsculas, tabuladores, CSV y basura."""
+    lines = []
+    for index in range(count):
+        timestamp = f"07/07/2025 05:21:{index % 60:02d}PM"
+        length = rnd.choice([8, 8, 8, 4, 3, 1, 0])
+        data = ' '.join(f'{rnd.getrandbits(8):02X}' for _ in range(length))
+        kind = rnd.random()
+        if kind < 0.05:
+            lines.append(f"CAN;{timestamp};DOBACK022;5;{index};")
+        elif kind < 0.1:
+            lines.append('')
+        elif kind < 0.15:
+            lines.append(f"{timestamp}   can0  18FEF100   [8]  {data.lower()}")
+        elif kind < 0.2:
+            lines.append(f"{timestamp}   can0  0CF00400   [8]  FF ZZ 7D 00 00 FF FF 9A")
+        elif kind < 0.25:
+            lines.append(f"18FEF100,{timestamp},{data.replace(' ', '')} ")
+        elif kind < 0.28:
+            lines.append(f"basura sin formato {index}")
+        elif kind < 0.3:
+            lines.append(f"{timestamp} can0 [8]")
+        elif kind < 0.33:
+            lines.append(f"  {timestamp}\tcan0\t7E8\t[8]\t{data}  ")
+        else:
+            can_id = rnd.choice(['0CF00400', '18FEF100', '7E8'])
+            lines.append(f"{timestamp}   can0  {can_id}   [{length}]  {data}")
+    return lines
+
+
+def periodic_log_lines(rnd, seconds):
+    """Una trama por segundo y por ID, con tramos de datos repetidos de longitud variable y una cabecera por minuto."""
+    lines = []
+    current = {}
+    start = datetime(2025, 7, 7, 17, 21, 0)
+    for second in range(seconds):
+        timestamp = (start + timedelta(seconds=second)).strftime('%d/%m/%Y %I:%M:%S%p')
+        if second % 60 == 0:
+            lines.append(f"CAN;{timestamp};DOBACK022;5;{second // 60};")
+        for can_id in MEZCLA_J1939:
+            if can_id not in current or rnd.random() < 0.15:
+                current[can_id] = ' '.join(f'{rnd.getrandbits(8):02X}' for _ in range(8))
+            lines.append(f"{timestamp}   can0  {can_id}   [8]  {current[can_id]}")
+    return lines
+
+
+@unittest.skipIf(decoder is None, 'cantools no está instalado')
+class DecoderTestCase(unittest.TestCase):
+    """Directorio temporal y decodificador sin salida por consola."""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp_dir, ignore_errors=True)
+
+    def synthetic_log(self, name, protocolo='J1939', **options):
+        path = os.path.join(self.tmp_dir, name)
+        generar_log_sintetico(path, protocolo, **options)
+        return path
+
+    @staticmethod
+    def quietly(function, *args, **kwargs):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return function(*args, **kwargs)
+
+
+class TestVectorizedDecode(DecoderTestCase):
+    """decodificar_can frente al bucle original con cantools."""
+
+    def decode_both(self, path):
+        decodificador = decoder.DecodificadorCAN(exportar_csv=False, deduplicar=False)
+        df, _ = self.quietly(decodificador.leer_archivo_mixto, path)
+        self.assertTrue(self.quietly(decodificador.cargar_dbc, decodificador.identificar_protocolo(df)))
+        decoded = self.quietly(decodificador.decodificar_can, df)
+        return decodificador, df, decoded.reset_index(drop=True), original_decode(decodificador.db, df)
+
+    def test_j1939_matches_original_loop(self):
+        """Mismas filas, columnas, valores y tipos en J1939, con IDs fuera del DBC."""
+        path = self.synthetic_log('CAN_J1939.txt', tramas=3000, mezcla=MEZCLA_J1939, desconocidos=0.02)
+        decodificador, df, decoded, expected = self.decode_both(path)
+        self.assertLess(len(decoded), len(df))
+        pd.testing.assert_frame_equal(decoded, expected)
+        # Los fallos no cortan el archivo: todas las tramas no decodificadas quedan contadas
+        self.assertEqual(sum(info['total'] for info in decodificador.errores_por_id.values()), len(df) - len(decoded))
+
+    def test_obd2_matches_original_loop(self):
+        """OBD2 (multiplexado, valores enumerados) decodificado trama a trama da lo mismo."""
+        path = self.synthetic_log('CAN_OBD2.txt', 'OBD2', tramas=3000)
+        _, _, decoded, expected = self.decode_both(path)
+        pd.testing.assert_frame_equal(decoded, expected)
+
+
+class TestColumnReader(DecoderTestCase):
+    """Lector por bloques y columnas (leer_tramas) frente al lector original línea a línea."""
+
+    def assert_matches_original(self, path, bloques=(None,)):
+        expected, expected_headers = original_read_mixed(path)
+        # El lector guarda los bytes, así que los datos hexadecimales salen siempre en mayúsculas
+        expected['Datos'] = expected['Datos'].str.upper()
+        for bytes_bloque in bloques:
+            with self.subTest(bytes_bloque=bytes_bloque):
+                if bytes_bloque is None:
+                    df, headers = self.quietly(decoder.DecodificadorCAN().leer_archivo_mixto, path)
+                else:
+                    tramas = decoder.leer_tramas(path, bytes_bloque=bytes_bloque)
+                    df, headers = tramas.a_dataframe(), tramas.cabeceras
+                pd.testing.assert_frame_equal(df.reset_index(drop=True), expected)
+                self.assertEqual(headers, expected_headers)
+
+    def test_irregular_lines_match_original_reader(self):
+        """Mismas filas y cabeceras con líneas irregulares, CRLF y bloques que cortan líneas."""
+        path = os.path.join(self.tmp_dir, 'CAN_irregular.txt')
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            f.write('\r\n'.join(irregular_log_lines(random.Random(1), 400)) + '\r\n')
+        self.assert_matches_original(path, bloques=(None, 64, 1000))
+
+    def test_synthetic_log_matches_original_reader(self):
+        """Mismas filas y cabeceras en una captura J1939 sintética."""
+        path = self.synthetic_log('CAN_J1939.txt', tramas=3000, mezcla=MEZCLA_J1939, desconocidos=0.02)
+        self.assert_matches_original(path, bloques=(None, 4096))
+
+
+class TestDeduplicatedDecode(DecoderTestCase):
+    """Modo deduplicado (tramos de repeticiones) frente a la decodificación completa."""
+
+    def decode(self, lines, deduplicar):
+        directory = os.path.join(self.tmp_dir, 'dedup' if deduplicar else 'completo')
+        os.makedirs(directory)
+        path = os.path.join(directory, 'CAN_DOBACK022_20250707_0.txt')
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(lines) + '\n')
+        decodificador = decoder.DecodificadorCAN(exportar_csv=True, deduplicar=deduplicar)
+        self.assertTrue(self.quietly(decodificador.decodificar_archivo, path)['ok'])
+        return decoder.ruta_traducida(path, decoder.SUFIJO_COLUMNAR), decoder.ruta_traducida(path, decoder.SUFIJO_CSV)
+
+    @staticmethod
+    def by_time_and_message(npz_path):
+        """
+        Columnas de cada trama con el nombre del mensaje, ordenadas por
+        timestamp, mensaje y valores (varios IDs comparten mensaje en el mismo
+        segundo y los tramos se expanden en otro orden que el archivo).
+        """
+        timestamps, columns, meta = load_decoded_can(npz_path)
+        messages = np.asarray(meta['mensajes'])[columns.pop('mensaje')]
+        order = np.lexsort(tuple(columns[name] for name in sorted(columns, reverse=True)) + (messages, timestamps))
+        return timestamps[order], messages[order], {name: values[order] for name, values in columns.items()}
+
+    def test_periodic_runs_expand_to_full_decode(self):
+        """Mismas tramas, mensajes, señales, CSV y rango temporal que sin deduplicar."""
+        lines = periodic_log_lines(random.Random(3), 600)
+        dedup_npz, dedup_csv = self.decode(lines, deduplicar=True)
+        full_npz, full_csv = self.decode(lines, deduplicar=False)
+
+        _, grouped, meta = load_decoded_can(dedup_npz, expand=False)
+        self.assertTrue(meta['deduplicado'])
+        self.assertLess(len(grouped['repeticiones']), len(lines) // 2)
+
+        timestamps, messages, columns = self.by_time_and_message(dedup_npz)
+        expected_timestamps, expected_messages, expected_columns = self.by_time_and_message(full_npz)
+        np.testing.assert_array_equal(timestamps, expected_timestamps)
+        np.testing.assert_array_equal(messages, expected_messages)
+        self.assertEqual(sorted(columns), sorted(expected_columns))
+        for name, values in expected_columns.items():
+            np.testing.assert_array_equal(columns[name], values, err_msg=name)
+
+        self.assertEqual(read_time_range(dedup_npz), read_time_range(full_npz))
+        with open(dedup_csv, encoding='utf-8') as dedup, open(full_csv, encoding='utf-8') as full:
+            # La primera línea es la fecha de decodificación
+            self.assertEqual(dedup.readlines()[1:], full.readlines()[1:])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests unitarios de gps_offset: la detección vectorizada del desfase se
+compara con la regla original de bucles anidados.
+"""
+
+import random
+import unittest
+from datetime import datetime, timedelta
+
+from gps_offset import detect_clock_offset, to_epoch_seconds
+
+BASE_DATE = datetime(2025, 7, 7)
+
+
+def nested_needs_correction(gps_starts, other_starts, expected_hours=2, tolerance_minutes=1, max_nearby_hours=3):
+    """Regla original por archivo GPS: comparar su inicio con el de cada otro archivo."""
+    result = []
+    for gps_start in gps_starts:
+        nearby = [other for other in other_starts
+                  if abs((gps_start - other).total_seconds() / 3600) <= max_nearby_hours]
+        if not nearby:
+            result.append(False)
+            continue
+        matches = sum(1 for other in nearby
+                      if abs((other - gps_start).total_seconds() / 3600 - expected_hours) <= tolerance_minutes / 60)
+        result.append(matches >= 2 and matches / len(nearby) >= 0.5)
+    return result
+
+
+class TestClockOffset(unittest.TestCase):
+    """Tests de gps_offset frente a la regla original con bucles anidados."""
+
+    def test_needs_correction_matches_nested_loops(self):
+        """Los GPS marcados para corrección coinciden con la comparación par a par."""
+        rnd = random.Random(3)
+        for _ in range(150):
+            gps_starts = [BASE_DATE + timedelta(seconds=rnd.randint(0, 86400 * 3))
+                          for _ in range(rnd.randint(0, 25))]
+            other_starts = []
+            for gps_start in gps_starts:
+                if rnd.random() < 0.6:
+                    other_starts += [gps_start + timedelta(hours=2, seconds=rnd.randint(-70, 70)) for _ in range(3)]
+            other_starts += [BASE_DATE + timedelta(seconds=rnd.randint(0, 86400 * 3))
+                             for _ in range(rnd.randint(0, 20))]
+            detection = detect_clock_offset(to_epoch_seconds(gps_starts), to_epoch_seconds(other_starts), 2, 1, 3)
+            self.assertEqual(detection.needs_correction.tolist(), nested_needs_correction(gps_starts, other_starts))
+            self.assertTrue(0 <= detection.confidence <= 1)
+
+    def test_mode_is_expected_offset(self):
+        """Con todos los archivos a +2 h, la moda es el desfase esperado."""
+        gps_starts = [BASE_DATE + timedelta(minutes=40 * index) for index in range(20)]
+        other_starts = [gps_start + timedelta(hours=2) for gps_start in gps_starts]
+        detection = detect_clock_offset(to_epoch_seconds(gps_starts), to_epoch_seconds(other_starts), 2, 1, 3)
+        self.assertTrue(detection.matches_expected)
+        self.assertAlmostEqual(detection.offset_hours, 2.0)
+
+    def test_no_nearby_files(self):
+        """Sin archivos cercanos no hay moda ni correcciones."""
+        detection = detect_clock_offset(to_epoch_seconds([BASE_DATE]), to_epoch_seconds([]), 2, 1, 3)
+        self.assertIsNone(detection.offset_hours)
+        self.assertEqual(detection.confidence, 0.0)
+        self.assertFalse(detection.needs_correction.any())
+
+
+if __name__ == '__main__':
+    unittest.main()
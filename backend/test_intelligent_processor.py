@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests unitarios de intelligent_processor.group_files_into_sessions frente a
+una copia del bucle anidado de cuatro niveles al que sustituye.
+"""
+
+import logging
+import random
+import unittest
+from datetime import datetime, timedelta
+
+from intelligent_processor import group_files_into_sessions
+
+
+def nested_group_files_into_sessions(valid_files, time_window_minutes=120):
+    """Bucle anidado original de intelligent_processor.group_files_into_sessions (sin logs)."""
+    sessions = []
+    vehicle_date_groups = {}
+    for file_info in valid_files:
+        metadata = file_info['metadata']
+        if not metadata.get('date'):
+            continue
+        key = f"{metadata['vehicle']}_{metadata['date'].strftime('%Y-%m-%d')}"
+        vehicle_date_groups.setdefault(key, []).append(file_info)
+
+    for files in vehicle_date_groups.values():
+        files_by_type = {'CAN': [], 'GPS': [], 'ESTABILIDAD': [], 'ROTATIVO': []}
+        for file_info in files:
+            if file_info['metadata']['type'] in files_by_type:
+                files_by_type[file_info['metadata']['type']].append(file_info)
+        if any(len(archivos) == 0 for archivos in files_by_type.values()):
+            continue
+
+        time_window = timedelta(minutes=time_window_minutes)
+        used_files = set()
+        can_files, gps_files, estabilidad_files, rotativo_files = (
+            sorted(files_by_type[tipo], key=lambda x: x['metadata']['date'])
+            for tipo in ('CAN', 'GPS', 'ESTABILIDAD', 'ROTATIVO')
+        )
+        for can_file in can_files:
+            can_time = can_file['metadata']['date']
+            if str(can_file['path']) in used_files:
+                continue
+            best_session = None
+            best_score = -1
+            for gps_file in gps_files:
+                if str(gps_file['path']) in used_files:
+                    continue
+                for estabilidad_file in estabilidad_files:
+                    if str(estabilidad_file['path']) in used_files:
+                        continue
+                    for rotativo_file in rotativo_files:
+                        if str(rotativo_file['path']) in used_files:
+                            continue
+                        gps_time = gps_file['metadata']['date']
+                        estabilidad_time = estabilidad_file['metadata']['date']
+                        rotativo_time = rotativo_file['metadata']['date']
+                        max_time_diff = max(
+                            abs((gps_time - can_time).total_seconds()),
+                            abs((estabilidad_time - can_time).total_seconds()),
+                            abs((rotativo_time - can_time).total_seconds())
+                        )
+                        if max_time_diff <= time_window.total_seconds():
+                            time_score = 1.0 / (1.0 + max_time_diff / 60.0)
+                            if time_score > best_score:
+                                best_score = time_score
+                                best_session = {
+                                    'files': {'CAN': can_file, 'GPS': gps_file,
+                                              'ESTABILIDAD': estabilidad_file, 'ROTATIVO': rotativo_file},
+                                    'score': time_score
+                                }
+            if best_session:
+                for file_info in best_session['files'].values():
+                    used_files.add(str(file_info['path']))
+                sessions.append(best_session)
+    return sessions
+
+
+class TestGroupFilesIntoSessions(unittest.TestCase):
+    """Tests de la agrupación en sesiones por vehículo y día."""
+
+    def setUp(self):
+        self.rnd = random.Random(7)
+        logging.disable(logging.CRITICAL)
+
+    def tearDown(self):
+        logging.disable(logging.NOTSET)
+
+    def _random_valid_files(self, count):
+        files = []
+        for vehicle in ('DOBACK022', 'DOBACK023'):
+            for file_type in ('CAN', 'GPS', 'ESTABILIDAD', 'ROTATIVO'):
+                for index in range(self.rnd.randrange(0, count)):
+                    date = datetime(2025, 7, self.rnd.choice([7, 8]), self.rnd.randrange(0, 24),
+                                    self.rnd.choice([0, 10, 20, 30]))
+                    files.append({'path': f'/x/{vehicle}/{file_type}_{index}_{date:%d%H%M}.txt',
+                                  'metadata': {'vehicle': vehicle, 'type': file_type, 'date': date}})
+        self.rnd.shuffle(files)
+        return files
+
+    @staticmethod
+    def _signature(sessions):
+        return [tuple(session['files'][file_type]['path'] for file_type in ('CAN', 'GPS', 'ESTABILIDAD', 'ROTATIVO'))
+                + (session['score'],) for session in sessions]
+
+    def test_group_files_into_sessions_matches_nested_loops(self):
+        """Las sesiones y sus puntuaciones coinciden con el bucle anidado de cuatro niveles."""
+        for _ in range(100):
+            valid_files = self._random_valid_files(self.rnd.choice([3, 6, 10]))
+            window = self.rnd.choice([30, 120, 600])
+            self.assertEqual(self._signature(group_files_into_sessions(valid_files, window)),
+                             self._signature(nested_group_files_into_sessions(valid_files, window)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests unitarios de la caché de parseo: lo que se sirve desde la caché es lo
+mismo que devuelve el parser, y la clave incluye la versión de cada parser.
+
+test_parser_output_matches_recorded_version guarda una huella de la salida
+de cada parser con los archivos de ejemplo. Si cambia la salida de un parser,
+falla hasta que se suba su versión en PARSER_VERSIONS y se registre la nueva
+huella: así la caché no sirve entradas generadas por el parser anterior.
+"""
+
+import hashlib
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+
+import complete_processor as cp
+from measurement_columns import MeasurementColumns
+from parsed_cache import ParsedFileCache
+
+GPS_TEXT = (
+    "GPS;20250708 07:17:00;DOBACK022;3;0\n"
+    "Fecha,Hora,Latitud,Longitud,Altitud,HDOP,Fix,NumSats,Velocidad(km/h)\n"
+    "08/07/2025,07:17:00,sin datos GPS\n"
+    + "".join(f"08/07/2025,07:17:{second:02d},40.52066{second:02d},-3.88390{second:02d},774.9,1.19,1,06,0.{second}\n"
+              for second in range(1, 30))
+    + "08/07/2025,07:17:30,40.5206642,no-es-un-número,774.9,1.19,1,06,0.81\n"
+)
+
+STABILITY_ROW = ("-22.81;  -0.61; 1020.04;  38.24; -34.91;  -3.76;   2.65;  26.03;   0.00; 44882.00; 28719.00; "
+                 "11240.00; 20002.00; 19998.00; 19999.00;   0.95; 1020.30;   0.00;   0.99;\n")
+STABILITY_TEXT = (
+    "ESTABILIDAD;07/07/2025 02:23:20PM;DOBACK022;51;0;\n"
+    "ax; ay; az; gx; gy; gz; roll; pitch; yaw; timeantwifi; usciclo1; usciclo2; usciclo3;usciclo4; usciclo5; "
+    "si; accmag; microsds; k3\n"
+    + STABILITY_ROW * 10 + "02:23:55PM\n" + STABILITY_ROW * 10 + "02:23:56PM\n" + STABILITY_ROW * 10
+)
+
+ROTATIVO_TEXT = (
+    "ROTATIVO;2025-07-07;DOBACK022;0;0\n"
+    "Fecha-Hora;Estado\n"
+    + "".join(f"2025-07-07 14:{minute:02d}:04;{minute % 2}\n" for minute in range(24, 50))
+    + "2025-07-07 14:50:04;1.2.3\n"
+)
+
+CAN_TEXT = (
+    "# Fecha de decodificación: 2025-07-08 10:00:00\n"
+    "# Protocolo: J1939\n"
+    "\n"
+    "CAN;07/07/2025 05:21:42PM;DOBACK022;5;0;\n"
+    "Timestamp,length,response,service,ParameterID_Service01,Parameter_Group_Number,Reserved,Request_Count,"
+    "Reserved2,Engine_Speed,Engine_Torque,Engine_Temperature,Fuel_Consumption\n"
+    + "".join(f"07/07/2025 05:21:{second:02d}PM,8,4,Show current data,Engine_Speed,,255,,,"
+              f"{800 + 25 * second}.875,-125.0,{60 + second}.0,12.75\n"
+              f"07/07/2025 05:21:{second:02d}PM,8,4,Show current data,Parameter_Group_Number,"
+              f"32255.0,125,0.0,2600468224.0,,,,\n"
+              for second in range(42, 60))
+)
+
+# Archivo de ejemplo, función de lectura del procesador, parser y tipos de columna de cada tipo
+FIXTURES = {
+    'GPS': ('GPS_DOBACK022_20250708_0.txt', GPS_TEXT, '_load_gps_data', '_parse_gps_chunks', cp.GPS_DTYPES),
+    'ESTABILIDAD': ('ESTABILIDAD_DOBACK022_20250707_0.txt', STABILITY_TEXT,
+                    '_load_stability_data', '_parse_stability_chunks', cp.STABILITY_DTYPES),
+    'CAN': ('CAN_DOBACK022_20250707_0_TRADUCIDO.csv', CAN_TEXT,
+            '_load_can_data', '_parse_can_chunks', cp.CAN_DTYPES),
+    'ROTATIVO': ('ROTATIVO_DOBACK022_20250707_0.txt', ROTATIVO_TEXT,
+                 '_load_rotativo_data', '_parse_rotativo_chunks', cp.ROTATIVO_DTYPES),
+}
+
+# Huella de la salida de cada parser con su archivo de ejemplo, por (tipo, versión del parser)
+PARSER_OUTPUT_DIGESTS = {
+    ('GPS', 1): 'c484d0fb4f63e1ffecbb878482a99995',
+    ('ESTABILIDAD', 1): '9f90b505f1aa8db72b4f38674894e287',
+    ('CAN', 1): 'c67e82e63b8954bc4778fad3865736b8',
+    ('ROTATIVO', 1): 'ff916db327afa0d3df29a7069ed50662',
+    ('GPS', 2): 'c484d0fb4f63e1ffecbb878482a99995',
+    ('ESTABILIDAD', 2): '9f90b505f1aa8db72b4f38674894e287',
+    ('CAN', 2): 'c67e82e63b8954bc4778fad3865736b8',
+    ('ROTATIVO', 2): 'ff916db327afa0d3df29a7069ed50662',
+}
+
+
+def output_digest(measurements: MeasurementColumns) -> str:
+    """Huella de timestamps, columnas (por nombre) y constantes de unas mediciones."""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(np.ascontiguousarray(measurements.timestamps, dtype=np.int64).tobytes())
+    for name in sorted(measurements.columns):
+        values = np.asarray(measurements.columns[name])
+        digest.update(name.encode('utf-8'))
+        if values.dtype == object:
+            digest.update('\x00'.join(str(value) for value in values.tolist()).encode('utf-8'))
+        else:
+            digest.update(values.dtype.str.encode('ascii'))
+            digest.update(np.ascontiguousarray(values).tobytes())
+    digest.update(repr(sorted((measurements.constants or {}).items())).encode('utf-8'))
+    return digest.hexdigest()
+
+
+class TestParsedCache(unittest.TestCase):
+    """Caché de parseo de DobackProcessor con archivos de ejemplo en un directorio temporal."""
+
+    def setUp(self):
+        self.data_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.data_dir, ignore_errors=True)
+        for name, value in (('DATA_DIR', self.data_dir),
+                            ('MANIFEST_PATH', os.path.join(self.data_dir, 'file_manifest.json')),
+                            ('PARSED_CACHE_DIR', os.path.join(self.data_dir, 'parsed_cache')),
+                            ('PARSED_CACHE_ENABLED', True)):
+            patcher = mock.patch.object(cp, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.processor = cp.DobackProcessor()
+        self.paths = {}
+        for file_type, (filename, text, *_) in FIXTURES.items():
+            self.paths[file_type] = os.path.join(self.data_dir, filename)
+            with open(self.paths[file_type], 'w', encoding='utf-8') as f:
+                f.write(text)
+
+    def load(self, file_type: str) -> MeasurementColumns:
+        return getattr(self.processor, FIXTURES[file_type][2])(self.paths[file_type])
+
+    def parse(self, file_type: str) -> MeasurementColumns:
+        chunks = list(getattr(self.processor, FIXTURES[file_type][3])(self.paths[file_type]))
+        return MeasurementColumns.concat(chunks, FIXTURES[file_type][4], chunks[0].constants if chunks else None)
+
+    def cache_entries(self):
+        return sorted(os.listdir(cp.PARSED_CACHE_DIR)) if os.path.isdir(cp.PARSED_CACHE_DIR) else []
+
+    def test_cached_read_matches_parse(self):
+        """La primera lectura guarda la entrada y la segunda la sirve sin cambios respecto al parser."""
+        for file_type in FIXTURES:
+            with self.subTest(file_type=file_type):
+                parsed = self.parse(file_type)
+                self.assertGreater(len(parsed), 0)
+                first = self.load(file_type)
+                entries = self.cache_entries()
+                with mock.patch.object(self.processor, FIXTURES[file_type][3],
+                                       side_effect=AssertionError('se volvió a parsear')):
+                    second = self.load(file_type)
+                self.assertEqual(self.cache_entries(), entries)
+                for measurements in (first, second):
+                    self.assertEqual(output_digest(measurements), output_digest(parsed))
+
+    def test_parser_version_is_part_of_key(self):
+        """Subir la versión de un parser invalida sus entradas y las del resto siguen sirviéndose."""
+        for file_type in FIXTURES:
+            self.load(file_type)
+        self.assertEqual(len(self.cache_entries()), len(FIXTURES))
+        content_hash = self.processor.manifest.content_hash(self.paths['GPS'])
+        self.assertIsNotNone(self.processor.parsed_cache.load(cp.parsed_cache_type('GPS'), content_hash))
+
+        with mock.patch.dict(cp.PARSER_VERSIONS, {'GPS': cp.PARSER_VERSIONS['GPS'] + 1}):
+            self.assertIsNone(self.processor.parsed_cache.load(cp.parsed_cache_type('GPS'), content_hash))
+            removed = ParsedFileCache(cp.PARSED_CACHE_DIR).prune(
+                [self.processor.manifest.content_hash(path) for path in self.paths.values()],
+                self.processor._parsed_cache_types())
+            self.assertEqual(removed, 1)
+            self.load('GPS')
+            self.assertTrue(any(name.startswith(cp.parsed_cache_type('GPS') + '_') for name in self.cache_entries()))
+        self.assertEqual(len(self.cache_entries()), len(FIXTURES))
+
+    def test_parser_output_matches_recorded_version(self):
+        """Un cambio en la salida de un parser exige subir su versión en PARSER_VERSIONS."""
+        for file_type in FIXTURES:
+            with self.subTest(file_type=file_type):
+                key = (file_type, cp.PARSER_VERSIONS[file_type])
+                self.assertIn(key, PARSER_OUTPUT_DIGESTS,
+                              f"Registra en PARSER_OUTPUT_DIGESTS la huella de {file_type} v{key[1]}")
+                self.assertEqual(
+                    output_digest(self.parse(file_type)), PARSER_OUTPUT_DIGESTS[key],
+                    f"La salida del parser {file_type} cambió: sube PARSER_VERSIONS['{file_type}'] "
+                    f"y registra la nueva huella")
+
+
+if __name__ == '__main__':
+    unittest.main()
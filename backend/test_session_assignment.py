@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests unitarios de session_assignment: la asignación de coste mínimo se
+compara con la búsqueda exhaustiva sobre matrices pequeñas.
+"""
+
+import itertools
+import unittest
+
+import numpy as np
+
+from session_assignment import UNASSIGNED_COST, assign_pairs, min_cost_assignment
+
+
+def brute_force_cost(cost):
+    """Coste mínimo probando todas las asignaciones de min(filas, columnas) pares."""
+    n_rows, n_columns = cost.shape
+    if n_rows <= n_columns:
+        return min(sum(cost[row, columns[row]] for row in range(n_rows))
+                   for columns in itertools.permutations(range(n_columns), n_rows))
+    return min(sum(cost[rows[column], column] for column in range(n_columns))
+               for rows in itertools.permutations(range(n_rows), n_columns))
+
+
+class TestMinCostAssignment(unittest.TestCase):
+    """Tests de session_assignment."""
+
+    def test_matches_brute_force_on_small_matrices(self):
+        """El húngaro da el mismo coste que probar todas las permutaciones."""
+        rng = np.random.default_rng(0)
+        for _ in range(200):
+            n_rows, n_columns = (int(value) for value in rng.integers(1, 6, size=2))
+            cost = rng.integers(0, 20, size=(n_rows, n_columns)).astype(float)
+            rows, columns = min_cost_assignment(cost)
+            self.assertEqual(len(rows), min(n_rows, n_columns))
+            self.assertEqual(len(set(rows.tolist())), len(rows))
+            self.assertEqual(len(set(columns.tolist())), len(columns))
+            self.assertAlmostEqual(float(cost[rows, columns].sum()), float(brute_force_cost(cost)))
+
+    def test_assign_pairs_matches_brute_force(self):
+        """assign_pairs por componentes da el coste mínimo de la matriz completa."""
+        rng = np.random.default_rng(1)
+        for _ in range(100):
+            n_rows, n_columns = (int(value) for value in rng.integers(1, 6, size=2))
+            cost = rng.integers(0, 20, size=(n_rows, n_columns)).astype(float)
+            pairs = [(row, column, float(cost[row, column]))
+                     for row in range(n_rows) for column in range(n_columns)]
+            assignment = assign_pairs(n_rows, n_columns, pairs)
+            self.assertEqual(len(assignment), min(n_rows, n_columns))
+            self.assertEqual(len(set(assignment.values())), len(assignment))
+            self.assertAlmostEqual(sum(cost[row, column] for row, column in assignment.items()),
+                                   float(brute_force_cost(cost)))
+
+    def test_rows_without_admissible_columns_stay_unassigned(self):
+        """Una fila cuyas columnas admisibles van mejor a otras filas queda sin asignar."""
+        self.assertEqual(assign_pairs(3, 2, [(0, 0, 5.0), (1, 0, 1.0), (2, 1, 1.0)]), {1: 0, 2: 1})
+        self.assertEqual(assign_pairs(2, 2, []), {})
+        self.assertEqual(assign_pairs(2, 3, [(1, 2, 3.0)]), {1: 2})
+
+    def test_unassigned_cost_is_never_chosen_over_a_real_pair(self):
+        """Con una sola columna admisible para dos filas, gana la más barata y la otra queda libre."""
+        cost = np.array([[UNASSIGNED_COST, 4.0], [UNASSIGNED_COST, 2.0]])
+        rows, columns = min_cost_assignment(cost)
+        assigned = {row: column for row, column in zip(rows.tolist(), columns.tolist())
+                    if cost[row, column] < UNASSIGNED_COST}
+        self.assertEqual(assigned, {1: 1})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests unitarios del emparejamiento de sesiones: la búsqueda con índice
+temporal se compara con una copia del recorrido lineal al que sustituye y
+los candidatos del índice con un filtrado exhaustivo.
+
+Las estrategias strict y pairs se comparan con StrictTemporalMatcher y
+ParejasMatcher, que siguen en el árbol; multi_reference con una copia del
+criterio original de MultiReferenceProcessor.
+"""
+
+import logging
+import random
+import unittest
+from datetime import datetime, timedelta
+
+from parejas_processor import ParejasMatcher
+from session_matching import (
+    SESSION_TYPES, MatchGroup, MultiReferenceStrategy, PairsStrategy, StrictStrategy,
+    find_compatible_files, session_signature, temporal_proximity
+)
+from strict_temporal_processor import StrictTemporalMatcher
+from temporal_index import TemporalFileIndex
+
+BASE_DATE = datetime(2025, 7, 7)
+
+
+def linear_find_compatible_files(base_file, files_by_type, tolerance_seconds):
+    """Recorrido lineal original de DobackProcessor._find_compatible_files_for_base."""
+    base_type = base_file.get('type', 'CAN')
+    session_files = {'CAN': None, 'GPS': None, 'ESTABILIDAD': None, 'ROTATIVO': None}
+    session_files[base_type] = base_file
+    base_start = base_file.get('start_time')
+    base_end = base_file.get('end_time')
+    if not base_start or not base_end:
+        return session_files
+    for file_type in ['CAN', 'GPS', 'ESTABILIDAD', 'ROTATIVO']:
+        if file_type == base_type:
+            continue
+        best_file = None
+        best_score = float('inf')
+        for file_info in files_by_type.get(file_type, []):
+            file_start = file_info.get('start_time')
+            file_end = file_info.get('end_time')
+            if not file_start or not file_end:
+                continue
+            score = temporal_proximity(base_start, base_end, file_start, file_end, tolerance_seconds)
+            if score is not None and score < best_score:
+                best_score = score
+                best_file = file_info
+        if best_file:
+            session_files[file_type] = best_file
+    return session_files
+
+
+def original_multi_reference_sessions(files_by_type, reference_type, max_early_minutes=10):
+    """Criterio original de MultiReferenceProcessor._find_matching_session_multi_ref por archivo de referencia."""
+    sessions = []
+    for ref_file in files_by_type[reference_type]:
+        ref_start, ref_end = ref_file['start_time'], ref_file['end_time']
+        session_files = {reference_type: ref_file}
+        for file_type in SESSION_TYPES:
+            if file_type == reference_type:
+                continue
+            best_match = None
+            max_overlap = 0
+            for file_info in files_by_type[file_type]:
+                f_start, f_end = file_info['start_time'], file_info['end_time']
+                if (ref_start - f_start).total_seconds() / 60.0 > max_early_minutes:
+                    continue
+                overlap = (min(ref_end, f_end) - max(ref_start, f_start)).total_seconds()
+                if overlap > 0 and overlap > max_overlap:
+                    max_overlap = overlap
+                    best_match = file_info
+            if best_match is None:
+                break
+            session_files[file_type] = best_match
+        else:
+            session_start = max(f['start_time'] for f in session_files.values())
+            session_end = min(f['end_time'] for f in session_files.values())
+            if session_start < session_end:
+                sessions.append({'files': session_files, 'start_time': session_start, 'end_time': session_end})
+    return sessions
+
+
+def original_unique_sessions(all_sessions):
+    """MultiReferenceProcessor._find_unique_sessions original."""
+    unique_sessions = []
+    for ref_type, sessions in all_sessions.items():
+        for session in sessions:
+            for existing in unique_sessions:
+                overlap = (min(session['end_time'], existing['end_time'])
+                           - max(session['start_time'], existing['start_time'])).total_seconds()
+                if overlap > 300:
+                    existing['detected_by'].append(ref_type)
+                    break
+            else:
+                unique_sessions.append(dict(session, detected_by=[ref_type]))
+    return unique_sessions
+
+
+class TestTemporalMatching(unittest.TestCase):
+    """Tests del emparejamiento con índice temporal frente a los recorridos originales."""
+
+    def setUp(self):
+        self.rnd = random.Random(7)
+        logging.disable(logging.CRITICAL)
+
+    def tearDown(self):
+        logging.disable(logging.NOTSET)
+
+    def _random_files(self, file_type, count):
+        files = []
+        for index in range(count):
+            start = BASE_DATE + timedelta(minutes=self.rnd.randrange(0, 24 * 60))
+            files.append({'type': file_type, 'path': f'{file_type}_{index}.txt', 'start_time': start,
+                          'end_time': start + timedelta(minutes=self.rnd.randrange(1, 90))})
+        if files and self.rnd.random() < 0.3:
+            files[0]['start_time'] = None
+        return files
+
+    def test_find_compatible_files_matches_linear_scan(self):
+        """El índice elige el mismo archivo por tipo (y el mismo desempate) que el recorrido lineal."""
+        tolerance = timedelta(minutes=15)
+        for _ in range(150):
+            files_by_type = {file_type: self._random_files(file_type, self.rnd.randrange(0, 25))
+                             for file_type in SESSION_TYPES}
+            for base_type in ('CAN', 'ESTABILIDAD', 'GPS'):
+                for base_file in files_by_type[base_type]:
+                    self.assertEqual(find_compatible_files(base_file, files_by_type, tolerance),
+                                     linear_find_compatible_files(base_file, files_by_type,
+                                                                  tolerance.total_seconds()))
+
+
+
+class TestTemporalFileIndex(unittest.TestCase):
+    """Tests de temporal_index.TemporalFileIndex."""
+
+    def test_candidates_match_exhaustive_filter(self):
+        """Los candidatos son los archivos que empiezan o terminan dentro de la tolerancia, en orden original."""
+        rnd = random.Random(11)
+        for _ in range(200):
+            files = []
+            for index in range(rnd.randrange(0, 30)):
+                start = BASE_DATE + timedelta(minutes=rnd.randrange(0, 600))
+                end = start + timedelta(minutes=rnd.randrange(0, 120))
+                files.append({'path': f'{index}.txt', 'start_time': start if rnd.random() > 0.1 else None,
+                              'end_time': end})
+            index = TemporalFileIndex(files)
+            start = BASE_DATE + timedelta(minutes=rnd.randrange(0, 600))
+            end = start + timedelta(minutes=rnd.randrange(0, 120))
+            tolerance = timedelta(minutes=rnd.choice([0, 5, 15]))
+            expected = [position for position, file_info in enumerate(files)
+                        if file_info['start_time'] and file_info['end_time']
+                        and (abs(file_info['start_time'] - start) <= tolerance
+                             or abs(file_info['end_time'] - end) <= tolerance)]
+            self.assertEqual(index.candidates(start, end, tolerance), expected)
+
+    def test_tolerance_bounds_are_inclusive(self):
+        """Un archivo justo a la distancia de tolerancia es candidato, como en temporal_proximity."""
+        tolerance = timedelta(minutes=15)
+        files = [{'start_time': BASE_DATE - tolerance, 'end_time': BASE_DATE + timedelta(hours=1)},
+                 {'start_time': BASE_DATE + tolerance, 'end_time': BASE_DATE + timedelta(hours=3)},
+                 {'start_time': BASE_DATE + tolerance + timedelta(seconds=1),
+                  'end_time': BASE_DATE + timedelta(hours=3)}]
+        index = TemporalFileIndex(files)
+        self.assertEqual(index.candidates(BASE_DATE, BASE_DATE + timedelta(hours=2), tolerance), [0, 1])
+        self.assertEqual(index.starting_between(BASE_DATE, BASE_DATE + tolerance), [])
+        self.assertEqual(index.starting_between(BASE_DATE - tolerance, BASE_DATE + tolerance), [0])
+
+
+
+class TestMatchingStrategies(unittest.TestCase):
+    """Estrategias de session_matching frente a los emparejadores a los que sustituyen."""
+
+    def setUp(self):
+        self.rnd = random.Random(5)
+        logging.disable(logging.CRITICAL)
+
+    def tearDown(self):
+        logging.disable(logging.NOTSET)
+
+    def _random_day(self, date_only_rotativos=True):
+        """Archivos de un vehículo y un día, con los campos de FileIndex y de los emparejadores originales."""
+        files_by_type = {}
+        for file_type in SESSION_TYPES:
+            files_by_type[file_type] = []
+            for index in range(self.rnd.randrange(1, 7)):
+                start = BASE_DATE + timedelta(hours=self.rnd.choice([8, 9, 10]),
+                                              minutes=self.rnd.randrange(0, 8), seconds=self.rnd.choice([0, 30]))
+                if file_type == 'ROTATIVO' and date_only_rotativos and self.rnd.random() < 0.15:
+                    start = BASE_DATE
+                path = f'/x/DOBACK022/{file_type}/{file_type}_DOBACK022_20250707_{index}.txt'
+                files_by_type[file_type].append({
+                    'path': path, 'filename': path.rsplit('/', 1)[-1], 'vehicle': 'DOBACK022', 'type': file_type,
+                    'date': start.date(), 'start_time': start, 'real_datetime': start,
+                    'end_time': start + timedelta(minutes=self.rnd.randrange(1, 90)),
+                })
+        files_by_type['CAN'].sort(key=lambda file_info: file_info['start_time'])
+        return files_by_type
+
+    @staticmethod
+    def _group(files_by_type):
+        return MatchGroup('DOBACK022', '2025-07-07', files_by_type)
+
+    def test_strict_matches_strict_temporal_matcher(self):
+        """Mismas sesiones, archivos y diferencias que el triple bucle de StrictTemporalMatcher."""
+        for _ in range(500):
+            files_by_type = self._random_day()
+            original = StrictTemporalMatcher()._find_strict_sessions_for_vehicle('DOBACK022', files_by_type)
+            sessions = StrictStrategy().match(self._group(files_by_type))
+            self.assertEqual([session_signature(session) for session in sessions],
+                             [session_signature(session) for session in original])
+            for session, original_session in zip(sessions, original):
+                self.assertAlmostEqual(max(session['time_diffs'].values()), original_session['max_time_diff'])
+
+    def test_pairs_matches_parejas_matcher(self):
+        """Mismas sesiones y puntuaciones que ParejasMatcher con asignación uno a uno."""
+        for _ in range(300):
+            files_by_type = self._random_day()
+            original = ParejasMatcher(one_to_one=True)._find_all_sessions_for_vehicle('DOBACK022', files_by_type)
+            sessions = PairsStrategy().match(self._group(files_by_type))
+            self.assertEqual([session_signature(session) for session in sessions],
+                             [session_signature(session) for session in original])
+            for session, original_session in zip(sessions, original):
+                self.assertAlmostEqual(session['score'], original_session['score'])
+
+    def test_multi_reference_matches_original(self):
+        """Mismas sesiones por referencia y mismas sesiones únicas que MultiReferenceProcessor."""
+        strategy = MultiReferenceStrategy()
+        for _ in range(300):
+            files_by_type = self._random_day(date_only_rotativos=False)
+            group = self._group(files_by_type)
+            original = {reference_type: original_multi_reference_sessions(files_by_type, reference_type)
+                        for reference_type in SESSION_TYPES}
+            for reference_type in SESSION_TYPES:
+                sessions = strategy.match_reference(group, reference_type)
+                self.assertEqual([(session_signature(s), s['start_time'], s['end_time']) for s in sessions],
+                                 [(session_signature(s), s['start_time'], s['end_time'])
+                                  for s in original[reference_type]])
+            self.assertEqual([(session_signature(s), s['detected_by']) for s in strategy.match(group)],
+                             [(session_signature(s), s['detected_by']) for s in original_unique_sessions(original)])
+
+
+if __name__ == '__main__':
+    unittest.main()
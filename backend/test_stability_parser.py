@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests unitarios de stability_parser: el parser vectorizado se compara con
+una copia del bucle original línea a línea de
+DobackProcessor._load_stability_data.
+"""
+
+import os
+import random
+import re
+import shutil
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from stability_parser import STABILITY_COLUMNS, iter_stability_chunks, parse_stability_file
+
+HEADER = "ESTABILIDAD;07/07/2025 02:23:20PM;DOBACK022;51;0;"
+COLUMNS_HEADER = ("ax; ay; az; gx; gy; gz; roll; pitch; yaw; timeantwifi; usciclo1; usciclo2; usciclo3;usciclo4; "
+                  "usciclo5; si; accmag; microsds; k3")
+
+
+def original_load_stability(file_path):
+    """Bucle original de _load_stability_data (sin logs): (puntos, líneas procesadas, descartes por motivo)."""
+    with open(file_path, 'r', encoding='utf-8') as file:
+        lines = file.readlines()
+    current_timestamp = datetime.strptime(lines[0].strip().split(';')[1].strip(), '%d/%m/%Y %I:%M:%S%p')
+    data = []
+    sample_count = 0
+    lines_processed = 0
+    discarded = {}
+
+    def discard(reason):
+        discarded[reason] = discarded.get(reason, 0) + 1
+
+    for line in lines[2:]:
+        line = line.strip()
+        if not line:
+            continue
+        lines_processed += 1
+        if re.match(r'^\d{1,2}:\d{2}:\d{2}(AM|PM)$', line):
+            try:
+                time_part = datetime.strptime(line, '%I:%M:%S%p').time()
+                current_timestamp = current_timestamp.replace(
+                    hour=time_part.hour, minute=time_part.minute, second=time_part.second)
+            except ValueError:
+                pass
+            continue
+        parts = line.split(';')
+        if len(parts) < 19:
+            discard('campos insuficientes')
+            continue
+        try:
+            ax, ay, az = float(parts[0]), float(parts[1]), float(parts[2])
+            gx, gy, gz = float(parts[3]), float(parts[4]), float(parts[5])
+            roll, pitch, yaw = float(parts[6]), float(parts[7]), float(parts[8])
+            si = float(parts[15])
+        except (ValueError, IndexError):
+            discard('error parseando valores')
+            continue
+        if not all(-500 <= val <= 500 for val in [ax, ay]):
+            discard('ax/ay fuera de rango')
+            continue
+        if not (900 <= az <= 1100):
+            discard('az fuera de rango')
+            continue
+        if not all(-2000 <= val <= 2000 for val in [gx, gy, gz]):
+            discard('gx/gy/gz fuera de rango')
+            continue
+        if not all(-180 <= val <= 180 for val in [roll, pitch, yaw]):
+            discard('roll/pitch/yaw fuera de rango')
+            continue
+        if not (0 <= si <= 1):
+            discard('si fuera de rango')
+            continue
+        point = {'timestamp': current_timestamp + timedelta(milliseconds=sample_count * 100)}
+        point.update({name: float(parts[index]) for index, name in enumerate(STABILITY_COLUMNS)})
+        data.append(point)
+        sample_count += 1
+    return data, lines_processed, discarded
+
+
+def random_stability_lines(rnd, count):
+    """Muestras dentro y fuera de rango, campos no numéricos o de menos, columnas extra, marcas de hora y basura."""
+    lines = [HEADER, COLUMNS_HEADER]
+    for _ in range(count):
+        kind = rnd.random()
+        if kind < 0.01:
+            lines.append(f"{rnd.randint(1, 12):02d}:{rnd.randrange(60):02d}:{rnd.randrange(60):02d}"
+                         f"{rnd.choice(['AM', 'PM'])}")
+        elif kind < 0.012:
+            lines.append("13:00:00PM")  # Encaja con la expresión pero no es una hora válida
+        elif kind < 0.02:
+            lines.append('')
+        elif kind < 0.025:
+            lines.append('basura')
+        else:
+            values = [rnd.uniform(-600, 600), rnd.uniform(-600, 600), rnd.uniform(880, 1120),
+                      rnd.uniform(-2100, 2100), rnd.uniform(-100, 100), rnd.uniform(-100, 100),
+                      rnd.uniform(-190, 190), rnd.uniform(-50, 50), rnd.uniform(-50, 50),
+                      44882, 28719, 11240, 20002, 19998, 19999, rnd.uniform(-0.1, 1.1), 1020.3, 0, 0.99]
+            fields = [f'{value:.2f}' for value in values]
+            noise = rnd.random()
+            if noise < 0.03:
+                fields[rnd.randrange(9)] = 'abc'
+            elif noise < 0.05:
+                fields = fields[:rnd.randrange(5, 18)]
+            elif noise < 0.07:
+                fields.append('  7.5')
+            elif noise < 0.09:
+                fields[15] = ''
+            lines.append(';'.join(f'{field:>7}' for field in fields) + ';')
+    return lines
+
+
+class TestStabilityParser(unittest.TestCase):
+    """stability_parser frente al bucle original de _load_stability_data."""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp_dir, ignore_errors=True)
+
+    def write(self, lines, newline='\n'):
+        path = os.path.join(self.tmp_dir, 'ESTABILIDAD_DOBACK022_20250707_0.txt')
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            f.write(newline.join(lines) + newline)
+        return path
+
+    def assert_matches_original(self, path, columns, lines_processed, discarded):
+        expected, expected_processed, expected_discarded = original_load_stability(path)
+        np.testing.assert_array_equal(
+            columns['timestamp'], np.array([point['timestamp'] for point in expected], dtype='datetime64[ms]'))
+        for name in STABILITY_COLUMNS:
+            np.testing.assert_array_equal(columns[name], [point[name] for point in expected], err_msg=name)
+        self.assertEqual(lines_processed, expected_processed)
+        self.assertEqual(discarded, expected_discarded)
+
+    def test_parse_file_matches_original_loop(self):
+        """Mismos puntos, timestamps, líneas procesadas y descartes por motivo."""
+        rnd = random.Random(2)
+        for newline in ('\n', '\r\n'):
+            with self.subTest(newline=repr(newline)):
+                path = self.write(random_stability_lines(rnd, 3000), newline)
+                result = parse_stability_file(path)
+                self.assertGreater(result.size, 0)
+                self.assert_matches_original(path, result.columns, result.lines_processed, result.discarded)
+
+    def test_chunks_match_original_loop(self):
+        """Por bloques pequeños (marcas de hora y muestras repartidas entre bloques) el resultado es el mismo."""
+        path = self.write(random_stability_lines(random.Random(4), 3000), '\r\n')
+        chunks = list(iter_stability_chunks(path, chunk_bytes=500))
+        self.assertGreater(len(chunks), 100)
+        discarded = {}
+        for chunk in chunks:
+            for reason, count in chunk.discarded.items():
+                discarded[reason] = discarded.get(reason, 0) + count
+        columns = {name: np.concatenate([chunk.columns[name] for chunk in chunks])
+                   for name in ['timestamp'] + STABILITY_COLUMNS}
+        self.assert_matches_original(path, columns, sum(chunk.lines_processed for chunk in chunks), discarded)
+
+
+if __name__ == '__main__':
+    unittest.main()
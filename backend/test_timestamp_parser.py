@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tests unitarios de timestamp_parser: TimestampParser y parse_column se
+comparan con datetime.strptime, que es lo que usaban los loaders antes.
+"""
+
+import random
+import unittest
+from datetime import datetime
+
+import numpy as np
+
+from timestamp_parser import KNOWN_FORMATS, TimestampParser, parse_column, sniff_format
+
+
+def strptime_or_none(text, fmt):
+    try:
+        return datetime.strptime(text, fmt)
+    except ValueError:
+        return None
+
+
+def random_timestamp(rnd, fmt):
+    """Timestamp con campos fuera de rango, sin ceros a la izquierda, AM/PM en minúsculas, espacios y basura."""
+    def field(value):
+        return f'{value:02d}' if rnd.random() < 0.7 else str(value)
+    text = fmt
+    for directive, choices in (('%d', [1, 7, 28, 29, 30, 31, 32, 0]), ('%m', [1, 2, 7, 12, 13, 0]),
+                               ('%H', [0, 1, 9, 12, 13, 23, 24]), ('%I', [0, 1, 9, 12, 13]),
+                               ('%M', [0, 5, 59, 60]), ('%S', [0, 9, 59, 60, 61])):
+        text = text.replace(directive, field(rnd.choice(choices)))
+    text = text.replace('%Y', str(rnd.choice([2024, 2025, 1999, 25])))
+    text = text.replace('%p', rnd.choice(['AM', 'PM', 'am', 'pm', 'Pm', 'XM']))
+    noise = rnd.random()
+    if noise < 0.05:
+        text = ' ' + text
+    elif noise < 0.1:
+        text = text + ' '
+    elif noise < 0.12:
+        text = text + 'x'
+    elif noise < 0.14:
+        text = ''
+    elif noise < 0.16:
+        text = text.replace(' ', '  ')
+    return text
+
+
+def as_datetime64(values):
+    return np.array([np.datetime64(value, 'ms') if value else np.datetime64('NaT') for value in values],
+                    dtype='datetime64[ms]')
+
+
+class TestTimestampParser(unittest.TestCase):
+    """timestamp_parser frente a datetime.strptime con los formatos de los archivos Doback."""
+
+    def setUp(self):
+        self.rnd = random.Random(0)
+
+    def test_parser_matches_strptime(self):
+        """Mismo resultado (o None donde strptime lanza ValueError) para cada formato conocido."""
+        for fmt in KNOWN_FORMATS:
+            parser = TimestampParser(fmt)
+            for _ in range(20000):
+                text = random_timestamp(self.rnd, fmt)
+                self.assertEqual(parser.parse(text), strptime_or_none(text, fmt), f"{fmt}: {text!r}")
+
+    def test_parse_column_matches_strptime(self):
+        """La columna vectorizada da lo mismo que strptime fila a fila, incluidos los segundos 60 y 61."""
+        for fmt in KNOWN_FORMATS:
+            with self.subTest(fmt=fmt):
+                values = [random_timestamp(self.rnd, fmt) for _ in range(20000)]
+                np.testing.assert_array_equal(parse_column(values, fmt),
+                                              as_datetime64([strptime_or_none(value, fmt) for value in values]))
+
+    def test_parse_column_fallback_formats(self):
+        """Las filas que no encajan se reintentan con los formatos alternativos, en orden."""
+        values = [random_timestamp(self.rnd, self.rnd.choice(KNOWN_FORMATS)) for _ in range(20000)]
+        fmt, *fallbacks = KNOWN_FORMATS
+        expected = []
+        for value in values:
+            expected.append(next((parsed for parsed in (strptime_or_none(value, option) for option in KNOWN_FORMATS)
+                                  if parsed is not None), None))
+        np.testing.assert_array_equal(parse_column(values, fmt, fallbacks), as_datetime64(expected))
+
+    def test_sniff_format_needs_majority(self):
+        """El formato detectado es el que encaja con más de la mitad de las muestras."""
+        gps = ['07/07/2025 14:23:49'] * 11 + ['2025-07-07 14:23:49'] * 9
+        self.assertEqual(sniff_format(gps), '%d/%m/%Y %H:%M:%S')
+        self.assertIsNone(sniff_format(['07/07/2025 14:23:49'] * 10 + ['basura'] * 10))
+        self.assertIsNone(sniff_format(['', '']))
+
+
+if __name__ == '__main__':
+    unittest.main()
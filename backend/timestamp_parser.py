@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Parseo rápido de timestamps de formato fijo para los loaders de telemetría.
+
+Formatos de los archivos Doback:
+    GPS:                      07/07/2025 14:23:49     (%d/%m/%Y %H:%M:%S)
+    ROTATIVO:                 2025-07-07 14:23:49     (%Y-%m-%d %H:%M:%S)
+    CAN y cabeceras ESTAB.:   07/07/2025 02:23:20PM   (%d/%m/%Y %I:%M:%S%p)
+
+El formato se detecta una vez por archivo (sniff_format) y después:
+    - parse_column convierte una columna entera a datetime64[ms] (NaT si no
+      es válida) con el parser vectorizado de pandas;
+    - TimestampParser parsea línea a línea con una expresión regular
+      compilada y reutiliza el último resultado cuando la cadena se repite,
+      algo habitual a 10 Hz con resolución de segundos.
+"""
+
+import re
+from datetime import datetime
+from typing import Iterable, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+GPS_FORMAT = '%d/%m/%Y %H:%M:%S'
+ROTATIVO_FORMAT = '%Y-%m-%d %H:%M:%S'
+DOBACK_FORMAT = '%d/%m/%Y %I:%M:%S%p'  # CAN y cabeceras de ESTABILIDAD
+KNOWN_FORMATS = [DOBACK_FORMAT, GPS_FORMAT, ROTATIVO_FORMAT]
+
+SNIFF_SAMPLES = 20  # Valores no vacíos examinados para detectar el formato
+
+# Directivas soportadas -> grupo de la expresión regular equivalente (las mismas que usa strptime)
+_DIRECTIVES = {
+    'd': r'(?P<day>3[0-1]|[1-2]\d|0[1-9]|[1-9]| [1-9])',
+    'm': r'(?P<month>1[0-2]|0[1-9]|[1-9])',
+    'Y': r'(?P<year>\d\d\d\d)',
+    'H': r'(?P<hour>2[0-3]|[0-1]\d|\d)',
+    'I': r'(?P<hour12>1[0-2]|0[1-9]|[1-9])',
+    'M': r'(?P<minute>[0-5]\d|\d)',
+    'S': r'(?P<second>6[0-1]|[0-5]\d|\d)',
+    'p': r'(?P<ampm>am|pm)',
+}
+
+def _compile_format(fmt: str) -> 're.Pattern':
+    """
+    Traduce un formato strptime con directivas fijas a una expresión regular
+    como la de strptime: sin distinguir mayúsculas y con cualquier espacio
+    en blanco donde el formato tiene uno.
+    """
+    pattern = []
+    index = 0
+    while index < len(fmt):
+        char = fmt[index]
+        if char == '%' and index + 1 < len(fmt):
+            directive = fmt[index + 1]
+            if directive not in _DIRECTIVES:
+                raise ValueError(f"Directiva no soportada en formato de timestamp: %{directive}")
+            pattern.append(_DIRECTIVES[directive])
+            index += 2
+        elif char.isspace():
+            pattern.append(r'\s+')
+            index += 1
+        else:
+            pattern.append(re.escape(char))
+            index += 1
+    return re.compile(''.join(pattern), re.IGNORECASE)
+
+class TimestampParser:
+    """
+    Parser de un formato fijo, equivalente a datetime.strptime(texto, fmt)
+    pero devolviendo None en lugar de lanzar ValueError.
+    """
+
+    def __init__(self, fmt: str):
+        self.fmt = fmt
+        self._regex = _compile_format(fmt)
+        self._last_text = None
+        self._last_value = None
+
+    def parse(self, text: str) -> Optional[datetime]:
+        if text == self._last_text:
+            return self._last_value
+        value = self._parse(text)
+        self._last_text = text
+        self._last_value = value
+        return value
+
+    def _parse(self, text: str) -> Optional[datetime]:
+        # Como strptime: la expresión debe encajar desde el inicio y consumir todo el texto
+        match = self._regex.match(text)
+        if not match or match.end() != len(text):
+            return None
+        fields = match.groupdict()
+        if fields.get('hour12') is not None:
+            hour = int(fields['hour12']) % 12 + (12 if (fields.get('ampm') or '').upper() == 'PM' else 0)
+        else:
+            hour = int(fields.get('hour') or 0)
+        try:
+            return datetime(
+                int(fields.get('year') or 1900), int(fields.get('month') or 1), int(fields.get('day') or 1),
+                hour, int(fields.get('minute') or 0), int(fields.get('second') or 0)
+            )
+        except ValueError:
+            return None
+
+def parse_timestamp(text: str, fmt: str) -> Optional[datetime]:
+    """Parsea un único timestamp con el formato dado (None si no es válido)."""
+    return TimestampParser(fmt).parse(text)
+
+def sniff_format(values: Iterable[str], formats: Sequence[str] = KNOWN_FORMATS) -> Optional[str]:
+    """
+    Devuelve el primer formato de formats que encaja con la mayoría de las
+    primeras SNIFF_SAMPLES cadenas no vacías (más de la mitad), o None si
+    ninguno llega.
+    """
+    samples = []
+    for value in values:
+        if value:
+            samples.append(value)
+            if len(samples) >= SNIFF_SAMPLES:
+                break
+    if not samples:
+        return None
+    best_format, best_hits = None, 0
+    for fmt in formats:
+        parser = TimestampParser(fmt)
+        hits = sum(1 for sample in samples if parser.parse(sample) is not None)
+        if hits > best_hits:
+            best_format, best_hits = fmt, hits
+    return best_format if best_hits * 2 > len(samples) else None
+
+def parse_column(values: Sequence[str], fmt: str, fallback_formats: Sequence[str] = ()) -> np.ndarray:
+    """
+    Convierte una columna de cadenas a datetime64[ms].
+
+    Los valores que no encajan con fmt se reintentan con fallback_formats (en
+    orden); los que no encajan con ninguno quedan como NaT. Las cadenas
+    repetidas se parsean una sola vez.
+    """
+    series = pd.Series(values, dtype=object)
+    result = _to_datetime(series, fmt)
+    for fallback in fallback_formats:
+        missing = result.isna().to_numpy()
+        if not missing.any():
+            break
+        result[missing] = _to_datetime(series[missing], fallback)
+    return result.to_numpy(dtype='datetime64[ms]')
+
+def _to_datetime(series: pd.Series, fmt: str) -> pd.Series:
+    """
+    pd.to_datetime con el criterio de strptime: pandas acepta los segundos 60
+    y 61 y los pasa al minuto siguiente, así que los resultados con segundo 0
+    o 1 se comprueban con TimestampParser (cada cadena distinta una vez).
+    """
+    result = pd.to_datetime(series, format=fmt, errors='coerce', cache=True)
+    suspects = (result.dt.second < 2).to_numpy()
+    if suspects.any():
+        parser = TimestampParser(fmt)
+        texts = series[suspects]
+        rejected = {text for text in pd.unique(texts) if parser.parse(text) is None}
+        if rejected:
+            result.loc[texts[texts.isin(rejected)].index] = pd.NaT
+    return result